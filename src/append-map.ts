@@ -0,0 +1,156 @@
+/**
+ * Append-aware incremental mapping for files that grow at the end.
+ *
+ * Logs, JSONL sessions and CSVs are usually appended to. An appendable
+ * mapper folds lines into a plain state object; after each run the state
+ * is cached with the byte offset of the last complete line. When the file
+ * has grown and the hashes of the first and last consumed blocks still
+ * match, the next run resumes from that offset and only reads the tail.
+ */
+import { createHash } from "node:crypto";
+import { createReadStream } from "node:fs";
+import { open, stat } from "node:fs/promises";
+
+import type { AppendableMapper, AppendState, FileMap } from "./types.js";
+
+import { THRESHOLDS } from "./constants.js";
+import { getCachedAppendState, setCachedAppendState } from "./map-cache.js";
+
+const NEWLINE = 0x0a;
+const CARRIAGE_RETURN = 0x0d;
+
+/**
+ * Hash bytes [start, end) of a file.
+ */
+async function hashRange(
+  filePath: string,
+  start: number,
+  end: number
+): Promise<string> {
+  const handle = await open(filePath, "r");
+  try {
+    const buffer = Buffer.alloc(end - start);
+    const { bytesRead } = await handle.read(buffer, 0, buffer.length, start);
+    return createHash("sha1")
+      .update(buffer.subarray(0, bytesRead))
+      .digest("hex");
+  } finally {
+    await handle.close();
+  }
+}
+
+/**
+ * Hash the first and last blocks of the first `offset` bytes.
+ */
+async function hashBoundaries(
+  filePath: string,
+  offset: number
+): Promise<{ headHash: string; tailHash: string }> {
+  const block = THRESHOLDS.APPEND_CHECK_BYTES;
+  const [headHash, tailHash] = await Promise.all([
+    hashRange(filePath, 0, Math.min(block, offset)),
+    hashRange(filePath, Math.max(0, offset - block), offset),
+  ]);
+  return { headHash, tailHash };
+}
+
+/**
+ * Check whether a cached state can be resumed for the file as it is now.
+ */
+async function canResume(
+  filePath: string,
+  cached: AppendState,
+  mapperId: string,
+  size: number
+): Promise<boolean> {
+  if (cached.mapper !== mapperId || size < cached.offset) {
+    return false;
+  }
+  const current = await hashBoundaries(filePath, cached.offset);
+  return (
+    current.headHash === cached.headHash && current.tailHash === cached.tailHash
+  );
+}
+
+function decodeLine(bytes: Buffer): string {
+  const end =
+    bytes.length > 0 && bytes[bytes.length - 1] === CARRIAGE_RETURN
+      ? bytes.length - 1
+      : bytes.length;
+  return bytes.toString("utf8", 0, end);
+}
+
+/**
+ * Map a file with an appendable mapper, resuming from the cached state
+ * when only new lines were appended since the last run.
+ *
+ * A trailing line without a newline is included in the map but not in
+ * the cached state, since it may still be growing.
+ */
+export async function mapAppendable<S>(
+  filePath: string,
+  mapper: AppendableMapper<S>,
+  signal?: AbortSignal
+): Promise<FileMap | null> {
+  const { size } = await stat(filePath);
+  const cached = getCachedAppendState(filePath);
+  const resume =
+    cached !== undefined &&
+    (await canResume(filePath, cached, mapper.id, size));
+
+  const state = resume
+    ? (structuredClone(cached.state) as S)
+    : mapper.createState();
+  let offset = resume ? cached.offset : 0;
+  let lines = resume ? cached.lines : 0;
+  let partial: Buffer[] = [];
+
+  if (offset < size) {
+    const stream = createReadStream(filePath, {
+      start: offset,
+      end: size - 1,
+      signal,
+    });
+    for await (const chunk of stream) {
+      const bytes = chunk as Buffer;
+      let from = 0;
+      let at = bytes.indexOf(NEWLINE);
+      while (at !== -1) {
+        const line =
+          partial.length > 0
+            ? Buffer.concat([...partial, bytes.subarray(from, at)])
+            : bytes.subarray(from, at);
+        partial = [];
+        lines++;
+        offset += line.length + 1;
+        mapper.consume(state, decodeLine(line), lines);
+        from = at + 1;
+        at = bytes.indexOf(NEWLINE, from);
+      }
+      if (from < bytes.length) {
+        partial.push(bytes.subarray(from));
+      }
+    }
+  }
+
+  setCachedAppendState(filePath, {
+    mapper: mapper.id,
+    offset,
+    lines,
+    ...(await hashBoundaries(filePath, offset)),
+    state: structuredClone(state),
+  });
+
+  const newlines = lines;
+  if (partial.length > 0) {
+    lines++;
+    mapper.consume(state, decodeLine(Buffer.concat(partial)), lines);
+  }
+
+  return mapper.finish(state, {
+    path: filePath,
+    totalBytes: size,
+    lines,
+    newlines,
+  });
+}
@@ -0,0 +1,222 @@
+/**
+ * Binary file detection.
+ *
+ * Known binary extensions are rejected by name. Anything else is sniffed:
+ * the first few KB are checked for magic numbers of common binary formats,
+ * NUL bytes, and invalid UTF-8 mixed with control bytes. The verdict is
+ * cached per path and mtime, so a file is sniffed once per version.
+ */
+import { open } from "node:fs/promises";
+import { extname } from "node:path";
+
+import { THRESHOLDS } from "./constants.js";
+import { getCachedBinaryVerdict, setCachedBinaryVerdict } from "./map-cache.js";
+
+/**
+ * File extensions that are binary/image files and should be
+ * delegated directly to the built-in read tool without map generation.
+ */
+const BINARY_EXTENSIONS = new Set([
+  ".jpg",
+  ".jpeg",
+  ".png",
+  ".gif",
+  ".webp",
+  ".bmp",
+  ".ico",
+  ".tiff",
+  ".tif",
+  ".svg",
+  ".avif",
+  ".heic",
+  ".heif",
+  // Audio/video
+  ".mp3",
+  ".mp4",
+  ".wav",
+  ".avi",
+  ".mov",
+  ".mkv",
+  ".flac",
+  ".ogg",
+  ".webm",
+  // Archives
+  ".zip",
+  ".tar",
+  ".gz",
+  ".bz2",
+  ".xz",
+  ".7z",
+  ".rar",
+  // Binary data
+  ".bin",
+  ".exe",
+  ".dll",
+  ".so",
+  ".dylib",
+  ".o",
+  ".a",
+  ".wasm",
+  ".pdf",
+  ".doc",
+  ".docx",
+  ".xls",
+  ".xlsx",
+  ".ppt",
+  ".pptx",
+]);
+
+/**
+ * Signatures of binary formats that may appear without a known extension.
+ * Printable signatures that text can start with too (`MZ`, `BZh`) are
+ * checked with the structure that follows them instead.
+ */
+const MAGIC_NUMBERS: readonly Buffer[] = [
+  Buffer.from([0x7f, 0x45, 0x4c, 0x46]), // ELF executables, core dumps
+  Buffer.from("SQLite format 3\0", "latin1"),
+  Buffer.from([0xfe, 0xed, 0xfa, 0xce]), // Mach-O 32-bit
+  Buffer.from([0xfe, 0xed, 0xfa, 0xcf]), // Mach-O 64-bit
+  Buffer.from([0xce, 0xfa, 0xed, 0xfe]), // Mach-O 32-bit, little-endian
+  Buffer.from([0xcf, 0xfa, 0xed, 0xfe]), // Mach-O 64-bit, little-endian
+  Buffer.from([0xca, 0xfe, 0xba, 0xbe]), // Mach-O universal, Java class
+  Buffer.from([0x00, 0x61, 0x73, 0x6d]), // WebAssembly
+  Buffer.from([0x50, 0x4b, 0x03, 0x04]), // zip, jar, docx
+  Buffer.from([0x1f, 0x8b]), // gzip
+  Buffer.from([0x28, 0xb5, 0x2f, 0xfd]), // zstd
+  Buffer.from([0xfd, 0x37, 0x7a, 0x58, 0x5a, 0x00]), // xz
+  Buffer.from("%PDF-", "latin1"),
+  Buffer.from([0x89, 0x50, 0x4e, 0x47]), // PNG
+  Buffer.from([0xff, 0xd8, 0xff]), // JPEG
+  Buffer.from("!<arch>\n", "latin1"), // ar archives, static libraries
+];
+
+/** bzip2 block and end-of-stream magic, following `BZh` and a digit */
+const BZIP2_BLOCK_MAGIC: readonly Buffer[] = [
+  Buffer.from([0x31, 0x41, 0x59, 0x26, 0x53, 0x59]),
+  Buffer.from([0x17, 0x72, 0x45, 0x38, 0x50, 0x90]),
+];
+
+/** Share of control bytes above which invalid UTF-8 is treated as binary */
+const MAX_CONTROL_RATIO = 0.1;
+
+function isControlByte(byte: number): boolean {
+  // Tab, newline, vertical tab, form feed, carriage return and escape
+  // appear in text files
+  return (
+    (byte < 0x20 && (byte < 0x09 || byte > 0x0d) && byte !== 0x1b) ||
+    byte === 0x7f
+  );
+}
+
+/**
+ * PE/COFF executable: the DOS header's `e_lfanew` field points at the
+ * `PE\0\0` signature.
+ */
+function isPortableExecutable(sample: Buffer): boolean {
+  if (sample.length < 0x40 || sample.toString("latin1", 0, 2) !== "MZ") {
+    return false;
+  }
+  const offset = sample.readUInt32LE(0x3c);
+  return (
+    offset + 4 <= sample.length &&
+    sample.toString("latin1", offset, offset + 4) === "PE\0\0"
+  );
+}
+
+/**
+ * bzip2 stream: `BZh`, a block size digit, then a block or end-of-stream
+ * magic.
+ */
+function isBzip2(sample: Buffer): boolean {
+  const size = sample[3] ?? 0;
+  return (
+    sample.toString("latin1", 0, 3) === "BZh" &&
+    size >= 0x31 &&
+    size <= 0x39 &&
+    BZIP2_BLOCK_MAGIC.some((magic) => sample.subarray(4, 10).equals(magic))
+  );
+}
+
+function hasBinarySignature(sample: Buffer): boolean {
+  return (
+    MAGIC_NUMBERS.some((magic) =>
+      sample.subarray(0, magic.length).equals(magic)
+    ) ||
+    isPortableExecutable(sample) ||
+    isBzip2(sample)
+  );
+}
+
+function isValidUtf8(sample: Buffer): boolean {
+  try {
+    // `stream` tolerates a multi-byte character cut off at the sample's end
+    new TextDecoder("utf-8", { fatal: true }).decode(sample, { stream: true });
+    return true;
+  } catch {
+    return false;
+  }
+}
+
+/**
+ * Check whether a file prefix looks binary.
+ */
+export function looksBinary(sample: Buffer): boolean {
+  if (hasBinarySignature(sample)) {
+    return true;
+  }
+  if (sample.includes(0)) {
+    return true;
+  }
+  if (isValidUtf8(sample)) {
+    return false;
+  }
+
+  // Invalid UTF-8 alone may be Latin-1 text; binary data also carries
+  // control bytes
+  let control = 0;
+  for (const byte of sample) {
+    if (isControlByte(byte)) {
+      control++;
+    }
+  }
+  return control > sample.length * MAX_CONTROL_RATIO;
+}
+
+/**
+ * Check whether a path has a known binary/image extension.
+ */
+export function hasBinaryExtension(filePath: string): boolean {
+  return BINARY_EXTENSIONS.has(extname(filePath).toLowerCase());
+}
+
+/**
+ * Sniff the start of a file to decide whether it is binary.
+ * The verdict is cached for the file's mtime; unreadable files count as text.
+ */
+export async function isBinaryFile(
+  filePath: string,
+  mtime: number
+): Promise<boolean> {
+  const cached = getCachedBinaryVerdict(filePath, mtime);
+  if (cached !== undefined) {
+    return cached;
+  }
+
+  let binary: boolean;
+  try {
+    const handle = await open(filePath, "r");
+    try {
+      const buffer = Buffer.alloc(THRESHOLDS.BINARY_SNIFF_BYTES);
+      const { bytesRead } = await handle.read(buffer, 0, buffer.length, 0);
+      binary = looksBinary(buffer.subarray(0, bytesRead));
+    } finally {
+      await handle.close();
+    }
+  } catch {
+    // Unreadable files are left to the built-in read to report
+    return false;
+  }
+
+  setCachedBinaryVerdict(filePath, mtime, binary);
+  return binary;
+}
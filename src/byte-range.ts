@@ -0,0 +1,67 @@
+/**
+ * Byte-addressed reads for minified and single-line files, where line
+ * offsets can't select anything smaller than the whole file.
+ */
+import { DEFAULT_MAX_BYTES, formatSize } from "@mariozechner/pi-coding-agent";
+import { open } from "node:fs/promises";
+
+/**
+ * Check whether a byte continues a multi-byte UTF-8 character.
+ */
+function isContinuation(byte: number | undefined): boolean {
+  return byte !== undefined && (byte & 0xc0) === 0x80;
+}
+
+/**
+ * Read `byteLength` bytes starting at `byteOffset`, capped at the built-in
+ * read's byte limit, with a notice on how to continue. The range is
+ * narrowed to whole UTF-8 characters.
+ */
+export async function readByteRange(
+  filePath: string,
+  byteOffset = 0,
+  byteLength?: number
+): Promise<string> {
+  const handle = await open(filePath, "r");
+  try {
+    const { size } = await handle.stat();
+    const start = Math.max(0, Math.floor(byteOffset));
+    if (start >= size && size > 0) {
+      // eslint-disable-next-line @factory/structured-logging
+      throw new Error(
+        `byteOffset ${start} is beyond end of file (${size} bytes total)`
+      );
+    }
+
+    const requestedEnd =
+      byteLength === undefined
+        ? size
+        : Math.min(size, start + Math.max(0, Math.floor(byteLength)));
+    const count = Math.min(requestedEnd - start, DEFAULT_MAX_BYTES);
+
+    // One extra byte shows whether the range ends inside a character
+    const buffer = Buffer.alloc(Math.min(count + 1, size - start));
+    const { bytesRead } = await handle.read(buffer, 0, buffer.length, start);
+
+    let from = 0;
+    while (from < count && isContinuation(buffer[from])) {
+      from++;
+    }
+    let to = Math.min(count, bytesRead);
+    while (to > from && to < bytesRead && isContinuation(buffer[to])) {
+      to--;
+    }
+
+    const text = buffer.toString("utf8", from, to);
+    const end = start + to;
+    if (requestedEnd - start > DEFAULT_MAX_BYTES) {
+      return `${text}\n\n[Showing bytes ${start + from}-${end} of ${size} (${formatSize(DEFAULT_MAX_BYTES)} limit). Use byteOffset=${end} to continue.]`;
+    }
+    if (end < size) {
+      return `${text}\n\n[${size - end} more bytes in file. Use byteOffset=${end} to continue.]`;
+    }
+    return text;
+  } finally {
+    await handle.close();
+  }
+}
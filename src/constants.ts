@@ -1,3 +1,7 @@
+import type { MapperCost, ReadMapSettings } from "./types.js";
+
+import { DetailLevel, MapFormat, MapperKind, SymbolKind } from "./enums.js";
+
 /**
  * Constants for thresholds.
  */
@@ -16,6 +20,243 @@ export const THRESHOLDS = {
   MAX_OUTLINE_BYTES: 50 * 1024,
   /** Maximum size for truncated level (hard cap) */
   MAX_TRUNCATED_BYTES: 100 * 1024,
-  /** Number of symbols to show at each end for truncated outline */
-  TRUNCATED_SYMBOLS_EACH: 50,
+  /** Fewest numbered symbols in a row collapsed into one range entry */
+  MIN_SYMBOL_RUN: 4,
+  /** Regions the omitted symbols of a truncated map are summarized in */
+  OMITTED_BUCKETS: 6,
+  /** Kinds and names listed per omitted region */
+  OMITTED_BUCKET_ENTRIES: 2,
+  /** Longest symbol name listed in an omitted region */
+  OMITTED_NAME_CHARS: 40,
+  /** Minimum file size before in-process mappers are sent to a worker */
+  WORKER_MIN_BYTES: 100 * 1024,
+  /** Upper bound on mapper worker threads */
+  MAX_WORKERS: 4,
+  /** Minimum file size for offset/limit reads to use a line index */
+  INDEXED_READ_MIN_BYTES: 5 * 1024 * 1024,
+  /** Lines between entries of a line index */
+  LINE_INDEX_STRIDE: 1024,
+  /** Maximum candidates listed when a symbol read is ambiguous */
+  MAX_SYMBOL_MATCHES: 20,
+  /** Bytes probed at the start of a file to measure its line length */
+  LONG_LINE_PROBE_BYTES: 64 * 1024,
+  /** Average line length above which a file is mapped as minified */
+  LONG_LINE_AVERAGE_BYTES: 1000,
+  /** Bytes sniffed at the start of a file to detect binary content */
+  BINARY_SNIFF_BYTES: 8 * 1024,
+  /** Size of the blocks hashed to check that an appended file's prefix is unchanged */
+  APPEND_CHECK_BYTES: 4096,
+  /** Renders memoized per cached map (formats, budgets) before evicting */
+  MAX_RENDERS_PER_MAP: 8,
+} as const;
+
+/**
+ * Estimated-token budgets per detail level, enforced when a map has a
+ * token cap (`maxMapTokens`), which lowers them further. Roughly the byte
+ * tiers at four bytes per token; Truncated is the hard cap.
+ */
+export const TOKEN_BUDGETS: Record<DetailLevel, number> = {
+  [DetailLevel.Full]: 2500,
+  [DetailLevel.Compact]: 5000,
+  [DetailLevel.Minimal]: 6250,
+  [DetailLevel.Outline]: 12_500,
+  [DetailLevel.Truncated]: 25_000,
+};
+
+/**
+ * One-character kind codes of the dense map format. Distinct, so the
+ * legend of a map decodes every line.
+ */
+export const DENSE_KIND_CODES: Record<SymbolKind, string> = {
+  [SymbolKind.Class]: "c",
+  [SymbolKind.Function]: "f",
+  [SymbolKind.Method]: "m",
+  [SymbolKind.Variable]: "v",
+  [SymbolKind.Constant]: "k",
+  [SymbolKind.Interface]: "i",
+  [SymbolKind.Type]: "t",
+  [SymbolKind.Enum]: "e",
+  [SymbolKind.Struct]: "s",
+  [SymbolKind.Import]: "I",
+  [SymbolKind.Module]: "M",
+  [SymbolKind.Namespace]: "n",
+  [SymbolKind.Property]: "p",
+  [SymbolKind.Heading]: "h",
+  [SymbolKind.Table]: "T",
+  [SymbolKind.View]: "V",
+  [SymbolKind.Procedure]: "P",
+  [SymbolKind.Trigger]: "g",
+  [SymbolKind.Index]: "x",
+  [SymbolKind.Schema]: "S",
+  [SymbolKind.Unknown]: "?",
+};
+
+/**
+ * Scheduler settings for map generation.
+ */
+export const SCHEDULER = {
+  /** Maximum concurrent mapper runs per resource class */
+  CONCURRENCY: {
+    [MapperKind.Python]: 2,
+    [MapperKind.Go]: 2,
+    [MapperKind.Jq]: 2,
+    [MapperKind.Ctags]: 2,
+    [MapperKind.Grep]: 4,
+    [MapperKind.Stream]: 2,
+    [MapperKind.InProcess]: 4,
+  } satisfies Record<MapperKind, number>,
+  /** Default deadline for foreground map generation */
+  DEFAULT_DEADLINE_MS: 15_000,
+  /** Time reserved for the grep fallback when a deadline is set */
+  FALLBACK_RESERVE_MS: 1000,
+} as const;
+
+/**
+ * Defaults for settings not present in `read-map.json`.
+ */
+export const DEFAULT_SETTINGS: ReadMapSettings = {
+  staleWhileRevalidate: false,
+  maxStaleChangedPercent: 10,
+  mapOnlyAboveBytes: null,
+  latencyBudgetMs: null,
+  statsFile: null,
+  mapperCosts: {},
+  prefetchImports: false,
+  dedupReads: false,
+  maxMapTokens: null,
+  mapFormat: MapFormat.Standard,
+  mapDiffs: true,
+};
+
+/**
+ * Session read deduplication settings.
+ */
+export const DEDUP = {
+  /** Reads remembered per session; the oldest are forgotten first */
+  MAX_READS: 200,
+  /** Largest diff, as a share of the new content, sent instead of it */
+  MAX_DIFF_RATIO: 0.5,
+  /** Maps remembered per session for diffing; the oldest are forgotten first */
+  MAX_MAPS: 20,
+  /** Largest map diff, as a share of the new map, sent instead of it */
+  MAX_MAP_DIFF_RATIO: 0.25,
+} as const;
+
+/**
+ * Budget for speculative prefetching of imported modules.
+ */
+export const PREFETCH = {
+  /** Imports prefetched per mapped file */
+  MAX_FILES_PER_READ: 8,
+  /** Prefetches in flight; the oldest is cancelled to start another */
+  MAX_IN_FLIGHT: 16,
+  /** Larger files are left for an actual read */
+  MAX_FILE_BYTES: 5 * 1024 * 1024,
+  /** Deadline for each prefetched map */
+  DEADLINE_MS: 30_000,
+} as const;
+
+/**
+ * Read statistics settings.
+ */
+export const STATS = {
+  /** Upper bounds of the latency histogram buckets */
+  HISTOGRAM_BOUNDS_MS: [
+    1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10_000,
+  ],
+  /** Most recent reads kept for export */
+  MAX_RECENT_READS: 1000,
+} as const;
+
+const TS_MORPH_COST: MapperCost = {
+  fixedMs: 300,
+  msPerMB: 3000,
+  msPerKLines: 0,
+  detail: DetailLevel.Full,
+};
+
+const TREE_SITTER_COST: MapperCost = {
+  fixedMs: 20,
+  msPerMB: 400,
+  msPerKLines: 0,
+  detail: DetailLevel.Full,
+};
+
+const REGEX_COST: MapperCost = {
+  fixedMs: 2,
+  msPerMB: 80,
+  msPerKLines: 0,
+  detail: DetailLevel.Full,
+};
+
+/**
+ * Estimated mapper costs, keyed by mapper name (language ID or "ctags").
+ * Subprocess and regex mappers are fitted to timings on the large and
+ * pathological fixtures. The ts-morph and tree-sitter curves are fitted
+ * from the "mapper cost curves" benchmark in `mappers.bench.ts` (the
+ * intercept and slope of its two sizes); until it has been run where
+ * those parsers are installed, they are conservative placeholders.
+ * Override per mapper with the `mapperCosts` setting.
+ */
+export const MAPPER_COSTS: Record<string, MapperCost> = {
+  python: {
+    fixedMs: 50,
+    msPerMB: 400,
+    msPerKLines: 8,
+    detail: DetailLevel.Full,
+    requires: "python3",
+  },
+  go: { fixedMs: 10, msPerMB: 55, msPerKLines: 0, detail: DetailLevel.Full },
+  typescript: TS_MORPH_COST,
+  javascript: TS_MORPH_COST,
+  rust: TREE_SITTER_COST,
+  cpp: TREE_SITTER_COST,
+  "c-header": TREE_SITTER_COST,
+  clojure: TREE_SITTER_COST,
+  c: REGEX_COST,
+  sql: REGEX_COST,
+  markdown: { ...REGEX_COST, msPerMB: 100 },
+  yaml: REGEX_COST,
+  toml: REGEX_COST,
+  json: {
+    fixedMs: 15,
+    msPerMB: 90,
+    msPerKLines: 0,
+    detail: DetailLevel.Full,
+    requires: "jq",
+  },
+  jsonl: { ...REGEX_COST, msPerMB: 150 },
+  csv: { ...REGEX_COST, msPerMB: 150 },
+  ctags: {
+    fixedMs: 15,
+    msPerMB: 60,
+    msPerKLines: 0,
+    detail: DetailLevel.Minimal,
+    requires: "ctags",
+  },
+};
+
+/**
+ * Cost model settings.
+ */
+export const COST_MODEL = {
+  /**
+   * Low estimate of map bytes per source line at each detail level, so
+   * rich mappers are kept unless the budget clearly rules out their detail
+   */
+  MAP_BYTES_PER_LINE: {
+    [DetailLevel.Full]: 8,
+    [DetailLevel.Compact]: 6.5,
+    [DetailLevel.Minimal]: 4,
+    [DetailLevel.Outline]: 1.5,
+  },
+  /** Line length assumed when a file can't be probed */
+  DEFAULT_LINE_BYTES: 40,
+  /** Cost assumed for mappers without an entry in `MAPPER_COSTS` */
+  DEFAULT_COST: {
+    fixedMs: 0,
+    msPerMB: 0,
+    msPerKLines: 0,
+    detail: DetailLevel.Full,
+  } satisfies MapperCost,
 } as const;
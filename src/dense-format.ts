@@ -0,0 +1,169 @@
+/**
+ * Dense map format, for contexts where every token counts.
+ *
+ * Drops the decorative box lines, abbreviates kinds to the one-character
+ * codes of `DENSE_KIND_CODES`, indents by one space per level and writes
+ * ranges as `START+LINES`. A child's start is an offset from its parent's
+ * start (`+OFFSET+LINES`), which stays short deep in large files. The
+ * header carries a legend of the codes used, so the map reads on its own.
+ */
+import { basename } from "node:path";
+
+import type {
+  FileSymbol,
+  MapHeader,
+  MapRenderer,
+  OmittedBucket,
+  SymbolGap,
+} from "./types.js";
+
+import { DENSE_KIND_CODES } from "./constants.js";
+import { DetailLevel } from "./enums.js";
+import { displayName, formatSize, showsChildren } from "./format-utils.js";
+
+function formatHeader(map: MapHeader, level: DetailLevel): string[] {
+  const fields = [
+    basename(map.path),
+    `${map.totalLines} lines`,
+    formatSize(map.totalBytes),
+    map.language,
+  ];
+  if (map.truncatedInfo) {
+    const { shownSymbols, totalSymbols } = map.truncatedInfo;
+    fields.push(`${shownSymbols} of ${totalSymbols} symbols`);
+  } else if (level !== DetailLevel.Full) {
+    fields.push(level);
+  }
+
+  const lines = [`File Map: ${fields.join(" | ")}`];
+  if (showsChildren(level) && map.imports.length > 0) {
+    const importList =
+      map.imports.length > 10
+        ? [...map.imports.slice(0, 10), `...${map.imports.length - 10} more`]
+        : map.imports;
+    lines.push(`imports: ${importList.join(", ")}`);
+  }
+
+  const kinds = [...map.kinds];
+  for (const bucket of map.truncatedInfo?.histogram ?? []) {
+    for (const { kind } of bucket.kinds) {
+      if (!kinds.includes(kind)) {
+        kinds.push(kind);
+      }
+    }
+  }
+  if (kinds.length > 0) {
+    lines.push(
+      `kinds: ${kinds.map((kind) => `${DENSE_KIND_CODES[kind]}=${kind}`).join(" ")}`
+    );
+  }
+  lines.push(
+    map.byteRanges
+      ? "ranges: BYTE+LENGTH; a child's BYTE is +OFFSET from its parent's"
+      : "ranges: LINE+LINES; a child's LINE is +OFFSET from its parent's; no +LINES is one line"
+  );
+  return lines;
+}
+
+/**
+ * Range of a symbol: absolute at top level, relative to `parent` below.
+ */
+function formatRange(symbol: FileSymbol, parent?: FileSymbol): string {
+  if (symbol.startByte !== undefined) {
+    const length = (symbol.endByte ?? symbol.startByte) - symbol.startByte;
+    const start =
+      parent?.startByte === undefined
+        ? `${symbol.startByte}`
+        : `+${symbol.startByte - parent.startByte}`;
+    return `${start}+${length}`;
+  }
+
+  const start = parent
+    ? `+${symbol.startLine - parent.startLine}`
+    : `${symbol.startLine}`;
+  const lines = symbol.endLine - symbol.startLine + 1;
+  return lines > 1 ? `${start}+${lines}` : start;
+}
+
+function formatSymbol(
+  symbol: FileSymbol,
+  level: DetailLevel,
+  indent: number,
+  parent?: FileSymbol
+): string {
+  // A collapsed run's name (`f_[0..99]`) already says how many it covers
+  let line = `${" ".repeat(indent)}${DENSE_KIND_CODES[symbol.kind]} ${formatRange(symbol, parent)} ${displayName(symbol, level)}`;
+  if (level === DetailLevel.Full && symbol.docstring) {
+    line += ` — ${symbol.docstring}`;
+  }
+  return line;
+}
+
+function formatSeparator(omittedSymbols: number): string[] {
+  return [`~ ${omittedSymbols} more symbols`];
+}
+
+function formatGap(gap: SymbolGap): string {
+  const range =
+    gap.startByte !== undefined && gap.endByte !== undefined
+      ? `bytes ${gap.startByte}-${gap.endByte}`
+      : `lines ${gap.startLine}-${gap.endLine}`;
+  return `~ ${gap.symbols} more symbols in ${range}`;
+}
+
+function formatHistogram(buckets: OmittedBucket[]): string[] {
+  if (buckets.length === 0) {
+    return [];
+  }
+  const lines = ["omitted by region (range: count, top kinds; largest):"];
+  for (const bucket of buckets) {
+    const range =
+      bucket.startByte !== undefined && bucket.endByte !== undefined
+        ? `${bucket.startByte}+${bucket.endByte - bucket.startByte}`
+        : `${bucket.startLine}+${bucket.endLine - bucket.startLine + 1}`;
+    const kinds = bucket.kinds
+      .map(({ kind, count }) => `${DENSE_KIND_CODES[kind]} ${count}`)
+      .join(", ");
+    lines.push(
+      `~ ${range}: ${bucket.symbols}, ${kinds}; ${bucket.largest.join(", ")}`
+    );
+  }
+  return lines;
+}
+
+function formatFooter(
+  byteRanges: boolean,
+  gap?: { before?: FileSymbol; after?: FileSymbol }
+): string[] {
+  const lines: string[] = [];
+  const before = gap?.before;
+  const after = gap?.after;
+  if (before?.endByte !== undefined && after?.startByte !== undefined) {
+    lines.push(`omitted: bytes ${before.endByte}-${after.startByte}`);
+  } else if (before && after) {
+    lines.push(`omitted: lines ${before.endLine + 1}-${after.startLine - 1}`);
+  }
+  if (gap) {
+    lines.push(
+      "Use read_map(path, startLine, endLine) to map omitted symbols."
+    );
+  }
+  lines.push(
+    byteRanges
+      ? "Use read(path, byteOffset=START, byteLength=N) for targeted reads."
+      : "Use read(path, offset=LINE, limit=N) for targeted reads."
+  );
+  return lines;
+}
+
+/**
+ * Renderer for the dense map format.
+ */
+export const denseRenderer: MapRenderer = {
+  header: formatHeader,
+  symbol: formatSymbol,
+  separator: formatSeparator,
+  gap: formatGap,
+  histogram: formatHistogram,
+  footer: formatFooter,
+};
@@ -35,3 +35,79 @@ export enum DetailLevel {
   Outline = "outline",
   Truncated = "truncated",
 }
+
+/**
+ * How maps are rendered.
+ */
+export enum MapFormat {
+  /** Boxed header, spelled-out kinds and absolute ranges */
+  Standard = "standard",
+  /** One-character kinds and relative ranges, for tight token budgets */
+  Dense = "dense",
+}
+
+/**
+ * Resource classes used by the mapper scheduler for concurrency limits.
+ */
+export enum MapperKind {
+  Python = "python",
+  Go = "go",
+  Jq = "jq",
+  Ctags = "ctags",
+  Grep = "grep",
+  Stream = "stream",
+  InProcess = "in-process",
+}
+
+/**
+ * Scheduling priority for map generation (lower runs first).
+ */
+export enum MapPriority {
+  Foreground = 0,
+  Prefetch = 1,
+}
+
+/**
+ * What a read of a whole file returns.
+ */
+export enum ReadMode {
+  Content = "content",
+  Map = "map",
+}
+
+/**
+ * Timed stages of a read, for the read statistics.
+ */
+export enum ReadStage {
+  Stat = "stat",
+  Sniff = "sniff",
+  GitBlob = "git-blob",
+  LineCount = "line-count",
+  BuiltInRead = "built-in-read",
+  LineIndex = "line-index",
+  ByteRange = "byte-range",
+  LineHash = "line-hash",
+  Mapper = "mapper",
+  Format = "format",
+}
+
+/**
+ * How a read was served, for the read statistics.
+ */
+export enum ReadOutcome {
+  Delegated = "delegated",
+  Indexed = "indexed",
+  ByteRange = "byte-range",
+  Symbol = "symbol",
+  MapOnly = "map-only",
+  Map = "map",
+  Error = "error",
+  /** Identical to a read earlier in the session */
+  Unchanged = "unchanged",
+  /** Changed since a read earlier in the session, sent as a diff */
+  Diff = "diff",
+  /** A page of a map slice, served by `read_map` */
+  MapSlice = "map-slice",
+  /** A map build that outlived its read's latency budget */
+  Background = "background",
+}
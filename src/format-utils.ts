@@ -0,0 +1,72 @@
+/**
+ * Helpers shared by the map renderers.
+ */
+import type { FileSymbol, PackedFileMap } from "./types.js";
+
+import { DetailLevel } from "./enums.js";
+
+/**
+ * Format a file size for display.
+ */
+export function formatSize(bytes: number): string {
+  if (bytes < 1024) {
+    return `${bytes} B`;
+  }
+  if (bytes < 1024 * 1024) {
+    return `${(bytes / 1024).toFixed(1)} KB`;
+  }
+  return `${(bytes / (1024 * 1024)).toFixed(1)} MB`;
+}
+
+/**
+ * Format a number with comma separators.
+ */
+export function formatNumber(n: number): string {
+  return n.toLocaleString("en-US");
+}
+
+/**
+ * Check whether the symbols at `rows` are addressed by byte range.
+ */
+export function hasByteRanges(
+  packed: PackedFileMap,
+  rows: Uint32Array
+): boolean {
+  return rows.some((row) => !Number.isNaN(packed.startBytes[row]));
+}
+
+/**
+ * Whether a level shows the children of top-level symbols.
+ */
+export function showsChildren(level: DetailLevel): boolean {
+  return level !== DetailLevel.Outline && level !== DetailLevel.Truncated;
+}
+
+/**
+ * A symbol's name as displayed at a level: at Full, with its modifiers
+ * and signature.
+ */
+export function displayName(symbol: FileSymbol, level: DetailLevel): string {
+  let { name } = symbol;
+  if (level !== DetailLevel.Full) {
+    return name;
+  }
+
+  if (symbol.signature) {
+    // Check whether the signature already contains the symbol name.
+    // Full-declaration signatures (e.g. Rust "pub fn foo(x: i32) -> bool")
+    // include the name; partial signatures (e.g. Python "(x, y) -> None")
+    // do not and should be appended.
+    if (symbol.signature.includes(name)) {
+      name = symbol.signature;
+    } else {
+      if (symbol.modifiers?.length) {
+        name = `${symbol.modifiers.join(" ")} ${name}`;
+      }
+      name = `${name}${symbol.signature}`;
+    }
+  } else if (symbol.modifiers?.length) {
+    name = `${symbol.modifiers.join(" ")} ${name}`;
+  }
+  return name;
+}
@@ -1,30 +1,78 @@
 import { basename } from "node:path";
 
-import type { FileMap, FileSymbol } from "./types.js";
+import type {
+  BudgetedMap,
+  FileMap,
+  FileSymbol,
+  MapHeader,
+  MapRenderer,
+  MapView,
+  OmittedBucket,
+  PackedFileMap,
+  SymbolGap,
+} from "./types.js";
 
-import { THRESHOLDS } from "./constants.js";
-import { DetailLevel } from "./enums.js";
+import { THRESHOLDS, TOKEN_BUDGETS } from "./constants.js";
+import { denseRenderer } from "./dense-format.js";
+import { DetailLevel, MapFormat, SymbolKind } from "./enums.js";
+import {
+  displayName,
+  formatNumber,
+  formatSize,
+  hasByteRanges,
+  showsChildren,
+} from "./format-utils.js";
+import { summarizeOmittedRows, widestHistograms } from "./omitted-histogram.js";
+import {
+  createSymbolReader,
+  fileFields,
+  kindAt,
+  materializeSymbol,
+  packFileMap,
+  topLevelRows,
+} from "./packed-map.js";
+import { rankRows } from "./symbol-rank.js";
+import { collapseRows } from "./symbol-runs.js";
+import { estimateTokens } from "./tokens.js";
 
 const BOX_LINE = "───────────────────────────────────────";
 
 /**
- * Format a file size for display.
+ * Number of symbols at `rows[start..end)`, counting each collapsed run in
+ * full.
  */
-function formatSize(bytes: number): string {
-  if (bytes < 1024) {
-    return `${bytes} B`;
+function countRows(
+  packed: PackedFileMap,
+  rows: Uint32Array,
+  start = 0,
+  end = rows.length
+): number {
+  let count = 0;
+  for (let i = start; i < end; i++) {
+    count += packed.runLengths[rows[i] ?? 0] || 1;
   }
-  if (bytes < 1024 * 1024) {
-    return `${(bytes / 1024).toFixed(1)} KB`;
-  }
-  return `${(bytes / (1024 * 1024)).toFixed(1)} MB`;
+  return count;
 }
 
 /**
- * Format a number with comma separators.
+ * Plural of a symbol kind, for collapsed runs.
  */
-function formatNumber(n: number): string {
-  return n.toLocaleString("en-US");
+function pluralKind(kind: SymbolKind): string {
+  switch (kind) {
+    case SymbolKind.Class:
+    case SymbolKind.Index: {
+      return `${kind}es`;
+    }
+    case SymbolKind.Property: {
+      return "properties";
+    }
+    case SymbolKind.Unknown: {
+      return "symbols";
+    }
+    default: {
+      return `${kind}s`;
+    }
+  }
 }
 
 /**
@@ -36,30 +84,18 @@ function formatSymbol(
   indent = 0
 ): string {
   const prefix = "  ".repeat(indent);
-  const lineRange =
+  let lineRange =
     symbol.startLine === symbol.endLine
       ? `[${symbol.startLine}]`
       : `[${symbol.startLine}-${symbol.endLine}]`;
+  if (symbol.startByte !== undefined) {
+    lineRange = `[bytes ${symbol.startByte}-${symbol.endByte ?? symbol.startByte}]`;
+  }
 
-  let { name } = symbol;
+  let name = displayName(symbol, level);
 
-  if (level === DetailLevel.Full) {
-    if (symbol.signature) {
-      // Check whether the signature already contains the symbol name.
-      // Full-declaration signatures (e.g. Rust "pub fn foo(x: i32) -> bool")
-      // include the name; partial signatures (e.g. Python "(x, y) -> None")
-      // do not and should be appended.
-      if (symbol.signature.includes(name)) {
-        name = symbol.signature;
-      } else {
-        if (symbol.modifiers?.length) {
-          name = `${symbol.modifiers.join(" ")} ${name}`;
-        }
-        name = `${name}${symbol.signature}`;
-      }
-    } else if (symbol.modifiers?.length) {
-      name = `${symbol.modifiers.join(" ")} ${name}`;
-    }
+  if (symbol.runLength !== undefined) {
+    name = `${name} (${formatNumber(symbol.runLength)} ${pluralKind(symbol.kind)})`;
   }
 
   // Format based on kind
@@ -97,31 +133,80 @@ function formatSymbol(
 }
 
 /**
- * Format symbols recursively.
+ * Draws and prices the rows of a packed map as a renderer does.
  */
-function formatSymbols(
-  symbols: FileSymbol[],
+interface Measure {
+  renderer: MapRenderer;
+  packed: PackedFileMap;
+  /** One row's line; `parent` is set for children */
+  text(
+    row: number,
+    level: DetailLevel,
+    indent: number,
+    parent?: number
+  ): string;
+  /** Cost of one row's line; tokens are only estimated if asked for */
+  line(
+    row: number,
+    level: DetailLevel,
+    indent: number,
+    parent?: number
+  ): Cost;
+}
+
+function createMeasure(
+  renderer: MapRenderer,
+  packed: PackedFileMap,
+  withTokens: boolean
+): Measure {
+  const read = createSymbolReader(packed);
+  const text = (
+    row: number,
+    level: DetailLevel,
+    indent: number,
+    parent?: number
+  ): string =>
+    renderer.symbol(
+      read(row, 0),
+      level,
+      indent,
+      parent === undefined ? undefined : read(parent, 1)
+    );
+  return {
+    renderer,
+    packed,
+    text,
+    line: (row, level, indent, parent) =>
+      lineCost(text(row, level, indent, parent), withTokens),
+  };
+}
+
+/**
+ * Format rows and their children recursively, appending to `lines`.
+ */
+function formatRows(
+  measure: Measure,
+  rows: Iterable<number>,
   level: DetailLevel,
-  indent = 0
+  indent = 0,
+  parent?: number,
+  lines: string[] = []
 ): string[] {
-  const lines: string[] = [];
-
-  for (const symbol of symbols) {
-    lines.push(formatSymbol(symbol, level, indent));
+  const { ends } = measure.packed;
+  for (const row of rows) {
+    lines.push(measure.text(row, level, indent, parent));
 
     // Add children for full, compact, and minimal levels (not outline or truncated)
-    if (
-      level !== DetailLevel.Outline &&
-      level !== DetailLevel.Truncated &&
-      symbol.children?.length
-    ) {
+    if (!showsChildren(level)) {
+      continue;
+    }
+    const end = ends[row] ?? row + 1;
+    for (let child = row + 1; child < end; child = ends[child] ?? end) {
       // For minimal, flatten children
       if (level === DetailLevel.Minimal) {
-        for (const child of symbol.children) {
-          lines.push(formatSymbol(child, level, indent + 1));
-        }
+        lines.push(measure.text(child, level, indent + 1, row));
       } else {
-        lines.push(...formatSymbols(symbol.children, level, indent + 1));
+        formatRows(measure, [child], level, indent + 1, row, lines);
       }
     }
   }
@@ -130,10 +215,9 @@ function formatSymbols(
 }
 
 /**
- * Format a complete file map to a string.
+ * Lines above the symbols: file header, level notice and imports.
  */
-export function formatFileMap(map: FileMap, level?: DetailLevel): string {
-  const effectiveLevel = level ?? map.detailLevel;
+function formatHeader(map: MapHeader, level: DetailLevel): string[] {
   const fileName = basename(map.path);
 
   const lines: string[] = [
@@ -152,13 +236,13 @@ export function formatFileMap(map: FileMap, level?: DetailLevel): string {
       `[Map ≤${formatSize(THRESHOLDS.MAX_TRUNCATED_BYTES)} | ${shownSymbols} of ${formatNumber(totalSymbols)} symbols]`
     );
     lines.push("");
-  } else if (effectiveLevel === DetailLevel.Outline) {
+  } else if (level === DetailLevel.Outline) {
     lines.push(`[Map ≤${formatSize(THRESHOLDS.MAX_OUTLINE_BYTES)} | outline]`);
     lines.push("");
-  } else if (effectiveLevel === DetailLevel.Minimal) {
+  } else if (level === DetailLevel.Minimal) {
     lines.push(`[Map ≤${formatSize(THRESHOLDS.MAX_MAP_BYTES)} | minimal]`);
     lines.push("");
-  } else if (effectiveLevel === DetailLevel.Compact) {
+  } else if (level === DetailLevel.Compact) {
     lines.push(
       `[Map ≤${formatSize(THRESHOLDS.COMPACT_TARGET_BYTES)} | compact]`
     );
@@ -166,11 +250,7 @@ export function formatFileMap(map: FileMap, level?: DetailLevel): string {
   }
 
   // Add imports if present and not outline or truncated level
-  if (
-    effectiveLevel !== DetailLevel.Outline &&
-    effectiveLevel !== DetailLevel.Truncated &&
-    map.imports.length > 0
-  ) {
+  if (showsChildren(level) && map.imports.length > 0) {
     const importList =
       map.imports.length > 10
         ? [...map.imports.slice(0, 10), `...${map.imports.length - 10} more`]
@@ -179,60 +259,269 @@ export function formatFileMap(map: FileMap, level?: DetailLevel): string {
     lines.push("");
   }
 
-  // Add symbols
-  if (map.truncatedInfo) {
-    // Truncated format: first half, separator, second half
-    const half = Math.floor(map.symbols.length / 2);
-    const firstSymbols = map.symbols.slice(0, half);
-    const lastSymbols = map.symbols.slice(half);
+  return lines;
+}
 
-    // Format first batch
-    const firstLines = formatSymbols(firstSymbols, effectiveLevel);
-    lines.push(...firstLines);
+/**
+ * Separator between the two halves of a truncated map.
+ */
+function formatSeparator(omittedSymbols: number): string[] {
+  return [
+    "",
+    `  ─ ─ ─ ${formatNumber(omittedSymbols)} more symbols ─ ─ ─`,
+    "",
+  ];
+}
 
-    // Add separator
-    lines.push("");
+/**
+ * Marker standing in for a stretch of omitted symbols.
+ */
+function formatGap(gap: SymbolGap): string {
+  const range =
+    gap.startByte !== undefined && gap.endByte !== undefined
+      ? `bytes ${gap.startByte}-${gap.endByte}`
+      : `lines ${formatNumber(gap.startLine)}-${formatNumber(gap.endLine)}`;
+  return `  ─ ─ ─ ${formatNumber(gap.symbols)} more symbols in ${range} ─ ─ ─`;
+}
+
+/**
+ * Omitted symbols of a truncated map, summarized by region.
+ */
+function formatHistogram(buckets: OmittedBucket[]): string[] {
+  if (buckets.length === 0) {
+    return [];
+  }
+  const lines = ["", "Omitted symbols by region:"];
+  for (const bucket of buckets) {
+    const range =
+      bucket.startByte !== undefined && bucket.endByte !== undefined
+        ? `bytes ${bucket.startByte}-${bucket.endByte}`
+        : `lines ${formatNumber(bucket.startLine)}-${formatNumber(bucket.endLine)}`;
+    const kinds = bucket.kinds.map(
+      ({ kind, count }) =>
+        `${formatNumber(count)} ${count === 1 ? kind : pluralKind(kind)}`
+    );
+    const contents =
+      bucket.kinds.length === 1
+        ? kinds.join("")
+        : `${formatNumber(bucket.symbols)} symbols (${kinds.join(", ")})`;
     lines.push(
-      `  ─ ─ ─ ${formatNumber(map.truncatedInfo.omittedSymbols)} more symbols ─ ─ ─`
+      `  ${range}: ${contents}; largest: ${bucket.largest.join(", ")}`
     );
-    lines.push("");
+  }
+  return lines;
+}
 
-    // Format last batch
-    const lastLines = formatSymbols(lastSymbols, effectiveLevel);
-    lines.push(...lastLines);
-  } else {
-    // Normal format
-    const symbolLines = formatSymbols(map.symbols, effectiveLevel);
-    lines.push(...symbolLines);
+/**
+ * Shown rows of a truncated map with their gap markers, in line order.
+ */
+function formatWithGaps(
+  measure: Measure,
+  rows: Uint32Array,
+  gaps: SymbolGap[]
+): string[] {
+  const gapsBefore = new Map(gaps.map((gap) => [gap.before, gap]));
+  const lines: string[] = [];
+  for (const [i, row] of rows.entries()) {
+    const gap = gapsBefore.get(i);
+    if (gap) {
+      lines.push(measure.renderer.gap(gap));
+    }
+    lines.push(measure.text(row, DetailLevel.Truncated, 0));
+  }
+  const trailing = gapsBefore.get(rows.length);
+  if (trailing) {
+    lines.push(measure.renderer.gap(trailing));
   }
+  return lines;
+}
 
-  // Add footer with appropriate guidance
-  lines.push("");
-  lines.push(BOX_LINE);
-  if (map.truncatedInfo) {
+/**
+ * Lines below the symbols. A truncated map passes the symbols on either
+ * side of the gap so the footer can say where the omitted ones are.
+ */
+function formatFooter(
+  byteRanges: boolean,
+  gap?: { before?: FileSymbol; after?: FileSymbol }
+): string[] {
+  const lines = ["", BOX_LINE];
+  if (gap) {
     // For truncated maps, provide specific guidance on finding omitted symbols
-    const firstShown = map.symbols.slice(0, Math.floor(map.symbols.length / 2));
-    const lastShown = map.symbols.slice(Math.floor(map.symbols.length / 2));
-    const lastFirst = firstShown.at(-1);
-    const firstLast = lastShown.at(0);
-    if (lastFirst && firstLast) {
-      const omitStart = lastFirst.endLine + 1;
-      const omitEnd = firstLast.startLine - 1;
+    const { before, after } = gap;
+    if (before?.endByte !== undefined && after?.startByte !== undefined) {
+      lines.push(
+        `Omitted symbols are in bytes ${before.endByte}-${after.startByte}.`
+      );
+    } else if (before && after) {
+      const omitStart = before.endLine + 1;
+      const omitEnd = after.startLine - 1;
       lines.push(
         `Omitted symbols are in lines ${formatNumber(omitStart)}-${formatNumber(omitEnd)}.`
       );
     }
     lines.push(
-      "Use read(path, offset=LINE, limit=N) to view specific sections."
+      byteRanges
+        ? "Use read(path, byteOffset=START, byteLength=N) to view specific sections."
+        : "Use read(path, offset=LINE, limit=N) to view specific sections."
+    );
+    lines.push(
+      "Use read_map(path, startLine=START, endLine=END) to map omitted symbols."
+    );
+  } else if (byteRanges) {
+    lines.push(
+      "Use read(path, byteOffset=START, byteLength=N) for targeted reads."
     );
   } else {
     lines.push("Use read(path, offset=LINE, limit=N) for targeted reads.");
   }
   lines.push(BOX_LINE);
+  return lines;
+}
+
+/**
+ * Renderer of the standard map format.
+ */
+const standardRenderer: MapRenderer = {
+  header: formatHeader,
+  symbol: formatSymbol,
+  separator: formatSeparator,
+  gap: formatGap,
+  histogram: formatHistogram,
+  footer: formatFooter,
+};
+
+const RENDERERS: Record<MapFormat, MapRenderer> = {
+  [MapFormat.Standard]: standardRenderer,
+  [MapFormat.Dense]: denseRenderer,
+};
+
+/**
+ * A view of `rows` of a packed map at a level.
+ */
+function viewOf(
+  packed: PackedFileMap,
+  detailLevel: DetailLevel,
+  rows = topLevelRows(packed),
+  truncatedInfo = packed.truncatedInfo
+): MapView {
+  return { packed, rows, detailLevel, truncatedInfo };
+}
+
+/**
+ * What a view's header describes. Kinds are collected as the view shows
+ * them: Minimal shows one level of children, Full and Compact all.
+ */
+function mapHeader(view: MapView): MapHeader {
+  const { packed, rows, detailLevel: level } = view;
+  // Kinds by their packed index, in order of first appearance
+  const seen: boolean[] = [];
+  const kinds: SymbolKind[] = [];
+  const add = (shown: number): void => {
+    const kind = packed.kinds[shown] ?? 0;
+    if (!seen[kind]) {
+      seen[kind] = true;
+      kinds.push(kindAt(packed, shown));
+    }
+  };
+  for (const row of rows) {
+    add(row);
+    if (!showsChildren(level)) {
+      continue;
+    }
+    // Minimal shows one level of children, Full and Compact all
+    const end = packed.ends[row] ?? row + 1;
+    for (let shown = row + 1; shown < end; ) {
+      add(shown);
+      shown =
+        level === DetailLevel.Minimal ? (packed.ends[shown] ?? end) : shown + 1;
+    }
+  }
+  return {
+    ...fileFields(packed),
+    detailLevel: level,
+    truncatedInfo: view.truncatedInfo,
+    kinds,
+    byteRanges: hasByteRanges(packed, rows),
+  };
+}
+
+/**
+ * The symbols a view shows, as a map.
+ */
+function materializeView(view: MapView): FileMap {
+  const { packed, detailLevel: level } = view;
+  return {
+    ...fileFields(packed),
+    imports: showsChildren(level) ? packed.imports : [],
+    detailLevel: level,
+    truncatedInfo: view.truncatedInfo,
+    symbols: Array.from(view.rows, (row) =>
+      materializeSymbol(packed, row, level)
+    ),
+  };
+}
+
+/**
+ * Render a view of a packed map.
+ */
+function renderView(view: MapView, format: MapFormat): string {
+  const { packed, rows, detailLevel: level, truncatedInfo } = view;
+  const renderer = RENDERERS[format];
+  const measure = createMeasure(renderer, packed, false);
+  const header = renderer.header(mapHeader(view), level);
+  const byteRanges = hasByteRanges(packed, rows);
+  let lines: string[];
+
+  if (truncatedInfo?.gaps) {
+    // Symbols picked by importance, with a marker for each omitted stretch
+    lines = [
+      ...header,
+      ...formatWithGaps(measure, rows, truncatedInfo.gaps),
+      ...renderer.histogram(truncatedInfo.histogram ?? []),
+      ...renderer.footer(byteRanges, {}),
+    ];
+  } else if (truncatedInfo) {
+    // Truncated format: first half, separator, second half
+    const half = Math.floor(rows.length / 2);
+    const firstRows = rows.subarray(0, half);
+    const lastRows = rows.subarray(half);
+    const outlineAt = (row: number | undefined): FileSymbol | undefined =>
+      row === undefined
+        ? undefined
+        : materializeSymbol(packed, row, DetailLevel.Outline);
+    lines = [
+      ...header,
+      ...formatRows(measure, firstRows, level),
+      ...renderer.separator(truncatedInfo.omittedSymbols),
+      ...formatRows(measure, lastRows, level),
+      ...renderer.histogram(truncatedInfo.histogram ?? []),
+      ...renderer.footer(byteRanges, {
+        before: outlineAt(firstRows.at(-1)),
+        after: outlineAt(lastRows.at(0)),
+      }),
+    ];
+  } else {
+    lines = [
+      ...header,
+      ...formatRows(measure, rows, level),
+      ...renderer.footer(byteRanges),
+    ];
+  }
 
   return lines.join("\n");
 }
 
+/**
+ * Format a complete file map to a string.
+ */
+export function formatFileMap(
+  map: FileMap,
+  level?: DetailLevel,
+  format = MapFormat.Standard
+): string {
+  return renderView(viewOf(packFileMap(map), level ?? map.detailLevel), format);
+}
+
 /**
  * Get the appropriate detail level for a map based on size.
  */
@@ -250,182 +539,532 @@ export function getDetailLevelForSize(currentSize: number): DetailLevel {
 }
 
 /**
- * Reduce detail level of a file map.
+ * Reduce detail level of a file map, keeping the fields the level shows.
  */
 export function reduceToLevel(map: FileMap, level: DetailLevel): FileMap {
-  if (level === DetailLevel.Outline) {
-    // Remove all children and signatures
-    return {
-      ...map,
-      detailLevel: DetailLevel.Outline,
-      imports: [],
-      symbols: map.symbols.map((s) => ({
-        name: s.name,
-        kind: s.kind,
-        startLine: s.startLine,
-        endLine: s.endLine,
-      })),
-    };
-  }
-
-  if (level === DetailLevel.Minimal) {
-    // Remove signatures and docstrings but keep children flattened
-    return {
-      ...map,
-      detailLevel: DetailLevel.Minimal,
-      symbols: map.symbols.map((s) => ({
-        name: s.name,
-        kind: s.kind,
-        startLine: s.startLine,
-        endLine: s.endLine,
-        isExported: s.isExported,
-        children: s.children?.map((c) => ({
-          name: c.name,
-          kind: c.kind,
-          startLine: c.startLine,
-          endLine: c.endLine,
-          isExported: c.isExported,
-        })),
-      })),
-    };
-  }
-
-  if (level === DetailLevel.Compact) {
-    // Remove signatures but keep structure
-    return {
-      ...map,
-      detailLevel: DetailLevel.Compact,
-      symbols: map.symbols.map((s) => stripSignatures(s)),
-    };
+  if (level === DetailLevel.Full || level === DetailLevel.Truncated) {
+    return { ...map, detailLevel: DetailLevel.Full };
   }
+  return materializeView(viewOf(packFileMap(map), level));
+}
 
-  return { ...map, detailLevel: DetailLevel.Full };
+/**
+ * Rendered size of some lines, in UTF-8 bytes and estimated tokens.
+ */
+interface Cost {
+  bytes: number;
+  tokens: number;
 }
 
-function stripSignatures(symbol: FileSymbol): FileSymbol {
+/**
+ * Size of one line, counting the newline after it. Tokens are only
+ * estimated `withTokens`, and are zero otherwise.
+ */
+function lineCost(line: string, withTokens = true): Cost {
   return {
-    name: symbol.name,
-    kind: symbol.kind,
-    startLine: symbol.startLine,
-    endLine: symbol.endLine,
-    modifiers: symbol.modifiers,
-    docstring: symbol.docstring,
-    isExported: symbol.isExported,
-    children: symbol.children?.map(stripSignatures),
+    bytes: Buffer.byteLength(line, "utf8") + 1,
+    tokens: withTokens ? estimateTokens(line) + 1 : 0,
   };
 }
 
 /**
- * Reduce a file map to truncated form: first N + last N symbols only.
- * Used when even Outline level exceeds budget.
+ * Size of a list of lines, counting the newline after each.
  */
-export function reduceToTruncated(
-  map: FileMap,
-  symbolsEach: number = THRESHOLDS.TRUNCATED_SYMBOLS_EACH
-): FileMap {
-  const { symbols } = map;
-  const total = symbols.length;
+function linesCost(lines: string[], withTokens = true): Cost {
+  const cost = { bytes: 0, tokens: 0 };
+  for (const line of lines) {
+    addCost(cost, lineCost(line, withTokens));
+  }
+  return cost;
+}
 
-  if (total <= symbolsEach * 2) {
-    // Not enough symbols to truncate, return as outline
-    return reduceToLevel(map, DetailLevel.Outline);
+function addCost(total: Cost, cost: Cost): Cost {
+  total.bytes += cost.bytes;
+  total.tokens += cost.tokens;
+  return total;
+}
+
+/**
+ * Size of the text joined from parts: one newline fewer than its lines.
+ */
+function textCost(...parts: Cost[]): Cost {
+  return parts.reduce(addCost, { bytes: -1, tokens: -1 });
+}
+
+function fits(cost: Cost, budget: Cost): boolean {
+  return cost.bytes <= budget.bytes && cost.tokens <= budget.tokens;
+}
+
+/**
+ * Size of a row and all its descendants at a level.
+ */
+function subtreeCost(
+  measure: Measure,
+  row: number,
+  level: DetailLevel,
+  indent: number,
+  parent?: number
+): Cost {
+  const { ends } = measure.packed;
+  const cost = measure.line(row, level, indent, parent);
+  const end = ends[row] ?? row + 1;
+  for (let child = row + 1; child < end; child = ends[child] ?? end) {
+    addCost(cost, subtreeCost(measure, child, level, indent + 1, row));
   }
+  return cost;
+}
 
-  const firstSymbols = symbols.slice(0, symbolsEach).map((s) => ({
-    name: s.name,
-    kind: s.kind,
-    startLine: s.startLine,
-    endLine: s.endLine,
-  }));
+interface SymbolCosts {
+  /** Size of all symbol lines at each untruncated level */
+  totals: Record<DetailLevel, Cost>;
+  /** Size of each top-level symbol's line at Outline */
+  outline: Cost[];
+}
 
-  const lastSymbols = symbols.slice(-symbolsEach).map((s) => ({
-    name: s.name,
-    kind: s.kind,
-    startLine: s.startLine,
-    endLine: s.endLine,
-  }));
+/**
+ * Measure every row once at each level. Below Full a symbol's own line
+ * is the same at every level; levels differ only in which children show.
+ */
+function measureSymbols(measure: Measure, rows: Uint32Array): SymbolCosts {
+  const { ends } = measure.packed;
+  const full = { bytes: 0, tokens: 0 };
+  const compact = { bytes: 0, tokens: 0 };
+  const minimal = { bytes: 0, tokens: 0 };
+  const outlineTotal = { bytes: 0, tokens: 0 };
+  const outline: Cost[] = [];
+
+  for (const row of rows) {
+    const own = measure.line(row, DetailLevel.Outline, 0);
+    outline.push(own);
+    addCost(outlineTotal, own);
+    addCost(full, subtreeCost(measure, row, DetailLevel.Full, 0));
+    addCost(minimal, own);
+    addCost(compact, own);
+
+    const end = ends[row] ?? row + 1;
+    for (let child = row + 1; child < end; child = ends[child] ?? end) {
+      const childCost = measure.line(child, DetailLevel.Compact, 1, row);
+      addCost(minimal, childCost);
+      addCost(compact, childCost);
+      const childEnd = ends[child] ?? child + 1;
+      for (
+        let grandchild = child + 1;
+        grandchild < childEnd;
+        grandchild = ends[grandchild] ?? childEnd
+      ) {
+        addCost(
+          compact,
+          subtreeCost(measure, grandchild, DetailLevel.Compact, 2, child)
+        );
+      }
+    }
+  }
 
   return {
-    ...map,
-    symbols: [...firstSymbols, ...lastSymbols],
-    detailLevel: DetailLevel.Truncated,
-    imports: [],
-    truncatedInfo: {
-      totalSymbols: total,
-      shownSymbols: symbolsEach * 2,
-      omittedSymbols: total - symbolsEach * 2,
+    totals: {
+      [DetailLevel.Full]: full,
+      [DetailLevel.Compact]: compact,
+      [DetailLevel.Minimal]: minimal,
+      [DetailLevel.Outline]: outlineTotal,
+      [DetailLevel.Truncated]: outlineTotal,
     },
+    outline,
+  };
+}
+
+function budgeted(
+  text: string,
+  detailLevel: DetailLevel,
+  format: MapFormat
+): BudgetedMap {
+  return {
+    text,
+    detailLevel,
+    passes: 1,
+    tokens: estimateTokens(text),
+    format,
   };
 }
 
 /**
- * Format a file map with automatic budget enforcement.
- * Reduces detail level until the map fits within the budget.
+ * Format a packed map with automatic budget enforcement, reporting the
+ * detail level reached, the number of formatting passes and the map's
+ * estimated token cost.
+ *
+ * Symbol costs are measured once; the level and truncation count are
+ * then chosen from those costs and the map is rendered a single time.
+ * With `maxTokens`, each tier must also fit its token budget and the
+ * whole map must fit `maxTokens`. The budgets apply to the map as
+ * rendered in `format`.
  */
-export function formatFileMapWithBudget(
-  map: FileMap,
-  maxBytes = THRESHOLDS.MAX_TRUNCATED_BYTES
-): string {
+export function formatPackedWithBudget(
+  packed: PackedFileMap,
+  maxBytes = THRESHOLDS.MAX_TRUNCATED_BYTES,
+  maxTokens?: number,
+  format = MapFormat.Standard
+): BudgetedMap {
+  const renderer = RENDERERS[format];
+  const rows = topLevelRows(packed);
+  // Symbol tokens are only estimated when there is a cap to check
+  const withTokens = maxTokens !== undefined;
+  const measure = createMeasure(renderer, packed, withTokens);
+  const costs = measureSymbols(measure, rows);
+  const footerCost = linesCost(renderer.footer(hasByteRanges(packed, rows)));
+  const render = (view: MapView): BudgetedMap =>
+    budgeted(renderView(view, format), view.detailLevel, format);
+
+  const levelCost = (level: DetailLevel): Cost =>
+    textCost(
+      linesCost(renderer.header(mapHeader(viewOf(packed, level, rows)), level)),
+      costs.totals[level],
+      footerCost
+    );
+  const tierBudget = (level: DetailLevel, bytes: number): Cost => ({
+    bytes,
+    tokens:
+      maxTokens === undefined
+        ? Infinity
+        : Math.min(TOKEN_BUDGETS[level], maxTokens),
+  });
+
+  const cap = tierBudget(DetailLevel.Truncated, maxBytes);
+
   // Tiered budgets: progressively reduce detail level
-  const tiers: { level: DetailLevel; budget: number }[] = [
-    { level: DetailLevel.Full, budget: THRESHOLDS.FULL_TARGET_BYTES },
-    { level: DetailLevel.Compact, budget: THRESHOLDS.COMPACT_TARGET_BYTES },
-    { level: DetailLevel.Minimal, budget: THRESHOLDS.MAX_MAP_BYTES },
-    { level: DetailLevel.Outline, budget: THRESHOLDS.MAX_OUTLINE_BYTES },
+  const tiers: { level: DetailLevel; budget: Cost }[] = [
+    {
+      level: DetailLevel.Full,
+      budget: tierBudget(DetailLevel.Full, THRESHOLDS.FULL_TARGET_BYTES),
+    },
+    {
+      level: DetailLevel.Compact,
+      budget: tierBudget(DetailLevel.Compact, THRESHOLDS.COMPACT_TARGET_BYTES),
+    },
+    {
+      level: DetailLevel.Minimal,
+      budget: tierBudget(DetailLevel.Minimal, THRESHOLDS.MAX_MAP_BYTES),
+    },
+    {
+      level: DetailLevel.Outline,
+      budget: tierBudget(DetailLevel.Outline, THRESHOLDS.MAX_OUTLINE_BYTES),
+    },
   ];
 
   for (const { level, budget } of tiers) {
-    const reduced = reduceToLevel(map, level);
-    const formatted = formatFileMap(reduced, level);
-    const size = Buffer.byteLength(formatted, "utf8");
+    const cost = levelCost(level);
+    if (fits(cost, budget) && fits(cost, cap)) {
+      return render(viewOf(packed, level, rows));
+    }
+  }
+
+  // Outline exceeded its tier budget but may still fit the cap
+  const outline = viewOf(packed, DetailLevel.Outline, rows);
+  if (fits(levelCost(DetailLevel.Outline), cap)) {
+    return render(outline);
+  }
+
+  // Collapse runs of numbered symbols before dropping any of them
+  const collapsed = collapseRows(packed, rows);
+  if (!collapsed) {
+    return truncateToBudget(outline, costs.outline, cap, measure, render);
+  }
+  const collapsedView = viewOf(collapsed, DetailLevel.Outline);
+  const collapsedMeasure = createMeasure(renderer, collapsed, withTokens);
+  const collapsedCosts = Array.from(collapsedView.rows, (row) =>
+    collapsedMeasure.line(row, DetailLevel.Outline, 0)
+  );
+  const collapsedCost = collapsedCosts.reduce(
+    addCost,
+    textCost(
+      linesCost(renderer.header(mapHeader(collapsedView), DetailLevel.Outline)),
+      footerCost
+    )
+  );
+  if (fits(collapsedCost, cap)) {
+    return render(collapsedView);
+  }
+  return truncateToBudget(
+    collapsedView,
+    collapsedCosts,
+    cap,
+    collapsedMeasure,
+    render
+  );
+}
+
+/**
+ * Format a file map with automatic budget enforcement; see
+ * `formatPackedWithBudget`.
+ */
+export function formatWithBudget(
+  map: FileMap,
+  maxBytes = THRESHOLDS.MAX_TRUNCATED_BYTES,
+  maxTokens?: number,
+  format = MapFormat.Standard
+): BudgetedMap {
+  return formatPackedWithBudget(packFileMap(map), maxBytes, maxTokens, format);
+}
+
+/**
+ * Keep the rows of an outline view at `selected` (ascending indices),
+ * recording each omitted stretch as a gap.
+ */
+function reduceToSelected(view: MapView, selected: number[]): MapView {
+  const { packed, rows } = view;
+  const shown: number[] = [];
+  const gaps: SymbolGap[] = [];
 
-    if (size <= budget && size <= maxBytes) {
-      return formatted;
+  const addGap = (start: number, end: number): void => {
+    const first = rows[start];
+    const last = rows[end - 1];
+    if (start >= end || first === undefined || last === undefined) {
+      return;
+    }
+    const gap: SymbolGap = {
+      before: shown.length,
+      symbols: countRows(packed, rows, start, end),
+      startLine: packed.startLines[first] ?? 0,
+      endLine: packed.endLines[last] ?? 0,
+    };
+    const startByte = packed.startBytes[first] ?? Number.NaN;
+    if (!Number.isNaN(startByte)) {
+      const endByte = packed.endBytes[last] ?? Number.NaN;
+      gap.startByte = startByte;
+      gap.endByte = Number.isNaN(endByte) ? undefined : endByte;
     }
+    gaps.push(gap);
+  };
+
+  let next = 0;
+  const kept = new Uint8Array(rows.length);
+  for (const index of selected) {
+    const row = rows[index];
+    if (row === undefined) {
+      continue;
+    }
+    addGap(next, index);
+    shown.push(row);
+    kept[index] = 1;
+    next = index + 1;
+  }
+  addGap(next, rows.length);
+  const shownRows = Uint32Array.from(shown);
+  const omitted = rows.filter((_, i) => !kept[i]);
+
+  const totalSymbols = countRows(packed, rows);
+  const shownSymbols = countRows(packed, shownRows);
+  return viewOf(packed, DetailLevel.Truncated, shownRows, {
+    totalSymbols,
+    shownSymbols,
+    omittedSymbols: totalSymbols - shownSymbols,
+    gaps,
+    histogram: summarizeOmittedRows(packed, omitted),
+  });
+}
+
+/**
+ * Truncate an outline view that doesn't fit by packing the most valuable
+ * symbols into the budget, kept in line order with a gap marker for each
+ * omitted stretch. `outlineCosts` are the sizes of each row's line.
+ */
+function truncateToBudget(
+  view: MapView,
+  outlineCosts: Cost[],
+  cap: Cost,
+  { renderer }: Measure,
+  render: (view: MapView) => BudgetedMap
+): BudgetedMap {
+  const { packed, rows } = view;
+  const byteRanges = hasByteRanges(packed, rows);
+  const totalSymbols = countRows(packed, rows);
+
+  // Price every gap marker and notice at its widest so the packed map
+  // is known to fit without rendering it
+  const lastRow = rows.at(-1);
+  const lastLine = Math.max(
+    packed.totalLines,
+    lastRow === undefined ? 0 : (packed.endLines[lastRow] ?? 0)
+  );
+  const widestGap: SymbolGap = {
+    before: 0,
+    symbols: totalSymbols,
+    startLine: lastLine,
+    endLine: lastLine,
+  };
+  if (byteRanges) {
+    widestGap.startByte = packed.totalBytes;
+    widestGap.endByte = packed.totalBytes;
   }
+  const gapCost = lineCost(renderer.gap(widestGap));
+  const histogramCost = widestHistograms(
+    packed,
+    rows,
+    lastLine,
+    byteRanges ? packed.totalBytes : undefined
+  )
+    .map((histogram) => linesCost(renderer.histogram(histogram)))
+    .reduce((widest, cost) => ({
+      bytes: Math.max(widest.bytes, cost.bytes),
+      tokens: Math.max(widest.tokens, cost.tokens),
+    }));
+  const truncatedInfo = {
+    totalSymbols,
+    shownSymbols: totalSymbols,
+    omittedSymbols: totalSymbols,
+  };
+  const size = textCost(
+    linesCost(
+      renderer.header(
+        mapHeader({
+          ...view,
+          detailLevel: DetailLevel.Truncated,
+          truncatedInfo,
+        }),
+        DetailLevel.Truncated
+      )
+    ),
+    linesCost(renderer.footer(byteRanges, {})),
+    histogramCost,
+    gapCost
+  );
 
-  // Outline exceeded budget - need to truncate symbols
-  // First check if full outline fits in maxBytes (just not in outline budget)
-  const outline = reduceToLevel(map, DetailLevel.Outline);
-  const outlineFormatted = formatFileMap(outline, DetailLevel.Outline);
-  const outlineSize = Buffer.byteLength(outlineFormatted, "utf8");
+  // Keeping a symbol splits the gap around it into the stretches left on
+  // either side, each of which may be empty
+  const minSymbols = 20; // Guaranteed minimum
+  const kept = new Uint8Array(rows.length);
+  const selected: number[] = [];
+  for (const index of rankRows(packed, rows)) {
+    const line = outlineCosts[index] ?? { bytes: 0, tokens: 0 };
+    const gapsAdded =
+      (index > 0 && !kept[index - 1] ? 1 : 0) +
+      (index < rows.length - 1 && !kept[index + 1] ? 1 : 0) -
+      1;
+    const bytes = size.bytes + line.bytes + gapsAdded * gapCost.bytes;
+    const tokens = size.tokens + line.tokens + gapsAdded * gapCost.tokens;
+    if (
+      (bytes <= cap.bytes && tokens <= cap.tokens) ||
+      selected.length < minSymbols
+    ) {
+      kept[index] = 1;
+      selected.push(index);
+      size.bytes = bytes;
+      size.tokens = tokens;
+    }
+  }
 
-  if (outlineSize <= maxBytes) {
-    // Outline fits in truncated budget, use it
-    return outlineFormatted;
+  if (selected.length === rows.length) {
+    return render(view);
   }
 
-  // Need to truncate - binary search for maximum symbols that fit
-  const totalSymbols = map.symbols.length;
-  const minSymbols = 10; // Guaranteed minimum
-  const maxSymbolsEach = Math.floor(totalSymbols / 2); // Can't show more than half on each side
+  selected.sort((a, b) => a - b);
+  return render(reduceToSelected(view, selected));
+}
+
+/**
+ * Split a map into pages whose Full rendering fits the Full budget (and
+ * its token budget under `maxTokens`), each a map of consecutive
+ * top-level symbols. A symbol too large for a page of its own is split
+ * by its children, repeated on every page that shows some of them.
+ * Only the first page lists the imports.
+ */
+export function paginateMap(
+  map: FileMap,
+  maxTokens?: number,
+  format = MapFormat.Standard
+): FileMap[] {
+  const renderer = RENDERERS[format];
+  const packed = packFileMap(map);
+  const rows = topLevelRows(packed);
+  const measure = createMeasure(renderer, packed, maxTokens !== undefined);
+  const budget: Cost = {
+    bytes: THRESHOLDS.FULL_TARGET_BYTES,
+    tokens:
+      maxTokens === undefined
+        ? Infinity
+        : Math.min(TOKEN_BUDGETS[DetailLevel.Full], maxTokens),
+  };
+  const base = textCost(
+    linesCost(
+      renderer.header(
+        mapHeader(viewOf(packed, DetailLevel.Full, rows)),
+        DetailLevel.Full
+      )
+    ),
+    linesCost(renderer.footer(hasByteRanges(packed, rows)))
+  );
 
-  let low = minSymbols;
-  let high = maxSymbolsEach;
-  let bestResult: string | null = null;
+  const fitsPage = (cost: Cost): boolean =>
+    fits(addCost({ ...base }, cost), budget);
 
-  while (low <= high) {
-    const mid = Math.floor((low + high) / 2);
-    const truncated = reduceToTruncated(map, mid);
-    const formatted = formatFileMap(truncated, DetailLevel.Truncated);
-    const size = Buffer.byteLength(formatted, "utf8");
+  // Rows, or parts of rows split by their children, in order
+  interface Part {
+    row: number;
+    /** Rows of the children shown, when split */
+    children?: number[];
+    cost: Cost;
+  }
+  const parts: Part[] = [];
+  for (const row of rows) {
+    const cost = subtreeCost(measure, row, DetailLevel.Full, 0);
+    const end = packed.ends[row] ?? row + 1;
+    if (end === row + 1 || fitsPage(cost)) {
+      parts.push({ row, cost });
+      continue;
+    }
 
-    if (size <= maxBytes) {
-      // This fits, try to show more
-      bestResult = formatted;
-      low = mid + 1;
-    } else {
-      // Too big, show fewer
-      high = mid - 1;
+    const own = measure.line(row, DetailLevel.Full, 0);
+    let children: number[] = [];
+    let partCost = { ...own };
+    for (let child = row + 1; child < end; child = packed.ends[child] ?? end) {
+      const childCost = subtreeCost(measure, child, DetailLevel.Full, 1, row);
+      if (
+        children.length > 0 &&
+        !fitsPage(addCost({ ...partCost }, childCost))
+      ) {
+        parts.push({ row, children, cost: partCost });
+        children = [];
+        partCost = { ...own };
+      }
+      children.push(child);
+      addCost(partCost, childCost);
     }
+    parts.push({ row, children, cost: partCost });
   }
 
-  // Return best result or fallback to minimum
-  if (bestResult) {
-    return bestResult;
+  const pages: Part[][] = [];
+  let page: Part[] = [];
+  let pageCost = { bytes: 0, tokens: 0 };
+  for (const part of parts) {
+    if (page.length > 0 && !fitsPage(addCost({ ...pageCost }, part.cost))) {
+      pages.push(page);
+      page = [];
+      pageCost = { bytes: 0, tokens: 0 };
+    }
+    page.push(part);
+    addCost(pageCost, part.cost);
   }
+  pages.push(page);
 
-  // Absolute fallback: minimum symbols (guaranteed to fit)
-  const minimal = reduceToTruncated(map, minSymbols);
-  return formatFileMap(minimal, DetailLevel.Truncated);
+  const materializePart = ({ row, children }: Part): FileSymbol =>
+    children
+      ? {
+          ...materializeSymbol(packed, row, DetailLevel.Full, false),
+          children: children.map((child) => materializeSymbol(packed, child)),
+        }
+      : materializeSymbol(packed, row);
+  return pages.map((page, i) => ({
+    ...map,
+    imports: i === 0 ? map.imports : [],
+    symbols: page.map(materializePart),
+  }));
+}
+
+/**
+ * Format a file map with automatic budget enforcement.
+ * Reduces detail level until the map fits within the budget.
+ */
+export function formatFileMapWithBudget(
+  map: FileMap,
+  maxBytes = THRESHOLDS.MAX_TRUNCATED_BYTES
+): string {
+  return formatWithBudget(map, maxBytes).text;
 }
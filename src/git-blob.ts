@@ -0,0 +1,140 @@
+/**
+ * Git blob IDs of tracked files, read from the index instead of hashing.
+ *
+ * A checkout or branch switch rewrites files and bumps their mtime even
+ * when the content is unchanged. For a tracked file whose stat data still
+ * matches its index entry, the entry's blob ID identifies the content, so
+ * maps can be shared across branches and worktrees. Only racily clean
+ * entries are confirmed by hashing. Modified and untracked files have no
+ * blob ID and keep the mtime-keyed cache.
+ */
+import { execFile } from "node:child_process";
+import { stat } from "node:fs/promises";
+import { basename, dirname, join } from "node:path";
+import { promisify } from "node:util";
+
+const execFileAsync = promisify(execFile);
+
+const NS_PER_SECOND = 1_000_000_000n;
+
+/** Git directory per working directory, null outside a repository */
+const gitDirs = new Map<string, Promise<string | null>>();
+
+/** Last lookup per file, valid while the file and the index are unchanged */
+const lookups = new Map<string, { key: string; blobId: string | null }>();
+
+function findGitDir(directory: string): Promise<string | null> {
+  let gitDir = gitDirs.get(directory);
+  if (!gitDir) {
+    gitDir = execFileAsync("git", ["rev-parse", "--absolute-git-dir"], {
+      cwd: directory,
+      timeout: 5000,
+    }).then(
+      ({ stdout }) => stdout.trim() || null,
+      () => null
+    );
+    gitDirs.set(directory, gitDir);
+  }
+  return gitDir;
+}
+
+/**
+ * Parse `git ls-files -s --debug` output for a single path.
+ */
+function parseIndexEntry(
+  output: string
+): { blobId: string; mtimeNs: bigint; size: number } | null {
+  const entry = /^(\d+) ([0-9a-f]+) (\d+)\t/.exec(output);
+  const mtime = /^\s+mtime: (\d+):(\d+)$/m.exec(output);
+  const size = /^\s+size: (\d+)/m.exec(output);
+  if (!entry || !mtime || !size) {
+    return null;
+  }
+
+  const [, mode, blobId, stage] = entry;
+  // Regular files only, and no merge conflicts
+  if ((mode !== "100644" && mode !== "100755") || stage !== "0" || !blobId) {
+    return null;
+  }
+  return {
+    blobId,
+    mtimeNs: BigInt(mtime[1] ?? 0) * NS_PER_SECOND + BigInt(mtime[2] ?? 0),
+    size: Number(size[1]),
+  };
+}
+
+/**
+ * Truncate a stat mtime to the precision of an index mtime. Git builds
+ * without nanosecond support record 0 nanoseconds.
+ */
+function toIndexPrecision(statNs: bigint, indexNs: bigint): bigint {
+  return indexNs % NS_PER_SECOND === 0n
+    ? (statNs / NS_PER_SECOND) * NS_PER_SECOND
+    : statNs;
+}
+
+/**
+ * Get the git blob ID of a file's current content, when the file is tracked
+ * and its stat data matches the index entry. Returns null otherwise,
+ * including outside a repository or when git is unavailable.
+ */
+export async function getBlobId(absPath: string): Promise<string | null> {
+  try {
+    const gitDir = await findGitDir(dirname(absPath));
+    if (!gitDir) {
+      return null;
+    }
+
+    const [file, index] = await Promise.all([
+      stat(absPath, { bigint: true }),
+      stat(join(gitDir, "index"), { bigint: true }),
+    ]);
+    const key = `${file.mtimeNs}:${file.size}:${index.mtimeNs}`;
+    const previous = lookups.get(absPath);
+    if (previous?.key === key) {
+      return previous.blobId;
+    }
+
+    const { stdout } = await execFileAsync(
+      "git",
+      ["ls-files", "-s", "--debug", "--", `:(literal)${basename(absPath)}`],
+      { cwd: dirname(absPath), timeout: 5000 }
+    );
+    const entry = parseIndexEntry(stdout);
+    // The index stores sizes truncated to 32 bits
+    const statMatches =
+      entry !== null &&
+      entry.size === Number(file.size % 2n ** 32n) &&
+      toIndexPrecision(file.mtimeNs, entry.mtimeNs) === entry.mtimeNs;
+
+    let blobId = statMatches ? entry.blobId : null;
+    // An entry written in the same tick as the file ("racily clean", as
+    // after a fresh checkout) may predate a later write: hash to confirm
+    if (
+      entry &&
+      blobId &&
+      toIndexPrecision(index.mtimeNs, entry.mtimeNs) <= entry.mtimeNs
+    ) {
+      const { stdout: hashed } = await execFileAsync(
+        "git",
+        ["hash-object", "--", basename(absPath)],
+        { cwd: dirname(absPath), timeout: 5000 }
+      );
+      blobId = hashed.trim() === entry.blobId ? blobId : null;
+    }
+
+    lookups.set(absPath, { key, blobId });
+    return blobId;
+  } catch {
+    return null;
+  }
+}
+
+/**
+ * Forget cached git directories and lookups. Exported for testing purposes
+ * only.
+ */
+export function resetBlobLookups(): void {
+  gitDirs.clear();
+  lookups.clear();
+}
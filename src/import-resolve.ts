@@ -0,0 +1,253 @@
+/**
+ * Resolve the imports listed in a file map to local files.
+ *
+ * Only imports that point into the project are resolved: relative and
+ * project-rooted Python modules, relative TypeScript/JavaScript
+ * specifiers, Go packages under the file's own module, and Rust
+ * `crate::`, `self::` and `super::` paths. Package-manager and standard
+ * library imports resolve to nothing.
+ */
+import { readdir, readFile, stat } from "node:fs/promises";
+import { basename, dirname, extname, join, resolve } from "node:path";
+
+import { detectLanguage } from "./language-detect.js";
+
+const TS_EXTENSIONS = [
+  ".ts",
+  ".tsx",
+  ".mts",
+  ".cts",
+  ".js",
+  ".jsx",
+  ".mjs",
+  ".cjs",
+];
+
+/** Output extensions that TypeScript sources are imported by */
+const JS_TO_TS: Record<string, string[]> = {
+  ".js": [".ts", ".tsx"],
+  ".jsx": [".tsx"],
+  ".mjs": [".mts"],
+  ".cjs": [".cts"],
+};
+
+async function isFile(filePath: string): Promise<boolean> {
+  try {
+    return (await stat(filePath)).isFile();
+  } catch {
+    return false;
+  }
+}
+
+/**
+ * First candidate path that is an existing file.
+ */
+async function firstFile(candidates: string[]): Promise<string | null> {
+  for (const candidate of candidates) {
+    if (await isFile(candidate)) {
+      return candidate;
+    }
+  }
+  return null;
+}
+
+/**
+ * Nearest ancestor directory of `from` (inclusive) containing `marker`.
+ */
+async function findUp(from: string, marker: string): Promise<string | null> {
+  let directory = from;
+  for (;;) {
+    if (await isFile(join(directory, marker))) {
+      return directory;
+    }
+    const parent = dirname(directory);
+    if (parent === directory) {
+      return null;
+    }
+    directory = parent;
+  }
+}
+
+function pythonModuleFile(
+  base: string,
+  parts: string[]
+): Promise<string | null> {
+  const modulePath = join(base, ...parts);
+  return firstFile([`${modulePath}.py`, join(modulePath, "__init__.py")]);
+}
+
+async function resolvePython(
+  filePath: string,
+  specifier: string,
+  root: string
+): Promise<string[]> {
+  const level = /^\.*/.exec(specifier)?.[0].length ?? 0;
+  const parts = specifier.slice(level).split(".").filter(Boolean);
+
+  if (level > 0) {
+    let base = dirname(filePath);
+    for (let i = 1; i < level; i++) {
+      base = dirname(base);
+    }
+    const resolved =
+      parts.length > 0
+        ? await pythonModuleFile(base, parts)
+        : await firstFile([join(base, "__init__.py")]);
+    return resolved ? [resolved] : [];
+  }
+
+  // Absolute imports: the project root, or a sibling module
+  for (const base of [root, dirname(filePath)]) {
+    const resolved = await pythonModuleFile(base, parts);
+    if (resolved) {
+      return [resolved];
+    }
+  }
+  return [];
+}
+
+async function resolveScript(
+  filePath: string,
+  specifier: string
+): Promise<string[]> {
+  if (!specifier.startsWith("./") && !specifier.startsWith("../")) {
+    return [];
+  }
+
+  const target = resolve(dirname(filePath), specifier);
+  const extension = extname(target);
+  const stem = target.slice(0, target.length - extension.length);
+  const resolved = await firstFile([
+    ...(JS_TO_TS[extension] ?? []).map((ext) => `${stem}${ext}`),
+    target,
+    ...TS_EXTENSIONS.map((ext) => `${target}${ext}`),
+    ...TS_EXTENSIONS.map((ext) => join(target, `index${ext}`)),
+  ]);
+  return resolved ? [resolved] : [];
+}
+
+async function resolveGo(
+  filePath: string,
+  specifier: string
+): Promise<string[]> {
+  // Aliased imports are recorded as "alias path"
+  const importPath = specifier.split(" ").at(-1) ?? "";
+  const moduleRoot = await findUp(dirname(filePath), "go.mod");
+  if (!moduleRoot) {
+    return [];
+  }
+
+  const goMod = await readFile(join(moduleRoot, "go.mod"), "utf8");
+  const modulePath = /^module\s+(\S+)/m.exec(goMod)?.[1];
+  if (
+    !modulePath ||
+    (importPath !== modulePath && !importPath.startsWith(`${modulePath}/`))
+  ) {
+    return [];
+  }
+
+  const packageDir = join(moduleRoot, importPath.slice(modulePath.length));
+  const entries = await readdir(packageDir).catch(() => []);
+  return entries
+    .filter((name) => name.endsWith(".go") && !name.endsWith("_test.go"))
+    .sort()
+    .map((name) => join(packageDir, name));
+}
+
+async function resolveRust(
+  filePath: string,
+  specifier: string
+): Promise<string[]> {
+  // Strip braced groups and aliases: `crate::a::{B, C}` -> crate::a
+  const path = specifier.replace(/::\{.*$/s, "").replace(/\s+as\s+\w+$/, "");
+  const segments = path.split("::");
+
+  const stem = basename(filePath, ".rs");
+  const moduleDir = ["mod", "lib", "main"].includes(stem)
+    ? dirname(filePath)
+    : join(dirname(filePath), stem);
+
+  let base: string;
+  if (segments[0] === "crate") {
+    const crateRoot = await findUp(dirname(filePath), "Cargo.toml");
+    if (!crateRoot) {
+      return [];
+    }
+    base = join(crateRoot, "src");
+    segments.shift();
+  } else if (segments[0] === "self") {
+    base = moduleDir;
+    segments.shift();
+  } else if (segments[0] === "super") {
+    base = moduleDir;
+    while (segments[0] === "super") {
+      base = dirname(base);
+      segments.shift();
+    }
+  } else {
+    return [];
+  }
+
+  // The trailing segments may name items rather than modules
+  for (let count = segments.length; count > 0; count--) {
+    const modulePath = join(base, ...segments.slice(0, count));
+    const resolved = await firstFile([
+      `${modulePath}.rs`,
+      join(modulePath, "mod.rs"),
+    ]);
+    if (resolved) {
+      return [resolved];
+    }
+  }
+
+  // Only items were named: the import is the base module itself
+  const resolved = await firstFile([
+    join(base, "mod.rs"),
+    `${base}.rs`,
+    join(base, "lib.rs"),
+    join(base, "main.rs"),
+  ]);
+  return resolved ? [resolved] : [];
+}
+
+/**
+ * Resolve a file's imports to existing local files, in import order and
+ * without duplicates. `root` is the project root for Python imports.
+ */
+export async function resolveLocalImports(
+  filePath: string,
+  imports: string[],
+  root: string
+): Promise<string[]> {
+  const language = detectLanguage(filePath)?.id;
+  const resolveOne = (specifier: string): Promise<string[]> => {
+    switch (language) {
+      case "python": {
+        return resolvePython(filePath, specifier, root);
+      }
+      case "typescript":
+      case "javascript": {
+        return resolveScript(filePath, specifier);
+      }
+      case "go": {
+        return resolveGo(filePath, specifier);
+      }
+      case "rust": {
+        return resolveRust(filePath, specifier);
+      }
+      default: {
+        return Promise.resolve([]);
+      }
+    }
+  };
+
+  const resolved = new Set<string>();
+  for (const specifier of imports) {
+    for (const path of await resolveOne(specifier).catch(() => [])) {
+      if (path !== filePath) {
+        resolved.add(path);
+      }
+    }
+  }
+  return [...resolved];
+}
@@ -9,82 +9,987 @@ import {
 import { Type } from "@sinclair/typebox";
 import { exec } from "node:child_process";
 import { stat } from "node:fs/promises";
-import { extname, resolve } from "node:path";
+import { resolve } from "node:path";
 import { promisify } from "node:util";
 
-import { formatFileMapWithBudget } from "./formatter.js";
+import type {
+  BudgetedMap,
+  MapCacheEntry,
+  MapOptions,
+  MapSliceOptions,
+  MapUrgency,
+  PackedFileMap,
+  ReadTrace,
+} from "./types.js";
+
+import { hasBinaryExtension, isBinaryFile } from "./binary-detect.js";
+import { readByteRange } from "./byte-range.js";
+import { DEDUP, PREFETCH, SCHEDULER, THRESHOLDS } from "./constants.js";
+import {
+  MapFormat,
+  MapPriority,
+  ReadMode,
+  ReadOutcome,
+  ReadStage,
+} from "./enums.js";
+import { formatNumber } from "./format-utils.js";
+import {
+  formatPackedWithBudget,
+  formatWithBudget,
+  paginateMap,
+} from "./formatter.js";
+import { getBlobId, resetBlobLookups } from "./git-blob.js";
+import { resolveLocalImports } from "./import-resolve.js";
+import {
+  changedPercent,
+  diffLineHashes,
+  formatLineDiff,
+  hashFileLines,
+  shiftFileMap,
+} from "./line-diff.js";
+import { buildLineIndex, readIndexedRange } from "./line-index.js";
+import {
+  clearMapCache,
+  getCachedBlobMap,
+  getCachedLineIndex,
+  getCachedMap,
+  getCachedRender,
+  setCachedBlobMap,
+  setCachedLineIndex,
+  setCachedMap,
+} from "./map-cache.js";
+import {
+  diffPackedMaps,
+  formatMapDiff,
+  summarizeMapDiff,
+} from "./map-diff.js";
+import { slicePackedMap } from "./map-slice.js";
 import { generateMap, shouldGenerateMap } from "./mapper.js";
+import { packFileMap, unpackFileMap } from "./packed-map.js";
+import {
+  cancelAllPrefetches,
+  claimPrefetch,
+  prefetchMaps,
+  resetPrefetchStats,
+} from "./prefetch.js";
+import {
+  clearSessionReads,
+  getSessionMap,
+  getSessionRead,
+  rememberSessionMap,
+  rememberSessionRead,
+  sessionReadKey,
+  setSessionTurn,
+} from "./read-dedup.js";
+import {
+  addSpan,
+  exportReadStats,
+  formatReadStats,
+  mergeTrace,
+  recordRead,
+  resetReadStats,
+  startReadTrace,
+  timeSpan,
+  traceRead,
+} from "./read-stats.js";
+import {
+  createUrgency,
+  raiseUrgency,
+  resetSchedulerStats,
+} from "./scheduler.js";
+import { getSettings, loadSettings, updateSettings } from "./settings.js";
+import { formatSymbolMatch, resolveSymbol } from "./symbol-resolve.js";
+import { estimateTokens } from "./tokens.js";
 
 const execAsync = promisify(exec);
 
-/**
- * File extensions that are binary/image files and should be
- * delegated directly to the built-in read tool without map generation.
- */
-const BINARY_EXTENSIONS = new Set([
-  ".jpg",
-  ".jpeg",
-  ".png",
-  ".gif",
-  ".webp",
-  ".bmp",
-  ".ico",
-  ".tiff",
-  ".tif",
-  ".svg",
-  ".avif",
-  ".heic",
-  ".heif",
-  // Audio/video
-  ".mp3",
-  ".mp4",
-  ".wav",
-  ".avi",
-  ".mov",
-  ".mkv",
-  ".flac",
-  ".ogg",
-  ".webm",
-  // Archives
-  ".zip",
-  ".tar",
-  ".gz",
-  ".bz2",
-  ".xz",
-  ".7z",
-  ".rar",
-  // Binary data
-  ".bin",
-  ".exe",
-  ".dll",
-  ".so",
-  ".dylib",
-  ".o",
-  ".a",
-  ".wasm",
-  ".pdf",
-  ".doc",
-  ".docx",
-  ".xls",
-  ".xlsx",
-  ".ppt",
-  ".pptx",
-]);
-
-// In-memory cache for maps
-const mapCache = new Map<string, { mtime: number; map: string }>();
+// Precise map builds in flight, by path
+const pendingBuilds = new Map<
+  string,
+  {
+    mtime: number;
+    promise: Promise<MapCacheEntry | null>;
+    urgency: MapUrgency;
+    signal?: AbortSignal;
+  }
+>();
+
+// Resolved by `withinBudget` when the latency budget runs out first
+const BUDGET_EXCEEDED = Symbol("budget-exceeded");
+
+// Appended to a map built by a cheaper mapper than the file's own
+const QUICK_MAP_NOTE =
+  "[Quick map: the precise map is still being generated in the background; later reads return it once ready.]";
 
 /**
  * Reset the map cache. Exported for testing purposes only.
  */
 export function resetMapCache(): void {
-  mapCache.clear();
+  cancelAllPrefetches();
+  clearMapCache();
+  clearSessionReads();
+  resetBlobLookups();
+}
+
+/**
+ * Format a map in the configured format, within the byte budget and the
+ * configured token cap.
+ */
+function formatMap(packedMap: PackedFileMap): BudgetedMap {
+  const { maxMapTokens, mapFormat } = getSettings();
+  return formatPackedWithBudget(
+    packedMap,
+    THRESHOLDS.MAX_TRUNCATED_BYTES,
+    maxMapTokens ?? undefined,
+    mapFormat
+  );
+}
+
+/**
+ * Key of the settings `formatMap` renders with, for memoizing renders.
+ */
+function currentRenderKey(): string {
+  const { maxMapTokens, mapFormat } = getSettings();
+  return `${mapFormat}:${THRESHOLDS.MAX_TRUNCATED_BYTES}:${maxMapTokens ?? "-"}`;
+}
+
+/**
+ * Build the cache entry of a raw map, keeping the render it was built with.
+ */
+function createEntry(
+  mtime: number,
+  packedMap: PackedFileMap,
+  budgeted: BudgetedMap
+): MapCacheEntry {
+  const renderKey = currentRenderKey();
+  return {
+    mtime,
+    map: budgeted.text,
+    packedMap,
+    detailLevel: budgeted.detailLevel,
+    tokens: budgeted.tokens,
+    renderKey,
+    renders: new Map([[renderKey, budgeted]]),
+  };
+}
+
+/**
+ * Re-render a cached entry built with other render settings than the
+ * current ones, e.g. after `/readmap-format` switched formats mid-session.
+ * Renders are memoized on the entry, so switching back costs nothing.
+ */
+function inCurrentSettings(
+  absPath: string,
+  entry: MapCacheEntry
+): MapCacheEntry {
+  const renderKey = currentRenderKey();
+  if (entry.renderKey === renderKey) {
+    return entry;
+  }
+
+  const budgeted = getCachedRender(entry, renderKey, () =>
+    formatMap(entry.packedMap)
+  );
+  const updated: MapCacheEntry = {
+    ...entry,
+    map: entry.provisional
+      ? `${budgeted.text}\n${QUICK_MAP_NOTE}`
+      : budgeted.text,
+    detailLevel: budgeted.detailLevel,
+    tokens: budgeted.tokens,
+    renderKey,
+  };
+  if (getCachedMap(absPath) === entry) {
+    setCachedMap(absPath, updated);
+  }
+  return updated;
+}
+
+/**
+ * Generate a map and build its cache entry.
+ * Line hashes are only kept when stale-while-revalidate is enabled.
+ */
+async function buildCacheEntry(
+  absPath: string,
+  mtime: number,
+  options: MapOptions
+): Promise<MapCacheEntry | null> {
+  const { trace } = options;
+  const lineHashes = getSettings().staleWhileRevalidate
+    ? await timeSpan(trace, ReadStage.LineHash, () =>
+        hashFileLines(absPath, options.signal)
+      ).catch(() => undefined)
+    : undefined;
+
+  const blobId = await getBlobId(absPath);
+  const fileMap = await timeSpan(trace, ReadStage.Mapper, () =>
+    generateMap(absPath, options)
+  );
+  if (!fileMap) {
+    return null;
+  }
+
+  const formatStart = performance.now();
+  const packedMap = packFileMap(fileMap);
+  const budgeted = formatMap(packedMap);
+  addSpan(trace, ReadStage.Format, performance.now() - formatStart);
+  if (trace) {
+    trace.formatPasses = budgeted.passes;
+  }
+
+  const entry = createEntry(mtime, packedMap, budgeted);
+  if (lineHashes) {
+    entry.lineHashes = lineHashes;
+  }
+  if (blobId) {
+    entry.blobId = blobId;
+  }
+  return entry;
+}
+
+/**
+ * Start building the map for a file version, or join a build already in
+ * flight for it. The entry is cached when it completes, unless a newer
+ * version of the file has been mapped meanwhile.
+ *
+ * A read joining a prefetch raises the build to the read's priority and
+ * deadline, and builds afresh if the prefetch was cancelled or came to
+ * nothing.
+ */
+function buildPreciseEntry(
+  absPath: string,
+  mtime: number,
+  options: MapOptions
+): Promise<MapCacheEntry | null> {
+  const { priority = MapPriority.Foreground, deadline } = options;
+  const pending = pendingBuilds.get(absPath);
+  if (pending && pending.mtime === mtime && !pending.signal?.aborted) {
+    if (priority >= pending.urgency.priority) {
+      return pending.promise;
+    }
+    raiseUrgency(pending.urgency, priority, deadline);
+    return pending.promise
+      .catch(() => null)
+      .then((entry) => entry ?? buildPreciseEntry(absPath, mtime, options));
+  }
+
+  const urgency = createUrgency(priority, deadline);
+  const promise = buildCacheEntry(absPath, mtime, { ...options, urgency })
+    .then((entry) => {
+      const current = getCachedMap(absPath);
+      if (entry && (!current || current.mtime <= mtime)) {
+        setCachedMap(absPath, entry);
+      }
+      if (entry?.blobId) {
+        setCachedBlobMap(entry.blobId, entry);
+      }
+      return entry;
+    })
+    .finally(() => {
+      if (pendingBuilds.get(absPath)?.promise === promise) {
+        pendingBuilds.delete(absPath);
+      }
+    });
+  pendingBuilds.set(absPath, {
+    mtime,
+    promise,
+    urgency,
+    signal: options.signal,
+  });
+  return promise;
+}
+
+/**
+ * Wait for a promise, giving up after `ms` milliseconds.
+ */
+function withinBudget<T>(
+  promise: Promise<T>,
+  ms: number
+): Promise<T | typeof BUDGET_EXCEEDED> {
+  let timer: ReturnType<typeof setTimeout> | undefined;
+  const expired = new Promise<typeof BUDGET_EXCEEDED>((resolve) => {
+    timer = setTimeout(() => resolve(BUDGET_EXCEEDED), ms);
+  });
+  return Promise.race([promise, expired]).finally(() => clearTimeout(timer));
+}
+
+/**
+ * Build the map for a file version within the read's latency budget.
+ *
+ * When the precise mapper can't finish in time, it is raced against the
+ * ctags/grep mappers. A quicker map wins the read and is cached as
+ * provisional; the precise build continues in the background and replaces
+ * it when done.
+ */
+async function buildMapEntry(
+  absPath: string,
+  mtime: number,
+  signal?: AbortSignal,
+  trace?: ReadTrace
+): Promise<MapCacheEntry | null> {
+  // Decouple the build from the read's signal once the read moves on
+  const controller = new AbortController();
+  const onAbort = () => controller.abort();
+  signal?.addEventListener("abort", onAbort, { once: true });
+
+  const buildTrace = startReadTrace(trace?.path ?? absPath);
+  const precise = buildPreciseEntry(absPath, mtime, {
+    signal: controller.signal,
+    deadline: Date.now() + SCHEDULER.DEFAULT_DEADLINE_MS,
+    trace: buildTrace,
+  });
+
+  try {
+    const { latencyBudgetMs } = getSettings();
+    const first =
+      latencyBudgetMs === null
+        ? await precise
+        : await withinBudget(precise, latencyBudgetMs);
+    if (first !== BUDGET_EXCEEDED) {
+      mergeTrace(trace, buildTrace);
+      return first;
+    }
+
+    if (trace) {
+      trace.budgetExceeded = true;
+    }
+    const quick = buildCacheEntry(absPath, mtime, {
+      signal,
+      languageMapper: false,
+      trace,
+    });
+    const winner = await Promise.race([
+      precise.then((entry) => ({ entry, provisional: false })),
+      quick.then((entry) => ({ entry, provisional: true })),
+    ]);
+
+    if (!winner.provisional || !winner.entry) {
+      const entry = winner.provisional ? await precise : winner.entry;
+      mergeTrace(trace, buildTrace);
+      return entry;
+    }
+
+    // Record the precise build on its own once it finishes
+    const buildStart = performance.now();
+    void precise
+      .catch(() => null)
+      .finally(() => {
+        buildTrace.outcome = ReadOutcome.Background;
+        buildTrace.totalMs = performance.now() - buildStart;
+        recordRead(buildTrace);
+      });
+
+    const entry: MapCacheEntry = {
+      ...winner.entry,
+      map: `${winner.entry.map}\n${QUICK_MAP_NOTE}`,
+      provisional: true,
+    };
+    const current = getCachedMap(absPath);
+    if (!current || current.mtime < mtime) {
+      setCachedMap(absPath, entry);
+    }
+    return entry;
+  } finally {
+    signal?.removeEventListener("abort", onAbort);
+  }
+}
+
+/**
+ * Reuse the map of a git blob for a file whose content is that blob, e.g.
+ * after a checkout touched it or when another worktree mapped it. The map
+ * is re-rendered when it was built for another path, and cached for this
+ * one. Returns null for untracked or modified files and unmapped blobs.
+ */
+async function getBlobEntry(
+  absPath: string,
+  mtime: number,
+  trace?: ReadTrace
+): Promise<MapCacheEntry | null> {
+  const blobId = await timeSpan(trace, ReadStage.GitBlob, () =>
+    getBlobId(absPath)
+  );
+  const shared = blobId ? getCachedBlobMap(blobId) : undefined;
+  if (!shared) {
+    return null;
+  }
+
+  let entry: MapCacheEntry = { ...shared, mtime };
+  if (shared.packedMap.path !== absPath) {
+    // The header names the file, so renders for the other path don't carry
+    const packedMap = { ...shared.packedMap, path: absPath };
+    entry = {
+      ...entry,
+      ...createEntry(mtime, packedMap, formatMap(packedMap)),
+    };
+  }
+  setCachedMap(absPath, entry);
+  if (trace) {
+    trace.cacheHit = true;
+  }
+  return entry;
+}
+
+/**
+ * Get the cache entry for the current version of a file, reusing the map
+ * of its git blob or generating and caching it when missing or stale.
+ */
+async function getCurrentMapEntry(
+  absPath: string,
+  mtime: number,
+  signal?: AbortSignal,
+  trace?: ReadTrace
+): Promise<MapCacheEntry | null> {
+  claimPrefetch(absPath, mtime);
+  const cached = getCachedMap(absPath);
+  let entry: MapCacheEntry | null = null;
+  if (cached && cached.mtime === mtime) {
+    entry = cached;
+    if (trace) {
+      trace.cacheHit = true;
+    }
+  } else {
+    entry =
+      (await getBlobEntry(absPath, mtime, trace)) ??
+      (await buildMapEntry(absPath, mtime, signal, trace));
+  }
+
+  if (entry) {
+    entry = inCurrentSettings(absPath, entry);
+  }
+  if (entry && trace) {
+    trace.detailLevel = entry.detailLevel;
+    trace.mapTokens = entry.tokens ?? estimateTokens(entry.map);
+  }
+  if (entry) {
+    prefetchImports(absPath, entry.packedMap.imports);
+  }
+  return entry;
+}
+
+/**
+ * Prefetch the maps of the local modules a mapped file imports, when
+ * enabled. Best-effort: failures only show in the prefetch statistics.
+ */
+function prefetchImports(absPath: string, imports: string[]): void {
+  if (!getSettings().prefetchImports || imports.length === 0) {
+    return;
+  }
+
+  void resolveLocalImports(absPath, imports, process.cwd()).then(
+    (paths) =>
+      prefetchMaps(paths, (path, mtime, signal) =>
+        buildPreciseEntry(path, mtime, {
+          priority: MapPriority.Prefetch,
+          signal,
+          deadline: Date.now() + PREFETCH.DEADLINE_MS,
+        })
+      ),
+    () => {
+      // Unresolvable imports are not prefetched
+    }
+  );
+}
+
+/**
+ * Regenerate a map at prefetch priority and cache it for the next read.
+ */
+function refreshInBackground(absPath: string, mtime: number): void {
+  void buildPreciseEntry(absPath, mtime, {
+    priority: MapPriority.Prefetch,
+  }).catch(() => {
+    // Best-effort: the next read regenerates synchronously
+  });
+}
+
+/**
+ * Serve the previous map of a changed file with its line numbers shifted
+ * to the current content, and regenerate the accurate map in the
+ * background. Returns null when stale serving is disabled or the file
+ * changed more than the configured limit.
+ */
+async function serveStaleMap(
+  absPath: string,
+  cached: MapCacheEntry,
+  size: number,
+  mtime: number,
+  signal?: AbortSignal,
+  trace?: ReadTrace
+): Promise<string | null> {
+  const settings = getSettings();
+  if (!settings.staleWhileRevalidate || !cached.lineHashes) {
+    return null;
+  }
+
+  const diff = diffLineHashes(
+    cached.lineHashes,
+    await timeSpan(trace, ReadStage.LineHash, () =>
+      hashFileLines(absPath, signal)
+    )
+  );
+  const percent = changedPercent(diff);
+  if (percent > settings.maxStaleChangedPercent) {
+    return null;
+  }
+
+  refreshInBackground(absPath, mtime);
+
+  const formatStart = performance.now();
+  const staleMap = formatMap(
+    packFileMap(shiftFileMap(unpackFileMap(cached.packedMap), diff, size))
+  );
+  addSpan(trace, ReadStage.Format, performance.now() - formatStart);
+  if (trace) {
+    trace.cacheHit = true;
+    trace.detailLevel = staleMap.detailLevel;
+    trace.formatPasses = staleMap.passes;
+    trace.mapTokens = staleMap.tokens;
+  }
+  return `${staleMap.text}\n[Map refreshing: the file changed since this map was built (${percent.toFixed(1)}% of lines). Line numbers are shifted to the current content; the next read returns an updated map.]`;
+}
+
+/**
+ * Get the formatted map for the current version of a file, serving a
+ * shifted stale map when enabled. Returns null when no map could be built.
+ */
+async function getMapText(
+  absPath: string,
+  size: number,
+  mtime: number,
+  signal?: AbortSignal,
+  trace?: ReadTrace
+): Promise<string | null> {
+  claimPrefetch(absPath, mtime);
+
+  // A changed mtime over unchanged git-tracked content needs no stale map
+  const cached = getCachedMap(absPath);
+  if (
+    cached &&
+    cached.mtime !== mtime &&
+    !(await getBlobEntry(absPath, mtime, trace))
+  ) {
+    const stale = await serveStaleMap(
+      absPath,
+      cached,
+      size,
+      mtime,
+      signal,
+      trace
+    ).catch(() => null);
+    if (stale !== null) {
+      return stale;
+    }
+  }
+
+  const entry = await getCurrentMapEntry(absPath, mtime, signal, trace);
+  return entry?.map ?? null;
+}
+
+/**
+ * The map text a read sends: the map, or its changes since the map this
+ * session last got for the file when those are much smaller. `fullMap`
+ * always sends the map.
+ */
+function mapOrDiff(
+  absPath: string,
+  displayPath: string,
+  mapText: string,
+  mtime: number,
+  fullMap = false,
+  trace?: ReadTrace
+): string {
+  // Quick and stale maps are stand-ins, not worth diffing or remembering
+  const entry = getCachedMap(absPath);
+  if (
+    !getSettings().mapDiffs ||
+    !entry ||
+    entry.mtime !== mtime ||
+    entry.provisional
+  ) {
+    return mapText;
+  }
+  const previous = getSessionMap(absPath);
+  rememberSessionMap(absPath, { mtime, packedMap: entry.packedMap });
+  if (fullMap || !previous || previous.mtime === mtime) {
+    return mapText;
+  }
+
+  const diff = diffPackedMaps(previous.packedMap, entry.packedMap);
+  const summary = summarizeMapDiff(diff);
+  const text =
+    summary === ""
+      ? `[Map unchanged since your read at turn ${previous.turn}: ${displayPath} changed, but not its symbols or their ranges. Pass resend=true for the full map.]`
+      : `[Map changed since your read at turn ${previous.turn}: ${summary} in ${displayPath}. Pass resend=true for the full map.]\n${formatMapDiff(diff)}`;
+  if (text.length > mapText.length * DEDUP.MAX_MAP_DIFF_RATIO) {
+    return mapText;
+  }
+  if (trace) {
+    trace.mapDiff = true;
+    trace.mapTokens = estimateTokens(text);
+  }
+  return text;
+}
+
+/**
+ * The cached map of a file version in the current render settings, null
+ * when only a stale map or none is cached.
+ */
+function currentMapRender(absPath: string, mtime: number): string | null {
+  const entry = getCachedMap(absPath);
+  return entry?.mtime === mtime ? inCurrentSettings(absPath, entry).map : null;
+}
+
+/**
+ * Serve an offset/limit read of a huge file through its line index.
+ * Returns null when the file is small or not a regular text file, so the
+ * caller delegates to the built-in read tool.
+ */
+async function readWithLineIndex(
+  absPath: string,
+  displayPath: string,
+  offset: number | undefined,
+  limit: number | undefined,
+  signal?: AbortSignal,
+  trace?: ReadTrace
+) {
+  if (hasBinaryExtension(absPath)) {
+    return null;
+  }
+
+  const stats = await stat(absPath);
+  if (
+    !stats.isFile() ||
+    stats.size < THRESHOLDS.INDEXED_READ_MIN_BYTES ||
+    (await isBinaryFile(absPath, stats.mtimeMs))
+  ) {
+    return null;
+  }
+
+  const range = await timeSpan(trace, ReadStage.LineIndex, async () => {
+    let index = getCachedLineIndex(absPath, stats.mtimeMs);
+    if (!index) {
+      index = await buildLineIndex(absPath, stats.mtimeMs, signal);
+      setCachedLineIndex(absPath, index);
+    }
+    return readIndexedRange(absPath, displayPath, index, offset, limit);
+  });
+  if (!range) {
+    return null;
+  }
+
+  if (trace) {
+    trace.bytes = stats.size;
+  }
+
+  return {
+    content: [{ type: "text" as const, text: range.text }],
+    details: { truncation: range.truncation },
+  };
+}
+
+/**
+ * Resolve a symbol against the file's map and read exactly its lines.
+ * Ambiguous queries return a short list of candidates instead.
+ */
+async function readSymbol(
+  builtInRead: ReturnType<typeof createReadTool>,
+  toolCallId: string,
+  inputPath: string,
+  absPath: string,
+  query: string,
+  signal?: AbortSignal,
+  trace?: ReadTrace
+) {
+  const stats = await timeSpan(trace, ReadStage.Stat, () => stat(absPath));
+  if (trace) {
+    trace.bytes = stats.size;
+  }
+  const entry = await getCurrentMapEntry(
+    absPath,
+    stats.mtimeMs,
+    signal,
+    trace
+  );
+  const fileMap = entry ? unpackFileMap(entry.packedMap) : null;
+  const matches = fileMap ? resolveSymbol(fileMap, query) : [];
+
+  if (matches.length === 0) {
+    const available = fileMap
+      ? fileMap.symbols
+          .slice(0, THRESHOLDS.MAX_SYMBOL_MATCHES)
+          .map((s) => s.name)
+          .join(", ")
+      : "";
+    // eslint-disable-next-line @factory/structured-logging
+    throw new Error(
+      `No symbol matching "${query}" in ${inputPath}.${available ? ` Top-level symbols: ${available}` : ""}`
+    );
+  }
+
+  const [match] = matches;
+  if (!match || matches.length > 1) {
+    const listed = matches
+      .slice(0, THRESHOLDS.MAX_SYMBOL_MATCHES)
+      .map((m) => `  ${formatSymbolMatch(m)}`);
+    const more = matches.length - listed.length;
+    const text = [
+      `${matches.length} symbols match "${query}" in ${inputPath}:`,
+      ...listed,
+      ...(more > 0 ? [`  ...${more} more`] : []),
+      "",
+      "Use a qualified name (e.g. Class.method) or read(path, offset=LINE, limit=N).",
+    ].join("\n");
+    return {
+      content: [{ type: "text" as const, text }],
+      details: undefined,
+    };
+  }
+
+  const { symbol } = match;
+  if (symbol.startByte !== undefined && symbol.endByte !== undefined) {
+    const { startByte, endByte } = symbol;
+    const text = await timeSpan(trace, ReadStage.ByteRange, () =>
+      readByteRange(absPath, startByte, endByte - startByte)
+    );
+    return {
+      content: [
+        { type: "text" as const, text: `[${formatSymbolMatch(match)}]` },
+        { type: "text" as const, text },
+      ],
+      details: undefined,
+    };
+  }
+
+  const range = {
+    path: inputPath,
+    offset: symbol.startLine,
+    limit: symbol.endLine - symbol.startLine + 1,
+  };
+  const result =
+    (await readWithLineIndex(
+      absPath,
+      inputPath,
+      range.offset,
+      range.limit,
+      signal,
+      trace
+    ).catch(() => null)) ??
+    (await timeSpan(trace, ReadStage.BuiltInRead, () =>
+      builtInRead.execute(toolCallId, range, signal)
+    ));
+
+  return {
+    ...result,
+    content: [
+      { type: "text" as const, text: `[${formatSymbolMatch(match)}]` },
+      ...result.content,
+    ],
+  };
+}
+
+/**
+ * Serve one page of the part of a file's cached map within a line range,
+ * at Full detail where the page budget allows.
+ */
+async function readMapSlice(
+  inputPath: string,
+  absPath: string,
+  options: MapSliceOptions & { page?: number },
+  signal?: AbortSignal,
+  trace?: ReadTrace
+) {
+  const { startLine, endLine, depth, page = 1 } = options;
+  if (
+    startLine !== undefined &&
+    endLine !== undefined &&
+    startLine > endLine
+  ) {
+    // eslint-disable-next-line @factory/structured-logging
+    throw new Error(`startLine ${startLine} is after endLine ${endLine}.`);
+  }
+
+  const stats = await timeSpan(trace, ReadStage.Stat, () => stat(absPath));
+  if (trace) {
+    trace.bytes = stats.size;
+  }
+  let entry = await getCurrentMapEntry(
+    absPath,
+    stats.mtimeMs,
+    signal,
+    trace
+  );
+  // A quick map lacks the detail a drill-down is for: wait for the
+  // precise build, which a provisional entry always has in flight
+  if (entry?.provisional) {
+    entry =
+      (await buildPreciseEntry(absPath, stats.mtimeMs, { signal })) ?? entry;
+  }
+  if (!entry) {
+    // eslint-disable-next-line @factory/structured-logging
+    throw new Error(`No map could be built for ${inputPath}.`);
+  }
+
+  const slice = slicePackedMap(entry.packedMap, {
+    startLine,
+    endLine,
+    depth,
+  });
+  const range = `lines ${formatNumber(startLine ?? 1)}-${formatNumber(endLine ?? entry.packedMap.totalLines)}`;
+  if (slice.symbols.length === 0) {
+    // eslint-disable-next-line @factory/structured-logging
+    throw new Error(`No symbols in ${range} of ${inputPath}.`);
+  }
+
+  const formatStart = performance.now();
+  const { maxMapTokens, mapFormat } = getSettings();
+  const pages = paginateMap(slice, maxMapTokens ?? undefined, mapFormat);
+  const pageMap = pages[page - 1];
+  if (!pageMap) {
+    // eslint-disable-next-line @factory/structured-logging
+    throw new Error(
+      `Page ${page} is out of range: the map of ${range} has ${pages.length} pages.`
+    );
+  }
+  const budgeted = formatWithBudget(
+    pageMap,
+    THRESHOLDS.MAX_TRUNCATED_BYTES,
+    maxMapTokens ?? undefined,
+    mapFormat
+  );
+  addSpan(trace, ReadStage.Format, performance.now() - formatStart);
+  if (trace) {
+    trace.outcome = ReadOutcome.MapSlice;
+    trace.detailLevel = budgeted.detailLevel;
+    trace.mapTokens = budgeted.tokens;
+  }
+
+  const first = pageMap.symbols.at(0)?.startLine ?? 1;
+  const last = pageMap.symbols.at(-1)?.endLine ?? first;
+  const next =
+    page < pages.length
+      ? ` Next: read_map with page=${page + 1}.`
+      : " This is the last page.";
+  return {
+    content: [
+      {
+        type: "text" as const,
+        text: `${budgeted.text}\n[Map page ${page} of ${pages.length} for ${range}: symbols in lines ${formatNumber(first)}-${formatNumber(last)}.${next}]`,
+      },
+    ],
+    details: undefined,
+  };
+}
+
+/**
+ * Answer a read the session already received with a short note (plus the
+ * current map), and a read of a changed file with a diff of its content,
+ * unless `resend` is set. A re-read whose quick, stale or differently
+ * rendered map has since been replaced is served again. Every text read
+ * is remembered for the session.
+ */
+async function readWithDedup<
+  T extends {
+    content: ({ type: "text"; text: string } | { type: string })[];
+  },
+>(
+  absPath: string,
+  params: Parameters<typeof sessionReadKey>[1] & {
+    path: string;
+    resend?: boolean;
+  },
+  trace: ReadTrace,
+  read: () => Promise<T>,
+  signal?: AbortSignal
+): Promise<
+  T | { content: { type: "text"; text: string }[]; details: undefined }
+> {
+  const stats = getSettings().dedupReads
+    ? await stat(absPath).catch(() => null)
+    : null;
+  if (!stats?.isFile()) {
+    return read();
+  }
+
+  const key = sessionReadKey(absPath, params);
+  const previous = params.resend ? undefined : getSessionRead(key);
+  const unchangedNote = (turn: number) =>
+    `[Unchanged since your read at turn ${turn}: ${params.path} has the same content for this range. Pass resend=true to get it again.]`;
+  if (
+    previous &&
+    previous.mtime === stats.mtimeMs &&
+    (previous.map === undefined ||
+      previous.map === currentMapRender(absPath, stats.mtimeMs))
+  ) {
+    const mapText = previous.mapped
+      ? await getMapText(absPath, stats.size, stats.mtimeMs, signal, trace)
+      : null;
+    trace.outcome = ReadOutcome.Unchanged;
+    return {
+      content: [
+        { type: "text" as const, text: unchangedNote(previous.turn) },
+        ...(mapText === null
+          ? []
+          : [{ type: "text" as const, text: mapText }]),
+      ],
+      details: undefined,
+    };
+  }
+
+  const result = await read();
+  const texts = result.content.filter(
+    (c): c is { type: "text"; text: string } => c.type === "text"
+  );
+  if (texts.length !== result.content.length) {
+    return result;
+  }
+
+  const mapped = trace.outcome === ReadOutcome.Map;
+  const content = (mapped ? texts.slice(0, -1) : texts)
+    .map((c) => c.text)
+    .join("\n");
+  const map =
+    mapped || trace.outcome === ReadOutcome.MapOnly
+      ? currentMapRender(absPath, stats.mtimeMs)
+      : undefined;
+  rememberSessionRead(key, { mtime: stats.mtimeMs, content, mapped, map });
+
+  // Line diffs only make sense for line-addressed reads, and map-only
+  // reads of a changed file are diffed by symbol instead
+  const lineRead =
+    params.symbol === undefined &&
+    params.byteOffset === undefined &&
+    params.byteLength === undefined &&
+    !(trace.outcome === ReadOutcome.MapOnly && getSettings().mapDiffs);
+  if (!previous || !lineRead) {
+    return result;
+  }
+  const diff = formatLineDiff(previous.content, content, params.offset ?? 1);
+  if (diff.length > content.length * DEDUP.MAX_DIFF_RATIO) {
+    return result;
+  }
+
+  // A touched but unchanged file diffs empty
+  trace.outcome = diff === "" ? ReadOutcome.Unchanged : ReadOutcome.Diff;
+  return {
+    ...result,
+    content: [
+      {
+        type: "text" as const,
+        text:
+          diff === ""
+            ? unchangedNote(previous.turn)
+            : `[Changed since your read at turn ${previous.turn}: showing only the differences in ${params.path} for this range. Pass resend=true for the full content.]\n${diff}`,
+      },
+      ...(mapped ? texts.slice(-1) : []),
+    ],
+  };
 }
 
 export default function piReadMapExtension(pi: ExtensionAPI): void {
   // Get the current working directory
   const cwd = process.cwd();
 
+  loadSettings(cwd);
+
   // Create the built-in read tool to delegate to
   const builtInRead = createReadTool(cwd);
 
@@ -95,7 +1000,7 @@ export default function piReadMapExtension(pi: ExtensionAPI): void {
   pi.registerTool({
     name: "read",
     label: "Read",
-    description: `Read the contents of a file. Supports text files and images (jpg, png, gif, webp). Images are sent as attachments. For text files, output is truncated to ${DEFAULT_MAX_LINES} lines or ${Math.round(DEFAULT_MAX_BYTES / 1024)}KB (whichever is hit first). If truncated, a structural map of the file is included to enable targeted reads. Use offset/limit for large files.`,
+    description: `Read the contents of a file. Supports text files and images (jpg, png, gif, webp). Images are sent as attachments. For text files, output is truncated to ${DEFAULT_MAX_LINES} lines or ${Math.round(DEFAULT_MAX_BYTES / 1024)}KB (whichever is hit first). If truncated, a structural map of the file is included to enable targeted reads. Use offset/limit or symbol for large files (byteOffset/byteLength for minified ones), or mode 'map' for just the map.`,
     parameters: Type.Object({
       path: Type.String({
         description: "Path to the file to read (relative or absolute)",
@@ -108,120 +1013,399 @@ export default function piReadMapExtension(pi: ExtensionAPI): void {
       limit: Type.Optional(
         Type.Number({ description: "Maximum number of lines to read" })
       ),
+      byteOffset: Type.Optional(
+        Type.Number({
+          description:
+            "Byte offset to start reading from (0-indexed), for minified or single-line files whose map lists byte ranges",
+        })
+      ),
+      byteLength: Type.Optional(
+        Type.Number({ description: "Maximum number of bytes to read" })
+      ),
+      symbol: Type.Optional(
+        Type.String({
+          description:
+            "Symbol to read instead of a line range, e.g. 'BatchProcessor.run' or a partial name. Resolved against the file map; returns exactly that symbol's lines, or a list of candidates if several match",
+        })
+      ),
+      mode: Type.Optional(
+        Type.Enum(ReadMode, {
+          description:
+            "'map' returns only the structural map of the file, without its content; 'content' forces a normal read",
+        })
+      ),
+      resend: Type.Optional(
+        Type.Boolean({
+          description:
+            "Return the full content and map even if this read already returned them earlier in the session",
+        })
+      ),
     }),
 
     async execute(toolCallId, params, signal, onUpdate) {
-      const { path: inputPath, offset, limit } = params;
-
-      // If offset or limit provided, delegate directly (targeted read)
-      if (offset !== undefined || limit !== undefined) {
-        return builtInRead.execute(toolCallId, params, signal, onUpdate);
-      }
+      const read = async (trace: ReadTrace) => {
+        const {
+          path: inputPath,
+          offset,
+          limit,
+          byteOffset,
+          byteLength,
+          symbol,
+          mode,
+          resend,
+        } = params;
+        const delegate = () =>
+          timeSpan(trace, ReadStage.BuiltInRead, () =>
+            builtInRead.execute(toolCallId, params, signal, onUpdate)
+          );
 
-      // Resolve path
-      const absPath = resolve(cwd, inputPath.replace(/^@/, ""));
+        // Resolve path
+        const absPath = resolve(cwd, inputPath.replace(/^@/, ""));
 
-      // Skip binary/image files — delegate directly without map generation
-      if (BINARY_EXTENSIONS.has(extname(absPath).toLowerCase())) {
-        return builtInRead.execute(toolCallId, params, signal, onUpdate);
-      }
+        // Symbol-addressed read: resolve against the map, read its lines
+        if (symbol !== undefined) {
+          trace.outcome = ReadOutcome.Symbol;
+          return readSymbol(
+            builtInRead,
+            toolCallId,
+            inputPath,
+            absPath,
+            symbol,
+            signal,
+            trace
+          );
+        }
 
-      // Check file size and line count
-      let stats;
-      try {
-        stats = await stat(absPath);
-      } catch {
-        // Let built-in handle the error
-        return builtInRead.execute(toolCallId, params, signal, onUpdate);
-      }
+        // Byte-range read, for files whose lines are too long to address
+        if (
+          (byteOffset !== undefined || byteLength !== undefined) &&
+          !hasBinaryExtension(absPath)
+        ) {
+          // Misnamed binaries are sniffed as on every other path; a missing
+          // file is left to the byte-range read to report
+          const stats = await stat(absPath).catch(() => null);
+          if (
+            stats?.isFile() &&
+            (await timeSpan(trace, ReadStage.Sniff, () =>
+              isBinaryFile(absPath, stats.mtimeMs)
+            ))
+          ) {
+            return delegate();
+          }
+          const text = await timeSpan(trace, ReadStage.ByteRange, () =>
+            readByteRange(absPath, byteOffset, byteLength)
+          );
+          trace.outcome = ReadOutcome.ByteRange;
+          return {
+            content: [{ type: "text" as const, text }],
+            details: undefined,
+          };
+        }
 
-      // For non-regular files, handle appropriately
-      if (!stats.isFile()) {
-        if (stats.isDirectory()) {
-          // Instead of letting EISDIR propagate and sending a custom steer message,
-          // we run ls and embed the listing directly into the thrown error.
-          // This prevents steer from breaking parallel executions.
-          let lsText: string | null = null;
-          try {
-            const lsResult = await builtInLs.execute(
-              toolCallId,
-              { path: inputPath },
-              signal
-            );
-            lsText = lsResult.content
-              .filter(
-                (c): c is { type: "text"; text: string } => c.type === "text"
-              )
-              .map((c) => c.text)
-              .join("\n");
-          } catch {
-            // best-effort: if ls fails, just let the error through without listing
+        // Targeted read: seek via the line index for huge files, otherwise
+        // delegate directly
+        if (offset !== undefined || limit !== undefined) {
+          const indexed = await readWithLineIndex(
+            absPath,
+            inputPath,
+            offset,
+            limit,
+            signal,
+            trace
+          ).catch(() => null);
+          if (indexed) {
+            trace.outcome = ReadOutcome.Indexed;
+            return indexed;
           }
+          return delegate();
+        }
 
-          if (lsText !== null) {
-            // eslint-disable-next-line @factory/structured-logging
-            throw new Error(
-              `EISDIR: illegal operation on a directory, read '${absPath}'\n\nFallback ls output for this directory:\n${lsText}`
-            );
+        // Skip binary/image files — delegate directly without map generation
+        if (hasBinaryExtension(absPath)) {
+          return delegate();
+        }
+
+        // Check file size and line count
+        let stats;
+        try {
+          stats = await timeSpan(trace, ReadStage.Stat, () => stat(absPath));
+        } catch {
+          // Let built-in handle the error
+          return delegate();
+        }
+        trace.bytes = stats.size;
+
+        // For non-regular files, handle appropriately
+        if (!stats.isFile()) {
+          if (stats.isDirectory()) {
+            // Instead of letting EISDIR propagate and sending a custom steer message,
+            // we run ls and embed the listing directly into the thrown error.
+            // This prevents steer from breaking parallel executions.
+            let lsText: string | null = null;
+            try {
+              const lsResult = await builtInLs.execute(
+                toolCallId,
+                { path: inputPath },
+                signal
+              );
+              lsText = lsResult.content
+                .filter(
+                  (c): c is { type: "text"; text: string } => c.type === "text"
+                )
+                .map((c) => c.text)
+                .join("\n");
+            } catch {
+              // best-effort: if ls fails, just let the error through without listing
+            }
+
+            if (lsText !== null) {
+              // eslint-disable-next-line @factory/structured-logging
+              throw new Error(
+                `EISDIR: illegal operation on a directory, read '${absPath}'\n\nFallback ls output for this directory:\n${lsText}`
+              );
+            }
+
+            // Fallback if ls fails for some reason
+            return delegate();
           }
+          return delegate();
+        }
 
-          // Fallback if ls fails for some reason
-          return builtInRead.execute(toolCallId, params, signal, onUpdate);
+        // Sniff the content: misnamed or extensionless binaries go straight
+        // to the built-in read, before any subprocess touches them
+        if (
+          await timeSpan(trace, ReadStage.Sniff, () =>
+            isBinaryFile(absPath, stats.mtimeMs)
+          )
+        ) {
+          return delegate();
         }
-        return builtInRead.execute(toolCallId, params, signal, onUpdate);
-      }
 
-      // Quick check: if file is small enough by bytes, delegate
-      if (stats.size <= DEFAULT_MAX_BYTES) {
-        return builtInRead.execute(toolCallId, params, signal, onUpdate);
-      }
+        // Map-only read: return just the map, without the content dump
+        const { mapOnlyAboveBytes } = getSettings();
+        const wantsMap =
+          mode === ReadMode.Map ||
+          (mode === undefined &&
+            mapOnlyAboveBytes !== null &&
+            stats.size > mapOnlyAboveBytes);
+        if (wantsMap) {
+          const mapText = await getMapText(
+            absPath,
+            stats.size,
+            stats.mtimeMs,
+            signal,
+            trace
+          );
+          if (mapText !== null) {
+            trace.outcome = ReadOutcome.MapOnly;
+            const shownMap = mapOrDiff(
+              absPath,
+              inputPath,
+              mapText,
+              stats.mtimeMs,
+              resend,
+              trace
+            );
+            return {
+              content: [
+                {
+                  type: "text" as const,
+                  text: `${shownMap}\n[Map only: file content was not read. Use offset/limit or symbol to read specific lines, or mode="content" for the first chunk.]`,
+                },
+              ],
+              details: undefined,
+            };
+          }
+          // No map could be built: fall through to a normal read
+        }
 
-      // Need to check line count too
-      let totalLines: number;
-      try {
-        const { stdout } = await execAsync(`wc -l < "${absPath}"`, { signal });
-        totalLines = Number.parseInt(stdout.trim(), 10) || 0;
-      } catch {
-        // If we can't count lines, delegate
-        return builtInRead.execute(toolCallId, params, signal, onUpdate);
-      }
+        // Quick check: if file is small enough by bytes, delegate
+        if (stats.size <= DEFAULT_MAX_BYTES) {
+          return delegate();
+        }
 
-      // If within threshold, delegate
-      if (!shouldGenerateMap(totalLines, stats.size)) {
-        return builtInRead.execute(toolCallId, params, signal, onUpdate);
-      }
+        // Need to check line count too
+        let totalLines: number;
+        try {
+          const { stdout } = await timeSpan(trace, ReadStage.LineCount, () =>
+            execAsync(`wc -l < "${absPath}"`, { signal })
+          );
+          totalLines = Number.parseInt(stdout.trim(), 10) || 0;
+        } catch {
+          // If we can't count lines, delegate
+          return delegate();
+        }
 
-      // File exceeds threshold - generate map and inline it in the tool result
-      const result = await builtInRead.execute(
-        toolCallId,
-        params,
-        signal,
-        onUpdate
-      );
+        // If within threshold, delegate
+        if (!shouldGenerateMap(totalLines, stats.size)) {
+          return delegate();
+        }
 
-      // Generate or retrieve cached map
-      let mapText: string;
-      const cached = mapCache.get(absPath);
+        // File exceeds threshold - generate map and inline it in the tool result
+        const result = await delegate();
 
-      if (cached && cached.mtime === stats.mtimeMs) {
-        mapText = cached.map;
-      } else {
-        const fileMap = await generateMap(absPath, { signal });
+        // Generate or retrieve cached map, serving a stale one if enabled
+        const mapText = await getMapText(
+          absPath,
+          stats.size,
+          stats.mtimeMs,
+          signal,
+          trace
+        );
 
-        if (!fileMap) {
+        if (mapText === null) {
           // Map generation failed, return original result
           return result;
         }
 
-        mapText = formatFileMapWithBudget(fileMap);
-        mapCache.set(absPath, { mtime: stats.mtimeMs, map: mapText });
+        // Append map to the tool result content
+        trace.outcome = ReadOutcome.Map;
+        return {
+          ...result,
+          content: [
+            ...result.content,
+            {
+              type: "text" as const,
+              text: mapOrDiff(
+                absPath,
+                inputPath,
+                mapText,
+                stats.mtimeMs,
+                resend,
+                trace
+              ),
+            },
+          ],
+        };
+      };
+
+      return await traceRead(params.path, (trace) =>
+        readWithDedup(
+          resolve(cwd, params.path.replace(/^@/, "")),
+          params,
+          trace,
+          () => read(trace),
+          signal
+        )
+      );
+    },
+  });
+
+  pi.registerTool({
+    name: "read_map",
+    label: "Read Map",
+    description:
+      "Read the structural map of a file, or of the symbols within a line range of it, at full detail with signatures. Served from the cached map without reading or re-parsing the file. Use it to explore the symbols a truncated map omitted; large maps are split into pages.",
+    parameters: Type.Object({
+      path: Type.String({
+        description: "Path to the file to map (relative or absolute)",
+      }),
+      startLine: Type.Optional(
+        Type.Number({
+          description: "First line of the range to map (1-indexed)",
+        })
+      ),
+      endLine: Type.Optional(
+        Type.Number({ description: "Last line of the range to map" })
+      ),
+      depth: Type.Optional(
+        Type.Number({
+          description:
+            "Levels of nesting to show: 1 for top-level symbols only, 2 to add their members (default: all)",
+          minimum: 1,
+        })
+      ),
+      page: Type.Optional(
+        Type.Number({
+          description: "Page of the map to return (1-indexed, default 1)",
+          minimum: 1,
+        })
+      ),
+    }),
+
+    async execute(_toolCallId, params, signal) {
+      return await traceRead(params.path, (trace) =>
+        readMapSlice(
+          params.path,
+          resolve(cwd, params.path.replace(/^@/, "")),
+          params,
+          signal,
+          trace
+        )
+      );
+    },
+  });
+
+  // The agent loses returned content when its session changes, forks or
+  // moves in its tree, or its context is compacted: resend everything
+  // after that
+  pi.on("turn_start", (event) => {
+    setSessionTurn(event.turnIndex);
+  });
+  pi.on("session_compact", () => {
+    clearSessionReads();
+  });
+  pi.on("session_switch", () => {
+    clearSessionReads();
+  });
+  pi.on("session_fork", () => {
+    clearSessionReads();
+  });
+  pi.on("session_tree", () => {
+    clearSessionReads();
+  });
+
+  pi.registerCommand("readmap-format", {
+    description:
+      "Show or set the map format for this session (standard, dense)",
+    handler: async (args, ctx) => {
+      const requested = args.trim();
+      if (!requested) {
+        ctx.ui.notify(
+          `read-map: map format is ${getSettings().mapFormat}`,
+          "info"
+        );
+        return;
       }
 
-      // Append map to the tool result content
-      return {
-        ...result,
-        content: [...result.content, { type: "text" as const, text: mapText }],
-      };
+      const formats: string[] = Object.values(MapFormat);
+      if (!formats.includes(requested)) {
+        ctx.ui.notify(
+          `read-map: unknown map format "${requested}" (use ${formats.join(" or ")})`,
+          "error"
+        );
+        return;
+      }
+
+      updateSettings({ mapFormat: requested as MapFormat });
+      ctx.ui.notify(`read-map: map format set to ${requested}`, "info");
+    },
+  });
+
+  pi.registerCommand("readmap-stats", {
+    description: "Show read-map timing statistics (or: export [path], reset)",
+    handler: async (args, ctx) => {
+      const [action, target] = args.trim().split(/\s+/);
+
+      if (action === "reset") {
+        resetReadStats();
+        resetPrefetchStats();
+        resetSchedulerStats();
+        ctx.ui.notify("read-map: statistics reset", "info");
+        return;
+      }
+
+      if (action === "export") {
+        const filePath = resolve(cwd, target ?? "read-map-stats.jsonl");
+        const count = await exportReadStats(filePath);
+        ctx.ui.notify(
+          `read-map: exported ${count} reads to ${filePath}`,
+          "info"
+        );
+        return;
+      }
+
+      ctx.ui.notify(formatReadStats(), "info");
     },
   });
 }
@@ -0,0 +1,363 @@
+/**
+ * Cheap line-level diffing over per-line hashes.
+ *
+ * Files are reduced to one 32-bit FNV-1a hash per line, so a previous
+ * version can be kept in memory at 4 bytes per line. Two versions are
+ * aligned patience-style: common prefix and suffix, then lines that are
+ * unique in both versions as anchors, extended over neighbouring equal
+ * lines. The result maps old line numbers to new ones.
+ */
+import { createReadStream } from "node:fs";
+
+import type { FileMap, FileSymbol, LineDiff, MatchedRun } from "./types.js";
+
+const FNV_OFFSET = 0x81_1c_9d_c5;
+const FNV_PRIME = 0x01_00_01_93;
+const NEWLINE = 0x0a;
+
+interface HashState {
+  hashes: Uint32Array;
+  count: number;
+  hash: number;
+  pending: boolean;
+}
+
+function createHashState(): HashState {
+  return {
+    hashes: new Uint32Array(1024),
+    count: 0,
+    hash: FNV_OFFSET,
+    pending: false,
+  };
+}
+
+function pushHash(state: HashState): void {
+  if (state.count === state.hashes.length) {
+    const grown = new Uint32Array(state.hashes.length * 2);
+    grown.set(state.hashes);
+    state.hashes = grown;
+  }
+  state.hashes[state.count++] = state.hash;
+  state.hash = FNV_OFFSET;
+  state.pending = false;
+}
+
+function updateHashState(state: HashState, bytes: Uint8Array): void {
+  for (const byte of bytes) {
+    if (byte === NEWLINE) {
+      pushHash(state);
+    } else {
+      state.hash = Math.imul(state.hash ^ byte, FNV_PRIME) >>> 0;
+      state.pending = true;
+    }
+  }
+}
+
+function finishHashState(state: HashState): Uint32Array {
+  if (state.pending) {
+    pushHash(state);
+  }
+  return state.hashes.slice(0, state.count);
+}
+
+/**
+ * Hash every line of a string.
+ */
+export function hashLines(content: string): Uint32Array {
+  const state = createHashState();
+  updateHashState(state, Buffer.from(content, "utf8"));
+  return finishHashState(state);
+}
+
+/**
+ * Hash every line of a file without decoding it.
+ */
+export async function hashFileLines(
+  filePath: string,
+  signal?: AbortSignal
+): Promise<Uint32Array> {
+  const state = createHashState();
+  for await (const chunk of createReadStream(filePath, { signal })) {
+    updateHashState(state, chunk as Buffer);
+  }
+  return finishHashState(state);
+}
+
+/**
+ * Indices of pairs forming the longest run increasing in `newIndex`.
+ * Pairs must already be ordered by `oldIndex`.
+ */
+function longestIncreasing(
+  pairs: { oldIndex: number; newIndex: number }[]
+): { oldIndex: number; newIndex: number }[] {
+  const tails: number[] = [];
+  const previous = new Int32Array(pairs.length).fill(-1);
+
+  for (let i = 0; i < pairs.length; i++) {
+    const value = pairs[i]?.newIndex ?? 0;
+    let low = 0;
+    let high = tails.length;
+    while (low < high) {
+      const mid = (low + high) >> 1;
+      if ((pairs[tails[mid] ?? 0]?.newIndex ?? 0) < value) {
+        low = mid + 1;
+      } else {
+        high = mid;
+      }
+    }
+    if (low > 0) {
+      previous[i] = tails[low - 1] ?? -1;
+    }
+    tails[low] = i;
+  }
+
+  const result: { oldIndex: number; newIndex: number }[] = [];
+  let index = tails.at(-1) ?? -1;
+  while (index !== -1) {
+    const pair = pairs[index];
+    if (pair) {
+      result.push(pair);
+    }
+    index = previous[index] ?? -1;
+  }
+  return result.reverse();
+}
+
+/**
+ * Lines that occur exactly once in both ranges, ordered by old index.
+ */
+function uniqueAnchors(
+  oldHashes: Uint32Array,
+  newHashes: Uint32Array,
+  start: number,
+  oldEnd: number,
+  newEnd: number
+): { oldIndex: number; newIndex: number }[] {
+  const seen = new Map<
+    number,
+    { oldCount: number; oldIndex: number; newCount: number; newIndex: number }
+  >();
+
+  for (let i = start; i < oldEnd; i++) {
+    const hash = oldHashes[i] ?? 0;
+    const entry = seen.get(hash);
+    if (entry) {
+      entry.oldCount++;
+    } else {
+      seen.set(hash, { oldCount: 1, oldIndex: i, newCount: 0, newIndex: -1 });
+    }
+  }
+  for (let i = start; i < newEnd; i++) {
+    const entry = seen.get(newHashes[i] ?? 0);
+    if (entry) {
+      entry.newCount++;
+      entry.newIndex = i;
+    }
+  }
+
+  const anchors: { oldIndex: number; newIndex: number }[] = [];
+  for (const entry of seen.values()) {
+    if (entry.oldCount === 1 && entry.newCount === 1) {
+      anchors.push({ oldIndex: entry.oldIndex, newIndex: entry.newIndex });
+    }
+  }
+  return anchors.sort((a, b) => a.oldIndex - b.oldIndex);
+}
+
+/**
+ * Align two versions of a file given their per-line hashes.
+ */
+export function diffLineHashes(
+  oldHashes: Uint32Array,
+  newHashes: Uint32Array
+): LineDiff {
+  const oldLines = oldHashes.length;
+  const newLines = newHashes.length;
+  const shortest = Math.min(oldLines, newLines);
+  const runs: MatchedRun[] = [];
+
+  let prefix = 0;
+  while (prefix < shortest && oldHashes[prefix] === newHashes[prefix]) {
+    prefix++;
+  }
+  let suffix = 0;
+  while (
+    suffix < shortest - prefix &&
+    oldHashes[oldLines - 1 - suffix] === newHashes[newLines - 1 - suffix]
+  ) {
+    suffix++;
+  }
+
+  if (prefix > 0) {
+    runs.push({ oldStart: 1, newStart: 1, length: prefix });
+  }
+
+  // Extend each unique-line anchor over equal neighbours into a run
+  const oldEnd = oldLines - suffix;
+  const newEnd = newLines - suffix;
+  let lastOld = prefix;
+  let lastNew = prefix;
+  const anchors = longestIncreasing(
+    uniqueAnchors(oldHashes, newHashes, prefix, oldEnd, newEnd)
+  );
+
+  for (const anchor of anchors) {
+    let { oldIndex: o, newIndex: n } = anchor;
+    if (o < lastOld || n < lastNew) {
+      continue;
+    }
+    while (
+      o > lastOld &&
+      n > lastNew &&
+      oldHashes[o - 1] === newHashes[n - 1]
+    ) {
+      o--;
+      n--;
+    }
+    let oEnd = anchor.oldIndex;
+    let nEnd = anchor.newIndex;
+    while (
+      oEnd < oldEnd &&
+      nEnd < newEnd &&
+      oldHashes[oEnd] === newHashes[nEnd]
+    ) {
+      oEnd++;
+      nEnd++;
+    }
+    runs.push({ oldStart: o + 1, newStart: n + 1, length: oEnd - o });
+    lastOld = oEnd;
+    lastNew = nEnd;
+  }
+
+  if (suffix > 0) {
+    runs.push({
+      oldStart: oldEnd + 1,
+      newStart: newEnd + 1,
+      length: suffix,
+    });
+  }
+
+  const matched = runs.reduce((sum, run) => sum + run.length, 0);
+  return {
+    oldLines,
+    newLines,
+    runs,
+    changedLines: Math.max(oldLines, newLines) - matched,
+  };
+}
+
+/**
+ * Percentage of lines that differ between the two versions.
+ */
+export function changedPercent(diff: LineDiff): number {
+  const total = Math.max(diff.oldLines, diff.newLines);
+  return total === 0 ? 0 : (diff.changedLines / total) * 100;
+}
+
+/**
+ * Map a line of the old version to the corresponding line of the new one.
+ * Lines inside changed hunks keep their offset from the preceding run.
+ */
+export function mapLine(diff: LineDiff, line: number): number {
+  const { runs } = diff;
+  let low = 0;
+  let high = runs.length - 1;
+  let index = -1;
+  while (low <= high) {
+    const mid = (low + high) >> 1;
+    if ((runs[mid]?.oldStart ?? 0) <= line) {
+      index = mid;
+      low = mid + 1;
+    } else {
+      high = mid - 1;
+    }
+  }
+
+  const run = runs[index];
+  let mapped = line;
+  if (run) {
+    const offset = line - run.oldStart;
+    mapped =
+      offset < run.length
+        ? run.newStart + offset
+        : Math.min(
+            run.newStart + offset,
+            (runs[index + 1]?.newStart ?? Number.POSITIVE_INFINITY) - 1
+          );
+  }
+  return Math.max(1, Math.min(mapped, diff.newLines));
+}
+
+function shiftSymbol(symbol: FileSymbol, diff: LineDiff): FileSymbol {
+  const startLine = mapLine(diff, symbol.startLine);
+  const shifted: FileSymbol = {
+    ...symbol,
+    startLine,
+    endLine: Math.max(startLine, mapLine(diff, symbol.endLine)),
+  };
+  if (symbol.children) {
+    shifted.children = symbol.children.map((c) => shiftSymbol(c, diff));
+  }
+  return shifted;
+}
+
+/**
+ * Move every symbol of a map from the old version's lines to the new one's.
+ */
+export function shiftFileMap(
+  map: FileMap,
+  diff: LineDiff,
+  totalBytes: number
+): FileMap {
+  return {
+    ...map,
+    totalLines: diff.newLines,
+    totalBytes,
+    symbols: map.symbols.map((s) => shiftSymbol(s, diff)),
+  };
+}
+
+function splitLines(text: string): string[] {
+  const lines = text.split("\n");
+  if (text.endsWith("\n")) {
+    lines.pop();
+  }
+  return lines;
+}
+
+/**
+ * Render the changes between two texts as unified-diff hunks without
+ * context lines, numbering lines from `firstLine`. Empty when equal.
+ */
+export function formatLineDiff(
+  oldText: string,
+  newText: string,
+  firstLine = 1
+): string {
+  const oldLines = splitLines(oldText);
+  const newLines = splitLines(newText);
+  const diff = diffLineHashes(hashLines(oldText), hashLines(newText));
+  const end: MatchedRun = {
+    oldStart: diff.oldLines + 1,
+    newStart: diff.newLines + 1,
+    length: 0,
+  };
+
+  const hunks: string[] = [];
+  let oldLine = 1;
+  let newLine = 1;
+  for (const run of [...diff.runs, end]) {
+    if (run.oldStart > oldLine || run.newStart > newLine) {
+      const removed = oldLines.slice(oldLine - 1, run.oldStart - 1);
+      const added = newLines.slice(newLine - 1, run.newStart - 1);
+      hunks.push(
+        `@@ -${oldLine + firstLine - 1},${removed.length} +${newLine + firstLine - 1},${added.length} @@`,
+        ...removed.map((line) => `-${line}`),
+        ...added.map((line) => `+${line}`)
+      );
+    }
+    oldLine = run.oldStart + run.length;
+    newLine = run.newStart + run.length;
+  }
+  return hunks.join("\n");
+}
@@ -0,0 +1,210 @@
+/**
+ * Sparse line-offset index for targeted reads of huge files.
+ *
+ * The built-in read tool splits the whole file to find line `offset`.
+ * The index records the byte offset of every `stride`-th line, so a
+ * targeted read seeks to the nearest indexed line and scans at most
+ * `stride` lines plus the requested range.
+ */
+import type { TruncationResult } from "@mariozechner/pi-coding-agent";
+
+import {
+  DEFAULT_MAX_BYTES,
+  DEFAULT_MAX_LINES,
+  formatSize,
+  truncateHead,
+} from "@mariozechner/pi-coding-agent";
+import { createReadStream } from "node:fs";
+import { open } from "node:fs/promises";
+
+import type { LineIndex } from "./types.js";
+
+import { THRESHOLDS } from "./constants.js";
+
+const NEWLINE = 0x0a;
+const CHUNK_BYTES = 64 * 1024;
+
+/**
+ * Scan a file once and record the byte offset of every `stride`-th line.
+ */
+export async function buildLineIndex(
+  filePath: string,
+  mtime: number,
+  signal?: AbortSignal,
+  stride: number = THRESHOLDS.LINE_INDEX_STRIDE
+): Promise<LineIndex> {
+  const offsets: number[] = [0];
+  let newlines = 0;
+  let position = 0;
+
+  for await (const chunk of createReadStream(filePath, { signal })) {
+    const bytes = chunk as Buffer;
+    let at = bytes.indexOf(NEWLINE);
+    while (at !== -1) {
+      newlines++;
+      if (newlines % stride === 0) {
+        offsets.push(position + at + 1);
+      }
+      at = bytes.indexOf(NEWLINE, at + 1);
+    }
+    position += bytes.length;
+  }
+
+  return {
+    mtime,
+    size: position,
+    stride,
+    offsets: Float64Array.from(offsets),
+    totalLines: newlines + 1,
+  };
+}
+
+/**
+ * Bytes of the selected lines, as the built-in read would join them.
+ */
+interface LineSlice {
+  content: string;
+  /** Size of the first selected line (may exceed what was read) */
+  firstLineBytes: number;
+}
+
+/**
+ * Read lines [startLine, startLine + lineCount) using the index, stopping
+ * once more than `maxBytes` have been collected.
+ */
+async function readSlice(
+  filePath: string,
+  index: LineIndex,
+  startLine: number,
+  lineCount: number,
+  maxBytes: number
+): Promise<LineSlice> {
+  const block = Math.floor((startLine - 1) / index.stride);
+  let position = index.offsets[block] ?? 0;
+  let line = block * index.stride + 1;
+
+  const handle = await open(filePath, "r");
+  try {
+    const buffer = Buffer.alloc(CHUNK_BYTES);
+    const collected: Buffer[] = [];
+    let collectedBytes = 0;
+    let startByte = line === startLine ? position : -1;
+    let linesDone = 0;
+    let firstLineBytes = -1;
+    let done = false;
+
+    while (!done && position < index.size) {
+      const { bytesRead } = await handle.read(buffer, 0, CHUNK_BYTES, position);
+      if (bytesRead === 0) {
+        break;
+      }
+      const chunk = buffer.subarray(0, bytesRead);
+      let from = 0;
+
+      // Skip whole lines until the requested start line
+      while (startByte === -1) {
+        const at = chunk.indexOf(NEWLINE, from);
+        if (at === -1) {
+          from = bytesRead;
+          break;
+        }
+        from = at + 1;
+        line++;
+        if (line === startLine) {
+          startByte = position + from;
+        }
+      }
+
+      // Collect the requested lines
+      let at = startByte === -1 ? -1 : chunk.indexOf(NEWLINE, from);
+      let end = startByte === -1 ? from : bytesRead;
+      while (at !== -1) {
+        if (firstLineBytes === -1) {
+          firstLineBytes = collectedBytes + at - from;
+        }
+        linesDone++;
+        if (linesDone === lineCount) {
+          end = at;
+          done = true;
+          break;
+        }
+        at = chunk.indexOf(NEWLINE, at + 1);
+      }
+
+      if (collectedBytes <= maxBytes) {
+        const part = chunk.subarray(from, end);
+        collected.push(Buffer.from(part));
+        collectedBytes += part.length;
+      } else if (firstLineBytes !== -1) {
+        // Enough content to decide truncation, and the first line's size is known
+        done = true;
+      } else {
+        collectedBytes += end - from;
+      }
+      position += bytesRead;
+    }
+
+    const content = Buffer.concat(collected).subarray(0, maxBytes + 1);
+    return {
+      content: content.toString("utf8"),
+      firstLineBytes: firstLineBytes === -1 ? collectedBytes : firstLineBytes,
+    };
+  } finally {
+    await handle.close();
+  }
+}
+
+/**
+ * Read an offset/limit range through the index, producing the same text
+ * and truncation notices as the built-in read tool.
+ *
+ * Returns null when the range can't be served from the index (e.g. the
+ * offset is past the end), so the caller can delegate to the built-in tool.
+ */
+export async function readIndexedRange(
+  filePath: string,
+  displayPath: string,
+  index: LineIndex,
+  offset: number | undefined,
+  limit: number | undefined
+): Promise<{ text: string; truncation: TruncationResult } | null> {
+  const startLine = offset ? Math.max(1, offset) : 1;
+  if (startLine > index.totalLines) {
+    return null;
+  }
+
+  const available = index.totalLines - startLine + 1;
+  const selectedLines =
+    limit === undefined ? available : Math.min(limit, available);
+  const slice = await readSlice(
+    filePath,
+    index,
+    startLine,
+    Math.min(selectedLines, DEFAULT_MAX_LINES + 1),
+    DEFAULT_MAX_BYTES
+  );
+
+  const truncation = {
+    ...truncateHead(slice.content),
+    totalLines: selectedLines,
+  };
+
+  let text: string;
+  if (truncation.firstLineExceedsLimit) {
+    text = `[Line ${startLine} is ${formatSize(slice.firstLineBytes)}, exceeds ${formatSize(DEFAULT_MAX_BYTES)} limit. Use bash: sed -n '${startLine}p' ${displayPath} | head -c ${DEFAULT_MAX_BYTES}]`;
+  } else if (truncation.truncated) {
+    const endLine = startLine + truncation.outputLines - 1;
+    const limitNote =
+      truncation.truncatedBy === "lines"
+        ? ""
+        : ` (${formatSize(DEFAULT_MAX_BYTES)} limit)`;
+    text = `${truncation.content}\n\n[Showing lines ${startLine}-${endLine} of ${index.totalLines}${limitNote}. Use offset=${endLine + 1} to continue.]`;
+  } else if (limit !== undefined && startLine - 1 + limit < index.totalLines) {
+    const nextOffset = startLine + limit;
+    text = `${truncation.content}\n\n[${index.totalLines - nextOffset + 1} more lines in file. Use offset=${nextOffset} to continue.]`;
+  } else {
+    text = truncation.content;
+  }
+
+  return { text, truncation };
+}
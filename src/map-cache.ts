@@ -0,0 +1,143 @@
+/**
+ * In-memory cache of generated maps, line indexes, resumable mapper state
+ * and binary verdicts, keyed by absolute path. Maps of unmodified tracked
+ * files are also kept by git blob ID, shared across branches and worktrees.
+ * Each map keeps its renders, so a re-render with other settings reuses
+ * the raw map instead of running the mapper again.
+ */
+import type {
+  AppendState,
+  BudgetedMap,
+  LineIndex,
+  MapCacheEntry,
+} from "./types.js";
+
+import { THRESHOLDS } from "./constants.js";
+
+const entries = new Map<string, MapCacheEntry>();
+const blobEntries = new Map<string, MapCacheEntry>();
+const lineIndexes = new Map<string, LineIndex>();
+const appendStates = new Map<string, AppendState>();
+const binaryVerdicts = new Map<string, { mtime: number; binary: boolean }>();
+
+/**
+ * Get the cached entry for a file, regardless of its mtime.
+ */
+export function getCachedMap(absPath: string): MapCacheEntry | undefined {
+  return entries.get(absPath);
+}
+
+/**
+ * Store the entry for a file, replacing any previous one.
+ */
+export function setCachedMap(absPath: string, entry: MapCacheEntry): void {
+  entries.set(absPath, entry);
+}
+
+/**
+ * Get an entry's map rendered with the settings `key` stands for, calling
+ * `render` only the first time. The oldest render is evicted once an
+ * entry holds `MAX_RENDERS_PER_MAP`.
+ */
+export function getCachedRender(
+  entry: MapCacheEntry,
+  key: string,
+  render: () => BudgetedMap
+): BudgetedMap {
+  let budgeted = entry.renders.get(key);
+  if (!budgeted) {
+    budgeted = render();
+    if (entry.renders.size >= THRESHOLDS.MAX_RENDERS_PER_MAP) {
+      const oldest = entry.renders.keys().next();
+      if (!oldest.done) {
+        entry.renders.delete(oldest.value);
+      }
+    }
+    entry.renders.set(key, budgeted);
+  }
+  return budgeted;
+}
+
+/**
+ * Get the entry built for a git blob, from whichever path it was mapped at.
+ */
+export function getCachedBlobMap(blobId: string): MapCacheEntry | undefined {
+  return blobEntries.get(blobId);
+}
+
+/**
+ * Store the entry for a git blob, replacing any previous one.
+ */
+export function setCachedBlobMap(blobId: string, entry: MapCacheEntry): void {
+  blobEntries.set(blobId, entry);
+}
+
+/**
+ * Get the line index for a file if it was built for this mtime.
+ */
+export function getCachedLineIndex(
+  absPath: string,
+  mtime: number
+): LineIndex | undefined {
+  const index = lineIndexes.get(absPath);
+  return index?.mtime === mtime ? index : undefined;
+}
+
+/**
+ * Store the line index for a file, replacing any previous one.
+ */
+export function setCachedLineIndex(absPath: string, index: LineIndex): void {
+  lineIndexes.set(absPath, index);
+}
+
+/**
+ * Get the resumable mapper state for a file.
+ */
+export function getCachedAppendState(
+  filePath: string
+): AppendState | undefined {
+  return appendStates.get(filePath);
+}
+
+/**
+ * Store the resumable mapper state for a file, replacing any previous one.
+ */
+export function setCachedAppendState(
+  filePath: string,
+  state: AppendState
+): void {
+  appendStates.set(filePath, state);
+}
+
+/**
+ * Get whether a file was sniffed as binary, if it was sniffed at this mtime.
+ */
+export function getCachedBinaryVerdict(
+  absPath: string,
+  mtime: number
+): boolean | undefined {
+  const verdict = binaryVerdicts.get(absPath);
+  return verdict?.mtime === mtime ? verdict.binary : undefined;
+}
+
+/**
+ * Store whether a file version is binary.
+ */
+export function setCachedBinaryVerdict(
+  absPath: string,
+  mtime: number,
+  binary: boolean
+): void {
+  binaryVerdicts.set(absPath, { mtime, binary });
+}
+
+/**
+ * Drop all cached maps, line indexes, mapper states and binary verdicts.
+ */
+export function clearMapCache(): void {
+  entries.clear();
+  blobEntries.clear();
+  lineIndexes.clear();
+  appendStates.clear();
+  binaryVerdicts.clear();
+}
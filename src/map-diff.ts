@@ -0,0 +1,218 @@
+/**
+ * Symbol-level diffs between two maps of a file.
+ *
+ * An edit to a mapped file usually leaves most of its symbols intact but
+ * moved. Symbols are matched by kind and qualified name, the nth of a
+ * repeated name to the nth. Matched symbols whose size changed are
+ * resized, unmatched ones added or removed, and consecutive matched
+ * symbols that moved by the same amount form one shifted region.
+ */
+import type {
+  FileSymbol,
+  MapDiff,
+  PackedFileMap,
+  ShiftedRegion,
+} from "./types.js";
+
+import { DetailLevel, SymbolKind } from "./enums.js";
+import { formatNumber, hasByteRanges } from "./format-utils.js";
+import {
+  kindAt,
+  materializeSymbol,
+  nameAt,
+  topLevelRows,
+} from "./packed-map.js";
+
+interface QualifiedRows {
+  /** Qualified name of each row, e.g. `Parser.parse` */
+  names: string[];
+  /** Key matching each row to its counterpart in another map */
+  keys: string[];
+}
+
+function qualifyRows(packed: PackedFileMap): QualifiedRows {
+  const names: string[] = [];
+  const keys: string[] = [];
+  const occurrences = new Map<string, number>();
+  for (let row = 0; row < packed.count; row++) {
+    const parent = packed.parents[row] ?? -1;
+    const name = nameAt(packed, row);
+    names.push(parent >= 0 ? `${names[parent]}.${name}` : name);
+
+    const key = `${kindAt(packed, row)} ${names[row]}`;
+    const occurrence = occurrences.get(key) ?? 0;
+    occurrences.set(key, occurrence + 1);
+    keys.push(`${key}#${occurrence}`);
+  }
+  return { names, keys };
+}
+
+/** Start of a row, in bytes when diffing by bytes */
+function startOf(
+  packed: PackedFileMap,
+  row: number,
+  byBytes: boolean
+): number {
+  const start = byBytes ? packed.startBytes[row] : packed.startLines[row];
+  return start === undefined || Number.isNaN(start) ? 0 : start;
+}
+
+/** End of a row, in bytes when diffing by bytes */
+function endOf(packed: PackedFileMap, row: number, byBytes: boolean): number {
+  const end = byBytes ? packed.endBytes[row] : packed.endLines[row];
+  return end === undefined || Number.isNaN(end)
+    ? startOf(packed, row, byBytes)
+    : end;
+}
+
+/**
+ * Changes from the map `before` to the map `after` of the same file.
+ * Positions are compared in bytes when both maps address bytes.
+ */
+export function diffPackedMaps(
+  before: PackedFileMap,
+  after: PackedFileMap
+): MapDiff {
+  const byBytes =
+    hasByteRanges(before, topLevelRows(before)) &&
+    hasByteRanges(after, topLevelRows(after));
+  const earlier = qualifyRows(before);
+  const later = qualifyRows(after);
+  const symbolAt = (
+    packed: PackedFileMap,
+    row: number,
+    names: string[]
+  ): FileSymbol => ({
+    ...materializeSymbol(packed, row, DetailLevel.Outline),
+    name: names[row] ?? "",
+  });
+
+  const beforeRows = new Map(earlier.keys.map((key, row) => [key, row]));
+  const matched = new Uint8Array(before.count);
+  const added = new Uint8Array(after.count);
+  const diff: MapDiff = {
+    added: [],
+    removed: [],
+    resized: [],
+    shifted: [],
+    byBytes,
+  };
+
+  let region: ShiftedRegion | null = null;
+  for (let row = 0; row < after.count; row++) {
+    const parent = after.parents[row] ?? -1;
+    const previous = beforeRows.get(later.keys[row] ?? "");
+    if (previous === undefined) {
+      // A new symbol's members are new too, and go without saying
+      added[row] = 1;
+      if (parent < 0 || !added[parent]) {
+        diff.added.push(symbolAt(after, row, later.names));
+      }
+      continue;
+    }
+    matched[previous] = 1;
+
+    const start = startOf(after, row, byBytes);
+    const end = endOf(after, row, byBytes);
+    const previousStart = startOf(before, previous, byBytes);
+    const previousEnd = endOf(before, previous, byBytes);
+    if (end - start !== previousEnd - previousStart) {
+      diff.resized.push({
+        before: symbolAt(before, previous, earlier.names),
+        after: symbolAt(after, row, later.names),
+      });
+    }
+
+    const shift = start - previousStart;
+    if (shift !== 0 && region?.shift === shift) {
+      region.end = Math.max(region.end, end);
+    } else {
+      region = shift === 0 ? null : { start, end, shift };
+      if (region) {
+        diff.shifted.push(region);
+      }
+    }
+  }
+
+  for (let row = 0; row < before.count; row++) {
+    const parent = before.parents[row] ?? -1;
+    if (!matched[row] && (parent < 0 || matched[parent])) {
+      diff.removed.push(symbolAt(before, row, earlier.names));
+    }
+  }
+  return diff;
+}
+
+/**
+ * One-line count of a diff's changes, e.g. `2 added, 1 resized`. Empty
+ * when the maps match.
+ */
+export function summarizeMapDiff(diff: MapDiff): string {
+  const counts: [number, string][] = [
+    [diff.added.length, "added"],
+    [diff.removed.length, "removed"],
+    [diff.resized.length, "resized"],
+    [
+      diff.shifted.length,
+      diff.shifted.length === 1 ? "region shifted" : "regions shifted",
+    ],
+  ];
+  return counts
+    .filter(([count]) => count > 0)
+    .map(([count, label]) => `${formatNumber(count)} ${label}`)
+    .join(", ");
+}
+
+function formatRange(symbol: FileSymbol, byBytes: boolean): string {
+  if (byBytes && symbol.startByte !== undefined) {
+    return `[bytes ${symbol.startByte}-${symbol.endByte ?? symbol.startByte}]`;
+  }
+  return symbol.startLine === symbol.endLine
+    ? `[${symbol.startLine}]`
+    : `[${symbol.startLine}-${symbol.endLine}]`;
+}
+
+function formatChanged(symbol: FileSymbol, byBytes: boolean): string {
+  const kind = symbol.kind === SymbolKind.Unknown ? "symbol" : symbol.kind;
+  return `  ${kind} ${symbol.name} ${formatRange(symbol, byBytes)}`;
+}
+
+/**
+ * Render a diff as sections of added, removed, resized and shifted
+ * symbols, leaving out empty ones.
+ */
+export function formatMapDiff(diff: MapDiff): string {
+  const { byBytes } = diff;
+  const lines: string[] = [];
+  if (diff.added.length > 0) {
+    lines.push("Added:");
+    for (const symbol of diff.added) {
+      lines.push(formatChanged(symbol, byBytes));
+    }
+  }
+  if (diff.removed.length > 0) {
+    lines.push("Removed:");
+    for (const symbol of diff.removed) {
+      lines.push(formatChanged(symbol, byBytes));
+    }
+  }
+  if (diff.resized.length > 0) {
+    lines.push("Resized:");
+    for (const { before, after } of diff.resized) {
+      lines.push(
+        `${formatChanged(after, byBytes)}, was ${formatRange(before, byBytes)}`
+      );
+    }
+  }
+  if (diff.shifted.length > 0) {
+    lines.push("Shifted:");
+    const unit = byBytes ? "bytes" : "lines";
+    for (const { start, end, shift } of diff.shifted) {
+      const by = `${shift > 0 ? "+" : "-"}${formatNumber(Math.abs(shift))}`;
+      lines.push(
+        `  ${unit} ${formatNumber(start)}-${formatNumber(end)} by ${by}`
+      );
+    }
+  }
+  return lines.join("\n");
+}
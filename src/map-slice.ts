@@ -0,0 +1,71 @@
+/**
+ * Slices of a cached file map, for drill-down reads with `read_map`.
+ *
+ * A slice keeps the symbols overlapping a line range at every depth, so a
+ * class spanning the whole range is kept with only the members inside it.
+ * Slices are cut from the packed map, so only the symbols they keep are
+ * materialized.
+ */
+import type {
+  FileMap,
+  FileSymbol,
+  MapSliceOptions,
+  PackedFileMap,
+} from "./types.js";
+
+import { DetailLevel } from "./enums.js";
+import {
+  childRows,
+  fileFields,
+  materializeSymbol,
+  topLevelRows,
+} from "./packed-map.js";
+
+function sliceRows(
+  packed: PackedFileMap,
+  rows: Iterable<number>,
+  startLine: number,
+  endLine: number,
+  depth: number
+): FileSymbol[] {
+  const sliced: FileSymbol[] = [];
+  for (const row of rows) {
+    if (
+      (packed.endLines[row] ?? 0) < startLine ||
+      (packed.startLines[row] ?? 0) > endLine
+    ) {
+      continue;
+    }
+    const symbol = materializeSymbol(packed, row, DetailLevel.Full, false);
+    const kept =
+      depth > 1
+        ? sliceRows(
+            packed,
+            childRows(packed, row),
+            startLine,
+            endLine,
+            depth - 1
+          )
+        : [];
+    if (kept.length > 0) {
+      symbol.children = kept;
+    }
+    sliced.push(symbol);
+  }
+  return sliced;
+}
+
+/**
+ * The part of a packed map overlapping `startLine`-`endLine`, nested at
+ * most `depth` levels, as a Full-detail map.
+ */
+export function slicePackedMap(
+  packed: PackedFileMap,
+  { startLine = 1, endLine = Infinity, depth = Infinity }: MapSliceOptions
+): FileMap {
+  return {
+    ...fileFields(packed),
+    detailLevel: DetailLevel.Full,
+    symbols: sliceRows(packed, topLevelRows(packed), startLine, endLine, depth),
+  };
+}
@@ -0,0 +1,125 @@
+/**
+ * Cost model for choosing between mappers.
+ *
+ * Each mapper declares an estimated run time as a linear function of file
+ * size and line count, the richest detail level it delivers faithfully,
+ * and the command it needs to run. `generateMap` predicts the detail level
+ * the map budget will allow for a file and tries the cheapest mapper able
+ * to deliver it first; richer but slower mappers follow as fallbacks.
+ */
+import { exec } from "node:child_process";
+import { promisify } from "node:util";
+
+import type { MapperCost } from "./types.js";
+
+import { COST_MODEL, MAPPER_COSTS, THRESHOLDS } from "./constants.js";
+import { DetailLevel } from "./enums.js";
+import { getSettings } from "./settings.js";
+
+const execAsync = promisify(exec);
+
+/** Detail levels from richest to poorest */
+const DETAIL_ORDER = Object.values(DetailLevel);
+
+const commandChecks = new Map<string, Promise<boolean>>();
+
+/**
+ * Cost model of a mapper, with the `mapperCosts` setting applied.
+ */
+export function getMapperCost(mapper: string): MapperCost {
+  return {
+    ...(MAPPER_COSTS[mapper] ?? COST_MODEL.DEFAULT_COST),
+    ...getSettings().mapperCosts[mapper],
+  };
+}
+
+/**
+ * Estimated run time of a mapper on a file, in milliseconds.
+ */
+export function estimateMapperMs(
+  mapper: string,
+  bytes: number,
+  lines: number
+): number {
+  const cost = getMapperCost(mapper);
+  return (
+    cost.fixedMs +
+    (cost.msPerMB * bytes) / (1024 * 1024) +
+    (cost.msPerKLines * lines) / 1000
+  );
+}
+
+/**
+ * Detail level the map budget is expected to allow for a file, from a
+ * deliberately low estimate of map size per source line.
+ */
+export function predictDetailLevel(lines: number): DetailLevel {
+  const tiers: {
+    level: Exclude<DetailLevel, DetailLevel.Truncated>;
+    budget: number;
+  }[] = [
+    { level: DetailLevel.Full, budget: THRESHOLDS.FULL_TARGET_BYTES },
+    { level: DetailLevel.Compact, budget: THRESHOLDS.COMPACT_TARGET_BYTES },
+    { level: DetailLevel.Minimal, budget: THRESHOLDS.MAX_MAP_BYTES },
+    { level: DetailLevel.Outline, budget: THRESHOLDS.MAX_OUTLINE_BYTES },
+  ];
+  for (const { level, budget } of tiers) {
+    if (lines * COST_MODEL.MAP_BYTES_PER_LINE[level] <= budget) {
+      return level;
+    }
+  }
+  return DetailLevel.Truncated;
+}
+
+/**
+ * Check whether a mapper can deliver at least the given detail level.
+ */
+function canDeliver(mapper: string, level: DetailLevel): boolean {
+  return (
+    DETAIL_ORDER.indexOf(getMapperCost(mapper).detail) <=
+    DETAIL_ORDER.indexOf(level)
+  );
+}
+
+/**
+ * Order candidate mappers for a file: those able to deliver the predicted
+ * detail level first, cheapest first, then the others in their given order.
+ */
+export function planMappers(
+  candidates: string[],
+  bytes: number,
+  lines: number
+): string[] {
+  const level = predictDetailLevel(lines);
+  const capable = candidates
+    .filter((mapper) => canDeliver(mapper, level))
+    .sort(
+      (a, b) =>
+        estimateMapperMs(a, bytes, lines) - estimateMapperMs(b, bytes, lines)
+    );
+  return [
+    ...capable,
+    ...candidates.filter((mapper) => !capable.includes(mapper)),
+  ];
+}
+
+/**
+ * Check whether the command a mapper needs is installed. Results are
+ * cached for the lifetime of the process.
+ */
+export function isMapperAvailable(mapper: string): Promise<boolean> {
+  const { requires } = getMapperCost(mapper);
+  if (!requires) {
+    return Promise.resolve(true);
+  }
+
+  let check = commandChecks.get(requires);
+  if (!check) {
+    check = execAsync(`${requires} --version`, { timeout: 5000 }).then(
+      () => true,
+      () => false
+    );
+    commandChecks.set(requires, check);
+  }
+  return check;
+}
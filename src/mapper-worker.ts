@@ -0,0 +1,53 @@
+/**
+ * Worker-thread entry point for the in-process mappers.
+ *
+ * Each worker keeps its own module state, so the ts-morph `Project` and
+ * tree-sitter parsers stay warm across tasks sent to the same worker.
+ */
+import { parentPort } from "node:worker_threads";
+
+import type { MapperFn, WorkerRequest, WorkerResponse } from "./types.js";
+
+import { cMapper } from "./mappers/c.js";
+import { clojureMapper } from "./mappers/clojure.js";
+import { cppMapper } from "./mappers/cpp.js";
+import { markdownMapper } from "./mappers/markdown.js";
+import { rustMapper } from "./mappers/rust.js";
+import { sqlMapper } from "./mappers/sql.js";
+import { tomlMapper } from "./mappers/toml.js";
+import { typescriptMapper } from "./mappers/typescript.js";
+import { yamlMapper } from "./mappers/yaml.js";
+
+/**
+ * Mappers that can run inside a worker, keyed by language ID.
+ * Must stay in sync with `WORKER_LANGUAGES` in worker-pool.ts.
+ */
+const WORKER_MAPPERS: Record<string, MapperFn> = {
+  typescript: typescriptMapper,
+  javascript: typescriptMapper,
+  rust: rustMapper,
+  cpp: cppMapper,
+  "c-header": cppMapper,
+  clojure: clojureMapper,
+  c: cMapper,
+  sql: sqlMapper,
+  markdown: markdownMapper,
+  yaml: yamlMapper,
+  toml: tomlMapper,
+};
+
+parentPort?.on("message", async (request: WorkerRequest) => {
+  const mapper = WORKER_MAPPERS[request.languageId];
+  let response: WorkerResponse;
+
+  try {
+    const result = mapper ? await mapper(request.filePath) : null;
+    response = { id: request.id, result };
+  } catch (error) {
+    response = { id: request.id, result: null, error: String(error) };
+  }
+
+  parentPort?.postMessage(response);
+});
+
+parentPort?.postMessage({ ready: true });
@@ -1,7 +1,11 @@
-import type { FileMap, MapOptions } from "./types.js";
+import { stat } from "node:fs/promises";
 
-import { THRESHOLDS } from "./constants.js";
+import type { FileMap, MapOptions, MapperFn, ReadTrace } from "./types.js";
+
+import { COST_MODEL, SCHEDULER, THRESHOLDS } from "./constants.js";
+import { MapPriority, MapperKind } from "./enums.js";
 import { detectLanguage } from "./language-detect.js";
+import { isMapperAvailable, planMappers } from "./mapper-costs.js";
 import { cMapper } from "./mappers/c.js";
 import { clojureMapper } from "./mappers/clojure.js";
 import { cppMapper } from "./mappers/cpp.js";
@@ -12,17 +16,15 @@ import { goMapper } from "./mappers/go.js";
 import { jsonMapper } from "./mappers/json.js";
 import { jsonlMapper } from "./mappers/jsonl.js";
 import { markdownMapper } from "./mappers/markdown.js";
+import { averageLineBytes, minifiedMapper } from "./mappers/minified.js";
 import { pythonMapper } from "./mappers/python.js";
 import { rustMapper } from "./mappers/rust.js";
 import { sqlMapper } from "./mappers/sql.js";
 import { tomlMapper } from "./mappers/toml.js";
 import { typescriptMapper } from "./mappers/typescript.js";
 import { yamlMapper } from "./mappers/yaml.js";
-
-type MapperFn = (
-  filePath: string,
-  signal?: AbortSignal
-) => Promise<FileMap | null>;
+import { createUrgency, followUrgency, schedule } from "./scheduler.js";
+import { canUseWorkers, runInWorker } from "./worker-pool.js";
 
 /**
  * Registry of language-specific mappers.
@@ -63,49 +65,181 @@ const MAPPERS: Record<string, MapperFn> = {
   clojure: clojureMapper,
 };
 
+/**
+ * Run a language mapper, moving it to the worker pool when the file is
+ * large enough for an in-process parse to stall the event loop.
+ */
+async function runLanguageMapper(
+  languageId: string,
+  mapper: MapperFn,
+  filePath: string,
+  options: MapOptions
+): Promise<FileMap | null> {
+  const { signal, useWorkers = true } = options;
+
+  if (useWorkers && canUseWorkers(languageId)) {
+    const stats = await stat(filePath).catch(() => null);
+    if (stats && stats.size >= THRESHOLDS.WORKER_MIN_BYTES) {
+      try {
+        return await runInWorker(languageId, filePath, signal);
+      } catch {
+        // Worker unavailable or crashed, run in-process instead
+      }
+    }
+  }
+
+  return mapper(filePath, signal);
+}
+
+/**
+ * Scheduler resource class for each language mapper.
+ * Languages not listed here run in-process (or on the worker pool).
+ */
+const MAPPER_KINDS: Record<string, MapperKind> = {
+  python: MapperKind.Python,
+  go: MapperKind.Go,
+  json: MapperKind.Jq,
+  jsonl: MapperKind.Stream,
+  csv: MapperKind.Stream,
+};
+
+/**
+ * Languages the minified tokenizer understands. Long lines in other
+ * languages (SQL dumps, one-paragraph-per-line Markdown) are left to
+ * their own mappers.
+ */
+const TOKENIZED_LANGUAGES = new Set(["javascript", "typescript", "json"]);
+
+/**
+ * Run one step of the mapper chain, recording it on the read's trace.
+ */
+async function tryMapper(
+  trace: ReadTrace | undefined,
+  mapper: string,
+  run: () => Promise<FileMap | null>
+): Promise<FileMap | null> {
+  const start = performance.now();
+  let result: FileMap | null = null;
+  try {
+    result = await run();
+    return result;
+  } finally {
+    if (trace) {
+      trace.attempts.push({
+        mapper,
+        ms: performance.now() - start,
+        ok: result !== null,
+      });
+      if (result) {
+        trace.mapper = mapper;
+        trace.fallbackDepth = trace.attempts.length - 1;
+      }
+    }
+  }
+}
+
 /**
  * Generate a structural map for a file.
  *
- * Dispatches to the appropriate language-specific mapper,
- * falling back to ctags (if available) then grep-based extraction.
+ * Dispatches to the tokenizer for minified files, otherwise to the
+ * language-specific mapper and ctags in the order chosen by their cost
+ * models, then to grep-based extraction.
+ * Every step goes through the scheduler; when the deadline leaves no time
+ * for the precise mappers they are skipped in favor of the grep fallback.
  */
 export async function generateMap(
   filePath: string,
   options: MapOptions = {}
 ): Promise<FileMap | null> {
-  const { signal } = options;
+  const {
+    signal,
+    priority = MapPriority.Foreground,
+    deadline,
+    trace,
+    languageMapper = true,
+  } = options;
+  const urgency = options.urgency ?? createUrgency(priority, deadline);
+  // Precise mappers must leave time for the grep fallback
+  const scheduleOptions = {
+    signal,
+    urgency: followUrgency(urgency, SCHEDULER.FALLBACK_RESERVE_MS),
+  };
 
   // Detect language
   const langInfo = detectLanguage(filePath);
-
-  if (!langInfo) {
-    // Unknown language, try ctags then fallback
-    const ctagsResult = await ctagsMapper(filePath, signal);
-    if (ctagsResult) {
-      return ctagsResult;
+  const size = (await stat(filePath).catch(() => null))?.size ?? 0;
+  const lineBytes = await averageLineBytes(filePath).catch(() => 0);
+
+  // Minified and single-line scripts: line ranges say nothing and the AST
+  // mappers are slow, so map them by byte range with the tokenizer
+  const minified =
+    languageMapper &&
+    (!langInfo || TOKENIZED_LANGUAGES.has(langInfo.id)) &&
+    lineBytes >= THRESHOLDS.LONG_LINE_AVERAGE_BYTES;
+  if (minified) {
+    const result = await tryMapper(trace, "minified", () =>
+      schedule(
+        MapperKind.InProcess,
+        (taskSignal) => minifiedMapper(filePath, taskSignal),
+        scheduleOptions
+      )
+    );
+    if (result) {
+      return result;
     }
-    return fallbackMapper(filePath, signal);
   }
 
-  // Try language-specific mapper
-  const mapper = MAPPERS[langInfo.id];
+  // Try the language-specific mapper and ctags, cheapest first among
+  // those able to deliver the detail level the budget allows. Files the
+  // tokenizer couldn't map get their language mapper too
+  const mapper = langInfo && languageMapper ? MAPPERS[langInfo.id] : undefined;
+  const runners: Record<string, () => Promise<FileMap | null>> = {
+    ctags: () =>
+      schedule(
+        MapperKind.Ctags,
+        (taskSignal) => ctagsMapper(filePath, taskSignal),
+        scheduleOptions
+      ),
+  };
+  if (langInfo && mapper) {
+    runners[langInfo.id] = () =>
+      schedule(
+        MAPPER_KINDS[langInfo.id] ?? MapperKind.InProcess,
+        (taskSignal) =>
+          runLanguageMapper(langInfo.id, mapper, filePath, {
+            ...options,
+            signal: taskSignal,
+          }),
+        scheduleOptions
+      );
+  }
 
-  if (mapper) {
-    const result = await mapper(filePath, signal);
+  const lines = size / (lineBytes || COST_MODEL.DEFAULT_LINE_BYTES);
+  const candidates = langInfo && mapper ? [langInfo.id, "ctags"] : ["ctags"];
+  for (const name of planMappers(candidates, size, lines)) {
+    if (signal?.aborted) {
+      return null;
+    }
+    const run = runners[name];
+    if (!run || !(await isMapperAvailable(name))) {
+      continue;
+    }
+    const result = await tryMapper(trace, name, run);
     if (result) {
       return result;
     }
-    // Mapper failed, fall through to ctags/fallback
-  }
-
-  // Try ctags as intermediate fallback (better than grep when available)
-  const ctagsResult = await ctagsMapper(filePath, signal);
-  if (ctagsResult) {
-    return ctagsResult;
+    // Mapper failed or ran out of time, fall through to the next one
   }
 
-  // Use grep-based fallback mapper
-  return fallbackMapper(filePath, signal);
+  // Use grep-based fallback mapper. It gets no deadline: a late cheap map
+  // is better than none.
+  return tryMapper(trace, "fallback", () =>
+    schedule(
+      MapperKind.Grep,
+      (taskSignal) => fallbackMapper(filePath, taskSignal),
+      { signal, urgency: followUrgency(urgency, null) }
+    )
+  );
 }
 
 /**
@@ -1,12 +1,11 @@
 /**
- * CSV/TSV mapper using in-process parsing.
+ * CSV/TSV mapper using in-process streaming.
  *
  * Extracts header columns, row count, and sample data.
  */
-import { readFile, stat } from "node:fs/promises";
-
-import type { FileMap, FileSymbol } from "../types.js";
+import type { AppendableMapper, FileMap, FileSymbol } from "../types.js";
 
+import { mapAppendable } from "../append-map.js";
 import { DetailLevel, SymbolKind } from "../enums.js";
 
 /**
@@ -51,90 +50,118 @@ function parseLine(line: string, delimiter: string): string[] {
   return fields;
 }
 
+/** Resumable state of the CSV mapper. */
+interface CsvState {
+  /** Non-empty lines seen */
+  rows: number;
+  /** First non-empty line (the header) */
+  headerLine: string | null;
+  /** Second non-empty line (the sample row) */
+  sampleLine: string | null;
+}
+
 /**
- * Generate a file map for CSV/TSV files.
+ * Build the map once all lines have been consumed.
  */
-export async function csvMapper(
-  filePath: string,
-  signal?: AbortSignal
-): Promise<FileMap | null> {
-  try {
-    const stats = await stat(filePath);
-    const totalBytes = stats.size;
-
-    const content = await readFile(filePath, "utf8");
-
-    if (signal?.aborted) {
-      return null;
-    }
+function finishCsvMap(
+  state: CsvState,
+  file: { path: string; totalBytes: number; newlines: number }
+): FileMap | null {
+  const { headerLine: firstLine, sampleLine } = state;
+  // Counted like content.split("\n")
+  const totalLines = file.newlines + 1;
+
+  if (!firstLine) {
+    return null;
+  }
 
-    const lines = content.split(/\r?\n/).filter((l) => l.trim() !== "");
-    const totalLines = content.split("\n").length;
+  const delimiter = detectDelimiter(firstLine);
+  const headers = parseLine(firstLine, delimiter);
 
-    if (lines.length === 0) {
-      return null;
-    }
+  if (headers.length === 0) {
+    return null;
+  }
 
-    const [firstLine] = lines;
-    if (!firstLine) {
-      return null;
-    }
+  // Create symbols from headers
+  const symbols: FileSymbol[] = headers.map((header, idx) => ({
+    name: header || `Column ${idx + 1}`,
+    kind: SymbolKind.Property,
+    startLine: 1,
+    endLine: 1,
+    signature: `Column ${idx + 1} of ${headers.length}`,
+  }));
+
+  // Add summary symbol with row count
+  const dataRows = state.rows - 1;
+  symbols.unshift({
+    name: `${dataRows} rows × ${headers.length} columns`,
+    kind: SymbolKind.Table,
+    startLine: 1,
+    endLine: totalLines,
+  });
+
+  // Add sample of first data row if available
+  if (sampleLine) {
+    const sampleValues = parseLine(sampleLine, delimiter);
+    const samplePreview = sampleValues
+      .slice(0, 5)
+      .map((v) => (v.length > 20 ? `${v.slice(0, 17)}...` : v))
+      .join(delimiter === "\t" ? " | " : ", ");
+
+    symbols.push({
+      name: `Sample: ${samplePreview}`,
+      kind: SymbolKind.Variable,
+      startLine: 2,
+      endLine: 2,
+    });
+  }
 
-    const delimiter = detectDelimiter(firstLine);
-    const headers = parseLine(firstLine, delimiter);
+  const isTsv = file.path.endsWith(".tsv") || delimiter === "\t";
+
+  return {
+    path: file.path,
+    totalLines,
+    totalBytes: file.totalBytes,
+    language: isTsv ? "TSV" : "CSV",
+    symbols,
+    imports: [],
+    detailLevel: DetailLevel.Full,
+  };
+}
 
-    if (headers.length === 0) {
-      return null;
+/**
+ * Appendable CSV mapper: only the header, the first data row and the row
+ * count are needed, so appended rows just bump the count.
+ */
+const CSV_MAPPER: AppendableMapper<CsvState> = {
+  id: "csv",
+  createState: () => ({ rows: 0, headerLine: null, sampleLine: null }),
+  consume: (state, line) => {
+    if (line.trim() === "") {
+      return;
     }
-
-    // Create symbols from headers
-    const symbols: FileSymbol[] = headers.map((header, idx) => ({
-      name: header || `Column ${idx + 1}`,
-      kind: SymbolKind.Property,
-      startLine: 1,
-      endLine: 1,
-      signature: `Column ${idx + 1} of ${headers.length}`,
-    }));
-
-    // Add summary symbol with row count
-    const dataRows = lines.length - 1;
-    symbols.unshift({
-      name: `${dataRows} rows × ${headers.length} columns`,
-      kind: SymbolKind.Table,
-      startLine: 1,
-      endLine: totalLines,
-    });
-
-    // Add sample of first data row if available
-    if (lines.length > 1) {
-      const [, sampleLine] = lines;
-      if (sampleLine) {
-        const sampleValues = parseLine(sampleLine, delimiter);
-        const samplePreview = sampleValues
-          .slice(0, 5)
-          .map((v) => (v.length > 20 ? `${v.slice(0, 17)}...` : v))
-          .join(delimiter === "\t" ? " | " : ", ");
-
-        symbols.push({
-          name: `Sample: ${samplePreview}`,
-          kind: SymbolKind.Variable,
-          startLine: 2,
-          endLine: 2,
-        });
-      }
+    state.rows++;
+    if (state.headerLine === null) {
+      state.headerLine = line;
+    } else if (state.sampleLine === null) {
+      state.sampleLine = line;
     }
+  },
+  finish: finishCsvMap,
+};
 
-    const isTsv = filePath.endsWith(".tsv") || delimiter === "\t";
-
-    return {
-      path: filePath,
-      totalLines,
-      totalBytes,
-      language: isTsv ? "TSV" : "CSV",
-      symbols,
-      imports: [],
-      detailLevel: DetailLevel.Full,
-    };
+/**
+ * Generate a file map for CSV/TSV files.
+ *
+ * Streams the file line by line; when it only grew since the last run,
+ * just the appended rows are read.
+ */
+export async function csvMapper(
+  filePath: string,
+  signal?: AbortSignal
+): Promise<FileMap | null> {
+  try {
+    return await mapAppendable(filePath, CSV_MAPPER, signal);
   } catch (error) {
     if (signal?.aborted) {
       return null;
@@ -1,9 +1,9 @@
 import { createReadStream } from "node:fs";
-import { stat } from "node:fs/promises";
 import { createInterface } from "node:readline";
 
-import type { FileMap, FileSymbol } from "../types.js";
+import type { AppendableMapper, FileMap, FileSymbol } from "../types.js";
 
+import { mapAppendable } from "../append-map.js";
 import { DetailLevel, SymbolKind } from "../enums.js";
 
 interface JsonlSample {
@@ -188,198 +188,209 @@ function countEntryType(
   }
 }
 
+/** Resumable state of the pi session mapper. */
+interface PiSessionState {
+  header: PiSessionHeader;
+  counts: SessionCounts;
+  records: SessionSymbolRecord[];
+  // The user turn whose endLine is set by the next structural entry
+  openUserTurn: SessionSymbolRecord | null;
+}
+
 /**
- * Parse a pi session JSONL file into a conversation-aware structural map.
- *
- * Streams line-by-line, producing symbols for:
- * - Session header (Module)
- * - Stats summary (Property)
- * - User message turns (Function) — line range spans through responses
- * - Compaction boundaries (Namespace)
- * - Model changes (Namespace)
- * - Session name (Property)
+ * Fold one session entry into the state.
  */
-async function parsePiSession(
-  filePath: string,
-  header: PiSessionHeader,
-  totalBytes: number,
-  signal?: AbortSignal
-): Promise<FileMap | null> {
-  const counts: SessionCounts = {
-    user: 0,
-    assistant: 0,
-    toolResult: 0,
-    compaction: 0,
-    branchSummary: 0,
-    modelChange: 0,
-    sessionInfo: 0,
-    other: 0,
-  };
-
-  // Collect structural symbols while streaming.
-  // We track "open" user turns to compute their endLine once the next
-  // structural entry appears.
-  const records: SessionSymbolRecord[] = [];
-  let lineCount = 0;
-  let openUserTurn: SessionSymbolRecord | null = null;
-
-  const stream = createReadStream(filePath, { encoding: "utf8" });
-  const rl = createInterface({ input: stream });
-
-  signal?.addEventListener("abort", () => {
-    rl.close();
-    stream.destroy();
-  });
-
-  for await (const line of rl) {
-    lineCount++;
-
-    // Skip the header (line 1), already parsed
-    if (lineCount === 1) {
-      continue;
-    }
+function consumeSessionLine(
+  state: PiSessionState,
+  line: string,
+  lineCount: number
+): void {
+  const { counts, records } = state;
 
-    const trimmed = line.trim();
-    if (!trimmed) {
-      continue;
-    }
+  // Skip the header (line 1), already parsed
+  if (lineCount === 1) {
+    return;
+  }
 
-    let entry: Record<string, unknown>;
-    try {
-      entry = JSON.parse(trimmed) as Record<string, unknown>;
-    } catch {
-      continue;
-    }
+  const trimmed = line.trim();
+  if (!trimmed) {
+    return;
+  }
 
-    const entryType = entry["type"] as string | undefined;
+  let entry: Record<string, unknown>;
+  try {
+    entry = JSON.parse(trimmed) as Record<string, unknown>;
+  } catch {
+    return;
+  }
 
-    countEntryType(counts, entry, entryType);
+  const entryType = entry["type"] as string | undefined;
 
-    // Collect structural symbols
-    if (entryType === "message") {
-      const msg = entry["message"] as Record<string, unknown> | undefined;
-      const role = msg?.["role"] as string | undefined;
+  countEntryType(counts, entry, entryType);
 
-      if (role === "user") {
-        // Close previous user turn
-        if (openUserTurn) {
-          openUserTurn.symbol.endLine = lineCount - 1;
-        }
+  // Collect structural symbols
+  if (entryType === "message") {
+    const msg = entry["message"] as Record<string, unknown> | undefined;
+    const role = msg?.["role"] as string | undefined;
 
-        const preview = extractUserPreview(msg?.["content"]);
-        const record: SessionSymbolRecord = {
-          symbol: {
-            name: `[User] ${preview}`,
-            kind: SymbolKind.Function,
-            startLine: lineCount,
-            endLine: lineCount, // updated when next structural entry appears
-          },
-          spanStart: lineCount,
-        };
-        records.push(record);
-        openUserTurn = record;
-      }
-      // assistant and toolResult messages fold into the current user turn.
-      // Future: showing tool calls as nested child symbols under
-      // user turns would provide richer navigation (currently folded for simplicity).
-    } else if (entryType === "compaction") {
+    if (role === "user") {
       // Close previous user turn
-      if (openUserTurn) {
-        openUserTurn.symbol.endLine = lineCount - 1;
-        openUserTurn = null;
+      if (state.openUserTurn) {
+        state.openUserTurn.symbol.endLine = lineCount - 1;
       }
 
-      records.push({
+      const preview = extractUserPreview(msg?.["content"]);
+      const record: SessionSymbolRecord = {
         symbol: {
-          name: "[Compaction]",
-          kind: SymbolKind.Namespace,
+          name: `[User] ${preview}`,
+          kind: SymbolKind.Function,
           startLine: lineCount,
-          endLine: lineCount,
+          endLine: lineCount, // updated when next structural entry appears
         },
         spanStart: lineCount,
-      });
-    } else if (entryType === "model_change") {
-      const provider = entry["provider"] as string | undefined;
-      const modelId = entry["modelId"] as string | undefined;
-      const label =
-        provider && modelId
-          ? `${provider}/${modelId}`
-          : (provider ?? modelId ?? "unknown");
-
-      records.push({
-        symbol: {
-          name: `[Model] ${label}`,
-          kind: SymbolKind.Namespace,
-          startLine: lineCount,
-          endLine: lineCount,
-        },
-        spanStart: lineCount,
-      });
-    } else if (entryType === "session_info") {
-      const name = entry["name"] as string | undefined;
-      if (name) {
-        records.push({
-          symbol: {
-            name: `[Session] ${name}`,
-            kind: SymbolKind.Property,
-            startLine: lineCount,
-            endLine: lineCount,
-          },
-          spanStart: lineCount,
-        });
-      }
-    } else if (entryType === "branch_summary") {
-      // Close previous user turn
-      if (openUserTurn) {
-        openUserTurn.symbol.endLine = lineCount - 1;
-        openUserTurn = null;
-      }
+      };
+      records.push(record);
+      state.openUserTurn = record;
+    }
+    // assistant and toolResult messages fold into the current user turn.
+    // Future: showing tool calls as nested child symbols under
+    // user turns would provide richer navigation (currently folded for simplicity).
+  } else if (entryType === "compaction") {
+    // Close previous user turn
+    if (state.openUserTurn) {
+      state.openUserTurn.symbol.endLine = lineCount - 1;
+      state.openUserTurn = null;
+    }
 
+    records.push({
+      symbol: {
+        name: "[Compaction]",
+        kind: SymbolKind.Namespace,
+        startLine: lineCount,
+        endLine: lineCount,
+      },
+      spanStart: lineCount,
+    });
+  } else if (entryType === "model_change") {
+    const provider = entry["provider"] as string | undefined;
+    const modelId = entry["modelId"] as string | undefined;
+    const label =
+      provider && modelId
+        ? `${provider}/${modelId}`
+        : (provider ?? modelId ?? "unknown");
+
+    records.push({
+      symbol: {
+        name: `[Model] ${label}`,
+        kind: SymbolKind.Namespace,
+        startLine: lineCount,
+        endLine: lineCount,
+      },
+      spanStart: lineCount,
+    });
+  } else if (entryType === "session_info") {
+    const name = entry["name"] as string | undefined;
+    if (name) {
       records.push({
         symbol: {
-          name: "[Branch Summary]",
-          kind: SymbolKind.Namespace,
+          name: `[Session] ${name}`,
+          kind: SymbolKind.Property,
           startLine: lineCount,
           endLine: lineCount,
         },
         spanStart: lineCount,
       });
     }
-  }
+  } else if (entryType === "branch_summary") {
+    // Close previous user turn
+    if (state.openUserTurn) {
+      state.openUserTurn.symbol.endLine = lineCount - 1;
+      state.openUserTurn = null;
+    }
 
-  // Close final open user turn
-  if (openUserTurn) {
-    openUserTurn.symbol.endLine = lineCount;
+    records.push({
+      symbol: {
+        name: "[Branch Summary]",
+        kind: SymbolKind.Namespace,
+        startLine: lineCount,
+        endLine: lineCount,
+      },
+      spanStart: lineCount,
+    });
   }
+}
 
-  // Assemble symbols in line order
-  const symbols: FileSymbol[] = [
-    // Header symbol
-    {
-      name: `Pi Session: ${header.cwd} (${formatSessionTimestamp(header.timestamp)})`,
-      kind: SymbolKind.Module,
-      startLine: 1,
-      endLine: 1,
-    },
-    // Stats summary
-    {
-      name: formatStatsSummary(counts),
-      kind: SymbolKind.Property,
-      startLine: 1,
-      endLine: lineCount,
-    },
-    // Conversation symbols (already in line order from streaming)
-    ...records.map((r) => r.symbol),
-  ];
-
+/**
+ * Appendable mapper turning a pi session JSONL file into a
+ * conversation-aware structural map.
+ *
+ * Produces symbols for:
+ * - Session header (Module)
+ * - Stats summary (Property)
+ * - User message turns (Function) — line range spans through responses
+ * - Compaction boundaries (Namespace)
+ * - Model changes (Namespace)
+ * - Session name (Property)
+ */
+function piSessionMapper(
+  header: PiSessionHeader
+): AppendableMapper<PiSessionState> {
   return {
-    path: filePath,
-    totalLines: lineCount,
-    totalBytes,
-    language: "Pi Session",
-    symbols,
-    imports: [],
-    detailLevel: DetailLevel.Full,
+    id: "jsonl-session",
+    createState: () => ({
+      header,
+      counts: {
+        user: 0,
+        assistant: 0,
+        toolResult: 0,
+        compaction: 0,
+        branchSummary: 0,
+        modelChange: 0,
+        sessionInfo: 0,
+        other: 0,
+      },
+      records: [],
+      openUserTurn: null,
+    }),
+    consume: consumeSessionLine,
+    finish: (state, file) => {
+      const lineCount = file.lines;
+
+      // Close final open user turn
+      if (state.openUserTurn) {
+        state.openUserTurn.symbol.endLine = lineCount;
+      }
+
+      // Assemble symbols in line order
+      const symbols: FileSymbol[] = [
+        // Header symbol
+        {
+          name: `Pi Session: ${state.header.cwd} (${formatSessionTimestamp(state.header.timestamp)})`,
+          kind: SymbolKind.Module,
+          startLine: 1,
+          endLine: 1,
+        },
+        // Stats summary
+        {
+          name: formatStatsSummary(state.counts),
+          kind: SymbolKind.Property,
+          startLine: 1,
+          endLine: lineCount,
+        },
+        // Conversation symbols (already in line order from streaming)
+        ...state.records.map((r) => r.symbol),
+      ];
+
+      return {
+        path: file.path,
+        totalLines: lineCount,
+        totalBytes: file.totalBytes,
+        language: "Pi Session",
+        symbols,
+        imports: [],
+        detailLevel: DetailLevel.Full,
+      };
+    },
   };
 }
 
@@ -387,85 +398,78 @@ async function parsePiSession(
 // Generic JSONL parsing (original logic)
 // ---------------------------------------------------------------------------
 
+/** Resumable state of the generic JSONL mapper. */
+interface GenericJsonlState {
+  samples: JsonlSample[];
+  schema: { keys: string[]; type: string } | null;
+}
+
 /**
- * Generate a generic file map for a JSON Lines file.
+ * Appendable mapper producing a generic schema + samples map for a JSON
+ * Lines file.
  */
-async function parseGenericJsonl(
-  filePath: string,
-  totalBytes: number,
-  signal?: AbortSignal
-): Promise<FileMap | null> {
-  const samples: JsonlSample[] = [];
-  let lineCount = 0;
-  let schema: { keys: string[]; type: string } | null = null;
-
-  const stream = createReadStream(filePath, { encoding: "utf8" });
-  const rl = createInterface({ input: stream });
-
-  signal?.addEventListener("abort", () => {
-    rl.close();
-    stream.destroy();
-  });
-
-  for await (const line of rl) {
-    lineCount++;
-
+const GENERIC_JSONL_MAPPER: AppendableMapper<GenericJsonlState> = {
+  id: "jsonl",
+  createState: () => ({ samples: [], schema: null }),
+  consume: (state, line, lineCount) => {
     // Collect first few samples (only from first 100 lines)
-    if (lineCount <= 100 && samples.length < 10 && line.trim()) {
+    if (lineCount <= 100 && state.samples.length < 10 && line.trim()) {
       const lineSchema = analyzeJsonLine(line);
       if (lineSchema) {
-        samples.push({
+        state.samples.push({
           lineNumber: lineCount,
           preview: line.slice(0, 80) + (line.length > 80 ? "..." : ""),
           keys: lineSchema.keys,
         });
 
-        if (!schema) {
-          schema = lineSchema;
+        if (!state.schema) {
+          state.schema = lineSchema;
         }
       }
     }
-  }
-
-  const symbols: FileSymbol[] = [];
-
-  if (schema) {
-    symbols.push({
-      name: `Schema: ${schema.type}${schema.keys.length > 0 ? ` {${schema.keys.slice(0, 5).join(", ")}${schema.keys.length > 5 ? "..." : ""}}` : ""}`,
-      kind: SymbolKind.Class,
-      startLine: 1,
-      endLine: 1,
-    });
-  }
+  },
+  finish: ({ samples, schema }, file) => {
+    const lineCount = file.lines;
+    const symbols: FileSymbol[] = [];
+
+    if (schema) {
+      symbols.push({
+        name: `Schema: ${schema.type}${schema.keys.length > 0 ? ` {${schema.keys.slice(0, 5).join(", ")}${schema.keys.length > 5 ? "..." : ""}}` : ""}`,
+        kind: SymbolKind.Class,
+        startLine: 1,
+        endLine: 1,
+      });
+    }
 
-  for (const sample of samples.slice(0, 5)) {
-    symbols.push({
-      name: `Line ${sample.lineNumber}: ${sample.preview}`,
-      kind: SymbolKind.Variable,
-      startLine: sample.lineNumber,
-      endLine: sample.lineNumber,
-    });
-  }
+    for (const sample of samples.slice(0, 5)) {
+      symbols.push({
+        name: `Line ${sample.lineNumber}: ${sample.preview}`,
+        kind: SymbolKind.Variable,
+        startLine: sample.lineNumber,
+        endLine: sample.lineNumber,
+      });
+    }
 
-  if (lineCount > samples.length) {
-    symbols.push({
-      name: `... ${lineCount - samples.length} more lines`,
-      kind: SymbolKind.Variable,
-      startLine: samples.length + 1,
-      endLine: lineCount,
-    });
-  }
+    if (lineCount > samples.length) {
+      symbols.push({
+        name: `... ${lineCount - samples.length} more lines`,
+        kind: SymbolKind.Variable,
+        startLine: samples.length + 1,
+        endLine: lineCount,
+      });
+    }
 
-  return {
-    path: filePath,
-    totalLines: lineCount,
-    totalBytes,
-    language: "JSON Lines",
-    symbols,
-    imports: [],
-    detailLevel: DetailLevel.Full,
-  };
-}
+    return {
+      path: file.path,
+      totalLines: lineCount,
+      totalBytes: file.totalBytes,
+      language: "JSON Lines",
+      symbols,
+      imports: [],
+      detailLevel: DetailLevel.Full,
+    };
+  },
+};
 
 // ---------------------------------------------------------------------------
 // Entry point
@@ -476,26 +480,28 @@ async function parseGenericJsonl(
  *
  * If the first line is a pi session header (`{"type":"session",...}`),
  * produces a conversation-aware structural map. Otherwise falls back to
- * generic schema + sample display.
+ * generic schema + sample display. When the file only grew since the last
+ * run, just the appended lines are read.
  */
 export async function jsonlMapper(
   filePath: string,
   signal?: AbortSignal
 ): Promise<FileMap | null> {
   try {
-    const stats = await stat(filePath);
-    const totalBytes = stats.size;
-
     // Read just the first line to detect pi sessions
     const firstLine = await readFirstLine(filePath, signal);
     if (firstLine !== null) {
       const sessionHeader = parsePiSessionHeader(firstLine);
       if (sessionHeader) {
-        return parsePiSession(filePath, sessionHeader, totalBytes, signal);
+        return await mapAppendable(
+          filePath,
+          piSessionMapper(sessionHeader),
+          signal
+        );
       }
     }
 
-    return parseGenericJsonl(filePath, totalBytes, signal);
+    return await mapAppendable(filePath, GENERIC_JSONL_MAPPER, signal);
   } catch (error) {
     if (signal?.aborted) {
       return null;
@@ -0,0 +1,664 @@
+/**
+ * Tokenizer-based mapper for minified and single-line files.
+ *
+ * Bundles, one-line JSON dumps and similar blobs have a handful of huge
+ * lines, so line ranges say nothing about where a symbol is and the AST
+ * mappers spend seconds on them. This mapper scans the bytes once with a
+ * small tokenizer and reports symbols with byte ranges, which reads can
+ * address with `byteOffset`/`byteLength`.
+ */
+import { open, readFile } from "node:fs/promises";
+
+import type { FileMap, FileSymbol } from "../types.js";
+
+import { THRESHOLDS } from "../constants.js";
+import { DetailLevel, SymbolKind } from "../enums.js";
+import { detectLanguage } from "../language-detect.js";
+
+const NEWLINE = 0x0a;
+
+/** Symbols nest at most this deep (top level plus members) */
+const MAX_DEPTH = 2;
+
+/** Symbols recorded per file; scanning continues for ranges past this */
+const MAX_SYMBOLS = 5000;
+
+/** Keywords after which a `/` starts a regular expression */
+const REGEX_PREFIX_KEYWORDS = new Set([
+  "return",
+  "typeof",
+  "instanceof",
+  "in",
+  "of",
+  "new",
+  "delete",
+  "void",
+  "throw",
+  "case",
+  "do",
+  "else",
+  "yield",
+  "await",
+]);
+
+/** Names that look like a method when followed by `(` but are not */
+const CONTROL_KEYWORDS = new Set([
+  "if",
+  "for",
+  "while",
+  "switch",
+  "catch",
+  "with",
+  "function",
+  "return",
+  "typeof",
+  "super",
+]);
+
+/** Modifiers kept in front of a declaration's start */
+const MODIFIERS = new Set(["async", "static", "get", "set", "export"]);
+
+type TokenKind = "name" | "string" | "number" | "punct";
+
+interface Token {
+  kind: TokenKind;
+  /** Name, punctuator or literal text (strings without quotes) */
+  text: string;
+  start: number;
+  end: number;
+}
+
+function isNameStart(byte: number): boolean {
+  return (
+    (byte >= 0x61 && byte <= 0x7a) ||
+    (byte >= 0x41 && byte <= 0x5a) ||
+    byte === 0x5f ||
+    byte === 0x24 ||
+    byte >= 0x80
+  );
+}
+
+function isNamePart(byte: number): boolean {
+  return isNameStart(byte) || (byte >= 0x30 && byte <= 0x39);
+}
+
+function isDigit(byte: number): boolean {
+  return byte >= 0x30 && byte <= 0x39;
+}
+
+/**
+ * Split JavaScript or JSON source into tokens, skipping whitespace,
+ * comments, regular expressions and template literal text.
+ */
+function tokenize(bytes: Buffer, onToken: (token: Token) => void): void {
+  // One entry per open `{`: true when it opened a template substitution
+  const braces: boolean[] = [];
+  let previous: Token | null = null;
+  let i = 0;
+
+  const emit = (kind: TokenKind, text: string, start: number) => {
+    previous = { kind, text, start, end: i };
+    onToken(previous);
+  };
+
+  const regexAllowed = () => {
+    const last = previous as Token | null;
+    if (!last) {
+      return true;
+    }
+    if (last.kind === "punct") {
+      return last.text !== ")" && last.text !== "]" && last.text !== "}";
+    }
+    return last.kind === "name" && REGEX_PREFIX_KEYWORDS.has(last.text);
+  };
+
+  // Scan template text up to the closing backtick or a substitution
+  const scanTemplate = () => {
+    while (i < bytes.length) {
+      const byte = bytes[i];
+      if (byte === 0x5c) {
+        i += 2;
+      } else if (byte === 0x60) {
+        i++;
+        return;
+      } else if (byte === 0x24 && bytes[i + 1] === 0x7b) {
+        i += 2;
+        braces.push(true);
+        return;
+      } else {
+        i++;
+      }
+    }
+  };
+
+  while (i < bytes.length) {
+    const byte = bytes[i] ?? 0;
+    const start = i;
+
+    if (byte <= 0x20) {
+      i++;
+    } else if (byte === 0x2f && bytes[i + 1] === 0x2f) {
+      const end = bytes.indexOf(NEWLINE, i);
+      i = end === -1 ? bytes.length : end;
+    } else if (byte === 0x2f && bytes[i + 1] === 0x2a) {
+      const end = bytes.indexOf("*/", i + 2);
+      i = end === -1 ? bytes.length : end + 2;
+    } else if (byte === 0x22 || byte === 0x27) {
+      i++;
+      while (i < bytes.length && bytes[i] !== byte && bytes[i] !== NEWLINE) {
+        i += bytes[i] === 0x5c ? 2 : 1;
+      }
+      i++;
+      emit("string", bytes.toString("utf8", start + 1, i - 1), start);
+    } else if (byte === 0x60) {
+      i++;
+      scanTemplate();
+      emit("string", "", start);
+    } else if (isNameStart(byte)) {
+      while (i < bytes.length && isNamePart(bytes[i] ?? 0)) {
+        i++;
+      }
+      emit("name", bytes.toString("utf8", start, i), start);
+    } else if (isDigit(byte)) {
+      while (
+        i < bytes.length &&
+        (isNamePart(bytes[i] ?? 0) || bytes[i] === 0x2e)
+      ) {
+        i++;
+      }
+      emit("number", bytes.toString("latin1", start, i), start);
+    } else if (byte === 0x2f && regexAllowed()) {
+      let inClass = false;
+      i++;
+      while (i < bytes.length && bytes[i] !== NEWLINE) {
+        const current = bytes[i];
+        if (current === 0x5c) {
+          i++;
+        } else if (current === 0x5b) {
+          inClass = true;
+        } else if (current === 0x5d) {
+          inClass = false;
+        } else if (current === 0x2f && !inClass) {
+          break;
+        }
+        i++;
+      }
+      i++;
+      while (i < bytes.length && isNamePart(bytes[i] ?? 0)) {
+        i++;
+      }
+      emit("string", "", start);
+    } else if (byte === 0x7d && braces.at(-1) === true) {
+      // End of a template substitution: resume the template text
+      braces.pop();
+      i++;
+      scanTemplate();
+    } else {
+      i++;
+      let text = String.fromCodePoint(byte);
+      if (byte === 0x3d && bytes[i] === 0x3e) {
+        i++;
+        text = "=>";
+      } else if (
+        bytes[i] === 0x3d &&
+        (byte === 0x3d || byte === 0x21 || byte === 0x3c || byte === 0x3e)
+      ) {
+        // Comparisons, so that a lone `=` is always an assignment
+        while (bytes[i] === 0x3d) {
+          i++;
+        }
+        text = "==";
+      }
+      if (byte === 0x7b) {
+        braces.push(false);
+      } else if (byte === 0x7d) {
+        braces.pop();
+      }
+      emit("punct", text, start);
+    }
+  }
+}
+
+/**
+ * A symbol under construction, waiting for or inside its body.
+ */
+interface OpenSymbol {
+  symbol: FileSymbol;
+  /** Bracket depth inside the symbol's body */
+  depth: number;
+}
+
+/**
+ * A declaration header waiting for its body's `{`.
+ */
+interface PendingSymbol {
+  name: string | null;
+  kind: SymbolKind;
+  start: number;
+  /** Bracket depth the body must open at */
+  depth: number;
+}
+
+/**
+ * Collects finished symbols into their parents.
+ */
+function createSymbolTree() {
+  const roots: FileSymbol[] = [];
+  const open: OpenSymbol[] = [];
+  let count = 0;
+
+  return {
+    roots,
+    open,
+    canOpen: () => open.length < MAX_DEPTH && count < MAX_SYMBOLS,
+    push(symbol: FileSymbol, depth: number) {
+      count++;
+      open.push({ symbol, depth });
+    },
+    close(end: number) {
+      const finished = open.pop();
+      if (!finished) {
+        return;
+      }
+      finished.symbol.endByte = end;
+      const parent = open.at(-1)?.symbol;
+      if (parent) {
+        parent.children ??= [];
+        parent.children.push(finished.symbol);
+      } else {
+        roots.push(finished.symbol);
+      }
+    },
+  };
+}
+
+/**
+ * Find named functions, classes, methods and module-table entries in
+ * JavaScript. Single-character names are minifier output and skipped.
+ */
+function scanScript(bytes: Buffer): FileSymbol[] {
+  const tree = createSymbolTree();
+  // Tokens before each open bracket, to name arrow functions at `)`
+  const brackets: Token[][] = [];
+  let history: Token[] = [];
+  let afterParen: Token[] = [];
+  let pending: PendingSymbol | null = null;
+
+  const back = (n: number, tokens = history) => tokens.at(-n);
+  const isPunct = (token: Token | undefined, text: string) =>
+    token?.kind === "punct" && token.text === text;
+
+  // Name assigned by `name = ...` or `key: ...` ending just before `index`
+  const assignedName = (tokens: Token[], index: number) => {
+    let at = index;
+    if (tokens.at(at)?.text === "async") {
+      at--;
+    }
+    const operator = tokens.at(at);
+    const target = tokens.at(at - 1);
+    if (
+      (isPunct(operator, "=") || isPunct(operator, ":")) &&
+      target &&
+      target.kind !== "punct"
+    ) {
+      return target;
+    }
+    return null;
+  };
+
+  const declare = (
+    name: string | null,
+    kind: SymbolKind,
+    start: number
+  ) => {
+    pending = { name, kind, start, depth: brackets.length };
+  };
+
+  tokenize(bytes, (token) => {
+    const current = pending as PendingSymbol | null;
+    const { kind, text } = token;
+
+    if (kind === "name" && (text === "function" || text === "class")) {
+      const symbolKind =
+        text === "class" ? SymbolKind.Class : SymbolKind.Function;
+      const target = assignedName(history, -1);
+      if (target) {
+        declare(target.text, symbolKind, target.start);
+      } else {
+        const modifier = back(1);
+        const start =
+          modifier?.kind === "name" && MODIFIERS.has(modifier.text)
+            ? modifier.start
+            : token.start;
+        declare(null, symbolKind, start);
+      }
+    } else if (
+      current &&
+      current.name === null &&
+      kind === "name" &&
+      text !== "extends" &&
+      ["function", "class", "*"].includes(back(1)?.text ?? "")
+    ) {
+      current.name = text;
+    } else if (kind === "punct" && text === "(") {
+      const name = back(1);
+      const innermost = tree.open.at(-1);
+      if (
+        !current &&
+        name?.kind === "name" &&
+        !CONTROL_KEYWORDS.has(name.text) &&
+        innermost?.symbol.kind === SymbolKind.Class &&
+        innermost.depth === brackets.length
+      ) {
+        const modifier = back(2);
+        const start =
+          modifier?.kind === "name" && MODIFIERS.has(modifier.text)
+            ? modifier.start
+            : name.start;
+        declare(name.text, SymbolKind.Method, start);
+      }
+    } else if (kind === "punct" && text === "=>") {
+      const params = back(1);
+      const target = isPunct(params, ")")
+        ? assignedName(afterParen, -1)
+        : assignedName(history, -2);
+      if (target) {
+        declare(target.text, SymbolKind.Function, target.start);
+      }
+    }
+
+    if (kind === "punct") {
+      if (text === "{" || text === "(" || text === "[") {
+        const opening = pending as PendingSymbol | null;
+        if (
+          text === "{" &&
+          opening &&
+          opening.depth === brackets.length
+        ) {
+          pending = null;
+          if (opening.name && opening.name.length > 1 && tree.canOpen()) {
+            tree.push(
+              {
+                name: opening.name,
+                kind: opening.kind,
+                startLine: 0,
+                endLine: 0,
+                startByte: opening.start,
+              },
+              brackets.length + 1
+            );
+          }
+        }
+        brackets.push(history);
+        history = [];
+      } else if (text === "}" || text === ")" || text === "]") {
+        if (tree.open.at(-1)?.depth === brackets.length) {
+          tree.close(token.end);
+        }
+        const pendingNow = pending as PendingSymbol | null;
+        if (pendingNow && pendingNow.depth >= brackets.length) {
+          pending = null;
+        }
+        afterParen = brackets.pop() ?? [];
+        history = [...afterParen];
+      } else if (
+        (text === ";" || text === ",") &&
+        current &&
+        current.depth === brackets.length
+      ) {
+        pending = null;
+      }
+    }
+
+    history.push(token);
+    if (history.length > 4) {
+      history = history.slice(-4);
+    }
+  });
+
+  while (tree.open.length > 0) {
+    tree.close(bytes.length);
+  }
+  return tree.roots;
+}
+
+/**
+ * A JSON container being scanned.
+ */
+interface JsonContainer {
+  isArray: boolean;
+  /** Symbol describing this container, when recorded */
+  symbol: FileSymbol | null;
+  items: number;
+  /** Key waiting for its value */
+  key: string | null;
+}
+
+function describeValue(token: Token): string {
+  if (token.kind === "string") {
+    return "string";
+  }
+  if (token.kind === "number") {
+    return "number";
+  }
+  if (token.text === "true" || token.text === "false") {
+    return "boolean";
+  }
+  return token.text;
+}
+
+function isPunctText(token: Token, text: string): boolean {
+  return token.kind === "punct" && token.text === text;
+}
+
+/**
+ * Map the top-level members of a JSON document and the keys of the
+ * objects among them.
+ */
+function scanJson(bytes: Buffer): FileSymbol[] {
+  const roots: FileSymbol[] = [];
+  const stack: JsonContainer[] = [];
+  let count = 0;
+  let previous: Token | null = null;
+  // Start of a negative number's minus sign
+  let sign: number | null = null;
+
+  tokenize(bytes, (token) => {
+    const container = stack.at(-1);
+    const last = previous;
+    previous = token;
+
+    if (isPunctText(token, "{") || isPunctText(token, "[")) {
+      const isArray = token.text === "[";
+      let symbol: FileSymbol | null = null;
+      if (container && stack.length <= MAX_DEPTH && count < MAX_SYMBOLS) {
+        const name = container.isArray
+          ? `[${container.items}]`
+          : (container.key ?? "?");
+        symbol = {
+          name,
+          kind: SymbolKind.Class,
+          startLine: 0,
+          endLine: 0,
+          startByte: token.start,
+        };
+        count++;
+        const parent = stack.length === 1 ? null : container.symbol;
+        if (parent) {
+          parent.children ??= [];
+          parent.children.push(symbol);
+        } else {
+          roots.push(symbol);
+        }
+      }
+      if (container) {
+        container.items++;
+        container.key = null;
+      }
+      stack.push({ isArray, symbol, items: 0, key: null });
+      return;
+    }
+
+    if (isPunctText(token, "}") || isPunctText(token, "]")) {
+      const closed = stack.pop();
+      if (closed?.symbol) {
+        closed.symbol.endByte = token.end;
+        if (closed.isArray) {
+          closed.symbol.name += ` (${closed.items} items)`;
+        }
+      }
+      return;
+    }
+
+    if (!container) {
+      return;
+    }
+
+    if (isPunctText(token, ":")) {
+      container.key = last?.kind === "string" ? last.text : null;
+    } else if (isPunctText(token, ",")) {
+      container.key = null;
+    } else if (isPunctText(token, "-")) {
+      sign = token.start;
+    } else if (
+      !container.isArray &&
+      container.key !== null &&
+      stack.length <= MAX_DEPTH &&
+      count < MAX_SYMBOLS
+    ) {
+      // A primitive value of an object member
+      const symbol: FileSymbol = {
+        name: `${container.key}: ${describeValue(token)}`,
+        kind: SymbolKind.Variable,
+        startLine: 0,
+        endLine: 0,
+        startByte: sign ?? token.start,
+        endByte: token.end,
+      };
+      sign = null;
+      count++;
+      const parent = stack.length === 1 ? null : container.symbol;
+      if (parent) {
+        parent.children ??= [];
+        parent.children.push(symbol);
+      } else {
+        roots.push(symbol);
+      }
+      container.key = null;
+      container.items++;
+    } else if (container.isArray) {
+      container.items++;
+    }
+  });
+
+  return roots;
+}
+
+/**
+ * Fill in line numbers from byte ranges, given the offsets of every
+ * newline in the file.
+ */
+function assignLines(symbols: FileSymbol[], newlines: number[]): void {
+  const lineAt = (byte: number) => {
+    let low = 0;
+    let high = newlines.length;
+    while (low < high) {
+      const mid = (low + high) >> 1;
+      if ((newlines[mid] ?? 0) < byte) {
+        low = mid + 1;
+      } else {
+        high = mid;
+      }
+    }
+    return low + 1;
+  };
+
+  for (const symbol of symbols) {
+    const startByte = symbol.startByte ?? 0;
+    const endByte = symbol.endByte ?? startByte + 1;
+    symbol.startLine = lineAt(startByte);
+    symbol.endLine = Math.max(symbol.startLine, lineAt(endByte - 1));
+    if (symbol.children) {
+      assignLines(symbol.children, newlines);
+    }
+  }
+}
+
+/**
+ * Average line length in bytes over the start of a file. Files shorter
+ * than the probe get their exact average.
+ */
+export async function averageLineBytes(filePath: string): Promise<number> {
+  const handle = await open(filePath, "r");
+  try {
+    const buffer = Buffer.alloc(THRESHOLDS.LONG_LINE_PROBE_BYTES);
+    const { bytesRead } = await handle.read(buffer, 0, buffer.length, 0);
+    if (bytesRead === 0) {
+      return 0;
+    }
+
+    let lines = 0;
+    let at = buffer.indexOf(NEWLINE);
+    while (at !== -1 && at < bytesRead) {
+      lines++;
+      at = buffer.indexOf(NEWLINE, at + 1);
+    }
+    // A line cut off by the end of the probe counts as well
+    if (buffer[bytesRead - 1] !== NEWLINE) {
+      lines++;
+    }
+    return bytesRead / lines;
+  } finally {
+    await handle.close();
+  }
+}
+
+/**
+ * Generate a byte-range map for a minified or single-line file.
+ */
+export async function minifiedMapper(
+  filePath: string,
+  signal?: AbortSignal
+): Promise<FileMap | null> {
+  try {
+    const bytes = await readFile(filePath, { signal });
+
+    const newlines: number[] = [];
+    let at = bytes.indexOf(NEWLINE);
+    while (at !== -1) {
+      newlines.push(at);
+      at = bytes.indexOf(NEWLINE, at + 1);
+    }
+
+    const langInfo = detectLanguage(filePath);
+    const firstByte = bytes.find((byte) => byte > 0x20);
+    const isJson =
+      langInfo?.id === "json" ||
+      (!langInfo && (firstByte === 0x7b || firstByte === 0x5b));
+
+    const symbols = isJson ? scanJson(bytes) : scanScript(bytes);
+    if (symbols.length === 0) {
+      return null;
+    }
+    assignLines(symbols, newlines);
+
+    const lastByte = bytes.at(-1);
+    return {
+      path: filePath,
+      totalLines:
+        newlines.length +
+        (lastByte === undefined || lastByte === NEWLINE ? 0 : 1),
+      totalBytes: bytes.length,
+      language: `${langInfo?.name ?? (isJson ? "JSON" : "Unknown")} (minified)`,
+      symbols,
+      imports: [],
+      detailLevel: DetailLevel.Full,
+    };
+  } catch (error) {
+    if (signal?.aborted) {
+      return null;
+    }
+    console.error(`Minified mapper failed: ${error}`);
+    return null;
+  }
+}
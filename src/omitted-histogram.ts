@@ -0,0 +1,199 @@
+/**
+ * Summarize the symbols a truncated map leaves out.
+ *
+ * The span of the omitted symbols is split into equal line (or byte)
+ * ranges. Each non-empty range reports how many symbols it holds, its
+ * most common kinds and its largest symbols, so an agent can aim a read
+ * at the right region instead of bisecting the file.
+ */
+import type { OmittedBucket, PackedFileMap } from "./types.js";
+
+import { THRESHOLDS } from "./constants.js";
+import { SymbolKind } from "./enums.js";
+import { kindAt, nameAt } from "./packed-map.js";
+import { estimateTokens } from "./tokens.js";
+
+/** Start of a row, in bytes when the map addresses bytes */
+function startOf(
+  packed: PackedFileMap,
+  row: number,
+  byBytes: boolean
+): number {
+  if (!byBytes) {
+    return packed.startLines[row] ?? 0;
+  }
+  const start = packed.startBytes[row] ?? Number.NaN;
+  return Number.isNaN(start) ? 0 : start;
+}
+
+/** End of a row, in bytes when the map addresses bytes */
+function endOf(
+  packed: PackedFileMap,
+  row: number,
+  byBytes: boolean
+): number {
+  if (!byBytes) {
+    return packed.endLines[row] ?? 0;
+  }
+  const end = packed.endBytes[row] ?? Number.NaN;
+  return Number.isNaN(end) ? startOf(packed, row, true) : end;
+}
+
+/** Furthest end among `rows` */
+function lastEnd(
+  packed: PackedFileMap,
+  rows: ArrayLike<number>,
+  byBytes: boolean
+): number {
+  let end = 0;
+  for (let i = 0; i < rows.length; i++) {
+    end = Math.max(end, endOf(packed, rows[i] ?? 0, byBytes));
+  }
+  return end;
+}
+
+function shortName(name: string): string {
+  return name.length > THRESHOLDS.OMITTED_NAME_CHARS
+    ? `${name.slice(0, THRESHOLDS.OMITTED_NAME_CHARS - 1)}…`
+    : name;
+}
+
+function summarizeBucket(
+  packed: PackedFileMap,
+  rows: number[],
+  byBytes: boolean
+): OmittedBucket {
+  const kindCounts = new Map<SymbolKind, number>();
+  const size = (row: number): number =>
+    endOf(packed, row, byBytes) - startOf(packed, row, byBytes);
+  // The largest rows so far, largest first; ties keep file order
+  const largestRows: number[] = [];
+  let count = 0;
+  for (const row of rows) {
+    const kind = kindAt(packed, row);
+    const weight = packed.runLengths[row] || 1;
+    kindCounts.set(kind, (kindCounts.get(kind) ?? 0) + weight);
+    count += weight;
+
+    let at = largestRows.length;
+    while (at > 0 && size(row) > size(largestRows[at - 1] ?? 0)) {
+      at--;
+    }
+    if (at < THRESHOLDS.OMITTED_BUCKET_ENTRIES) {
+      largestRows.splice(at, 0, row);
+      largestRows.length = Math.min(
+        largestRows.length,
+        THRESHOLDS.OMITTED_BUCKET_ENTRIES
+      );
+    }
+  }
+
+  const kinds = [...kindCounts]
+    .map(([kind, kindCount]) => ({ kind, count: kindCount }))
+    .sort((a, b) => b.count - a.count)
+    .slice(0, THRESHOLDS.OMITTED_BUCKET_ENTRIES);
+
+  const first = rows[0] ?? 0;
+  const bucket: OmittedBucket = {
+    startLine: rows.length > 0 ? (packed.startLines[first] ?? 0) : 0,
+    endLine: lastEnd(packed, rows, false),
+    symbols: count,
+    kinds,
+    largest: largestRows.map((row) => shortName(nameAt(packed, row))),
+  };
+  if (byBytes) {
+    bucket.startByte = startOf(packed, first, true);
+    bucket.endByte = lastEnd(packed, rows, true);
+  }
+  return bucket;
+}
+
+/**
+ * Summarize the omitted `rows` of a packed map (in file order) in at most
+ * `buckets` regions of equal span. Empty regions are left out, and so is
+ * the whole summary when there are no more omitted symbols than regions.
+ */
+export function summarizeOmittedRows(
+  packed: PackedFileMap,
+  rows: ArrayLike<number>,
+  buckets: number = THRESHOLDS.OMITTED_BUCKETS
+): OmittedBucket[] {
+  const first = rows[0];
+  if (first === undefined || rows.length <= buckets) {
+    return [];
+  }
+  const byBytes = !Number.isNaN(packed.startBytes[first] ?? Number.NaN);
+  const start = startOf(packed, first, byBytes);
+  const end = lastEnd(packed, rows, byBytes);
+  const width = Math.max(1, (end - start + 1) / buckets);
+
+  const regions: number[][] = Array.from({ length: buckets }, () => []);
+  for (let i = 0; i < rows.length; i++) {
+    const row = rows[i] ?? 0;
+    const offset = startOf(packed, row, byBytes) - start;
+    const index = Math.min(buckets - 1, Math.floor(offset / width));
+    regions[index]?.push(row);
+  }
+  return regions
+    .filter((region) => region.length > 0)
+    .map((region) => summarizeBucket(packed, region, byBytes));
+}
+
+/**
+ * Histograms at least as large as any `summarizeOmittedRows` can make
+ * from `rows`: every region full, with the widest numbers up to
+ * `lastLine` (or `lastByte`) and the longest kinds and names. One lists
+ * the longest names in bytes, the other the costliest in tokens.
+ */
+export function widestHistograms(
+  packed: PackedFileMap,
+  rows: Uint32Array,
+  lastLine: number,
+  lastByte?: number
+): OmittedBucket[][] {
+  const kindSet = new Set<SymbolKind>();
+  // Names are interned: each distinct one is measured once
+  const seen = new Uint8Array(packed.strings.length + 1);
+  let total = 0;
+  let longest = "";
+  let costliest = "";
+  for (const row of rows) {
+    total += packed.runLengths[row] || 1;
+    kindSet.add(kindAt(packed, row));
+
+    const id = packed.names[row] ?? 0;
+    if (seen[id]) {
+      continue;
+    }
+    seen[id] = 1;
+    const name = shortName(nameAt(packed, row));
+    if (Buffer.byteLength(name, "utf8") > Buffer.byteLength(longest, "utf8")) {
+      longest = name;
+    }
+    if (estimateTokens(name) > estimateTokens(costliest)) {
+      costliest = name;
+    }
+  }
+  const kinds = [...kindSet]
+    .sort((a, b) => b.length - a.length)
+    .slice(0, THRESHOLDS.OMITTED_BUCKET_ENTRIES)
+    .map((kind) => ({ kind, count: total }));
+
+  return [longest, costliest].map((name) => {
+    const bucket: OmittedBucket = {
+      startLine: lastLine,
+      endLine: 2 * lastLine,
+      symbols: total,
+      kinds,
+      largest: Array.from(
+        { length: THRESHOLDS.OMITTED_BUCKET_ENTRIES },
+        () => name
+      ),
+    };
+    if (lastByte !== undefined) {
+      bucket.startByte = lastByte;
+      bucket.endByte = 2 * lastByte;
+    }
+    return Array.from({ length: THRESHOLDS.OMITTED_BUCKETS }, () => bucket);
+  });
+}
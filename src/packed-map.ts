@@ -0,0 +1,379 @@
+/**
+ * Columnar storage of file maps.
+ *
+ * A mapped file of 100k symbols is 100k objects, each with its own
+ * strings and optional arrays. Packed, it is a dozen typed arrays plus one
+ * table of distinct strings: repeated names, signatures and modifiers are
+ * stored once. The formatter works on the rows directly, reading them
+ * through reusable symbol objects; symbols are only materialized for the
+ * maps returned to callers.
+ */
+import type { FileMap, FileSymbol, PackedFileMap } from "./types.js";
+
+import { DetailLevel, SymbolKind } from "./enums.js";
+
+const KINDS = Object.values(SymbolKind);
+const KIND_INDEXES = new Map(KINDS.map((kind, i) => [kind, i]));
+
+const EXPORTED = 1;
+const NOT_EXPORTED = 2;
+const HAS_CHILDREN = 4;
+
+const MODIFIER_SEPARATOR = "\0";
+
+/**
+ * Reads a row into a reusable symbol object, one per `slot`. The object
+ * is overwritten by the next read into its slot and has no children.
+ */
+export type SymbolReader = (row: number, slot?: number) => FileSymbol;
+
+function countSymbols(symbols: FileSymbol[]): number {
+  let count = symbols.length;
+  for (const symbol of symbols) {
+    if (symbol.children) {
+      count += countSymbols(symbol.children);
+    }
+  }
+  return count;
+}
+
+function createColumns(
+  fields: Omit<FileMap, "symbols">,
+  count: number,
+  strings: string[]
+): PackedFileMap {
+  return {
+    ...fields,
+    count,
+    kinds: new Uint8Array(count),
+    startLines: new Uint32Array(count),
+    endLines: new Uint32Array(count),
+    startBytes: new Float64Array(count).fill(Number.NaN),
+    endBytes: new Float64Array(count).fill(Number.NaN),
+    parents: new Int32Array(count),
+    ends: new Uint32Array(count),
+    childCounts: new Uint32Array(count),
+    names: new Uint32Array(count),
+    signatures: new Uint32Array(count),
+    docstrings: new Uint32Array(count),
+    modifiers: new Uint32Array(count),
+    runLengths: new Uint32Array(count),
+    flags: new Uint8Array(count),
+    strings,
+  };
+}
+
+/**
+ * Write a symbol's own fields to row `i`; its `ends` entry is left to the
+ * caller.
+ */
+function writeSymbol(
+  packed: PackedFileMap,
+  i: number,
+  symbol: FileSymbol,
+  parent: number,
+  intern: (value: string | undefined) => number
+): void {
+  packed.kinds[i] = KIND_INDEXES.get(symbol.kind) ?? 0;
+  packed.startLines[i] = symbol.startLine;
+  packed.endLines[i] = symbol.endLine;
+  packed.startBytes[i] = symbol.startByte ?? Number.NaN;
+  packed.endBytes[i] = symbol.endByte ?? Number.NaN;
+  packed.parents[i] = parent;
+  packed.childCounts[i] = symbol.children?.length ?? 0;
+  packed.names[i] = intern(symbol.name);
+  packed.signatures[i] = intern(symbol.signature);
+  packed.docstrings[i] = intern(symbol.docstring);
+  packed.modifiers[i] = intern(symbol.modifiers?.join(MODIFIER_SEPARATOR));
+  packed.runLengths[i] = symbol.runLength ?? 0;
+  packed.flags[i] =
+    (symbol.isExported === true ? EXPORTED : 0) |
+    (symbol.isExported === false ? NOT_EXPORTED : 0) |
+    (symbol.children ? HAS_CHILDREN : 0);
+}
+
+/**
+ * A packed map's file fields, without its columns.
+ */
+export function fileFields(packed: PackedFileMap): Omit<FileMap, "symbols"> {
+  const fields: Omit<FileMap, "symbols"> = {
+    path: packed.path,
+    totalLines: packed.totalLines,
+    totalBytes: packed.totalBytes,
+    language: packed.language,
+    imports: packed.imports,
+    detailLevel: packed.detailLevel,
+  };
+  if (packed.truncatedInfo) {
+    fields.truncatedInfo = packed.truncatedInfo;
+  }
+  return fields;
+}
+
+/**
+ * Pack a map's symbols into columns.
+ */
+export function packFileMap(map: FileMap): PackedFileMap {
+  const { symbols, ...fields } = map;
+  const packed = createColumns(fields, countSymbols(symbols), []);
+
+  const interned = new Map<string, number>();
+  const intern = (value: string | undefined): number => {
+    if (value === undefined) {
+      return 0;
+    }
+    let index = interned.get(value);
+    if (index === undefined) {
+      index = packed.strings.push(value);
+      interned.set(value, index);
+    }
+    return index;
+  };
+
+  let next = 0;
+  const pack = (list: FileSymbol[], parent: number): void => {
+    for (const symbol of list) {
+      const i = next++;
+      writeSymbol(packed, i, symbol, parent, intern);
+      if (symbol.children) {
+        pack(symbol.children, i);
+      }
+      packed.ends[i] = next;
+    }
+  };
+  pack(symbols, -1);
+  return packed;
+}
+
+/**
+ * Pack a list of symbols, for helpers that take symbols rather than maps.
+ */
+export function packSymbols(symbols: FileSymbol[]): PackedFileMap {
+  return packFileMap({
+    path: "",
+    totalLines: 0,
+    totalBytes: 0,
+    language: "",
+    symbols,
+    imports: [],
+    detailLevel: DetailLevel.Full,
+  });
+}
+
+/**
+ * Pack top-level symbols only: rows of `packed` (keeping their child
+ * counts but not their children) and new symbols, in the given order.
+ */
+export function packOutline(
+  packed: PackedFileMap,
+  entries: (number | FileSymbol)[]
+): PackedFileMap {
+  const outline = createColumns(fileFields(packed), entries.length, [
+    ...packed.strings,
+  ]);
+  const append = (value: string | undefined): number =>
+    value === undefined ? 0 : outline.strings.push(value);
+
+  for (const [i, entry] of entries.entries()) {
+    if (typeof entry === "number") {
+      outline.kinds[i] = packed.kinds[entry] ?? 0;
+      outline.startLines[i] = packed.startLines[entry] ?? 0;
+      outline.endLines[i] = packed.endLines[entry] ?? 0;
+      outline.startBytes[i] = packed.startBytes[entry] ?? Number.NaN;
+      outline.endBytes[i] = packed.endBytes[entry] ?? Number.NaN;
+      outline.childCounts[i] = packed.childCounts[entry] ?? 0;
+      outline.names[i] = packed.names[entry] ?? 0;
+      outline.signatures[i] = packed.signatures[entry] ?? 0;
+      outline.docstrings[i] = packed.docstrings[entry] ?? 0;
+      outline.modifiers[i] = packed.modifiers[entry] ?? 0;
+      outline.runLengths[i] = packed.runLengths[entry] ?? 0;
+      outline.flags[i] = packed.flags[entry] ?? 0;
+      outline.parents[i] = -1;
+    } else {
+      writeSymbol(outline, i, entry, -1, append);
+    }
+    outline.ends[i] = i + 1;
+  }
+  return outline;
+}
+
+/**
+ * Rows of a packed map's top-level symbols.
+ */
+export function topLevelRows(packed: PackedFileMap): Uint32Array {
+  const rows: number[] = [];
+  let row = 0;
+  while (row < packed.count) {
+    rows.push(row);
+    row = packed.ends[row] ?? packed.count;
+  }
+  return Uint32Array.from(rows);
+}
+
+/**
+ * Rows of the children of the symbol at `row`.
+ */
+export function childRows(packed: PackedFileMap, row: number): number[] {
+  const end = packed.ends[row] ?? packed.count;
+  const children: number[] = [];
+  for (let child = row + 1; child < end; child = packed.ends[child] ?? end) {
+    children.push(child);
+  }
+  return children;
+}
+
+/**
+ * Kind of the symbol at `row`.
+ */
+export function kindAt(packed: PackedFileMap, row: number): SymbolKind {
+  return KINDS[packed.kinds[row] ?? 0] ?? SymbolKind.Unknown;
+}
+
+/**
+ * Name of the symbol at `row`.
+ */
+export function nameAt(packed: PackedFileMap, row: number): string {
+  return stringAt(packed, packed.names[row]) ?? "";
+}
+
+function stringAt(
+  packed: PackedFileMap,
+  index: number | undefined
+): string | undefined {
+  return index ? packed.strings[index - 1] : undefined;
+}
+
+function optionalNumber(value: number | undefined): number | undefined {
+  return value === undefined || Number.isNaN(value) ? undefined : value;
+}
+
+function exportedFlag(flags: number): boolean | undefined {
+  return flags & (EXPORTED | NOT_EXPORTED)
+    ? (flags & EXPORTED) !== 0
+    : undefined;
+}
+
+/**
+ * The symbol at `row` as a new object with the fields `level` shows:
+ * everything at Full, no signatures at Compact, names, ranges, export
+ * status and one level of children at Minimal, and names and ranges at
+ * Outline and Truncated.
+ */
+export function materializeSymbol(
+  packed: PackedFileMap,
+  row: number,
+  level = DetailLevel.Full,
+  withChildren = true
+): FileSymbol {
+  const symbol: FileSymbol = {
+    name: nameAt(packed, row),
+    kind: kindAt(packed, row),
+    startLine: packed.startLines[row] ?? 0,
+    endLine: packed.endLines[row] ?? 0,
+  };
+  const startByte = optionalNumber(packed.startBytes[row]);
+  if (startByte !== undefined) {
+    symbol.startByte = startByte;
+    symbol.endByte = optionalNumber(packed.endBytes[row]);
+  }
+  const runLength = packed.runLengths[row] || undefined;
+  if (level === DetailLevel.Outline || level === DetailLevel.Truncated) {
+    if (runLength !== undefined) {
+      symbol.runLength = runLength;
+    }
+    return symbol;
+  }
+
+  const flags = packed.flags[row] ?? 0;
+  const signature = stringAt(packed, packed.signatures[row]);
+  if (level === DetailLevel.Full && signature !== undefined) {
+    symbol.signature = signature;
+  }
+  if (withChildren && flags & HAS_CHILDREN) {
+    // Minimal shows children, but not theirs
+    const nested = level !== DetailLevel.Minimal;
+    symbol.children = childRows(packed, row).map((child) =>
+      materializeSymbol(packed, child, level, nested)
+    );
+  }
+  if (level !== DetailLevel.Minimal) {
+    const joined = stringAt(packed, packed.modifiers[row]);
+    if (joined !== undefined) {
+      symbol.modifiers = joined ? joined.split(MODIFIER_SEPARATOR) : [];
+    }
+    const docstring = stringAt(packed, packed.docstrings[row]);
+    if (docstring !== undefined) {
+      symbol.docstring = docstring;
+    }
+  }
+  const isExported = exportedFlag(flags);
+  if (isExported !== undefined) {
+    symbol.isExported = isExported;
+  }
+  if (level === DetailLevel.Full && runLength !== undefined) {
+    symbol.runLength = runLength;
+  }
+  return symbol;
+}
+
+/**
+ * Rebuild the map a packed map was made from.
+ */
+export function unpackFileMap(packed: PackedFileMap): FileMap {
+  return {
+    ...fileFields(packed),
+    symbols: Array.from(topLevelRows(packed), (row) =>
+      materializeSymbol(packed, row)
+    ),
+  };
+}
+
+/**
+ * Create a reader of a packed map's rows, for passing rows to code that
+ * takes symbols without allocating one per row.
+ */
+export function createSymbolReader(packed: PackedFileMap): SymbolReader {
+  const slots: FileSymbol[] = [];
+  // Row each slot holds, so reading it again is free
+  const slotRows: number[] = [];
+  const modifierLists: (string[] | undefined)[] = [];
+  return (row, slot = 0) => {
+    let symbol = slots[slot];
+    if (symbol && slotRows[slot] === row) {
+      return symbol;
+    }
+    if (!symbol) {
+      symbol = {
+        name: "",
+        kind: SymbolKind.Unknown,
+        startLine: 0,
+        endLine: 0,
+      };
+      slots[slot] = symbol;
+    }
+    slotRows[slot] = row;
+    symbol.name = nameAt(packed, row);
+    symbol.kind = kindAt(packed, row);
+    symbol.startLine = packed.startLines[row] ?? 0;
+    symbol.endLine = packed.endLines[row] ?? 0;
+    symbol.startByte = optionalNumber(packed.startBytes[row]);
+    symbol.endByte =
+      symbol.startByte === undefined
+        ? undefined
+        : optionalNumber(packed.endBytes[row]);
+    symbol.signature = stringAt(packed, packed.signatures[row]);
+    symbol.docstring = stringAt(packed, packed.docstrings[row]);
+    symbol.isExported = exportedFlag(packed.flags[row] ?? 0);
+    symbol.runLength = packed.runLengths[row] || undefined;
+
+    const modifiers = packed.modifiers[row] ?? 0;
+    let list = modifierLists[modifiers];
+    if (!list && modifiers) {
+      const joined = stringAt(packed, modifiers) ?? "";
+      list = joined ? joined.split(MODIFIER_SEPARATOR) : [];
+      modifierLists[modifiers] = list;
+    }
+    symbol.modifiers = list;
+    return symbol;
+  };
+}
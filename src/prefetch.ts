@@ -0,0 +1,206 @@
+/**
+ * Speculative map prefetching for imported modules.
+ *
+ * After a file is mapped, the local modules it imports are likely to be
+ * read next. Those large enough to be mapped have their maps built at
+ * prefetch priority, a few per read and a bounded number at a time. Every
+ * prefetch can be cancelled; a read that needs a prefetched file adopts
+ * the build so it is no longer cancelled. Hits and waste are counted to
+ * show whether prefetching pays off.
+ */
+import { open, stat } from "node:fs/promises";
+
+import type { MapCacheEntry, PrefetchStats } from "./types.js";
+
+import { PREFETCH } from "./constants.js";
+import { getCachedMap } from "./map-cache.js";
+import { shouldGenerateMap } from "./mapper.js";
+
+type PrefetchBuild = (
+  absPath: string,
+  mtime: number,
+  signal: AbortSignal
+) => Promise<MapCacheEntry | null>;
+
+const NEWLINE = 0x0a;
+
+/** Prefetches in flight, oldest first */
+const inFlight = new Map<string, AbortController>();
+
+/** Prefetched maps not read yet, with their mtime and build time */
+const unused = new Map<string, { mtime: number; ms: number }>();
+
+let stats: PrefetchStats = createStats();
+
+function createStats(): PrefetchStats {
+  return {
+    started: 0,
+    completed: 0,
+    cancelled: 0,
+    failed: 0,
+    hits: 0,
+    wasted: 0,
+    buildMs: 0,
+    wastedMs: 0,
+  };
+}
+
+/**
+ * Check whether a file is large enough to be mapped when read. Files under
+ * the byte limit are small enough to count their lines directly.
+ */
+async function needsMap(absPath: string, size: number): Promise<boolean> {
+  if (shouldGenerateMap(0, size)) {
+    return true;
+  }
+  const handle = await open(absPath, "r");
+  try {
+    const buffer = Buffer.alloc(size);
+    const { bytesRead } = await handle.read(buffer, 0, size, 0);
+    let lines = 0;
+    for (let at = buffer.indexOf(NEWLINE); at !== -1 && at < bytesRead; ) {
+      lines++;
+      at = buffer.indexOf(NEWLINE, at + 1);
+    }
+    return shouldGenerateMap(lines, size);
+  } finally {
+    await handle.close();
+  }
+}
+
+/**
+ * Count a prefetched map that will never be read as it was built.
+ */
+function markWasted(absPath: string): void {
+  const prefetched = unused.get(absPath);
+  if (prefetched) {
+    unused.delete(absPath);
+    stats.wasted++;
+    stats.wastedMs += prefetched.ms;
+  }
+}
+
+async function prefetchOne(
+  absPath: string,
+  build: PrefetchBuild
+): Promise<void> {
+  const fileStats = await stat(absPath).catch(() => null);
+  if (
+    !fileStats?.isFile() ||
+    fileStats.size > PREFETCH.MAX_FILE_BYTES ||
+    getCachedMap(absPath)?.mtime === fileStats.mtimeMs ||
+    unused.get(absPath)?.mtime === fileStats.mtimeMs ||
+    !(await needsMap(absPath, fileStats.size).catch(() => false)) ||
+    inFlight.has(absPath)
+  ) {
+    return;
+  }
+
+  // Keep within budget by cancelling the oldest prefetch
+  if (inFlight.size >= PREFETCH.MAX_IN_FLIGHT) {
+    const [oldest] = inFlight.keys();
+    if (oldest !== undefined) {
+      cancelPrefetch(oldest);
+    }
+  }
+
+  const controller = new AbortController();
+  inFlight.set(absPath, controller);
+  stats.started++;
+  const start = performance.now();
+  let entry: MapCacheEntry | null = null;
+  try {
+    entry = await build(absPath, fileStats.mtimeMs, controller.signal);
+  } catch {
+    // Counted below
+  }
+  const ms = performance.now() - start;
+
+  // Adopted by a read meanwhile: the read counted the hit
+  const adopted = inFlight.get(absPath) !== controller;
+  if (!adopted) {
+    inFlight.delete(absPath);
+  }
+  if (controller.signal.aborted) {
+    return;
+  }
+
+  stats.buildMs += ms;
+  if (!entry) {
+    stats.failed++;
+    return;
+  }
+  stats.completed++;
+  if (!adopted) {
+    markWasted(absPath);
+    unused.set(absPath, { mtime: fileStats.mtimeMs, ms });
+  }
+}
+
+/**
+ * Prefetch the maps of up to `PREFETCH.MAX_FILES_PER_READ` files.
+ * Files already mapped or being prefetched, too small to be mapped when
+ * read, or over `PREFETCH.MAX_FILE_BYTES` are skipped.
+ */
+export function prefetchMaps(paths: string[], build: PrefetchBuild): void {
+  for (const absPath of paths.slice(0, PREFETCH.MAX_FILES_PER_READ)) {
+    if (!inFlight.has(absPath)) {
+      void prefetchOne(absPath, build);
+    }
+  }
+}
+
+/**
+ * Cancel a prefetch in flight.
+ */
+export function cancelPrefetch(absPath: string): void {
+  const controller = inFlight.get(absPath);
+  if (controller) {
+    inFlight.delete(absPath);
+    stats.cancelled++;
+    controller.abort();
+  }
+}
+
+/**
+ * Cancel every prefetch in flight.
+ */
+export function cancelAllPrefetches(): void {
+  for (const absPath of [...inFlight.keys()]) {
+    cancelPrefetch(absPath);
+  }
+}
+
+/**
+ * Record that a read needs the map of a file version. A prefetched map of
+ * that version, or a prefetch still building it, counts as a hit and is
+ * no longer cancellable; a prefetched map of another version is waste.
+ */
+export function claimPrefetch(absPath: string, mtime: number): void {
+  if (inFlight.delete(absPath)) {
+    stats.hits++;
+    return;
+  }
+  if (unused.get(absPath)?.mtime === mtime) {
+    unused.delete(absPath);
+    stats.hits++;
+    return;
+  }
+  markWasted(absPath);
+}
+
+/**
+ * Prefetch counters, with maps built but not read yet counted separately
+ * from waste.
+ */
+export function getPrefetchStats(): PrefetchStats & { pending: number } {
+  return { ...stats, pending: unused.size };
+}
+
+/**
+ * Drop the prefetch statistics, including the maps not read yet.
+ */
+export function resetPrefetchStats(): void {
+  unused.clear();
+  stats = createStats();
+}
@@ -0,0 +1,108 @@
+/**
+ * Per-session memory of the content reads have returned.
+ *
+ * Agents often re-read the same large file while planning. Reads are
+ * remembered by path and requested range with the file's mtime, so an
+ * identical re-read can be answered with a short note and a changed file
+ * with a diff. The last map returned for each file is remembered too, so
+ * the map of a changed file can be sent as its changes. The memory is
+ * cleared when the session changes or its context is compacted, since
+ * the agent no longer has the content then.
+ */
+import type { SessionMap, SessionRead } from "./types.js";
+
+import { DEDUP } from "./constants.js";
+
+const reads = new Map<string, SessionRead>();
+const maps = new Map<string, SessionMap>();
+let turn = 0;
+
+/**
+ * Key identifying a read by file and requested range.
+ */
+export function sessionReadKey(
+  absPath: string,
+  range: {
+    offset?: number;
+    limit?: number;
+    byteOffset?: number;
+    byteLength?: number;
+    symbol?: string;
+    mode?: string;
+  }
+): string {
+  return JSON.stringify([
+    absPath,
+    range.offset,
+    range.limit,
+    range.byteOffset,
+    range.byteLength,
+    range.symbol,
+    range.mode,
+  ]);
+}
+
+/**
+ * Get the content a read with this key returned earlier in the session.
+ */
+export function getSessionRead(key: string): SessionRead | undefined {
+  return reads.get(key);
+}
+
+/**
+ * Remember the content a read returned, forgetting the oldest reads
+ * beyond `DEDUP.MAX_READS`.
+ */
+export function rememberSessionRead(
+  key: string,
+  read: Omit<SessionRead, "turn">
+): void {
+  reads.delete(key);
+  reads.set(key, { ...read, turn });
+  for (const oldest of reads.keys()) {
+    if (reads.size <= DEDUP.MAX_READS) {
+      break;
+    }
+    reads.delete(oldest);
+  }
+}
+
+/**
+ * Get the map last returned for a file in the session.
+ */
+export function getSessionMap(absPath: string): SessionMap | undefined {
+  return maps.get(absPath);
+}
+
+/**
+ * Remember the map returned for a file, forgetting the oldest maps beyond
+ * `DEDUP.MAX_MAPS`.
+ */
+export function rememberSessionMap(
+  absPath: string,
+  map: Omit<SessionMap, "turn">
+): void {
+  maps.delete(absPath);
+  maps.set(absPath, { ...map, turn });
+  for (const oldest of maps.keys()) {
+    if (maps.size <= DEDUP.MAX_MAPS) {
+      break;
+    }
+    maps.delete(oldest);
+  }
+}
+
+/**
+ * Set the agent turn subsequent reads belong to.
+ */
+export function setSessionTurn(index: number): void {
+  turn = index;
+}
+
+/**
+ * Forget every read and map, e.g. after the context was compacted.
+ */
+export function clearSessionReads(): void {
+  reads.clear();
+  maps.clear();
+}
@@ -0,0 +1,342 @@
+/**
+ * Per-read timing and outcome statistics.
+ *
+ * Each read carries a trace that collects stage timings, the mapper that
+ * produced the map and the final detail level. Finished traces are folded
+ * into fixed-bucket histograms per stage and per mapper, kept in a bounded
+ * list of recent reads for export, and optionally appended to a JSONL file.
+ */
+import { appendFile, writeFile } from "node:fs/promises";
+
+import type { LatencyHistogram, ReadTrace } from "./types.js";
+
+import { STATS } from "./constants.js";
+import { DetailLevel, ReadOutcome, ReadStage } from "./enums.js";
+import { getPrefetchStats } from "./prefetch.js";
+import { getSchedulerStats } from "./scheduler.js";
+import { getSettings } from "./settings.js";
+
+let stageHistograms = new Map<ReadStage, LatencyHistogram>();
+let mapperHistograms = new Map<string, LatencyHistogram>();
+let totalHistogram = createHistogram();
+let outcomes = new Map<ReadOutcome, number>();
+let detailLevels = new Map<DetailLevel, number>();
+let mapTokens = { count: 0, total: 0, max: 0 };
+let recent: ReadTrace[] = [];
+
+function createHistogram(): LatencyHistogram {
+  return {
+    buckets: Array.from(
+      { length: STATS.HISTOGRAM_BOUNDS_MS.length + 1 },
+      () => 0
+    ),
+    count: 0,
+    totalMs: 0,
+    maxMs: 0,
+  };
+}
+
+function recordSample(histogram: LatencyHistogram, ms: number): void {
+  const bucket = STATS.HISTOGRAM_BOUNDS_MS.findIndex((bound) => ms <= bound);
+  const index = bucket === -1 ? STATS.HISTOGRAM_BOUNDS_MS.length : bucket;
+  histogram.buckets[index] = (histogram.buckets[index] ?? 0) + 1;
+  histogram.count++;
+  histogram.totalMs += ms;
+  histogram.maxMs = Math.max(histogram.maxMs, ms);
+}
+
+function recordInto<K>(
+  histograms: Map<K, LatencyHistogram>,
+  key: K,
+  ms: number
+): void {
+  let histogram = histograms.get(key);
+  if (!histogram) {
+    histogram = createHistogram();
+    histograms.set(key, histogram);
+  }
+  recordSample(histogram, ms);
+}
+
+function increment<K>(counts: Map<K, number>, key: K): void {
+  counts.set(key, (counts.get(key) ?? 0) + 1);
+}
+
+/**
+ * Upper bound of the bucket holding the given quantile (0-1).
+ * Samples above every bound report the histogram's maximum.
+ */
+export function histogramQuantile(
+  histogram: LatencyHistogram,
+  quantile: number
+): number {
+  const target = Math.ceil(histogram.count * quantile);
+  let seen = 0;
+  for (const [index, count] of histogram.buckets.entries()) {
+    seen += count;
+    if (count > 0 && seen >= target) {
+      return STATS.HISTOGRAM_BOUNDS_MS[index] ?? histogram.maxMs;
+    }
+  }
+  return histogram.maxMs;
+}
+
+/**
+ * Start tracing a read.
+ */
+export function startReadTrace(path: string): ReadTrace {
+  return {
+    startedAt: Date.now(),
+    path,
+    outcome: ReadOutcome.Delegated,
+    bytes: null,
+    mapper: null,
+    fallbackDepth: 0,
+    attempts: [],
+    detailLevel: null,
+    formatPasses: 0,
+    mapTokens: null,
+    cacheHit: false,
+    mapDiff: false,
+    budgetExceeded: false,
+    spans: {},
+    totalMs: 0,
+  };
+}
+
+/**
+ * Add time to one of a trace's stages.
+ */
+export function addSpan(
+  trace: ReadTrace | undefined,
+  stage: ReadStage,
+  ms: number
+): void {
+  if (trace) {
+    trace.spans[stage] = (trace.spans[stage] ?? 0) + ms;
+  }
+}
+
+/**
+ * Run a task and add its duration to a trace's stage.
+ */
+export async function timeSpan<T>(
+  trace: ReadTrace | undefined,
+  stage: ReadStage,
+  task: () => Promise<T>
+): Promise<T> {
+  const start = performance.now();
+  try {
+    return await task();
+  } finally {
+    addSpan(trace, stage, performance.now() - start);
+  }
+}
+
+/**
+ * Copy the map generation recorded on one trace into another.
+ */
+export function mergeTrace(
+  target: ReadTrace | undefined,
+  source: ReadTrace
+): void {
+  if (!target) {
+    return;
+  }
+  target.attempts.push(...source.attempts);
+  for (const [stage, ms] of Object.entries(source.spans)) {
+    if (ms !== undefined) {
+      addSpan(target, stage as ReadStage, ms);
+    }
+  }
+  target.mapper = source.mapper ?? target.mapper;
+  target.fallbackDepth = source.fallbackDepth;
+  target.formatPasses = source.formatPasses;
+}
+
+/**
+ * Fold a finished trace into the statistics.
+ */
+export function recordRead(trace: ReadTrace): void {
+  recordSample(totalHistogram, trace.totalMs);
+  for (const [stage, ms] of Object.entries(trace.spans)) {
+    if (ms !== undefined) {
+      recordInto(stageHistograms, stage as ReadStage, ms);
+    }
+  }
+  for (const attempt of trace.attempts) {
+    recordInto(mapperHistograms, attempt.mapper, attempt.ms);
+  }
+  increment(outcomes, trace.outcome);
+  if (trace.detailLevel) {
+    increment(detailLevels, trace.detailLevel);
+  }
+  if (trace.mapTokens !== null) {
+    mapTokens.count++;
+    mapTokens.total += trace.mapTokens;
+    mapTokens.max = Math.max(mapTokens.max, trace.mapTokens);
+  }
+
+  recent.push(trace);
+  if (recent.length > STATS.MAX_RECENT_READS) {
+    recent.shift();
+  }
+
+  const { statsFile } = getSettings();
+  if (statsFile) {
+    void appendFile(statsFile, `${JSON.stringify(trace)}\n`).catch(() => {
+      // Best-effort: statistics never fail a read
+    });
+  }
+}
+
+/**
+ * Trace a read from start to finish. The trace's outcome becomes
+ * `error` when the read throws.
+ */
+export async function traceRead<T>(
+  path: string,
+  read: (trace: ReadTrace) => Promise<T>
+): Promise<T> {
+  const trace = startReadTrace(path);
+  const start = performance.now();
+  try {
+    return await read(trace);
+  } catch (error) {
+    trace.outcome = ReadOutcome.Error;
+    throw error;
+  } finally {
+    trace.totalMs = performance.now() - start;
+    recordRead(trace);
+  }
+}
+
+/**
+ * Recently finished reads, oldest first.
+ */
+export function getRecentReads(): readonly ReadTrace[] {
+  return recent;
+}
+
+/**
+ * Write the recent reads to a file, one JSON object per line.
+ * Returns the number of reads written.
+ */
+export async function exportReadStats(filePath: string): Promise<number> {
+  await writeFile(
+    filePath,
+    recent.map((trace) => `${JSON.stringify(trace)}\n`).join("")
+  );
+  return recent.length;
+}
+
+/**
+ * Drop all collected statistics.
+ */
+export function resetReadStats(): void {
+  stageHistograms = new Map();
+  mapperHistograms = new Map();
+  totalHistogram = createHistogram();
+  outcomes = new Map();
+  detailLevels = new Map();
+  mapTokens = { count: 0, total: 0, max: 0 };
+  recent = [];
+}
+
+function formatMs(ms: number): string {
+  if (ms < 1) {
+    return "<1ms";
+  }
+  return ms < 1000 ? `${Math.round(ms)}ms` : `${(ms / 1000).toFixed(1)}s`;
+}
+
+function formatHistogramRow(
+  label: string,
+  histogram: LatencyHistogram
+): string {
+  return [
+    label.padEnd(16),
+    String(histogram.count).padStart(6),
+    formatMs(histogramQuantile(histogram, 0.5)).padStart(8),
+    formatMs(histogramQuantile(histogram, 0.95)).padStart(8),
+    formatMs(histogram.maxMs).padStart(8),
+    formatMs(histogram.totalMs).padStart(8),
+  ].join(" ");
+}
+
+function formatCounts<K extends string>(counts: Map<K, number>): string {
+  return [...counts.entries()]
+    .sort((a, b) => b[1] - a[1])
+    .map(([key, count]) => `${key} ${count}`)
+    .join(", ");
+}
+
+/**
+ * Render the statistics as a plain-text report.
+ */
+export function formatReadStats(): string {
+  if (totalHistogram.count === 0) {
+    return "read-map: no reads recorded yet";
+  }
+
+  const header = [
+    "".padEnd(16),
+    "count".padStart(6),
+    "p50".padStart(8),
+    "p95".padStart(8),
+    "max".padStart(8),
+    "total".padStart(8),
+  ].join(" ");
+
+  const lines = [
+    `read-map: ${totalHistogram.count} reads (${formatCounts(outcomes)})`,
+    "",
+    header,
+    formatHistogramRow("read", totalHistogram),
+  ];
+  for (const stage of Object.values(ReadStage)) {
+    const histogram = stageHistograms.get(stage);
+    if (histogram) {
+      lines.push(formatHistogramRow(stage, histogram));
+    }
+  }
+
+  if (mapperHistograms.size > 0) {
+    lines.push("", "Mappers:");
+    const byTotal = [...mapperHistograms.entries()].sort(
+      (a, b) => b[1].totalMs - a[1].totalMs
+    );
+    for (const [mapper, histogram] of byTotal) {
+      lines.push(formatHistogramRow(mapper, histogram));
+    }
+  }
+
+  if (detailLevels.size > 0) {
+    lines.push("", `Detail levels: ${formatCounts(detailLevels)}`);
+  }
+  if (mapTokens.count > 0) {
+    lines.push(
+      `Map tokens (estimated): mean ${Math.round(mapTokens.total / mapTokens.count)}, max ${mapTokens.max}, total ${mapTokens.total}`
+    );
+  }
+
+  const prefetch = getPrefetchStats();
+  if (prefetch.started > 0) {
+    lines.push(
+      "",
+      `Prefetch: started ${prefetch.started}, hits ${prefetch.hits}, wasted ${prefetch.wasted}, not read yet ${prefetch.pending}, cancelled ${prefetch.cancelled}, failed ${prefetch.failed}; build time ${formatMs(prefetch.buildMs)}, wasted ${formatMs(prefetch.wastedMs)}`
+    );
+  }
+
+  const scheduler = getSchedulerStats().filter((s) => s.started > 0);
+  if (scheduler.length > 0) {
+    lines.push("", "Scheduler:");
+    for (const s of scheduler) {
+      lines.push(
+        `${s.kind.padEnd(16)} started ${s.started}, skipped ${s.skipped}, wait avg ${formatMs(s.totalWaitMs / s.started)}, max ${formatMs(s.maxWaitMs)}`
+      );
+    }
+  }
+
+  return lines.join("\n");
+}
@@ -0,0 +1,300 @@
+/**
+ * Mapper scheduler: per-resource concurrency limits, priority queues and
+ * deadlines for map generation.
+ *
+ * A burst of parallel reads would otherwise fork one python3/go/jq/ctags
+ * process per read. Each resource class gets a fixed number of slots;
+ * waiting tasks are served by priority, then FIFO. A task whose deadline
+ * passes while queued is skipped so the caller can degrade to a cheaper
+ * mapper, and a running task's signal aborts at its deadline.
+ */
+import type { MapUrgency, SchedulerKindStats } from "./types.js";
+
+import { SCHEDULER } from "./constants.js";
+import { MapPriority, MapperKind } from "./enums.js";
+
+interface ScheduleOptions {
+  priority?: MapPriority;
+  signal?: AbortSignal;
+  deadline?: number;
+  /** Shared priority and deadline; overrides `priority` and `deadline` */
+  urgency?: MapUrgency;
+}
+
+interface QueuedTask {
+  priority: MapPriority;
+  enqueuedAt: number;
+  start: () => void;
+  skip: () => void;
+}
+
+interface KindState {
+  active: number;
+  queue: QueuedTask[];
+  stats: SchedulerKindStats;
+}
+
+const states = new Map<MapperKind, KindState>();
+
+function getState(kind: MapperKind): KindState {
+  let state = states.get(kind);
+  if (!state) {
+    state = {
+      active: 0,
+      queue: [],
+      stats: {
+        kind,
+        active: 0,
+        queued: 0,
+        started: 0,
+        skipped: 0,
+        totalWaitMs: 0,
+        maxWaitMs: 0,
+      },
+    };
+    states.set(kind, state);
+  }
+  return state;
+}
+
+/**
+ * Insert keeping the queue ordered by priority, FIFO within a priority.
+ */
+function enqueue(state: KindState, task: QueuedTask): void {
+  const index = state.queue.findIndex((t) => t.priority > task.priority);
+  if (index === -1) {
+    state.queue.push(task);
+  } else {
+    state.queue.splice(index, 0, task);
+  }
+}
+
+function pump(kind: MapperKind): void {
+  const state = getState(kind);
+  const limit = SCHEDULER.CONCURRENCY[kind];
+  while (state.active < limit && state.queue.length > 0) {
+    const task = state.queue.shift();
+    task?.start();
+  }
+}
+
+/**
+ * Create the priority and deadline of a map build.
+ */
+export function createUrgency(
+  priority: MapPriority = MapPriority.Foreground,
+  deadline?: number
+): MapUrgency {
+  return { priority, deadline, listeners: new Set() };
+}
+
+/**
+ * Move a build to a higher priority and that priority's deadline, e.g. when
+ * a read joins a prefetch. Its queued tasks are re-queued and its running
+ * tasks' deadlines re-armed. A lower or equal priority is ignored.
+ */
+export function raiseUrgency(
+  urgency: MapUrgency,
+  priority: MapPriority,
+  deadline?: number
+): void {
+  if (priority >= urgency.priority) {
+    return;
+  }
+  urgency.priority = priority;
+  urgency.deadline = deadline;
+  for (const listener of [...urgency.listeners]) {
+    listener();
+  }
+}
+
+/**
+ * Derive the urgency of one step of a build, following the build's raises.
+ * `reserveMs` is held back from the deadline; null drops the deadline.
+ */
+export function followUrgency(
+  parent: MapUrgency,
+  reserveMs: number | null
+): MapUrgency {
+  const deadline = () =>
+    reserveMs === null || parent.deadline === undefined
+      ? undefined
+      : parent.deadline - reserveMs;
+  const child = createUrgency(parent.priority, deadline());
+  parent.listeners.add(() => raiseUrgency(child, parent.priority, deadline()));
+  return child;
+}
+
+/**
+ * Build the signal handed to a running task: the caller's signal combined
+ * with the time left to the deadline, re-armed when the urgency is raised.
+ */
+function taskSignal(
+  signal: AbortSignal | undefined,
+  urgency: MapUrgency
+): { signal: AbortSignal; dispose: () => void } {
+  const controller = new AbortController();
+  let timer: ReturnType<typeof setTimeout> | undefined;
+  const arm = () => {
+    clearTimeout(timer);
+    if (urgency.deadline !== undefined) {
+      timer = setTimeout(
+        () =>
+          controller.abort(
+            new DOMException("The operation timed out.", "TimeoutError")
+          ),
+        Math.max(0, urgency.deadline - Date.now())
+      );
+    }
+  };
+  arm();
+  urgency.listeners.add(arm);
+  return {
+    signal: signal
+      ? AbortSignal.any([signal, controller.signal])
+      : controller.signal,
+    dispose: () => {
+      clearTimeout(timer);
+      urgency.listeners.delete(arm);
+    },
+  };
+}
+
+/**
+ * Run a mapper task once a slot for its resource class is free.
+ *
+ * Resolves to null without running the task when it is aborted or its
+ * deadline passes while queued. Raising the task's urgency re-queues it.
+ */
+export function schedule<T>(
+  kind: MapperKind,
+  task: (signal?: AbortSignal) => Promise<T>,
+  options: ScheduleOptions = {}
+): Promise<T | null> {
+  const { signal } = options;
+  const urgency =
+    options.urgency ?? createUrgency(options.priority, options.deadline);
+  const state = getState(kind);
+
+  if (
+    signal?.aborted ||
+    (urgency.deadline !== undefined && urgency.deadline <= Date.now())
+  ) {
+    state.stats.skipped++;
+    return Promise.resolve(null);
+  }
+
+  return new Promise<T | null>((resolve, reject) => {
+    let timer: ReturnType<typeof setTimeout> | undefined;
+
+    const cleanup = () => {
+      if (timer) {
+        clearTimeout(timer);
+      }
+      signal?.removeEventListener("abort", onAbort);
+      urgency.listeners.delete(onRaise);
+    };
+
+    const armSkip = () => {
+      if (timer) {
+        clearTimeout(timer);
+      }
+      if (urgency.deadline !== undefined) {
+        timer = setTimeout(
+          queued.skip,
+          Math.max(0, urgency.deadline - Date.now())
+        );
+      }
+    };
+
+    const dequeue = () => {
+      const index = state.queue.indexOf(queued);
+      if (index === -1) {
+        return false;
+      }
+      state.queue.splice(index, 1);
+      state.stats.skipped++;
+      return true;
+    };
+
+    const onAbort = () => {
+      if (dequeue()) {
+        cleanup();
+        resolve(null);
+      }
+    };
+
+    const onRaise = () => {
+      const index = state.queue.indexOf(queued);
+      if (index === -1) {
+        return;
+      }
+      state.queue.splice(index, 1);
+      queued.priority = urgency.priority;
+      enqueue(state, queued);
+      armSkip();
+    };
+
+    const queued: QueuedTask = {
+      priority: urgency.priority,
+      enqueuedAt: performance.now(),
+      start: () => {
+        cleanup();
+        const waitMs = performance.now() - queued.enqueuedAt;
+        state.active++;
+        state.stats.started++;
+        state.stats.totalWaitMs += waitMs;
+        state.stats.maxWaitMs = Math.max(state.stats.maxWaitMs, waitMs);
+
+        const running = taskSignal(signal, urgency);
+        task(running.signal)
+          .then(resolve, reject)
+          .finally(() => {
+            running.dispose();
+            state.active--;
+            pump(kind);
+          });
+      },
+      skip: () => {
+        if (dequeue()) {
+          cleanup();
+          resolve(null);
+        }
+      },
+    };
+
+    signal?.addEventListener("abort", onAbort, { once: true });
+    urgency.listeners.add(onRaise);
+    armSkip();
+
+    enqueue(state, queued);
+    pump(kind);
+  });
+}
+
+/**
+ * Snapshot queue statistics for every resource class seen so far.
+ * Wait times are the input for tuning `SCHEDULER.CONCURRENCY`.
+ */
+export function getSchedulerStats(): SchedulerKindStats[] {
+  return [...states.values()].map((state) => ({
+    ...state.stats,
+    active: state.active,
+    queued: state.queue.length,
+  }));
+}
+
+/**
+ * Reset scheduler statistics, e.g. for `/readmap-stats reset`.
+ */
+export function resetSchedulerStats(): void {
+  for (const state of states.values()) {
+    state.stats = {
+      ...state.stats,
+      started: 0,
+      skipped: 0,
+      totalWaitMs: 0,
+      maxWaitMs: 0,
+    };
+  }
+}
@@ -0,0 +1,123 @@
+/**
+ * Extension settings.
+ *
+ * Read once at load time from `~/.pi/agent/read-map.json`, then from
+ * `.pi/read-map.json` in the working directory (project values win).
+ * Missing or malformed files are ignored, as are unknown values of
+ * enum-valued settings, with a warning.
+ */
+import { readFileSync } from "node:fs";
+import { homedir } from "node:os";
+import { join } from "node:path";
+
+import type { ReadMapSettings } from "./types.js";
+
+import { DEFAULT_SETTINGS } from "./constants.js";
+import { DetailLevel, MapFormat } from "./enums.js";
+
+let current: ReadMapSettings = { ...DEFAULT_SETTINGS };
+
+/**
+ * Check an enum-valued setting, warning when its value is unknown.
+ */
+function isKnownValue(
+  filePath: string,
+  name: string,
+  value: unknown,
+  values: string[]
+): boolean {
+  if (typeof value === "string" && values.includes(value)) {
+    return true;
+  }
+  console.warn(
+    `read-map: ignoring ${name} ${JSON.stringify(value)} in ${filePath}, expected one of: ${values.join(", ")}`
+  );
+  return false;
+}
+
+/**
+ * Drop unknown values of enum-valued settings so their defaults apply.
+ */
+function validateSettings(
+  filePath: string,
+  settings: Partial<ReadMapSettings>
+): Partial<ReadMapSettings> {
+  const valid = { ...settings };
+  if (
+    valid.mapFormat !== undefined &&
+    !isKnownValue(
+      filePath,
+      "mapFormat",
+      valid.mapFormat,
+      Object.values(MapFormat)
+    )
+  ) {
+    delete valid.mapFormat;
+  }
+  if (typeof valid.mapperCosts === "object" && valid.mapperCosts !== null) {
+    valid.mapperCosts = Object.fromEntries(
+      Object.entries(valid.mapperCosts).map(([mapper, cost]) => {
+        if (
+          cost?.detail === undefined ||
+          isKnownValue(
+            filePath,
+            `mapperCosts.${mapper}.detail`,
+            cost.detail,
+            Object.values(DetailLevel)
+          )
+        ) {
+          return [mapper, cost];
+        }
+        const rest = { ...cost };
+        delete rest.detail;
+        return [mapper, rest];
+      })
+    );
+  }
+  return valid;
+}
+
+function readSettingsFile(filePath: string): Partial<ReadMapSettings> {
+  try {
+    const parsed = JSON.parse(readFileSync(filePath, "utf8")) as unknown;
+    if (typeof parsed === "object" && parsed !== null) {
+      return validateSettings(filePath, parsed as Partial<ReadMapSettings>);
+    }
+  } catch {
+    // Missing or invalid settings file
+  }
+  return {};
+}
+
+/**
+ * Load settings for a working directory and make them current.
+ */
+export function loadSettings(cwd: string): ReadMapSettings {
+  current = {
+    ...DEFAULT_SETTINGS,
+    ...readSettingsFile(join(homedir(), ".pi", "agent", "read-map.json")),
+    ...readSettingsFile(join(cwd, ".pi", "read-map.json")),
+  };
+  return current;
+}
+
+/**
+ * Get the current settings.
+ */
+export function getSettings(): ReadMapSettings {
+  return current;
+}
+
+/**
+ * Override individual settings. Exported for testing purposes only.
+ */
+export function setSettings(overrides: Partial<ReadMapSettings>): void {
+  current = { ...DEFAULT_SETTINGS, ...overrides };
+}
+
+/**
+ * Change individual settings for the rest of the session.
+ */
+export function updateSettings(overrides: Partial<ReadMapSettings>): void {
+  current = { ...current, ...overrides };
+}
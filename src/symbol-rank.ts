@@ -0,0 +1,77 @@
+/**
+ * Rank top-level symbols by how much they help an agent navigate a file.
+ *
+ * Used when a map must drop symbols: large spans, exported API, symbols
+ * with members, documented symbols, distinctive names and collapsed runs
+ * are worth more per line than small private helpers.
+ */
+import type { FileSymbol, PackedFileMap } from "./types.js";
+
+import { createSymbolReader } from "./packed-map.js";
+
+/** Bytes counted as one line when scoring byte-addressed symbols */
+const BYTES_PER_LINE = 80;
+
+/**
+ * Navigational value of one symbol. `nameCount` is how many top-level
+ * symbols share its name.
+ */
+function scoreSymbol(
+  symbol: FileSymbol,
+  nameCount: number,
+  childCount: number
+): number {
+  const span =
+    symbol.startByte !== undefined && symbol.endByte !== undefined
+      ? (symbol.endByte - symbol.startByte) / BYTES_PER_LINE
+      : symbol.endLine - symbol.startLine + 1;
+
+  let score = Math.log2(1 + Math.max(span, 0));
+  if (symbol.isExported) {
+    score += 2;
+  }
+  score += 1.5 * Math.log2(1 + childCount);
+  if (symbol.docstring) {
+    score += 1;
+  }
+  score += 1 / nameCount;
+  if (symbol.runLength !== undefined) {
+    score += Math.log2(symbol.runLength);
+  }
+  return score;
+}
+
+/**
+ * Indices of `scores` from highest to lowest. Ties keep their order.
+ */
+function byScore(scores: Float64Array): Uint32Array {
+  return Uint32Array.from(scores.keys()).sort(
+    (a, b) => (scores[b] ?? 0) - (scores[a] ?? 0) || a - b
+  );
+}
+
+/**
+ * Indices into `rows` of a packed map's symbols, from most to least
+ * valuable. Ties keep line order.
+ */
+export function rankRows(
+  packed: PackedFileMap,
+  rows: Uint32Array
+): Uint32Array {
+  const read = createSymbolReader(packed);
+  // Names are interned, so equal names share an index
+  const nameCounts = new Uint32Array(packed.strings.length + 1);
+  for (const row of rows) {
+    const name = packed.names[row] ?? 0;
+    nameCounts[name] = (nameCounts[name] ?? 0) + 1;
+  }
+
+  const scores = Float64Array.from(rows, (row) =>
+    scoreSymbol(
+      read(row),
+      nameCounts[packed.names[row] ?? 0] ?? 1,
+      packed.childCounts[row]
+    )
+  );
+  return byScore(scores);
+}
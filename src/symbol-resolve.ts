@@ -0,0 +1,102 @@
+/**
+ * Resolve a symbol query such as `BatchProcessor.run` against a file map.
+ */
+import type { FileMap, FileSymbol, SymbolMatch } from "./types.js";
+
+/**
+ * Flatten the symbol tree with dotted qualified names.
+ */
+function flattenSymbols(
+  symbols: FileSymbol[],
+  parent = "",
+  out: SymbolMatch[] = []
+): SymbolMatch[] {
+  for (const symbol of symbols) {
+    const qualifiedName = parent ? `${parent}.${symbol.name}` : symbol.name;
+    out.push({ symbol, qualifiedName });
+    if (symbol.children) {
+      flattenSymbols(symbol.children, qualifiedName, out);
+    }
+  }
+  return out;
+}
+
+/**
+ * Check whether all characters of `query` appear in order in `text`.
+ */
+function isSubsequence(query: string, text: string): boolean {
+  let i = 0;
+  for (const char of text) {
+    if (char === query[i]) {
+      i++;
+      if (i === query.length) {
+        return true;
+      }
+    }
+  }
+  return query.length === 0;
+}
+
+/**
+ * Text a partial query is matched against: the qualified name for dotted
+ * queries, otherwise the symbol's own name.
+ */
+function partialTarget(match: SymbolMatch, lower: string): string {
+  return (
+    lower.includes(".") ? match.qualifiedName : match.symbol.name
+  ).toLowerCase();
+}
+
+/**
+ * Match tiers, from most to least precise. Only the first tier with any
+ * match is returned, so an exact hit is never drowned out by fuzzy ones.
+ */
+const TIERS: ((m: SymbolMatch, query: string, lower: string) => boolean)[] = [
+  (m, query) => m.qualifiedName === query,
+  (m, query) => m.symbol.name === query,
+  (m, _query, lower) =>
+    m.qualifiedName.toLowerCase() === lower ||
+    m.symbol.name.toLowerCase() === lower,
+  (m, _query, lower) => m.qualifiedName.toLowerCase().endsWith(`.${lower}`),
+  (m, _query, lower) => partialTarget(m, lower).includes(lower),
+  (m, _query, lower) => isSubsequence(lower, partialTarget(m, lower)),
+];
+
+/**
+ * Find the symbols matching a query, best tier only, in line order.
+ *
+ * Accepts `.`, `::` and `#` as path separators, so `Foo::bar` and
+ * `Foo#bar` resolve like `Foo.bar`.
+ */
+export function resolveSymbol(map: FileMap, query: string): SymbolMatch[] {
+  const normalized = query.trim().replaceAll(/::|#/g, ".");
+  if (!normalized) {
+    return [];
+  }
+
+  const lower = normalized.toLowerCase();
+  const candidates = flattenSymbols(map.symbols);
+
+  for (const tier of TIERS) {
+    const matches = candidates.filter((m) => tier(m, normalized, lower));
+    if (matches.length > 0) {
+      return matches;
+    }
+  }
+  return [];
+}
+
+/**
+ * Format one match for display, e.g. `BatchProcessor.run (method) [67-180]`.
+ */
+export function formatSymbolMatch(match: SymbolMatch): string {
+  const { symbol } = match;
+  let range =
+    symbol.startLine === symbol.endLine
+      ? `${symbol.startLine}`
+      : `${symbol.startLine}-${symbol.endLine}`;
+  if (symbol.startByte !== undefined) {
+    range = `bytes ${symbol.startByte}-${symbol.endByte ?? symbol.startByte}`;
+  }
+  return `${match.qualifiedName} (${symbol.kind}) [${range}]`;
+}
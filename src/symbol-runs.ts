@@ -0,0 +1,184 @@
+/**
+ * Collapse runs of numbered symbols into single range entries.
+ *
+ * Generated and pathological files often declare thousands of symbols
+ * that differ only in a counter (`function_0` … `function_19999`,
+ * `Config1` … `Config300`). A run of such symbols is rendered as one
+ * line, `function_[0..19999]`, covering the span of the whole run.
+ */
+import type { FileSymbol, PackedFileMap } from "./types.js";
+
+import { THRESHOLDS } from "./constants.js";
+import { createSymbolReader, nameAt, packOutline } from "./packed-map.js";
+
+/** A name split around its last number: `case_12_ok` -> case_, 12, _ok */
+const NUMBERED_NAME = /^(.*?)(\d{1,15})(\D*)$/;
+
+interface NumberedName {
+  prefix: string;
+  digits: string;
+  suffix: string;
+  value: number;
+}
+
+function parseName(name: string): NumberedName | null {
+  const match = NUMBERED_NAME.exec(name);
+  if (!match) {
+    return null;
+  }
+  const [, prefix = "", digits = "", suffix = ""] = match;
+  return { prefix, digits, suffix, value: Number(digits) };
+}
+
+/**
+ * Whether `next` is the name after `last` in a run: same pattern, next
+ * number in sequence.
+ */
+function continuesName(last: NumberedName, next: NumberedName): boolean {
+  return (
+    next.prefix === last.prefix &&
+    next.suffix === last.suffix &&
+    next.value === last.value + 1
+  );
+}
+
+/**
+ * Whether two rows of a packed map have the same kind and shape.
+ */
+function sameRowShape(packed: PackedFileMap, a: number, b: number): boolean {
+  return (
+    packed.kinds[a] === packed.kinds[b] &&
+    packed.childCounts[a] === packed.childCounts[b] &&
+    Number.isNaN(packed.startBytes[a]) === Number.isNaN(packed.startBytes[b])
+  );
+}
+
+function runSymbol(
+  first: FileSymbol,
+  firstName: NumberedName,
+  last: FileSymbol,
+  lastName: NumberedName,
+  length: number
+): FileSymbol {
+  const { prefix, suffix } = firstName;
+  const symbol: FileSymbol = {
+    name: `${prefix}[${firstName.digits}..${lastName.digits}]${suffix}`,
+    kind: first.kind,
+    startLine: first.startLine,
+    endLine: last.endLine,
+    runLength: length,
+  };
+  if (first.startByte !== undefined) {
+    symbol.startByte = first.startByte;
+    symbol.endByte = last.endByte;
+  }
+  return symbol;
+}
+
+interface SymbolRun {
+  /** Index of the first symbol */
+  start: number;
+  /** Index after the last symbol */
+  end: number;
+  firstName: NumberedName;
+  lastName: NumberedName;
+}
+
+/**
+ * Runs of at least `minRun` of `count` symbols, given their parsed names
+ * and whether each has the same shape as the one before it.
+ */
+function findRuns(
+  count: number,
+  nameAt: (i: number) => NumberedName | null,
+  shapedLikePrevious: (i: number) => boolean,
+  minRun: number
+): SymbolRun[] {
+  const runs: SymbolRun[] = [];
+  let i = 0;
+
+  while (i < count) {
+    const firstName = nameAt(i);
+    let lastName = firstName;
+    let end = i + 1;
+
+    while (lastName && end < count) {
+      const nextName = nameAt(end);
+      if (
+        !nextName ||
+        !continuesName(lastName, nextName) ||
+        !shapedLikePrevious(end)
+      ) {
+        break;
+      }
+      lastName = nextName;
+      end++;
+    }
+
+    if (firstName && lastName && end - i >= minRun) {
+      runs.push({ start: i, end, firstName, lastName });
+      i = end;
+    } else {
+      i++;
+    }
+  }
+
+  return runs;
+}
+
+/**
+ * Replace each run of at least `minRun` consecutive numbered symbols among
+ * the `rows` of a packed map with one range symbol, as a packed outline of
+ * the top-level symbols. Null when there are no runs.
+ */
+export function collapseRows(
+  packed: PackedFileMap,
+  rows: Uint32Array,
+  minRun: number = THRESHOLDS.MIN_SYMBOL_RUN
+): PackedFileMap | null {
+  // Names are interned: each distinct one is parsed once
+  const parsed: (NumberedName | null | undefined)[] = [];
+  const numberedAt = (i: number): NumberedName | null => {
+    const row = rows[i] ?? 0;
+    const name = packed.names[row] ?? 0;
+    let numbered = parsed[name];
+    if (numbered === undefined) {
+      numbered = parseName(nameAt(packed, row));
+      parsed[name] = numbered;
+    }
+    return numbered;
+  };
+  const runs = findRuns(
+    rows.length,
+    numberedAt,
+    (i) => sameRowShape(packed, rows[i - 1] ?? 0, rows[i] ?? 0),
+    minRun
+  );
+  if (runs.length === 0) {
+    return null;
+  }
+
+  const read = createSymbolReader(packed);
+  const entries: (number | FileSymbol)[] = [];
+  let i = 0;
+  const keepUntil = (end: number): void => {
+    for (; i < end; i++) {
+      entries.push(rows[i] ?? 0);
+    }
+  };
+  for (const { start, end, firstName, lastName } of runs) {
+    keepUntil(start);
+    entries.push(
+      runSymbol(
+        read(rows[start] ?? 0, 0),
+        firstName,
+        read(rows[end - 1] ?? 0, 1),
+        lastName,
+        end - start
+      )
+    );
+    i = end;
+  }
+  keepUntil(rows.length);
+  return packOutline(packed, entries);
+}
@@ -0,0 +1,131 @@
+/**
+ * Fast approximate token counting for maps.
+ *
+ * A single pass classifies characters and charges each run by what BPE
+ * tokenizers typically make of it: words cost about one token per eight
+ * letters, numbers one per three digits, punctuation one per two
+ * characters, CJK one per character, and box-drawing and other symbols
+ * one per character with repeats merging in pairs. Single spaces join
+ * the following word. Newlines are one token each, so the estimate of
+ * joined lines is the sum of the lines' estimates plus one per newline.
+ */
+
+const NEWLINE = 0;
+const SPACE = 1;
+const WORD = 2;
+const DIGIT = 3;
+const PUNCTUATION = 4;
+const CJK = 5;
+const SURROGATE = 6;
+const LOW_SURROGATE = 7;
+const SYMBOL = 8;
+
+/** Letters per token in a word, counting non-ASCII letters double */
+const LETTERS_PER_TOKEN = 8;
+/** Digits per token: BPE vocabularies split numbers into 3-digit groups */
+const DIGITS_PER_TOKEN = 3;
+/** Punctuation or repeated symbols per token (`->`, `()`, `──` merge) */
+const PUNCTUATION_PER_TOKEN = 2;
+
+/** Classes of the ASCII characters, looked up rather than compared */
+const ASCII_CLASSES = Uint8Array.from({ length: 128 }, (_, code) => {
+  if (code === 10) {
+    return NEWLINE;
+  }
+  if (code === 32 || code === 9 || code === 13) {
+    return SPACE;
+  }
+  if (code >= 48 && code <= 57) {
+    return DIGIT;
+  }
+  if ((code >= 65 && code <= 90) || (code >= 97 && code <= 122)) {
+    return WORD;
+  }
+  return PUNCTUATION;
+});
+
+function classify(code: number): number {
+  if (code < 128) {
+    return ASCII_CLASSES[code] ?? PUNCTUATION;
+  }
+  // Latin-1 and extended Latin, Greek and Cyrillic letters
+  if (
+    (code >= 0xc0 && code <= 0x24f && code !== 0xd7 && code !== 0xf7) ||
+    (code >= 0x370 && code <= 0x52f)
+  ) {
+    return WORD;
+  }
+  // CJK ideographs, kana, Hangul and compatibility ideographs
+  if (
+    (code >= 0x2e80 && code <= 0x9fff) ||
+    (code >= 0xac00 && code <= 0xd7af) ||
+    (code >= 0xf900 && code <= 0xfaff)
+  ) {
+    return CJK;
+  }
+  if (code >= 0xd800 && code <= 0xdbff) {
+    return SURROGATE;
+  }
+  if (code >= 0xdc00 && code <= 0xdfff) {
+    return LOW_SURROGATE;
+  }
+  return SYMBOL;
+}
+
+/**
+ * Tokens for a run of `length` characters of one class.
+ */
+function runTokens(kind: number, length: number): number {
+  switch (kind) {
+    case SPACE: {
+      return length > 1 ? 1 : 0;
+    }
+    case WORD: {
+      return Math.ceil(length / LETTERS_PER_TOKEN);
+    }
+    case DIGIT: {
+      return Math.ceil(length / DIGITS_PER_TOKEN);
+    }
+    case PUNCTUATION:
+    case SYMBOL: {
+      return Math.ceil(length / PUNCTUATION_PER_TOKEN);
+    }
+    case SURROGATE: {
+      // Astral characters (emoji) take a pair of byte-level tokens
+      return 2 * length;
+    }
+    case LOW_SURROGATE: {
+      return 0;
+    }
+    default: {
+      // Newlines and CJK characters never merge
+      return length;
+    }
+  }
+}
+
+/**
+ * Estimate how many model tokens `text` costs.
+ */
+export function estimateTokens(text: string): number {
+  let tokens = 0;
+  let kind = NEWLINE;
+  let length = 0;
+  let previous = -1;
+
+  for (let i = 0; i < text.length; i++) {
+    const code = text.charCodeAt(i);
+    const next = classify(code);
+    // Only repeats of the same symbol (box-drawing rules) merge
+    if (next === kind && (next !== SYMBOL || code === previous)) {
+      length += next === WORD && code >= 128 ? 2 : 1;
+    } else {
+      tokens += runTokens(kind, length);
+      kind = next;
+      length = next === WORD && code >= 128 ? 2 : 1;
+    }
+    previous = code;
+  }
+
+  return tokens + runTokens(kind, length);
+}
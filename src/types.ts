@@ -1,4 +1,12 @@
-import type { DetailLevel, SymbolKind } from "./enums.js";
+import type {
+  DetailLevel,
+  MapFormat,
+  MapPriority,
+  MapperKind,
+  ReadOutcome,
+  ReadStage,
+  SymbolKind,
+} from "./enums.js";
 
 /**
  * Represents a symbol extracted from a file.
@@ -12,6 +20,10 @@ export interface FileSymbol {
   startLine: number;
   /** Ending line number (1-indexed) */
   endLine: number;
+  /** Starting byte offset (0-indexed), for maps of minified files */
+  startByte?: number;
+  /** Ending byte offset (exclusive), for maps of minified files */
+  endByte?: number;
   /** Optional signature (for functions/methods) */
   signature?: string;
   /** Child symbols (for nested structures like methods in classes) */
@@ -22,6 +34,68 @@ export interface FileSymbol {
   docstring?: string;
   /** Whether this symbol is exported from its module */
   isExported?: boolean;
+  /** Number of numbered symbols collapsed into this range entry */
+  runLength?: number;
+}
+
+/**
+ * A symbol found by name in a file map.
+ */
+export interface SymbolMatch {
+  /** The matched symbol */
+  symbol: FileSymbol;
+  /** Dotted path from the top-level symbol (e.g. "BatchProcessor.run") */
+  qualifiedName: string;
+}
+
+/**
+ * A stretch of consecutive symbols left out of a truncated map.
+ */
+export interface SymbolGap {
+  /** Index of the shown symbol the gap precedes (symbol count if trailing) */
+  before: number;
+  /** Number of symbols omitted */
+  symbols: number;
+  /** First line of the omitted symbols */
+  startLine: number;
+  /** Last line of the omitted symbols */
+  endLine: number;
+  /** First byte of the omitted symbols, for byte-addressed maps */
+  startByte?: number;
+  /** End byte of the omitted symbols, for byte-addressed maps */
+  endByte?: number;
+}
+
+/**
+ * Part of a file map requested through `read_map`.
+ */
+export interface MapSliceOptions {
+  /** First line of interest (default: start of file) */
+  startLine?: number;
+  /** Last line of interest (default: end of file) */
+  endLine?: number;
+  /** Levels of nesting shown, 1 for top-level symbols only (default: all) */
+  depth?: number;
+}
+
+/**
+ * One region of a truncated map's omitted symbols, for its histogram.
+ */
+export interface OmittedBucket {
+  /** First line of the region's omitted symbols */
+  startLine: number;
+  /** Last line of the region's omitted symbols */
+  endLine: number;
+  /** First byte of the region's omitted symbols, for byte-addressed maps */
+  startByte?: number;
+  /** End byte of the region's omitted symbols, for byte-addressed maps */
+  endByte?: number;
+  /** Number of symbols omitted in the region */
+  symbols: number;
+  /** Most common kinds in the region, most common first */
+  kinds: { kind: SymbolKind; count: number }[];
+  /** Names of the region's largest symbols, largest first */
+  largest: string[];
 }
 
 /**
@@ -34,6 +108,10 @@ export interface TruncatedInfo {
   shownSymbols: number;
   /** Number of symbols omitted from the truncated view */
   omittedSymbols: number;
+  /** Omitted stretches when symbols were picked by importance */
+  gaps?: SymbolGap[];
+  /** Omitted symbols summarized by region */
+  histogram?: OmittedBucket[];
 }
 
 /**
@@ -66,6 +144,82 @@ export interface MapOptions {
   maxBytes?: number;
   /** Abort signal */
   signal?: AbortSignal;
+  /** Run in-process mappers on the worker pool when possible (default: true) */
+  useWorkers?: boolean;
+  /** Scheduling priority (default: foreground) */
+  priority?: MapPriority;
+  /** Epoch milliseconds by which a map should be produced */
+  deadline?: number;
+  /** Read being traced; receives the mapper attempts */
+  trace?: ReadTrace;
+  /** Try the language-specific mapper before ctags/grep (default: true) */
+  languageMapper?: boolean;
+  /** Shared priority and deadline; overrides `priority` and `deadline` */
+  urgency?: MapUrgency;
+}
+
+/**
+ * Priority and deadline of a map build, raised in place when a read joins
+ * a prefetch.
+ */
+export interface MapUrgency {
+  priority: MapPriority;
+  /** Epoch milliseconds by which the build should finish */
+  deadline?: number;
+  /** Notified when the urgency is raised */
+  listeners: Set<() => void>;
+}
+
+/**
+ * Signature shared by all language mappers.
+ */
+export type MapperFn = (
+  filePath: string,
+  signal?: AbortSignal
+) => Promise<FileMap | null>;
+
+/**
+ * Queue statistics for one mapper resource class.
+ */
+export interface SchedulerKindStats {
+  /** Resource class */
+  kind: MapperKind;
+  /** Tasks currently running */
+  active: number;
+  /** Tasks waiting for a slot */
+  queued: number;
+  /** Tasks that acquired a slot */
+  started: number;
+  /** Tasks dropped from the queue by their deadline or abort */
+  skipped: number;
+  /** Total time spent waiting for a slot */
+  totalWaitMs: number;
+  /** Longest time spent waiting for a slot */
+  maxWaitMs: number;
+}
+
+/**
+ * Task message sent from the worker pool to a mapper worker.
+ */
+export interface WorkerRequest {
+  /** Task identifier, echoed back in the response */
+  id: number;
+  /** Language ID selecting the mapper to run */
+  languageId: string;
+  /** Absolute file path to map */
+  filePath: string;
+}
+
+/**
+ * Result message sent from a mapper worker back to the pool.
+ */
+export interface WorkerResponse {
+  /** Task identifier from the request */
+  id: number;
+  /** Mapper result (null when the mapper could not map the file) */
+  result: FileMap | null;
+  /** Error message when the mapper threw */
+  error?: string;
 }
 
 /**
@@ -79,5 +233,417 @@ export interface LanguageInfo {
 }
 
 /**
- * Details for file map custom messages.
+ * A file map with its symbols stored as columns instead of objects. Each
+ * symbol is a row; rows are in depth-first order, so a symbol's
+ * descendants are the rows after it up to its `ends` entry. Strings are
+ * interned in `strings`, and string columns hold an index into it plus
+ * one, zero meaning unset.
+ */
+export interface PackedFileMap extends Omit<FileMap, "symbols"> {
+  /** Number of symbols, children included */
+  count: number;
+  /** Index of each symbol's kind in `SymbolKind` order */
+  kinds: Uint8Array;
+  /** Starting lines */
+  startLines: Uint32Array;
+  /** Ending lines */
+  endLines: Uint32Array;
+  /** Starting byte offsets, NaN when unset */
+  startBytes: Float64Array;
+  /** Ending byte offsets, NaN when unset */
+  endBytes: Float64Array;
+  /** Index of each symbol's parent, -1 for top-level symbols */
+  parents: Int32Array;
+  /** Row after each symbol's last descendant */
+  ends: Uint32Array;
+  /** Number of children of each symbol, listed in the rows or not */
+  childCounts: Uint32Array;
+  /** Names (always set) */
+  names: Uint32Array;
+  /** Signatures */
+  signatures: Uint32Array;
+  /** Docstrings */
+  docstrings: Uint32Array;
+  /** Modifiers, joined by NUL characters */
+  modifiers: Uint32Array;
+  /** Collapsed run lengths, zero when unset */
+  runLengths: Uint32Array;
+  /** Bit flags: export status and whether a children list is present */
+  flags: Uint8Array;
+  /** Interned strings */
+  strings: string[];
+}
+
+/**
+ * A map reduced to a detail level as a view over a packed map: the rows
+ * of the top-level symbols shown, with no symbol copied.
+ */
+export interface MapView {
+  /** Packed map the rows belong to */
+  packed: PackedFileMap;
+  /** Rows of the top-level symbols shown, in order */
+  rows: Uint32Array;
+  /** Detail level shown */
+  detailLevel: DetailLevel;
+  /** Truncation metadata (present when symbols are truncated) */
+  truncatedInfo?: TruncatedInfo;
+}
+
+/**
+ * Cached map for one file.
+ */
+export interface MapCacheEntry {
+  /** File mtime the map was generated for */
+  mtime: number;
+  /** Formatted, budget-enforced map text */
+  map: string;
+  /** Raw map as produced by the mapper, packed into symbol columns */
+  packedMap: PackedFileMap;
+  /** Detail level the formatted map was reduced to */
+  detailLevel: DetailLevel;
+  /** Estimated model tokens of the formatted map */
+  tokens?: number;
+  /** Render settings (format and budgets) the formatted map was built with */
+  renderKey: string;
+  /** Renders of the raw map by render key, memoized on demand */
+  renders: Map<string, BudgetedMap>;
+  /** Built by a cheaper mapper while the precise map is still generating */
+  provisional?: boolean;
+  /** Per-line hashes of the mapped content (stale-while-revalidate only) */
+  lineHashes?: Uint32Array;
+  /** Git blob ID of the mapped content, when tracked and unmodified */
+  blobId?: string;
+}
+
+/**
+ * Sparse line-offset index for seeking to a line without a full scan.
+ */
+export interface LineIndex {
+  /** File mtime the index was built for */
+  mtime: number;
+  /** File size in bytes */
+  size: number;
+  /** Lines between indexed offsets */
+  stride: number;
+  /** Byte offset of lines 1, 1 + stride, 1 + 2 * stride, ... */
+  offsets: Float64Array;
+  /** Line count as the built-in read counts it (newlines + 1) */
+  totalLines: number;
+}
+
+/**
+ * User-configurable behavior, loaded from `read-map.json`.
+ */
+export interface ReadMapSettings {
+  /** Serve shifted stale maps for changed files while regenerating */
+  staleWhileRevalidate: boolean;
+  /** Largest changed-line percentage for which a stale map is served */
+  maxStaleChangedPercent: number;
+  /** Files larger than this many bytes default to map-only reads (null: never) */
+  mapOnlyAboveBytes: number | null;
+  /** Milliseconds to wait for the precise mapper before racing cheaper ones (null: no limit) */
+  latencyBudgetMs: number | null;
+  /** Append every read's statistics to this JSONL file (null: off) */
+  statsFile: string | null;
+  /** Per-mapper overrides of the cost model, keyed by mapper name */
+  mapperCosts: Record<string, Partial<MapperCost>>;
+  /** Prefetch the maps of local modules imported by mapped files */
+  prefetchImports: boolean;
+  /** Replace repeated reads of unchanged content with a short note */
+  dedupReads: boolean;
+  /** Cap on a map's estimated tokens, alongside the byte budgets (null: none) */
+  maxMapTokens: number | null;
+  /** How maps are rendered */
+  mapFormat: MapFormat;
+  /** Send a changed file's map as its changes since the session's last map */
+  mapDiffs: boolean;
+}
+
+/**
+ * Content a read returned earlier in the session.
+ */
+export interface SessionRead {
+  /** File mtime when the content was returned */
+  mtime: number;
+  /** Agent turn the read happened in */
+  turn: number;
+  /** Text returned, without the map */
+  content: string;
+  /** Whether a map was appended to the content */
+  mapped: boolean;
+  /**
+   * Cached render the read's map came from, null for a stale map; absent
+   * when the read returned no map
+   */
+  map?: string | null;
+}
+
+/**
+ * Map a read returned earlier in the session.
+ */
+export interface SessionMap {
+  /** File mtime the map was built for */
+  mtime: number;
+  /** Agent turn the map was returned in */
+  turn: number;
+  /** The map, as cached */
+  packedMap: PackedFileMap;
+}
+
+/**
+ * A symbol whose extent changed between two maps of a file.
+ */
+export interface ResizedSymbol {
+  /** The symbol in the earlier map */
+  before: FileSymbol;
+  /** The symbol in the later map */
+  after: FileSymbol;
+}
+
+/**
+ * A stretch of a file whose symbols all moved by the same amount.
+ */
+export interface ShiftedRegion {
+  /** Start of the stretch in the later file, in lines (or bytes) */
+  start: number;
+  /** End of the stretch in the later file */
+  end: number;
+  /** How far its symbols moved; negative when they moved up */
+  shift: number;
+}
+
+/**
+ * Changes between two maps of one file. Symbols are named by their
+ * qualified names (`Parser.parse`) and carry no children.
+ */
+export interface MapDiff {
+  /** Symbols only in the later map, outermost only */
+  added: FileSymbol[];
+  /** Symbols only in the earlier map, outermost only */
+  removed: FileSymbol[];
+  /** Symbols in both whose size changed */
+  resized: ResizedSymbol[];
+  /** Stretches of symbols in both that moved */
+  shifted: ShiftedRegion[];
+  /** Whether positions are bytes rather than lines */
+  byBytes: boolean;
+}
+
+/**
+ * Counters of speculative map prefetching.
+ */
+export interface PrefetchStats {
+  /** Prefetches started */
+  started: number;
+  /** Prefetches that produced a map */
+  completed: number;
+  /** Prefetches cancelled before finishing */
+  cancelled: number;
+  /** Prefetches that produced no map */
+  failed: number;
+  /** Reads served by a prefetched map or build */
+  hits: number;
+  /** Prefetched maps whose file changed or was re-prefetched before a read */
+  wasted: number;
+  /** Time spent building prefetched maps */
+  buildMs: number;
+  /** Build time of wasted prefetched maps */
+  wastedMs: number;
+}
+
+/**
+ * Estimated cost and capability of a mapper. Run time is modeled as
+ * `fixedMs + msPerMB * MB + msPerKLines * thousands of lines`.
+ */
+export interface MapperCost {
+  /** Startup cost (process spawn, parser setup) */
+  fixedMs: number;
+  /** Cost per MB of source */
+  msPerMB: number;
+  /** Cost per thousand lines of source */
+  msPerKLines: number;
+  /** Richest detail level the mapper delivers faithfully */
+  detail: DetailLevel;
+  /** Command that must be installed for the mapper to run */
+  requires?: string;
+}
+
+/**
+ * A run of identical lines shared by two versions of a file.
+ */
+export interface MatchedRun {
+  /** First line of the run in the old version (1-indexed) */
+  oldStart: number;
+  /** First line of the run in the new version (1-indexed) */
+  newStart: number;
+  /** Number of lines in the run */
+  length: number;
+}
+
+/**
+ * Line correspondence between two versions of a file.
+ */
+export interface LineDiff {
+  /** Line count of the old version */
+  oldLines: number;
+  /** Line count of the new version */
+  newLines: number;
+  /** Matched runs, ordered by line in both versions */
+  runs: MatchedRun[];
+  /** Lines of the new version not matched to the old version */
+  changedLines: number;
+}
+
+/**
+ * A budget-enforced map and how it was produced.
  */
+export interface BudgetedMap {
+  /** Formatted map text */
+  text: string;
+  /** Detail level that fit the budget */
+  detailLevel: DetailLevel;
+  /** Number of times the map was formatted to find it */
+  passes: number;
+  /** Estimated model tokens of the text */
+  tokens: number;
+  /** Format the text is rendered in */
+  format: MapFormat;
+}
+
+/**
+ * What a map's header describes: the file, plus the kinds of the symbols
+ * shown and whether they are addressed by byte range.
+ */
+export interface MapHeader extends Omit<FileMap, "symbols"> {
+  /** Kinds of the symbols shown, in order of first appearance */
+  kinds: SymbolKind[];
+  /** Whether the symbols carry byte ranges */
+  byteRanges: boolean;
+}
+
+/**
+ * Renders the parts of a map in one format.
+ */
+export interface MapRenderer {
+  /** Lines above the symbols: file header, level notice and imports */
+  header(map: MapHeader, level: DetailLevel): string[];
+  /** One symbol's line; `parent` is set for children */
+  symbol(
+    symbol: FileSymbol,
+    level: DetailLevel,
+    indent: number,
+    parent?: FileSymbol
+  ): string;
+  /** Separator between the two halves of a head-and-tail truncated map */
+  separator(omittedSymbols: number): string[];
+  /** Marker standing in for a stretch of omitted symbols */
+  gap(gap: SymbolGap): string;
+  /** Summary of a truncated map's omitted symbols by region */
+  histogram(buckets: OmittedBucket[]): string[];
+  /**
+   * Lines below the symbols. A truncated map passes the symbols on either
+   * side of the gap so the footer can say where the omitted ones are.
+   */
+  footer(
+    byteRanges: boolean,
+    gap?: { before?: FileSymbol; after?: FileSymbol }
+  ): string[];
+}
+
+/**
+ * One mapper run during map generation.
+ */
+export interface MapperAttempt {
+  /** Mapper name: a language ID, "ctags" or "fallback" */
+  mapper: string;
+  /** Time from scheduling to result, including queue wait */
+  ms: number;
+  /** Whether the mapper produced a map */
+  ok: boolean;
+}
+
+/**
+ * Timing and outcome of a single read, as recorded in the read statistics.
+ */
+export interface ReadTrace {
+  /** Epoch milliseconds when the read started */
+  startedAt: number;
+  /** Path as passed to the tool */
+  path: string;
+  /** How the read was served */
+  outcome: ReadOutcome;
+  /** File size in bytes, when known */
+  bytes: number | null;
+  /** Mapper that produced the map, when one was generated */
+  mapper: string | null;
+  /** Mappers tried before one succeeded (0: the language mapper) */
+  fallbackDepth: number;
+  /** Every mapper run, in order */
+  attempts: MapperAttempt[];
+  /** Detail level of the returned map */
+  detailLevel: DetailLevel | null;
+  /** Formatting passes spent enforcing the budget */
+  formatPasses: number;
+  /** Estimated model tokens of the returned map */
+  mapTokens: number | null;
+  /** Whether the map came from the cache */
+  cacheHit: boolean;
+  /** Whether the map was sent as its changes since an earlier read */
+  mapDiff: boolean;
+  /** Whether the precise mapper missed the latency budget */
+  budgetExceeded: boolean;
+  /** Milliseconds spent per stage */
+  spans: Partial<Record<ReadStage, number>>;
+  /** Total milliseconds for the read */
+  totalMs: number;
+}
+
+/**
+ * Fixed-bucket latency histogram.
+ */
+export interface LatencyHistogram {
+  /** Samples per bucket; the last bucket counts samples above every bound */
+  buckets: number[];
+  /** Number of samples */
+  count: number;
+  /** Sum of all samples in milliseconds */
+  totalMs: number;
+  /** Largest sample in milliseconds */
+  maxMs: number;
+}
+
+/**
+ * A mapper that builds its map one line at a time, so mapping can resume
+ * after the last processed line when a file only grew.
+ */
+export interface AppendableMapper<S> {
+  /** Identifies the state layout; states of other mappers are never resumed */
+  id: string;
+  /** State before the first line */
+  createState: () => S;
+  /** Fold one line (without its line terminator) into the state */
+  consume: (state: S, line: string, lineNumber: number) => void;
+  /** Build the map from the state after the last line */
+  finish: (
+    state: S,
+    file: { path: string; totalBytes: number; lines: number; newlines: number }
+  ) => FileMap | null;
+}
+
+/**
+ * Resumable state of an appendable mapper for one file.
+ */
+export interface AppendState {
+  /** `AppendableMapper.id` that produced the state */
+  mapper: string;
+  /** Bytes consumed, up to and including the last complete line's newline */
+  offset: number;
+  /** Complete lines consumed */
+  lines: number;
+  /** Hash of the first block of the consumed bytes */
+  headHash: string;
+  /** Hash of the last block of the consumed bytes */
+  tailHash: string;
+  /** Mapper state after the last complete line */
+  state: unknown;
+}
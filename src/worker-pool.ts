@@ -0,0 +1,343 @@
+/**
+ * Worker-thread pool for the in-process mappers.
+ *
+ * ts-morph and tree-sitter parse synchronously, so a large file would
+ * otherwise block pi's event loop for seconds. Workers are spawned lazily,
+ * kept warm between tasks, and unref'd while idle so they never keep the
+ * process alive. Aborting a running task terminates its worker; a fresh one
+ * is spawned for the next task.
+ */
+import { createRequire } from "node:module";
+import { availableParallelism } from "node:os";
+import { fileURLToPath } from "node:url";
+import { Worker } from "node:worker_threads";
+
+import type { FileMap, WorkerRequest, WorkerResponse } from "./types.js";
+
+import { THRESHOLDS } from "./constants.js";
+
+/**
+ * Language IDs whose mappers run in-process and can be moved to a worker.
+ * Must stay in sync with `WORKER_MAPPERS` in mapper-worker.ts.
+ */
+const WORKER_LANGUAGES = new Set([
+  "typescript",
+  "javascript",
+  "rust",
+  "cpp",
+  "c-header",
+  "clojure",
+  "c",
+  "sql",
+  "markdown",
+  "yaml",
+  "toml",
+]);
+
+/**
+ * Bootstrap used when running from TypeScript sources (as pi loads
+ * extensions). The worker loads its entry through jiti, the same loader pi
+ * uses for the extension itself.
+ */
+const WORKER_BOOTSTRAP = `
+const { workerData } = require("node:worker_threads");
+const loaderModule = require(workerData.loader);
+const createJiti = loaderModule.createJiti ?? loaderModule.default ?? loaderModule;
+const jiti = createJiti(workerData.entry);
+if (typeof jiti.import === "function") {
+  jiti.import(workerData.entry);
+} else {
+  jiti(workerData.entry);
+}
+`;
+
+interface PendingTask {
+  request: WorkerRequest;
+  signal?: AbortSignal;
+  onAbort?: () => void;
+  resolve: (result: FileMap | null) => void;
+  reject: (error: Error) => void;
+}
+
+interface PooledWorker {
+  worker: Worker;
+  task: PendingTask | null;
+  ready: boolean;
+  terminating: boolean;
+}
+
+const workers: PooledWorker[] = [];
+const queue: PendingTask[] = [];
+let nextTaskId = 0;
+let poolDisabled = false;
+let workerSource: { entry: string; loader: string | null } | null | undefined;
+
+function getPoolSize(): number {
+  return Math.max(
+    1,
+    Math.min(THRESHOLDS.MAX_WORKERS, availableParallelism() - 1)
+  );
+}
+
+/**
+ * Locate the worker entry and, when running from .ts sources, a loader
+ * able to execute it. Returns null when workers cannot be started.
+ */
+function resolveWorkerSource(): {
+  entry: string;
+  loader: string | null;
+} | null {
+  if (workerSource !== undefined) {
+    return workerSource;
+  }
+
+  const selfPath = fileURLToPath(import.meta.url);
+  const isTypeScript = selfPath.endsWith(".ts");
+  const entry = fileURLToPath(
+    new URL(
+      isTypeScript ? "./mapper-worker.ts" : "./mapper-worker.js",
+      import.meta.url
+    )
+  );
+
+  if (!isTypeScript) {
+    workerSource = { entry, loader: null };
+    return workerSource;
+  }
+
+  const require = createRequire(import.meta.url);
+  for (const id of ["jiti", "@mariozechner/jiti"]) {
+    try {
+      workerSource = { entry, loader: require.resolve(id) };
+      return workerSource;
+    } catch {
+      // Try the next candidate
+    }
+  }
+
+  workerSource = null;
+  return workerSource;
+}
+
+function removeWorker(pooled: PooledWorker): void {
+  const index = workers.indexOf(pooled);
+  if (index !== -1) {
+    workers.splice(index, 1);
+  }
+}
+
+function settleTask(task: PendingTask): void {
+  if (task.onAbort) {
+    task.signal?.removeEventListener("abort", task.onAbort);
+  }
+}
+
+function handleWorkerFailure(pooled: PooledWorker, error: Error): void {
+  removeWorker(pooled);
+  if (!pooled.ready) {
+    // The worker never came up; don't keep spawning broken workers
+    poolDisabled = true;
+  }
+
+  const { task } = pooled;
+  pooled.task = null;
+  if (task) {
+    settleTask(task);
+    task.reject(error);
+  }
+
+  if (poolDisabled) {
+    for (const pending of queue.splice(0)) {
+      settleTask(pending);
+      pending.reject(error);
+    }
+  } else {
+    dispatch();
+  }
+}
+
+function spawnWorker(): PooledWorker | null {
+  const source = resolveWorkerSource();
+  if (!source) {
+    poolDisabled = true;
+    return null;
+  }
+
+  let worker: Worker;
+  try {
+    worker = source.loader
+      ? new Worker(WORKER_BOOTSTRAP, {
+          eval: true,
+          workerData: { loader: source.loader, entry: source.entry },
+        })
+      : new Worker(source.entry);
+  } catch {
+    poolDisabled = true;
+    return null;
+  }
+
+  const pooled: PooledWorker = {
+    worker,
+    task: null,
+    ready: false,
+    terminating: false,
+  };
+
+  worker.on("message", (message: WorkerResponse | { ready: true }) => {
+    if ("ready" in message) {
+      pooled.ready = true;
+      return;
+    }
+
+    const { task } = pooled;
+    if (!task || task.request.id !== message.id) {
+      return;
+    }
+
+    pooled.task = null;
+    worker.unref();
+    settleTask(task);
+    if (message.error) {
+      task.reject(new Error(message.error));
+    } else {
+      task.resolve(message.result);
+    }
+    dispatch();
+  });
+
+  worker.on("error", (error) => {
+    handleWorkerFailure(pooled, error);
+  });
+
+  worker.on("exit", (code) => {
+    if (!pooled.terminating) {
+      handleWorkerFailure(
+        pooled,
+        new Error(`Mapper worker exited with code ${code}`)
+      );
+    }
+  });
+
+  worker.unref();
+  workers.push(pooled);
+  return pooled;
+}
+
+function assign(pooled: PooledWorker, task: PendingTask): void {
+  pooled.task = task;
+  pooled.worker.ref();
+  pooled.worker.postMessage(task.request);
+}
+
+/**
+ * Hand queued tasks to idle workers, spawning new ones up to the pool size.
+ */
+function dispatch(): void {
+  while (queue.length > 0 && !poolDisabled) {
+    let pooled = workers.find((w) => !w.task && !w.terminating);
+    if (!pooled && workers.length < getPoolSize()) {
+      pooled = spawnWorker() ?? undefined;
+    }
+    if (!pooled) {
+      break;
+    }
+
+    const task = queue.shift();
+    if (task) {
+      assign(pooled, task);
+    }
+  }
+}
+
+function abortTask(task: PendingTask): void {
+  const queuedIndex = queue.indexOf(task);
+  if (queuedIndex !== -1) {
+    queue.splice(queuedIndex, 1);
+  }
+
+  // A running task can't be interrupted cooperatively: recycle its worker
+  const owner = workers.find((w) => w.task === task);
+  if (owner) {
+    owner.task = null;
+    owner.terminating = true;
+    removeWorker(owner);
+    void owner.worker.terminate();
+  }
+
+  settleTask(task);
+  task.resolve(null);
+  dispatch();
+}
+
+/**
+ * Check whether a language's mapper can be run on the worker pool.
+ */
+export function canUseWorkers(languageId: string): boolean {
+  return (
+    !poolDisabled &&
+    WORKER_LANGUAGES.has(languageId) &&
+    resolveWorkerSource() !== null
+  );
+}
+
+/**
+ * Run a language mapper on a pooled worker thread.
+ *
+ * Resolves to null when aborted, mirroring in-process mappers. Rejects
+ * when no worker could run the task, so callers can fall back to the
+ * in-process mapper.
+ */
+export function runInWorker(
+  languageId: string,
+  filePath: string,
+  signal?: AbortSignal
+): Promise<FileMap | null> {
+  if (signal?.aborted) {
+    return Promise.resolve(null);
+  }
+
+  return new Promise((resolve, reject) => {
+    const task: PendingTask = {
+      request: { id: nextTaskId++, languageId, filePath },
+      signal,
+      resolve,
+      reject,
+    };
+
+    if (signal) {
+      task.onAbort = () => abortTask(task);
+      signal.addEventListener("abort", task.onAbort, { once: true });
+    }
+
+    queue.push(task);
+    dispatch();
+
+    if (poolDisabled && queue.includes(task)) {
+      queue.splice(queue.indexOf(task), 1);
+      settleTask(task);
+      reject(new Error("Mapper worker pool is unavailable"));
+    }
+  });
+}
+
+/**
+ * Terminate all pooled workers. Exported for testing purposes only.
+ */
+export async function shutdownWorkerPool(): Promise<void> {
+  const active = workers.splice(0);
+  for (const pending of queue.splice(0)) {
+    settleTask(pending);
+    pending.resolve(null);
+  }
+  await Promise.all(
+    active.map((pooled) => {
+      pooled.terminating = true;
+      if (pooled.task) {
+        settleTask(pooled.task);
+        pooled.task.resolve(null);
+        pooled.task = null;
+      }
+      return pooled.worker.terminate();
+    })
+  );
+}
@@ -36,6 +36,38 @@ const generateLargeTs = (numClasses: number): string => {
   return lines.join("\n");
 };
 
+// Generate a C++ file for benchmarking
+const generateLargeCpp = (numClasses: number): string => {
+  const lines: string[] = ["#include <iostream>\n"];
+  for (let i = 0; i < numClasses; i++) {
+    lines.push(`class Class${i} {`);
+    lines.push(`public:`);
+    lines.push(`  void method${i}();`);
+    lines.push(`private:`);
+    lines.push(`  int value${i};`);
+    lines.push(`};\n`);
+  }
+  return lines.join("\n");
+};
+
+// Generate a Rust file for benchmarking
+const generateLargeRs = (numStructs: number): string => {
+  const lines: string[] = [];
+  for (let i = 0; i < numStructs; i++) {
+    lines.push(`pub struct Struct${i} {`);
+    lines.push(`  pub name: String,`);
+    lines.push(`}`);
+    lines.push(``);
+    lines.push(`impl Struct${i} {`);
+    lines.push(`  pub fn new(name: String) -> Self {`);
+    lines.push(`    Self { name }`);
+    lines.push(`  }`);
+    lines.push(`}`);
+    lines.push(``);
+  }
+  return lines.join("\n");
+};
+
 describe("mapper performance benchmarks", () => {
   const tsFilePath = join(FIXTURES_DIR, "large.ts");
   const mdFilePath = join(FIXTURES_DIR, "large.md");
@@ -61,32 +93,10 @@ describe("mapper performance benchmarks", () => {
     await writeFile(mdFilePath, mdLines.join("\n"));
 
     // Create large C++ file
-    const cppLines: string[] = ["#include <iostream>\n"];
-    for (let i = 0; i < 50; i++) {
-      cppLines.push(`class Class${i} {`);
-      cppLines.push(`public:`);
-      cppLines.push(`  void method${i}();`);
-      cppLines.push(`private:`);
-      cppLines.push(`  int value${i};`);
-      cppLines.push(`};\n`);
-    }
-    await writeFile(cppFilePath, cppLines.join("\n"));
+    await writeFile(cppFilePath, generateLargeCpp(50));
 
     // Create large Rust file
-    const rsLines: string[] = [];
-    for (let i = 0; i < 50; i++) {
-      rsLines.push(`pub struct Struct${i} {`);
-      rsLines.push(`  pub name: String,`);
-      rsLines.push(`}`);
-      rsLines.push(``);
-      rsLines.push(`impl Struct${i} {`);
-      rsLines.push(`  pub fn new(name: String) -> Self {`);
-      rsLines.push(`    Self { name }`);
-      rsLines.push(`  }`);
-      rsLines.push(`}`);
-      rsLines.push(``);
-    }
-    await writeFile(rsFilePath, rsLines.join("\n"));
+    await writeFile(rsFilePath, generateLargeRs(50));
 
     return async () => {
       await rm(FIXTURES_DIR, { recursive: true, force: true });
@@ -109,3 +119,41 @@ describe("mapper performance benchmarks", () => {
     await rustMapper(rsFilePath);
   });
 });
+
+/**
+ * The ts-morph and tree-sitter mappers at two sizes each. `MAPPER_COSTS`
+ * takes the intercept of the two mean times as `fixedMs` and their slope
+ * per MB as `msPerMB`; each bench name gives its file size.
+ */
+describe("mapper cost curves", () => {
+  const mappers = [
+    { ext: "ts", generate: generateLargeTs, map: typescriptMapper },
+    { ext: "cpp", generate: generateLargeCpp, map: cppMapper },
+    { ext: "rs", generate: generateLargeRs, map: rustMapper },
+  ];
+  const fixtures = mappers.flatMap((mapper) =>
+    [200, 4000].map((count) => ({
+      ...mapper,
+      path: join(FIXTURES_DIR, `curve-${count}.${mapper.ext}`),
+      text: mapper.generate(count),
+    }))
+  );
+
+  beforeAll(async () => {
+    await mkdir(FIXTURES_DIR, { recursive: true });
+    for (const fixture of fixtures) {
+      await writeFile(fixture.path, fixture.text);
+    }
+
+    return async () => {
+      await rm(FIXTURES_DIR, { recursive: true, force: true });
+    };
+  });
+
+  for (const fixture of fixtures) {
+    const kb = (Buffer.byteLength(fixture.text) / 1024).toFixed(0);
+    bench(`${fixture.map.name} - ${kb} KB`, async () => {
+      await fixture.map(fixture.path);
+    });
+  }
+});
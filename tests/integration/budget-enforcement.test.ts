@@ -217,12 +217,11 @@ class MyClass:
     // Must stay under 100KB (truncated budget)
     expect(size).toBeLessThanOrEqual(THRESHOLDS.MAX_TRUNCATED_BYTES);
 
-    // Should use truncated format
+    // Numbered functions collapse into one range instead of truncating
     expect(output).toContain("[Map");
-    expect(output).toContain("more symbols");
-
-    // Should have first and last symbols
-    expect(output).toContain("function_0:");
-    expect(output).toContain("function_4999:");
+    expect(output).not.toContain("more symbols");
+    expect(output).toContain(
+      "function_[0..4999] (5,000 functions): [3-20001]"
+    );
   });
 });
@@ -0,0 +1,69 @@
+import { afterAll, beforeEach, describe, expect, it, vi } from "vitest";
+
+import piReadMapExtension, { resetMapCache } from "../../src/index.js";
+import { cleanupAllTempFiles, createTempFile } from "./helpers.js";
+
+// eslint-disable-next-line jest/no-untyped-mock-factory
+vi.mock("@mariozechner/pi-coding-agent", async (importOriginal) => {
+  const actual =
+    await importOriginal<typeof import("@mariozechner/pi-coding-agent")>();
+  return {
+    ...actual,
+    createReadTool: vi.fn(() => ({
+      execute: vi.fn().mockResolvedValue({
+        content: [{ type: "text", text: "Mocked original content" }],
+      }),
+    })),
+    createLsTool: vi.fn(),
+  };
+});
+
+function registerReadTool() {
+  const mockPi = {
+    registerTool: vi.fn(),
+    registerCommand: vi.fn(),
+    on: vi.fn(),
+  };
+  piReadMapExtension(mockPi as never);
+  return mockPi.registerTool.mock.calls[0]?.[0];
+}
+
+function textOf(result: { content: { type: string; text?: string }[] }) {
+  return result.content.map((c) => c.text ?? "").join("\n");
+}
+
+describe("byte-range reads", () => {
+  beforeEach(() => {
+    resetMapCache();
+  });
+
+  afterAll(async () => {
+    await cleanupAllTempFiles();
+  });
+
+  it("reads the requested bytes of a text file", async () => {
+    const tool = registerReadTool();
+    const path = await createTempFile("data.min.js", "0123456789");
+
+    const text = textOf(
+      await tool.execute("test-call-id", { path, byteOffset: 2, byteLength: 3 })
+    );
+
+    expect(text).toContain("234");
+    expect(text).not.toContain("Mocked original content");
+  });
+
+  it("delegates misnamed binaries to the built-in read", async () => {
+    const tool = registerReadTool();
+    const path = await createTempFile(
+      "core.min.js",
+      `\u007FELF\u0002\u0001\u0001${"\0".repeat(64)}`
+    );
+
+    const text = textOf(
+      await tool.execute("test-call-id", { path, byteOffset: 0 })
+    );
+
+    expect(text).toBe("Mocked original content");
+  });
+});
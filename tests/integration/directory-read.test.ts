@@ -45,6 +45,7 @@ describe("directory read handling", () => {
   it("throws with inline ls text on directory read", async () => {
     const mockPi = {
       registerTool: vi.fn(),
+      registerCommand: vi.fn(),
       on: vi.fn(),
     };
 
@@ -1,6 +1,13 @@
 import { describe, it, expect, expectTypeOf, vi } from "vitest";
 
+import { MapperKind } from "../../src/enums.js";
 import piReadMapExtension from "../../src/index.js";
+import {
+  formatReadStats,
+  recordRead,
+  startReadTrace,
+} from "../../src/read-stats.js";
+import { schedule } from "../../src/scheduler.js";
 
 /**
  * Create a mock pi object with all required methods for the extension.
@@ -8,6 +15,7 @@ import piReadMapExtension from "../../src/index.js";
 function createMockPi() {
   return {
     registerTool: vi.fn(),
+    registerCommand: vi.fn(),
     on: vi.fn(),
     registerMessageRenderer: vi.fn(),
     sendMessage: vi.fn(),
@@ -19,12 +27,13 @@ describe("extension loading", () => {
     expectTypeOf(piReadMapExtension).toBeFunction();
   });
 
-  it("registers the read tool when called", () => {
+  it("registers the read and read_map tools when called", () => {
     const mockPi = createMockPi();
 
     piReadMapExtension(mockPi as never);
 
-    expect(mockPi.registerTool).toHaveBeenCalledOnce();
+    expect(mockPi.registerTool).toHaveBeenCalledTimes(2);
+    expect(mockPi.registerTool.mock.calls[1]?.[0].name).toBe("read_map");
     expect(mockPi.registerTool).toHaveBeenCalledWith(
       expect.objectContaining({
         name: "read",
@@ -61,4 +70,31 @@ describe("extension loading", () => {
     expect(registeredTool.execute).toBeTypeOf("function");
     expect(registeredTool.execute.constructor.name).toBe("AsyncFunction");
   });
+
+  it("registers the readmap-stats command", () => {
+    const mockPi = createMockPi();
+
+    piReadMapExtension(mockPi as never);
+
+    expect(mockPi.registerCommand).toHaveBeenCalledWith(
+      "readmap-stats",
+      expect.objectContaining({ handler: expect.any(Function) })
+    );
+  });
+
+  it("clears scheduler statistics with /readmap-stats reset", async () => {
+    const mockPi = createMockPi();
+    piReadMapExtension(mockPi as never);
+    const command = mockPi.registerCommand.mock.calls.find(
+      ([name]) => name === "readmap-stats"
+    )?.[1];
+    await schedule(MapperKind.Grep, async () => {});
+    recordRead(startReadTrace("/tmp/large.py"));
+    expect(formatReadStats()).toContain("Scheduler:");
+
+    await command.handler("reset", { ui: { notify: vi.fn() } });
+    recordRead(startReadTrace("/tmp/large.py"));
+
+    expect(formatReadStats()).not.toContain("Scheduler:");
+  });
 });
@@ -0,0 +1,79 @@
+import { execFileSync } from "node:child_process";
+import { mkdtemp, rm, writeFile } from "node:fs/promises";
+import { tmpdir } from "node:os";
+import { join } from "node:path";
+import { afterEach, beforeEach, describe, expect, it, vi } from "vitest";
+
+import piReadMapExtension, { resetMapCache } from "../../src/index.js";
+import { getRecentReads, resetReadStats } from "../../src/read-stats.js";
+import { generatePythonCode } from "./helpers.js";
+
+// eslint-disable-next-line jest/no-untyped-mock-factory
+vi.mock("@mariozechner/pi-coding-agent", async (importOriginal) => {
+  const actual =
+    await importOriginal<typeof import("@mariozechner/pi-coding-agent")>();
+  return {
+    ...actual,
+    createReadTool: vi.fn(() => ({
+      execute: vi.fn().mockResolvedValue({
+        content: [{ type: "text", text: "Mocked original content" }],
+      }),
+    })),
+    createLsTool: vi.fn(),
+  };
+});
+
+function registerReadTool() {
+  const mockPi = {
+    registerTool: vi.fn(),
+    registerCommand: vi.fn(),
+    on: vi.fn(),
+  };
+  piReadMapExtension(mockPi as never);
+  return mockPi.registerTool.mock.calls[0]?.[0];
+}
+
+function git(cwd: string, ...args: string[]): void {
+  execFileSync(
+    "git",
+    ["-c", "user.name=test", "-c", "user.email=test@example.com", ...args],
+    { cwd }
+  );
+}
+
+describe("git blob map reuse", () => {
+  let dir: string;
+
+  beforeEach(async () => {
+    resetMapCache();
+    resetReadStats();
+    dir = await mkdtemp(join(tmpdir(), "read-map-worktrees-"));
+    const main = join(dir, "main");
+    execFileSync("git", ["init", "-q", main]);
+    await writeFile(join(main, "service.py"), generatePythonCode(3000));
+    git(main, "add", "service.py");
+    git(main, "commit", "-q", "-m", "init");
+    git(main, "worktree", "add", "-q", join(dir, "feature"));
+  });
+
+  afterEach(async () => {
+    await rm(dir, { recursive: true, force: true });
+  });
+
+  it("shares maps across worktrees with the same blob", async () => {
+    const tool = registerReadTool();
+
+    const first = await tool.execute("call-1", {
+      path: join(dir, "main", "service.py"),
+    });
+    const second = await tool.execute("call-2", {
+      path: join(dir, "feature", "service.py"),
+    });
+
+    const [mainRead, featureRead] = getRecentReads();
+    expect(mainRead?.cacheHit).toBe(false);
+    expect(featureRead?.cacheHit).toBe(true);
+    expect(featureRead?.attempts).toHaveLength(0);
+    expect(second.content.at(-1)?.text).toBe(first.content.at(-1)?.text);
+  });
+});
@@ -70,6 +70,7 @@ describe("inline map generation", () => {
   it("appends the generated map string to the tool result content", async () => {
     const mockPi = {
       registerTool: vi.fn(),
+      registerCommand: vi.fn(),
       on: vi.fn(), // Should not be called
       registerMessageRenderer: vi.fn(), // Should not be called
       sendMessage: vi.fn(), // Should not be called
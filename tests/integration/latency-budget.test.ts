@@ -0,0 +1,154 @@
+import {
+  afterAll,
+  afterEach,
+  beforeEach,
+  describe,
+  expect,
+  it,
+  vi,
+} from "vitest";
+
+import { SCHEDULER } from "../../src/constants.js";
+import { MapperKind, ReadOutcome } from "../../src/enums.js";
+import piReadMapExtension, { resetMapCache } from "../../src/index.js";
+import { getRecentReads, resetReadStats } from "../../src/read-stats.js";
+import { schedule } from "../../src/scheduler.js";
+import { setSettings } from "../../src/settings.js";
+import {
+  cleanupAllTempFiles,
+  createTempFile,
+  generatePythonCode,
+} from "./helpers.js";
+
+// eslint-disable-next-line jest/no-untyped-mock-factory
+vi.mock("@mariozechner/pi-coding-agent", async (importOriginal) => {
+  const actual =
+    await importOriginal<typeof import("@mariozechner/pi-coding-agent")>();
+  return {
+    ...actual,
+    createReadTool: vi.fn(() => ({
+      execute: vi.fn().mockResolvedValue({
+        content: [{ type: "text", text: "Mocked original content" }],
+      }),
+    })),
+    createLsTool: vi.fn(),
+  };
+});
+
+function registerReadTool() {
+  const mockPi = {
+    registerTool: vi.fn(),
+    registerCommand: vi.fn(),
+    on: vi.fn(),
+  };
+  piReadMapExtension(mockPi as never);
+  return mockPi.registerTool.mock.calls[0]?.[0];
+}
+
+async function readMapText(
+  tool: ReturnType<typeof registerReadTool>,
+  path: string
+): Promise<string> {
+  const result = await tool.execute("test-call-id", { path });
+  return result.content.at(-1)?.text ?? "";
+}
+
+/**
+ * Occupy every python3 slot in the scheduler until released.
+ */
+function blockPythonMapper(): () => void {
+  let release = () => {};
+  const gate = new Promise<void>((resolve) => {
+    release = resolve;
+  });
+  for (let i = 0; i < SCHEDULER.CONCURRENCY[MapperKind.Python]; i++) {
+    void schedule(MapperKind.Python, () => gate);
+  }
+  return release;
+}
+
+describe("latency budget", () => {
+  beforeEach(() => {
+    resetMapCache();
+    resetReadStats();
+  });
+
+  afterEach(() => {
+    setSettings({});
+  });
+
+  afterAll(async () => {
+    await cleanupAllTempFiles();
+  });
+
+  it("serves a quick map when the precise mapper misses the budget", async () => {
+    const tool = registerReadTool();
+    setSettings({ latencyBudgetMs: 50 });
+    const path = await createTempFile("budget.py", generatePythonCode(3000));
+    const release = blockPythonMapper();
+
+    const quick = await readMapText(tool, path);
+    expect(quick).toContain("File Map:");
+    expect(quick).toContain("[Quick map");
+    expect(getRecentReads().at(-1)?.budgetExceeded).toBe(true);
+
+    release();
+
+    await vi.waitFor(
+      async () => {
+        const precise = await readMapText(tool, path);
+        expect(precise).not.toContain("[Quick map");
+        expect(precise).toContain("func_0: [2-3]");
+      },
+      { timeout: 5000, interval: 50 }
+    );
+
+    const background = getRecentReads().find(
+      (r) => r.outcome === ReadOutcome.Background
+    );
+    expect(background?.mapper).toBe("python");
+  });
+
+  it("sends the precise map to a map-only re-read of a quick map", async () => {
+    const tool = registerReadTool();
+    setSettings({ latencyBudgetMs: 50, dedupReads: true });
+    const path = await createTempFile(
+      "budget-map.py",
+      generatePythonCode(3000)
+    );
+    const release = blockPythonMapper();
+    const readMap = async () =>
+      (await tool.execute("test-call-id", { path, mode: "map" })).content
+        .map((c: { text?: string }) => c.text ?? "")
+        .join("\n");
+
+    expect(await readMap()).toContain("[Quick map");
+
+    release();
+
+    await vi.waitFor(
+      async () => {
+        const precise = await readMap();
+        expect(precise).not.toContain("[Quick map");
+        expect(precise).toContain("func_0: [2-3]");
+      },
+      { timeout: 5000, interval: 50 }
+    );
+    expect(await readMap()).toContain("Unchanged since your read");
+  });
+
+  it("waits for the precise mapper without a budget", async () => {
+    const tool = registerReadTool();
+    setSettings({ latencyBudgetMs: null });
+    const path = await createTempFile("no-budget.py", generatePythonCode(3000));
+    const release = blockPythonMapper();
+
+    const pending = readMapText(tool, path);
+    setTimeout(release, 100);
+
+    const text = await pending;
+    expect(text).not.toContain("[Quick map");
+    expect(text).toContain("func_0: [2-3]");
+    expect(getRecentReads().at(-1)?.mapper).toBe("python");
+  });
+});
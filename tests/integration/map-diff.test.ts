@@ -0,0 +1,114 @@
+import { readFile, utimes, writeFile } from "node:fs/promises";
+import {
+  afterAll,
+  afterEach,
+  beforeEach,
+  describe,
+  expect,
+  it,
+  vi,
+} from "vitest";
+
+import piReadMapExtension, { resetMapCache } from "../../src/index.js";
+import { getRecentReads } from "../../src/read-stats.js";
+import { setSettings } from "../../src/settings.js";
+import {
+  cleanupAllTempFiles,
+  createTempFile,
+  generatePythonCode,
+} from "./helpers.js";
+
+// eslint-disable-next-line jest/no-untyped-mock-factory
+vi.mock("@mariozechner/pi-coding-agent", async (importOriginal) => {
+  const actual =
+    await importOriginal<typeof import("@mariozechner/pi-coding-agent")>();
+  return {
+    ...actual,
+    createReadTool: vi.fn(() => ({ execute: vi.fn() })),
+    createLsTool: vi.fn(),
+  };
+});
+
+function registerExtension() {
+  const handlers = new Map<string, (event: unknown) => void>();
+  const mockPi = {
+    registerTool: vi.fn(),
+    registerCommand: vi.fn(),
+    on: vi.fn((event: string, handler: (event: unknown) => void) => {
+      handlers.set(event, handler);
+    }),
+  };
+  piReadMapExtension(mockPi as never);
+  return { tool: mockPi.registerTool.mock.calls[0]?.[0], handlers };
+}
+
+async function readMap(
+  tool: ReturnType<typeof registerExtension>["tool"],
+  params: Record<string, unknown>
+): Promise<string> {
+  const result = await tool.execute("test-call-id", {
+    ...params,
+    mode: "map",
+  });
+  return result.content[0]?.text ?? "";
+}
+
+async function edit(path: string, from: string, to: string): Promise<void> {
+  const content = await readFile(path, "utf8");
+  await writeFile(path, content.replace(from, to));
+  const future = Date.now() / 1000 + 5;
+  await utimes(path, future, future);
+}
+
+describe("map diffs", () => {
+  beforeEach(() => {
+    resetMapCache();
+  });
+
+  afterEach(() => {
+    setSettings({});
+  });
+
+  afterAll(async () => {
+    await cleanupAllTempFiles();
+  });
+
+  it("sends a changed file's map as its changes", async () => {
+    const { tool, handlers } = registerExtension();
+    handlers.get("turn_start")?.({ type: "turn_start", turnIndex: 2 });
+    const path = await createTempFile("diff.py", generatePythonCode(3000));
+    expect(await readMap(tool, { path })).toContain("File Map:");
+
+    await edit(
+      path,
+      "def func_10(",
+      "def added_helper() -> None:\n    pass\n\ndef func_10("
+    );
+    const diff = await readMap(tool, { path });
+
+    expect(diff).toContain("Map changed since your read at turn 2");
+    expect(diff).toContain("function added_helper [32-33]");
+    expect(diff).toMatch(/lines 35-\S+ by \+3/);
+    expect(diff).not.toContain("File Map:");
+    expect(getRecentReads().at(-1)?.mapDiff).toBe(true);
+  });
+
+  it("sends the full map on resend, after compaction and when off", async () => {
+    const { tool, handlers } = registerExtension();
+    const path = await createTempFile("diff-full.py", generatePythonCode(3000));
+    await readMap(tool, { path });
+
+    await edit(path, "def func_10(", "def renamed_10(");
+    expect(await readMap(tool, { path, resend: true })).toContain(
+      "File Map:"
+    );
+
+    await edit(path, "def func_20(", "def renamed_20(");
+    handlers.get("session_compact")?.({ type: "session_compact" });
+    expect(await readMap(tool, { path })).toContain("File Map:");
+
+    setSettings({ mapDiffs: false, dedupReads: false });
+    await edit(path, "def func_30(", "def renamed_30(");
+    expect(await readMap(tool, { path })).toContain("File Map:");
+  });
+});
@@ -0,0 +1,93 @@
+import {
+  afterAll,
+  afterEach,
+  beforeEach,
+  describe,
+  expect,
+  it,
+  vi,
+} from "vitest";
+
+import piReadMapExtension, { resetMapCache } from "../../src/index.js";
+import { getSettings, setSettings } from "../../src/settings.js";
+import {
+  cleanupAllTempFiles,
+  createTempFile,
+  generatePythonCode,
+} from "./helpers.js";
+
+// eslint-disable-next-line jest/no-untyped-mock-factory
+vi.mock("@mariozechner/pi-coding-agent", async (importOriginal) => {
+  const actual =
+    await importOriginal<typeof import("@mariozechner/pi-coding-agent")>();
+  return {
+    ...actual,
+    createReadTool: vi.fn(() => ({
+      execute: vi.fn().mockResolvedValue({
+        content: [{ type: "text", text: "Mocked original content" }],
+      }),
+    })),
+    createLsTool: vi.fn(),
+  };
+});
+
+function registerExtension() {
+  const mockPi = {
+    registerTool: vi.fn(),
+    registerCommand: vi.fn(),
+    on: vi.fn(),
+  };
+  piReadMapExtension(mockPi as never);
+  const command = mockPi.registerCommand.mock.calls.find(
+    ([name]) => name === "readmap-format"
+  )?.[1];
+  return { tool: mockPi.registerTool.mock.calls[0]?.[0], command };
+}
+
+describe("map format", () => {
+  beforeEach(() => {
+    resetMapCache();
+  });
+
+  afterEach(() => {
+    setSettings({});
+  });
+
+  afterAll(async () => {
+    await cleanupAllTempFiles();
+  });
+
+  it("switches a session to the dense format, re-rendering cached maps", async () => {
+    const { tool, command } = registerExtension();
+    const notify = vi.fn();
+    const path = await createTempFile("format.py", generatePythonCode(3000));
+
+    const standard = await tool.execute("call-1", { path });
+    expect(standard.content.at(-1)?.text).toContain("───");
+
+    await command.handler("dense", { ui: { notify } });
+    expect(getSettings().mapFormat).toBe("dense");
+
+    const dense = await tool.execute("call-2", { path });
+    const map = dense.content.at(-1)?.text ?? "";
+    expect(map).toContain("kinds: f=function");
+    expect(map).toMatch(/^f \d+\+2 func_0$/m);
+    expect(map).not.toContain("───");
+
+    // Switching back serves the memoized standard render
+    await command.handler("standard", { ui: { notify } });
+    const back = await tool.execute("call-3", { path });
+    expect(back.content.at(-1)?.text).toBe(standard.content.at(-1)?.text);
+  });
+
+  it("rejects unknown formats", async () => {
+    const { command } = registerExtension();
+    const notify = vi.fn();
+
+    await command.handler("tiny", { ui: { notify } });
+    const [message, type] = notify.mock.calls[0] ?? [];
+    expect(message).toContain("unknown map format");
+    expect(type).toBe("error");
+    expect(getSettings().mapFormat).toBe("standard");
+  });
+});
@@ -0,0 +1,120 @@
+import {
+  afterAll,
+  afterEach,
+  beforeEach,
+  describe,
+  expect,
+  it,
+  vi,
+} from "vitest";
+
+import piReadMapExtension, { resetMapCache } from "../../src/index.js";
+import { setSettings } from "../../src/settings.js";
+import {
+  cleanupAllTempFiles,
+  createTempFile,
+  generatePythonCode,
+} from "./helpers.js";
+
+// eslint-disable-next-line jest/no-untyped-mock-factory
+vi.mock("@mariozechner/pi-coding-agent", async (importOriginal) => {
+  const actual =
+    await importOriginal<typeof import("@mariozechner/pi-coding-agent")>();
+  return {
+    ...actual,
+    createReadTool: vi.fn(() => ({
+      execute: vi.fn().mockResolvedValue({
+        content: [{ type: "text", text: "Mocked original content" }],
+      }),
+    })),
+    createLsTool: vi.fn(),
+  };
+});
+
+function registerReadTool() {
+  const mockPi = {
+    registerTool: vi.fn(),
+    registerCommand: vi.fn(),
+    on: vi.fn(),
+  };
+  piReadMapExtension(mockPi as never);
+  return mockPi.registerTool.mock.calls[0]?.[0];
+}
+
+function textOf(result: { content: { type: string; text?: string }[] }) {
+  return result.content.map((c) => c.text ?? "").join("\n");
+}
+
+describe("map-only reads", () => {
+  beforeEach(() => {
+    resetMapCache();
+  });
+
+  afterEach(() => {
+    setSettings({});
+  });
+
+  afterAll(async () => {
+    await cleanupAllTempFiles();
+  });
+
+  it("returns only the map when mode is 'map'", async () => {
+    const tool = registerReadTool();
+    const path = await createTempFile("map-only.py", generatePythonCode(3000));
+
+    const text = textOf(
+      await tool.execute("test-call-id", { path, mode: "map" })
+    );
+
+    expect(text).toContain("func_0: [2-3]");
+    expect(text).toContain("[Map only");
+    expect(text).not.toContain("Mocked original content");
+  });
+
+  it("maps files below the large-file threshold on request", async () => {
+    const tool = registerReadTool();
+    const path = await createTempFile("map-small.py", generatePythonCode(5));
+
+    const text = textOf(
+      await tool.execute("test-call-id", { path, mode: "map" })
+    );
+
+    expect(text).toContain("func_4");
+    expect(text).not.toContain("Mocked original content");
+  });
+
+  it("defaults to map-only above the configured size", async () => {
+    const tool = registerReadTool();
+    setSettings({ mapOnlyAboveBytes: 1024 });
+    const path = await createTempFile(
+      "map-default.py",
+      generatePythonCode(3000)
+    );
+
+    const text = textOf(await tool.execute("test-call-id", { path }));
+    expect(text).toContain("[Map only");
+    expect(text).not.toContain("Mocked original content");
+
+    const content = textOf(
+      await tool.execute("test-call-id", { path, mode: "content" })
+    );
+    expect(content).toContain("Mocked original content");
+    expect(content).toContain("func_0: [2-3]");
+  });
+
+  it("prefers explicit ranges over map mode", async () => {
+    const tool = registerReadTool();
+    const path = await createTempFile("map-range.py", generatePythonCode(3000));
+
+    const text = textOf(
+      await tool.execute("test-call-id", {
+        path,
+        mode: "map",
+        offset: 1,
+        limit: 5,
+      })
+    );
+
+    expect(text).toBe("Mocked original content");
+  });
+});
@@ -0,0 +1,125 @@
+import { writeFile } from "node:fs/promises";
+import { dirname, join } from "node:path";
+import {
+  afterAll,
+  afterEach,
+  beforeEach,
+  describe,
+  expect,
+  it,
+  vi,
+} from "vitest";
+
+import piReadMapExtension, { resetMapCache } from "../../src/index.js";
+import {
+  cancelAllPrefetches,
+  getPrefetchStats,
+  resetPrefetchStats,
+} from "../../src/prefetch.js";
+import { setSettings } from "../../src/settings.js";
+import {
+  cleanupAllTempFiles,
+  createTempFile,
+  generatePythonCode,
+} from "./helpers.js";
+
+// eslint-disable-next-line jest/no-untyped-mock-factory
+vi.mock("@mariozechner/pi-coding-agent", async (importOriginal) => {
+  const actual =
+    await importOriginal<typeof import("@mariozechner/pi-coding-agent")>();
+  return {
+    ...actual,
+    createReadTool: vi.fn(() => ({
+      execute: vi.fn().mockResolvedValue({
+        content: [{ type: "text", text: "Mocked original content" }],
+      }),
+    })),
+    createLsTool: vi.fn(),
+  };
+});
+
+function registerReadTool() {
+  const mockPi = {
+    registerTool: vi.fn(),
+    registerCommand: vi.fn(),
+    on: vi.fn(),
+  };
+  piReadMapExtension(mockPi as never);
+  return mockPi.registerTool.mock.calls[0]?.[0];
+}
+
+describe("import prefetching", () => {
+  beforeEach(() => {
+    resetMapCache();
+    resetPrefetchStats();
+  });
+
+  afterEach(() => {
+    setSettings({});
+  });
+
+  afterAll(async () => {
+    await cleanupAllTempFiles();
+  });
+
+  it("prefetches imported modules and counts the later read as a hit", async () => {
+    const tool = registerReadTool();
+    setSettings({ prefetchImports: true });
+    const helpers = await createTempFile(
+      "prefetch_helpers.py",
+      generatePythonCode(3000)
+    );
+    const main = join(dirname(helpers), "prefetch_main.py");
+    await writeFile(
+      main,
+      `import os\nimport prefetch_helpers\n\n${generatePythonCode(3000)}`
+    );
+
+    await tool.execute("call-1", { path: main });
+    await vi.waitFor(() => expect(getPrefetchStats().completed).toBe(1), {
+      timeout: 10_000,
+    });
+
+    const result = await tool.execute("call-2", { path: helpers });
+    expect(result.content.at(-1)?.text).toContain("func_0");
+    expect(getPrefetchStats().hits).toBe(1);
+  });
+
+  it("builds the map for a read that joins a cancelled prefetch", async () => {
+    const tool = registerReadTool();
+    setSettings({ prefetchImports: true });
+    const helpers = await createTempFile(
+      "cancelled_helpers.py",
+      generatePythonCode(3000)
+    );
+    const main = join(dirname(helpers), "cancelled_main.py");
+    await writeFile(
+      main,
+      `import cancelled_helpers\n\n${generatePythonCode(3000)}`
+    );
+
+    await tool.execute("call-1", { path: main });
+    await vi.waitFor(() => expect(getPrefetchStats().started).toBe(1));
+    cancelAllPrefetches();
+
+    const result = await tool.execute("call-2", { path: helpers });
+    expect(result.content.at(-1)?.text).toContain("File Map:");
+    expect(getPrefetchStats().cancelled).toBe(1);
+  });
+
+  it("does nothing unless enabled", async () => {
+    const tool = registerReadTool();
+    const helpers = await createTempFile(
+      "plain_helpers.py",
+      generatePythonCode(3000)
+    );
+    const main = join(dirname(helpers), "plain_main.py");
+    await writeFile(
+      main,
+      `import plain_helpers\n\n${generatePythonCode(3000)}`
+    );
+
+    await tool.execute("call-1", { path: main });
+    expect(getPrefetchStats().started).toBe(0);
+  });
+});
@@ -0,0 +1,157 @@
+import { readFile, utimes, writeFile } from "node:fs/promises";
+import {
+  afterAll,
+  afterEach,
+  beforeEach,
+  describe,
+  expect,
+  it,
+  vi,
+} from "vitest";
+
+import piReadMapExtension, { resetMapCache } from "../../src/index.js";
+import { setSettings } from "../../src/settings.js";
+import {
+  cleanupAllTempFiles,
+  createTempFile,
+  generatePythonCode,
+} from "./helpers.js";
+
+// eslint-disable-next-line jest/no-untyped-mock-factory
+vi.mock("@mariozechner/pi-coding-agent", async (importOriginal) => {
+  const actual =
+    await importOriginal<typeof import("@mariozechner/pi-coding-agent")>();
+  return {
+    ...actual,
+    createReadTool: vi.fn(() => ({
+      execute: vi.fn(async (_id: string, params: { path: string }) => ({
+        content: [
+          {
+            type: "text",
+            text: (await readFile(params.path, "utf8"))
+              .split("\n")
+              .slice(0, 2000)
+              .join("\n"),
+          },
+        ],
+      })),
+    })),
+    createLsTool: vi.fn(),
+  };
+});
+
+function registerExtension() {
+  const handlers = new Map<string, (event: unknown) => void>();
+  const mockPi = {
+    registerTool: vi.fn(),
+    registerCommand: vi.fn(),
+    on: vi.fn((event: string, handler: (event: unknown) => void) => {
+      handlers.set(event, handler);
+    }),
+  };
+  piReadMapExtension(mockPi as never);
+  return { tool: mockPi.registerTool.mock.calls[0]?.[0], handlers };
+}
+
+async function readTexts(
+  tool: ReturnType<typeof registerExtension>["tool"],
+  params: Record<string, unknown>
+): Promise<string[]> {
+  const result = await tool.execute("test-call-id", params);
+  return result.content.map((c: { text?: string }) => c.text ?? "");
+}
+
+describe("session read dedup", () => {
+  beforeEach(() => {
+    resetMapCache();
+  });
+
+  afterEach(() => {
+    setSettings({});
+  });
+
+  afterAll(async () => {
+    await cleanupAllTempFiles();
+  });
+
+  it("answers an identical re-read with a note and the map", async () => {
+    const { tool, handlers } = registerExtension();
+    setSettings({ dedupReads: true });
+    handlers.get("turn_start")?.({ type: "turn_start", turnIndex: 3 });
+    const path = await createTempFile("dedup.py", generatePythonCode(3000));
+
+    const first = await readTexts(tool, { path });
+    expect(first[0]).toContain("def func_0");
+
+    const second = await readTexts(tool, { path });
+    expect(second).toHaveLength(2);
+    expect(second[0]).toContain("Unchanged since your read at turn 3");
+    expect(second[0]).not.toContain("def func_0");
+    expect(second[1]).toContain("File Map:");
+  });
+
+  it("sends a diff when the file changed", async () => {
+    const { tool } = registerExtension();
+    setSettings({ dedupReads: true });
+    const path = await createTempFile(
+      "dedup-diff.py",
+      generatePythonCode(3000)
+    );
+    await readTexts(tool, { path });
+
+    const content = await readFile(path, "utf8");
+    await writeFile(path, content.replace("def func_1(", "def renamed_1("));
+    const future = Date.now() / 1000 + 5;
+    await utimes(path, future, future);
+
+    const [diff] = await readTexts(tool, { path });
+    expect(diff).toContain("Changed since your read");
+    expect(diff).toContain("-def func_1(");
+    expect(diff).toContain("+def renamed_1(");
+    expect(diff).not.toContain("def func_2(");
+  });
+
+  it("resends the full content on request and after compaction", async () => {
+    const { tool, handlers } = registerExtension();
+    setSettings({ dedupReads: true });
+    const path = await createTempFile(
+      "dedup-resend.py",
+      generatePythonCode(3000)
+    );
+    await readTexts(tool, { path });
+
+    const [resent] = await readTexts(tool, { path, resend: true });
+    expect(resent).toContain("def func_0");
+
+    handlers.get("session_compact")?.({ type: "session_compact" });
+    const [afterCompact] = await readTexts(tool, { path });
+    expect(afterCompact).toContain("def func_0");
+  });
+
+  it("resends the full content after a fork or tree navigation", async () => {
+    const { tool, handlers } = registerExtension();
+    setSettings({ dedupReads: true });
+    const path = await createTempFile(
+      "dedup-fork.py",
+      generatePythonCode(3000)
+    );
+    await readTexts(tool, { path });
+
+    handlers.get("session_fork")?.({ type: "session_fork" });
+    const [afterFork] = await readTexts(tool, { path });
+    expect(afterFork).toContain("def func_0");
+
+    handlers.get("session_tree")?.({ type: "session_tree" });
+    const [afterTree] = await readTexts(tool, { path });
+    expect(afterTree).toContain("def func_0");
+  });
+
+  it("is off by default", async () => {
+    const { tool } = registerExtension();
+    const path = await createTempFile("dedup-off.py", generatePythonCode(3000));
+    await readTexts(tool, { path });
+
+    const [again] = await readTexts(tool, { path });
+    expect(again).toContain("def func_0");
+  });
+});
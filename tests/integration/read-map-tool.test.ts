@@ -0,0 +1,93 @@
+import { afterAll, beforeEach, describe, expect, it, vi } from "vitest";
+
+import piReadMapExtension, { resetMapCache } from "../../src/index.js";
+import { getRecentReads, resetReadStats } from "../../src/read-stats.js";
+import {
+  cleanupAllTempFiles,
+  createTempFile,
+  generatePythonCode,
+} from "./helpers.js";
+
+// eslint-disable-next-line jest/no-untyped-mock-factory
+vi.mock("@mariozechner/pi-coding-agent", async (importOriginal) => {
+  const actual =
+    await importOriginal<typeof import("@mariozechner/pi-coding-agent")>();
+  return {
+    ...actual,
+    createReadTool: vi.fn(() => ({
+      execute: vi.fn().mockResolvedValue({
+        content: [{ type: "text", text: "Mocked original content" }],
+      }),
+    })),
+    createLsTool: vi.fn(),
+  };
+});
+
+function registerMapTool() {
+  const mockPi = {
+    registerTool: vi.fn(),
+    registerCommand: vi.fn(),
+    on: vi.fn(),
+  };
+  piReadMapExtension(mockPi as never);
+  return mockPi.registerTool.mock.calls.find(
+    ([tool]) => tool.name === "read_map"
+  )?.[0];
+}
+
+async function readMap(
+  tool: ReturnType<typeof registerMapTool>,
+  params: Record<string, unknown>
+): Promise<string> {
+  const result = await tool.execute("test-call-id", params);
+  return result.content[0]?.text ?? "";
+}
+
+describe("read_map tool", () => {
+  beforeEach(() => {
+    resetMapCache();
+    resetReadStats();
+  });
+
+  afterAll(async () => {
+    await cleanupAllTempFiles();
+  });
+
+  it("maps the symbols within a line range at full detail", async () => {
+    const tool = registerMapTool();
+    const path = await createTempFile("slice.py", generatePythonCode(20_000));
+
+    const text = await readMap(tool, {
+      path,
+      startLine: 30_000,
+      endLine: 30_050,
+    });
+
+    expect(text).toContain("func_9999(x: int) -> bool: [29999-30000]");
+    expect(text).toContain("func_10016(x: int) -> bool");
+    expect(text).not.toContain("func_10017(");
+    expect(text).toContain("[Map page 1 of 1 for lines 30,000-30,050");
+  });
+
+  it("pages through a map that exceeds the budget from the cached map", async () => {
+    const tool = registerMapTool();
+    const path = await createTempFile("pages.py", generatePythonCode(3000));
+
+    const first = await readMap(tool, { path });
+    const pages = Number(/page 1 of (\d+)/.exec(first)?.[1]);
+    expect(pages).toBeGreaterThan(1);
+    expect(first).toContain("func_0(x: int) -> bool");
+
+    const second = await readMap(tool, { path, page: 2 });
+    expect(second).not.toContain("func_0(");
+    expect(second).toContain(`page 2 of ${pages}`);
+    for (const text of [first, second]) {
+      expect(Buffer.byteLength(text, "utf8")).toBeLessThan(11 * 1024);
+    }
+    expect(getRecentReads().at(-1)?.cacheHit).toBe(true);
+
+    await expect(readMap(tool, { path, page: pages + 1 })).rejects.toThrow(
+      "out of range"
+    );
+  });
+});
@@ -0,0 +1,123 @@
+import { readFile, utimes, writeFile } from "node:fs/promises";
+import {
+  afterAll,
+  afterEach,
+  beforeEach,
+  describe,
+  expect,
+  it,
+  vi,
+} from "vitest";
+
+import piReadMapExtension, { resetMapCache } from "../../src/index.js";
+import { setSettings } from "../../src/settings.js";
+import {
+  cleanupAllTempFiles,
+  createTempFile,
+  generatePythonCode,
+} from "./helpers.js";
+
+// eslint-disable-next-line jest/no-untyped-mock-factory
+vi.mock("@mariozechner/pi-coding-agent", async (importOriginal) => {
+  const actual =
+    await importOriginal<typeof import("@mariozechner/pi-coding-agent")>();
+  return {
+    ...actual,
+    createReadTool: vi.fn(() => ({
+      execute: vi.fn().mockResolvedValue({
+        content: [{ type: "text", text: "Mocked original content" }],
+      }),
+    })),
+    createLsTool: vi.fn(),
+  };
+});
+
+function registerReadTool() {
+  const mockPi = {
+    registerTool: vi.fn(),
+    registerCommand: vi.fn(),
+    on: vi.fn(),
+  };
+  piReadMapExtension(mockPi as never);
+  return mockPi.registerTool.mock.calls[0]?.[0];
+}
+
+async function readMapText(
+  tool: ReturnType<typeof registerReadTool>,
+  path: string
+): Promise<string> {
+  const result = await tool.execute("test-call-id", { path });
+  return result.content.at(-1)?.text ?? "";
+}
+
+async function prependLines(path: string, lines: string[]): Promise<void> {
+  const content = await readFile(path, "utf8");
+  await writeFile(path, `${lines.join("\n")}\n${content}`);
+  const future = Date.now() / 1000 + 5;
+  await utimes(path, future, future);
+}
+
+describe("stale-while-revalidate", () => {
+  beforeEach(() => {
+    resetMapCache();
+  });
+
+  afterEach(() => {
+    setSettings({});
+  });
+
+  afterAll(async () => {
+    await cleanupAllTempFiles();
+  });
+
+  it("serves a shifted stale map and refreshes it in the background", async () => {
+    const tool = registerReadTool();
+    setSettings({ staleWhileRevalidate: true, maxStaleChangedPercent: 10 });
+    const path = await createTempFile("swr.py", generatePythonCode(3000));
+
+    const initial = await readMapText(tool, path);
+    expect(initial).toContain("func_0: [2-3]");
+
+    await prependLines(path, ["# one", "# two", "# three"]);
+
+    const stale = await readMapText(tool, path);
+    expect(stale).toContain("Map refreshing");
+    expect(stale).toContain("func_0: [5-6]");
+
+    await vi.waitFor(
+      async () => {
+        const fresh = await readMapText(tool, path);
+        expect(fresh).not.toContain("Map refreshing");
+        expect(fresh).toContain("func_0: [5-6]");
+      },
+      { timeout: 5000, interval: 50 }
+    );
+  });
+
+  it("regenerates synchronously when too much of the file changed", async () => {
+    const tool = registerReadTool();
+    setSettings({
+      staleWhileRevalidate: true,
+      maxStaleChangedPercent: 0,
+      mapDiffs: false,
+    });
+    const path = await createTempFile("swr-limit.py", generatePythonCode(3000));
+
+    await readMapText(tool, path);
+    await prependLines(path, ["# changed"]);
+
+    const text = await readMapText(tool, path);
+    expect(text).not.toContain("Map refreshing");
+    expect(text).toContain("func_0: [3-4]");
+  });
+
+  it("is disabled by default", async () => {
+    const tool = registerReadTool();
+    const path = await createTempFile("swr-off.py", generatePythonCode(3000));
+
+    await readMapText(tool, path);
+    await prependLines(path, ["# changed"]);
+
+    expect(await readMapText(tool, path)).not.toContain("Map refreshing");
+  });
+});
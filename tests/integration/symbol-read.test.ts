@@ -0,0 +1,89 @@
+import { afterAll, beforeEach, describe, expect, it, vi } from "vitest";
+
+import piReadMapExtension, { resetMapCache } from "../../src/index.js";
+import { cleanupAllTempFiles, createTempFile } from "./helpers.js";
+
+const SOURCE = `import os
+
+
+class BatchProcessor:
+    def run(self):
+        return 1
+
+    def run_async(self):
+        return 2
+
+
+class StreamProcessor:
+    def run(self):
+        return 3
+
+
+def main():
+    pass
+`;
+
+function registerReadTool() {
+  const mockPi = {
+    registerTool: vi.fn(),
+    registerCommand: vi.fn(),
+    on: vi.fn(),
+  };
+  piReadMapExtension(mockPi as never);
+  return mockPi.registerTool.mock.calls[0]?.[0];
+}
+
+function textOf(result: { content: { type: string; text?: string }[] }) {
+  return result.content.map((c) => c.text ?? "").join("\n");
+}
+
+describe("symbol-addressed reads", () => {
+  beforeEach(() => {
+    resetMapCache();
+  });
+
+  afterAll(async () => {
+    await cleanupAllTempFiles();
+  });
+
+  it("registers the symbol parameter", () => {
+    const tool = registerReadTool();
+    expect(tool.parameters.properties.symbol).toBeDefined();
+  });
+
+  it("reads exactly the lines of a qualified symbol", async () => {
+    const tool = registerReadTool();
+    const path = await createTempFile("symbols.py", SOURCE);
+
+    const text = textOf(
+      await tool.execute("test-call-id", { path, symbol: "BatchProcessor.run" })
+    );
+
+    expect(text).toMatch(/^\[BatchProcessor\.run \(\w+\) \[5-6\]\]/);
+    expect(text).toContain("return 1");
+    expect(text).not.toContain("return 2");
+  });
+
+  it("lists candidates when several symbols match", async () => {
+    const tool = registerReadTool();
+    const path = await createTempFile("ambiguous.py", SOURCE);
+
+    const text = textOf(
+      await tool.execute("test-call-id", { path, symbol: "run" })
+    );
+
+    expect(text).toContain('2 symbols match "run"');
+    expect(text).toContain("BatchProcessor.run (");
+    expect(text).toContain("StreamProcessor.run (");
+    expect(text).not.toContain("return 1");
+  });
+
+  it("rejects unknown symbols with the top-level names", async () => {
+    const tool = registerReadTool();
+    const path = await createTempFile("unknown.py", SOURCE);
+
+    await expect(
+      tool.execute("test-call-id", { path, symbol: "nonexistent_xyz" })
+    ).rejects.toThrow(/Top-level symbols: BatchProcessor, StreamProcessor/);
+  });
+});
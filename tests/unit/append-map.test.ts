@@ -0,0 +1,159 @@
+import { appendFile, copyFile, mkdtemp, rm, writeFile } from "node:fs/promises";
+import { tmpdir } from "node:os";
+import { join } from "node:path";
+import { afterEach, beforeEach, describe, expect, it } from "vitest";
+
+import type { AppendableMapper } from "../../src/types.js";
+
+import { mapAppendable } from "../../src/append-map.js";
+import { DetailLevel, SymbolKind } from "../../src/enums.js";
+import { clearMapCache, getCachedAppendState } from "../../src/map-cache.js";
+import { csvMapper } from "../../src/mappers/csv.js";
+import { jsonlMapper } from "../../src/mappers/jsonl.js";
+
+const FIXTURES = join(import.meta.dirname, "../fixtures");
+
+/**
+ * Mapper recording which lines it was handed.
+ */
+function createRecordingMapper(): AppendableMapper<{ seen: string[] }> & {
+  consumed: number[];
+} {
+  const consumed: number[] = [];
+  return {
+    id: "recording",
+    consumed,
+    createState: () => ({ seen: [] }),
+    consume: (state, line, lineNumber) => {
+      consumed.push(lineNumber);
+      state.seen.push(line);
+    },
+    finish: (state, file) => ({
+      path: file.path,
+      totalLines: file.lines,
+      totalBytes: file.totalBytes,
+      language: "Test",
+      symbols: state.seen.map((name, i) => ({
+        name,
+        kind: SymbolKind.Variable,
+        startLine: i + 1,
+        endLine: i + 1,
+      })),
+      imports: [],
+      detailLevel: DetailLevel.Full,
+    }),
+  };
+}
+
+describe("mapAppendable", () => {
+  let dir: string;
+
+  beforeEach(async () => {
+    clearMapCache();
+    dir = await mkdtemp(join(tmpdir(), "append-map-"));
+  });
+
+  afterEach(async () => {
+    await rm(dir, { recursive: true, force: true });
+  });
+
+  it("only consumes appended lines when the prefix is unchanged", async () => {
+    const path = join(dir, "log.txt");
+    await writeFile(path, "one\ntwo\n");
+    const mapper = createRecordingMapper();
+
+    await mapAppendable(path, mapper);
+    await appendFile(path, "three\n");
+    const map = await mapAppendable(path, mapper);
+
+    expect(mapper.consumed).toEqual([1, 2, 3]);
+    expect(map?.symbols.map((s) => s.name)).toEqual(["one", "two", "three"]);
+    expect(getCachedAppendState(path)?.offset).toBe(14);
+  });
+
+  it("re-reads a trailing line that had no newline yet", async () => {
+    const path = join(dir, "partial.txt");
+    await writeFile(path, "one\ntw");
+    const mapper = createRecordingMapper();
+
+    const first = await mapAppendable(path, mapper);
+    expect(first?.symbols.map((s) => s.name)).toEqual(["one", "tw"]);
+
+    await appendFile(path, "o\n");
+    const second = await mapAppendable(path, mapper);
+
+    expect(second?.symbols.map((s) => s.name)).toEqual(["one", "two"]);
+    expect(second?.totalLines).toBe(2);
+  });
+
+  it("starts over when the prefix changed", async () => {
+    const path = join(dir, "rewritten.txt");
+    await writeFile(path, "one\ntwo\n");
+    const mapper = createRecordingMapper();
+
+    await mapAppendable(path, mapper);
+    await writeFile(path, "ONE\ntwo\nthree\n");
+    const map = await mapAppendable(path, mapper);
+
+    expect(mapper.consumed).toEqual([1, 2, 1, 2, 3]);
+    expect(map?.symbols.map((s) => s.name)).toEqual(["ONE", "two", "three"]);
+  });
+
+  it("starts over when the file shrank", async () => {
+    const path = join(dir, "truncated.txt");
+    await writeFile(path, "one\ntwo\n");
+    const mapper = createRecordingMapper();
+
+    await mapAppendable(path, mapper);
+    await writeFile(path, "one\n");
+    const map = await mapAppendable(path, mapper);
+
+    expect(map?.symbols.map((s) => s.name)).toEqual(["one"]);
+  });
+});
+
+describe("append-aware mappers", () => {
+  let dir: string;
+
+  beforeEach(async () => {
+    clearMapCache();
+    dir = await mkdtemp(join(tmpdir(), "append-mappers-"));
+  });
+
+  afterEach(async () => {
+    await rm(dir, { recursive: true, force: true });
+  });
+
+  it("extends a pi session map with appended turns", async () => {
+    const path = join(dir, "session.jsonl");
+    await copyFile(join(FIXTURES, "jsonl/pi-session.jsonl"), path);
+    await jsonlMapper(path);
+
+    await appendFile(
+      path,
+      `${JSON.stringify({ type: "message", message: { role: "user", content: "Appended question" } })}\n${JSON.stringify({ type: "message", message: { role: "assistant", content: [] } })}\n`
+    );
+    const incremental = await jsonlMapper(path);
+
+    clearMapCache();
+    const full = await jsonlMapper(path);
+
+    expect(incremental).toEqual(full);
+    expect(incremental?.symbols.at(-1)?.name).toBe("[User] Appended question");
+  });
+
+  it("updates the CSV row count for appended rows", async () => {
+    const path = join(dir, "data.csv");
+    await copyFile(join(FIXTURES, "csv/data.csv"), path);
+    await csvMapper(path);
+
+    await appendFile(path, "6,Frank,frank@example.com,Sales,70000\n");
+    const incremental = await csvMapper(path);
+
+    clearMapCache();
+    const full = await csvMapper(path);
+
+    expect(incremental).toEqual(full);
+    expect(incremental?.symbols[0]?.name).toContain("6 rows");
+  });
+});
@@ -0,0 +1,116 @@
+import { mkdtemp, rm, writeFile } from "node:fs/promises";
+import { tmpdir } from "node:os";
+import { join } from "node:path";
+import { afterEach, beforeEach, describe, expect, it } from "vitest";
+
+import {
+  hasBinaryExtension,
+  isBinaryFile,
+  looksBinary,
+} from "../../src/binary-detect.js";
+import {
+  clearMapCache,
+  getCachedBinaryVerdict,
+} from "../../src/map-cache.js";
+
+describe("binary detection", () => {
+  let dir: string;
+
+  beforeEach(async () => {
+    dir = await mkdtemp(join(tmpdir(), "binary-detect-"));
+    clearMapCache();
+  });
+
+  afterEach(async () => {
+    await rm(dir, { recursive: true, force: true });
+  });
+
+  it("recognizes binary extensions case-insensitively", () => {
+    expect(hasBinaryExtension("/x/photo.PNG")).toBe(true);
+    expect(hasBinaryExtension("/x/report.pdf")).toBe(true);
+    expect(hasBinaryExtension("/x/main.ts")).toBe(false);
+    expect(hasBinaryExtension("/x/Makefile")).toBe(false);
+  });
+
+  it("detects magic numbers without an extension", () => {
+    const elf = Buffer.from([0x7f, 0x45, 0x4c, 0x46, 0x02, 0x01, 0x01]);
+    const sqlite = Buffer.concat([
+      Buffer.from("SQLite format 3\0", "latin1"),
+      Buffer.from("\u0010\u0000", "latin1"),
+    ]);
+    expect(looksBinary(elf)).toBe(true);
+    expect(looksBinary(sqlite)).toBe(true);
+    expect(looksBinary(Buffer.from("%PDF-1.7\n"))).toBe(true);
+  });
+
+  it("confirms printable signatures by the structure after them", () => {
+    const pe = Buffer.alloc(0x90, 0x20);
+    pe.write("MZ", 0, "latin1");
+    pe.writeUInt32LE(0x80, 0x3c);
+    pe.write("PE\0\0", 0x80, "latin1");
+    const bzip2 = Buffer.from([
+      0x42, 0x5a, 0x68, 0x39, 0x31, 0x41, 0x59, 0x26, 0x53, 0x59,
+    ]);
+    expect(looksBinary(pe)).toBe(true);
+    expect(looksBinary(bzip2)).toBe(true);
+  });
+
+  it("keeps text starting with printable signatures as text", () => {
+    const texts = [
+      "ORCID,name,affiliation\n0000-0002-1825-0097,Josiah Carberry,Brown\n",
+      `MZ_BUFFER_SIZE = 4096\n${"# padding the DOS header out\n".repeat(4)}`,
+      "PAR1 was the first parameter set.\n",
+      "BZh what a strange way to start a sentence.\n",
+    ];
+    for (const text of texts) {
+      expect(looksBinary(Buffer.from(text))).toBe(false);
+    }
+  });
+
+  it("treats NUL bytes as binary", () => {
+    expect(looksBinary(Buffer.from("abc\0def"))).toBe(true);
+  });
+
+  it("keeps UTF-8 and Latin-1 text as text", () => {
+    expect(looksBinary(Buffer.from("const café = \"naïve\";\n"))).toBe(false);
+    expect(looksBinary(Buffer.from("# Ünïcödé résumé\n", "latin1"))).toBe(
+      false
+    );
+    expect(looksBinary(Buffer.alloc(0))).toBe(false);
+  });
+
+  it("treats invalid UTF-8 with many control bytes as binary", () => {
+    const noise = Buffer.from([
+      0x01, 0x02, 0x03, 0xff, 0xfe, 0x04, 0x05, 0x80, 0x06, 0x07,
+    ]);
+    expect(looksBinary(noise)).toBe(true);
+  });
+
+  it("ignores a multi-byte character cut off at the sample's end", () => {
+    const text = Buffer.from("naïve");
+    expect(looksBinary(text.subarray(0, 3))).toBe(false);
+  });
+
+  it("sniffs extensionless files and caches the verdict per mtime", async () => {
+    const database = join(dir, "store");
+    await writeFile(
+      database,
+      Buffer.concat([
+        Buffer.from("SQLite format 3\0", "latin1"),
+        Buffer.alloc(64, 1),
+      ])
+    );
+    const script = join(dir, "run");
+    await writeFile(script, "#!/bin/sh\necho hello\n");
+
+    expect(await isBinaryFile(database, 1)).toBe(true);
+    expect(await isBinaryFile(script, 1)).toBe(false);
+    expect(getCachedBinaryVerdict(database, 1)).toBe(true);
+    expect(getCachedBinaryVerdict(database, 2)).toBeUndefined();
+
+    // A cached verdict is served without reading the file again
+    await writeFile(script, "\0\0\0");
+    expect(await isBinaryFile(script, 1)).toBe(false);
+    expect(await isBinaryFile(script, 2)).toBe(true);
+  });
+});
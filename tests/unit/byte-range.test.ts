@@ -0,0 +1,61 @@
+import { DEFAULT_MAX_BYTES } from "@mariozechner/pi-coding-agent";
+import { mkdtemp, rm, writeFile } from "node:fs/promises";
+import { tmpdir } from "node:os";
+import { join } from "node:path";
+import { afterEach, beforeEach, describe, expect, it } from "vitest";
+
+import { readByteRange } from "../../src/byte-range.js";
+
+describe("readByteRange", () => {
+  let dir: string;
+  let filePath: string;
+
+  beforeEach(async () => {
+    dir = await mkdtemp(join(tmpdir(), "byte-range-"));
+    filePath = join(dir, "data.min.js");
+  });
+
+  afterEach(async () => {
+    await rm(dir, { recursive: true, force: true });
+  });
+
+  it("reads the requested bytes with a continuation notice", async () => {
+    await writeFile(filePath, "0123456789");
+
+    expect(await readByteRange(filePath, 2, 3)).toBe(
+      "234\n\n[5 more bytes in file. Use byteOffset=5 to continue.]"
+    );
+    expect(await readByteRange(filePath, 5)).toBe("56789");
+  });
+
+  it("caps the range at the built-in byte limit", async () => {
+    await writeFile(filePath, "x".repeat(DEFAULT_MAX_BYTES * 2));
+    const text = await readByteRange(filePath, 10);
+
+    expect(text).toContain(
+      `[Showing bytes 10-${10 + DEFAULT_MAX_BYTES} of ${DEFAULT_MAX_BYTES * 2}`
+    );
+    expect(text).toContain(
+      `Use byteOffset=${10 + DEFAULT_MAX_BYTES} to continue.]`
+    );
+  });
+
+  it("never splits a multi-byte character", async () => {
+    await writeFile(filePath, "aé€b");
+    // "é" is bytes 1-2 and "€" bytes 3-5
+    expect(await readByteRange(filePath, 2, 4)).toBe(
+      "€\n\n[1 more bytes in file. Use byteOffset=6 to continue.]"
+    );
+    expect(await readByteRange(filePath, 0, 4)).toBe(
+      "aé\n\n[4 more bytes in file. Use byteOffset=3 to continue.]"
+    );
+  });
+
+  it("rejects offsets past the end of the file", async () => {
+    await writeFile(filePath, "abc");
+
+    await expect(readByteRange(filePath, 3)).rejects.toThrow(
+      "beyond end of file"
+    );
+  });
+});
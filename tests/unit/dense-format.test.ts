@@ -0,0 +1,124 @@
+import { describe, expect, it } from "vitest";
+
+import type { FileMap } from "../../src/types.js";
+
+import { THRESHOLDS } from "../../src/constants.js";
+import { DetailLevel, MapFormat, SymbolKind } from "../../src/enums.js";
+import { formatFileMap, formatWithBudget } from "../../src/formatter.js";
+
+function createTestMap(): FileMap {
+  return {
+    path: "/path/to/server.py",
+    totalLines: 400,
+    totalBytes: 12_000,
+    language: "Python",
+    detailLevel: DetailLevel.Full,
+    imports: ["os", "json"],
+    symbols: [
+      { name: "PORT", kind: SymbolKind.Constant, startLine: 5, endLine: 5 },
+      {
+        name: "Server",
+        kind: SymbolKind.Class,
+        startLine: 120,
+        endLine: 300,
+        docstring: "Serves requests.",
+        children: [
+          {
+            name: "handle",
+            kind: SymbolKind.Method,
+            startLine: 130,
+            endLine: 150,
+            signature: "(self, request)",
+          },
+          {
+            name: "close",
+            kind: SymbolKind.Method,
+            startLine: 290,
+            endLine: 290,
+          },
+        ],
+      },
+    ],
+  };
+}
+
+describe("dense map format", () => {
+  it("renders one-character kinds with a legend and relative ranges", () => {
+    const output = formatFileMap(
+      createTestMap(),
+      DetailLevel.Full,
+      MapFormat.Dense
+    );
+
+    expect(output.split("\n")).toEqual([
+      "File Map: server.py | 400 lines | 11.7 KB | Python",
+      "imports: os, json",
+      "kinds: k=constant c=class m=method",
+      "ranges: LINE+LINES; a child's LINE is +OFFSET from its parent's; no +LINES is one line",
+      "k 5 PORT",
+      "c 120+181 Server — Serves requests.",
+      " m +10+21 handle(self, request)",
+      " m +170 close",
+      "Use read(path, offset=LINE, limit=N) for targeted reads.",
+    ]);
+  });
+
+  it("writes byte-addressed ranges as start and length", () => {
+    const map: FileMap = {
+      ...createTestMap(),
+      symbols: [
+        {
+          name: "records",
+          kind: SymbolKind.Property,
+          startLine: 1,
+          endLine: 1,
+          startByte: 2000,
+          endByte: 2600,
+          children: [
+            {
+              name: "id",
+              kind: SymbolKind.Property,
+              startLine: 1,
+              endLine: 1,
+              startByte: 2010,
+              endByte: 2020,
+            },
+          ],
+        },
+      ],
+    };
+    const output = formatFileMap(map, DetailLevel.Compact, MapFormat.Dense);
+
+    expect(output).toContain("\np 2000+600 records\n p +10+10 id\n");
+    expect(output).toContain("byteOffset=START, byteLength=N");
+  });
+
+  it("fits more detail than the standard format in the same budget", () => {
+    const map: FileMap = {
+      ...createTestMap(),
+      symbols: Array.from({ length: 100 }, (_, i) => ({
+        name: `Handler${String.fromCodePoint(65 + (i % 26))}${i}`,
+        kind: SymbolKind.Class,
+        startLine: i * 40 + 1,
+        endLine: i * 40 + 39,
+        children: Array.from({ length: 4 }, (_, j) => ({
+          name: `step_${j}`,
+          kind: SymbolKind.Method,
+          startLine: i * 40 + j * 9 + 2,
+          endLine: i * 40 + j * 9 + 9,
+        })),
+      })),
+    };
+    const standard = formatWithBudget(map);
+    const dense = formatWithBudget(
+      map,
+      THRESHOLDS.MAX_TRUNCATED_BYTES,
+      undefined,
+      MapFormat.Dense
+    );
+
+    expect(standard.detailLevel).toBe(DetailLevel.Compact);
+    expect(dense.detailLevel).toBe(DetailLevel.Full);
+    expect(dense.format).toBe(MapFormat.Dense);
+  });
+});
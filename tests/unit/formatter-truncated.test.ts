@@ -7,7 +7,7 @@ import { DetailLevel, SymbolKind } from "../../src/enums.js";
 import {
   formatFileMap,
   formatFileMapWithBudget,
-  reduceToTruncated,
+  formatWithBudget,
 } from "../../src/formatter.js";
 
 /**
@@ -54,94 +54,56 @@ function createMapWithLongNames(count: number, nameLength: number): FileMap {
   };
 }
 
-describe("reduceToTruncated", () => {
-  it("keeps first N and last N symbols", () => {
-    const map = createMapWithSymbols(1000);
-    const truncated = reduceToTruncated(map, 50);
-
-    expect(truncated.symbols).toHaveLength(100);
-    expect(truncated.symbols[0]?.name).toBe("function_0");
-    expect(truncated.symbols[49]?.name).toBe("function_49");
-    expect(truncated.symbols[50]?.name).toBe("function_950");
-    expect(truncated.symbols[99]?.name).toBe("function_999");
-  });
-
-  it("includes truncatedInfo metadata", () => {
-    const map = createMapWithSymbols(5000);
-    const truncated = reduceToTruncated(map, 50);
-
-    expect(truncated.truncatedInfo).toEqual({
-      totalSymbols: 5000,
-      shownSymbols: 100,
-      omittedSymbols: 4900,
-    });
-  });
-
-  it("sets detail level to Truncated", () => {
-    const map = createMapWithSymbols(1000);
-    const truncated = reduceToTruncated(map, 50);
-
-    expect(truncated.detailLevel).toBe(DetailLevel.Truncated);
-  });
-
-  it("removes imports", () => {
-    const map = createMapWithSymbols(1000);
-    map.imports = ["os", "sys", "asyncio"];
-    const truncated = reduceToTruncated(map, 50);
-
-    expect(truncated.imports).toEqual([]);
-  });
-
-  it("does not truncate small symbol counts", () => {
-    const map = createMapWithSymbols(50);
-    const truncated = reduceToTruncated(map, 50);
-
-    // When symbols <= symbolsEach * 2, should return as outline (no truncation)
-    expect(truncated.truncatedInfo).toBeUndefined();
-    expect(truncated.symbols).toHaveLength(50);
-    expect(truncated.detailLevel).toBe(DetailLevel.Outline);
-  });
-
-  it("handles edge case where total equals 2x symbolsEach", () => {
-    const map = createMapWithSymbols(100);
-    const truncated = reduceToTruncated(map, 50);
-
-    // Exactly 100 symbols with 50+50 = 100, should not truncate
-    expect(truncated.truncatedInfo).toBeUndefined();
-    expect(truncated.symbols).toHaveLength(100);
-  });
-
-  it("handles edge case where total is just above threshold", () => {
-    const map = createMapWithSymbols(101);
-    const truncated = reduceToTruncated(map, 50);
+/**
+ * Create a map whose symbol names don't form numbered runs.
+ */
+function createMapWithUnrelatedNames(
+  count: number,
+  nameLength = 0
+): FileMap {
+  const map = createMapWithLongNames(count, nameLength);
+  map.symbols = map.symbols.map((s, i) => ({
+    ...s,
+    name: `handler_${"x".repeat(nameLength)}_${(i * 7) % count}`,
+  }));
+  return map;
+}
 
-    // 101 symbols > 100, should truncate
-    expect(truncated.truncatedInfo).toBeDefined();
-    expect(truncated.symbols).toHaveLength(100);
-    expect(truncated.truncatedInfo?.omittedSymbols).toBe(1);
-  });
-});
+/**
+ * Create a truncated map showing the first and last `each` of `count`
+ * symbols.
+ */
+function createTruncatedMap(count: number, each: number): FileMap {
+  const map = createMapWithSymbols(count);
+  return {
+    ...map,
+    detailLevel: DetailLevel.Truncated,
+    symbols: [...map.symbols.slice(0, each), ...map.symbols.slice(-each)],
+    truncatedInfo: {
+      totalSymbols: count,
+      shownSymbols: each * 2,
+      omittedSymbols: count - each * 2,
+    },
+  };
+}
 
 describe("formatFileMap with truncation", () => {
   it("includes truncation notice header", () => {
-    const map = createMapWithSymbols(5000);
-    const truncated = reduceToTruncated(map, 50);
+    const truncated = createTruncatedMap(5000, 50);
     const formatted = formatFileMap(truncated, DetailLevel.Truncated);
 
     expect(formatted).toContain("[Map ≤100.0 KB | 100 of 5,000 symbols]");
   });
 
   it("formats with omitted symbols separator", () => {
-    const map = createMapWithSymbols(1000);
-    const truncated = reduceToTruncated(map, 50);
+    const truncated = createTruncatedMap(1000, 50);
     const formatted = formatFileMap(truncated, DetailLevel.Truncated);
 
     expect(formatted).toContain("─ ─ ─ 900 more symbols ─ ─ ─");
   });
 
   it("includes first symbols before separator", () => {
-    const map = createMapWithSymbols(1000);
-    const truncated = reduceToTruncated(map, 50);
+    const truncated = createTruncatedMap(1000, 50);
     const formatted = formatFileMap(truncated, DetailLevel.Truncated);
 
     expect(formatted).toContain("function_0:");
@@ -149,8 +111,7 @@ describe("formatFileMap with truncation", () => {
   });
 
   it("includes last symbols after separator", () => {
-    const map = createMapWithSymbols(1000);
-    const truncated = reduceToTruncated(map, 50);
+    const truncated = createTruncatedMap(1000, 50);
     const formatted = formatFileMap(truncated, DetailLevel.Truncated);
 
     expect(formatted).toContain("function_950:");
@@ -158,8 +119,7 @@ describe("formatFileMap with truncation", () => {
   });
 
   it("does not include middle symbols", () => {
-    const map = createMapWithSymbols(1000);
-    const truncated = reduceToTruncated(map, 50);
+    const truncated = createTruncatedMap(1000, 50);
     const formatted = formatFileMap(truncated, DetailLevel.Truncated);
 
     expect(formatted).not.toContain("function_500:");
@@ -178,7 +138,7 @@ describe("formatFileMapWithBudget with pathological files", () => {
   });
 
   it("uses truncated format for large symbol counts", () => {
-    const map = createMapWithSymbols(5000);
+    const map = createMapWithUnrelatedNames(5000);
     const formatted = formatFileMapWithBudget(map);
 
     expect(formatted).toContain("more symbols");
@@ -208,6 +168,92 @@ describe("formatFileMapWithBudget with pathological files", () => {
     expect(formatted).toContain("[Map");
   });
 
+  it("packs the most valuable symbols into the budget in one render", () => {
+    const map = createMapWithUnrelatedNames(10_000, 100);
+    const budgeted = formatWithBudget(map, THRESHOLDS.MAX_TRUNCATED_BYTES);
+    const size = Buffer.byteLength(budgeted.text, "utf8");
+
+    expect(budgeted.passes).toBe(1);
+    expect(budgeted.detailLevel).toBe(DetailLevel.Truncated);
+    expect(size).toBeLessThanOrEqual(THRESHOLDS.MAX_TRUNCATED_BYTES);
+    expect(size).toBeGreaterThan(THRESHOLDS.MAX_TRUNCATED_BYTES * 0.9);
+  });
+
+  it("keeps important symbols from the middle of the file", () => {
+    const map = createMapWithUnrelatedNames(5000);
+    const middle = map.symbols[2500];
+    if (middle) {
+      middle.name = "CoreEngine";
+      middle.kind = SymbolKind.Class;
+      middle.endLine = middle.startLine + 800;
+      middle.isExported = true;
+      middle.docstring = "Main engine";
+      middle.children = [
+        { name: "run", kind: SymbolKind.Method, startLine: 2, endLine: 9 },
+      ];
+    }
+    const formatted = formatFileMapWithBudget(map);
+
+    expect(formatted).toContain("class CoreEngine: [10001-10801]");
+  });
+
+  it("states the range of each omitted stretch in line order", () => {
+    const map = createMapWithUnrelatedNames(5000);
+    for (const symbol of map.symbols.filter((_, i) => i % 500 === 250)) {
+      symbol.isExported = true;
+    }
+    const formatted = formatFileMapWithBudget(map);
+    const gaps = [
+      ...formatted.matchAll(/─ ─ ─ ([\d,]+) more symbols in lines ([\d,]+)-/g),
+    ];
+    const starts = [...formatted.matchAll(/: \[(\d+)-\d+\]$/gm)].map((m) =>
+      Number(m[1])
+    );
+
+    expect(gaps.length).toBeGreaterThan(1);
+    expect(starts).toEqual([...starts].sort((a, b) => a - b));
+    const omitted = gaps.reduce(
+      (sum, m) => sum + Number(m[1]?.replaceAll(",", "")),
+      0
+    );
+    expect(omitted + starts.length).toBe(5000);
+  });
+
+  it("summarizes the omitted symbols by region within the budget", () => {
+    const map = createMapWithUnrelatedNames(10_000, 100);
+    const formatted = formatFileMapWithBudget(map);
+    const regions = formatted
+      .split("\n")
+      .filter((line) =>
+        /^ {2}lines [\d,]+-[\d,]+: [\d,]+ functions; /.test(line)
+      );
+
+    expect(formatted).toContain("Omitted symbols by region:");
+    expect(regions).toHaveLength(THRESHOLDS.OMITTED_BUCKETS);
+    expect(Buffer.byteLength(formatted, "utf8")).toBeLessThanOrEqual(
+      THRESHOLDS.MAX_TRUNCATED_BYTES
+    );
+  });
+
+  it("collapses numbered runs instead of truncating them", () => {
+    const map = createMapWithSymbols(20_000);
+    const formatted = formatFileMapWithBudget(map);
+
+    expect(formatted).toContain(
+      "function_[0..19999] (20,000 functions): [1-79999]"
+    );
+    expect(formatted).not.toContain("more symbols");
+  });
+
+  it("counts collapsed runs as their symbols when truncating", () => {
+    const map = createMapWithUnrelatedNames(8000, 20);
+    map.symbols.push(...createMapWithSymbols(1000).symbols);
+    const formatted = formatFileMapWithBudget(map);
+
+    expect(formatted).toContain("function_[0..999] (1,000 functions)");
+    expect(formatted).toMatch(/\| \d+ of 9,000 symbols\]/);
+  });
+
   it("falls back to 10+10 symbols as guaranteed minimum", () => {
     // Create map with extremely long names that require minimal symbols
     const map = createMapWithLongNames(10_000, 2000);
@@ -2,13 +2,19 @@ import { describe, it, expect } from "vitest";
 
 import type { FileMap } from "../../src/types.js";
 
+import { THRESHOLDS } from "../../src/constants.js";
 import { DetailLevel, SymbolKind } from "../../src/enums.js";
 import {
   formatFileMap,
   formatFileMapWithBudget,
+  formatPackedWithBudget,
+  formatWithBudget,
+  paginateMap,
   reduceToLevel,
   getDetailLevelForSize,
 } from "../../src/formatter.js";
+import { packFileMap } from "../../src/packed-map.js";
+import { estimateTokens } from "../../src/tokens.js";
 
 function createTestMap(): FileMap {
   return {
@@ -296,4 +302,108 @@ describe("formatFileMapWithBudget", () => {
     // But if even outline doesn't fit, we still return it
     expect(size).toBeGreaterThan(0);
   });
+
+  it("reports the estimated tokens of the map", () => {
+    const budgeted = formatWithBudget(createTestMap());
+
+    expect(budgeted.tokens).toBe(estimateTokens(budgeted.text));
+    expect(budgeted.tokens).toBeGreaterThan(0);
+  });
+
+  it("drops to a cheaper level to fit a token cap", () => {
+    const map: FileMap = {
+      ...createTestMap(),
+      symbols: Array.from({ length: 60 }, (_, i) => ({
+        name: `处理器_${i}`,
+        kind: SymbolKind.Function,
+        startLine: i * 10 + 1,
+        endLine: i * 10 + 8,
+        signature: "(数据: 列表, 选项: 字典) -> 结果",
+      })),
+    };
+
+    expect(formatWithBudget(map).detailLevel).toBe(DetailLevel.Full);
+    const capped = formatWithBudget(map, 100 * 1024, 1200);
+    expect(capped.detailLevel).toBe(DetailLevel.Compact);
+    expect(capped.tokens).toBeLessThanOrEqual(1200);
+  });
+
+  it("truncates to fit a token cap", () => {
+    const map: FileMap = {
+      ...createTestMap(),
+      symbols: Array.from({ length: 2000 }, (_, i) => ({
+        name: `handler_${(i * 7) % 2000}`,
+        kind: SymbolKind.Function,
+        startLine: i * 10 + 1,
+        endLine: i * 10 + 8,
+      })),
+    };
+    const capped = formatWithBudget(map, 100 * 1024, 3000);
+
+    expect(capped.detailLevel).toBe(DetailLevel.Truncated);
+    expect(capped.tokens).toBeLessThanOrEqual(3000);
+    expect(capped.tokens).toBeGreaterThan(2250);
+  });
+
+  it("formats a packed map as it formats the map", () => {
+    const map: FileMap = {
+      ...createTestMap(),
+      symbols: Array.from({ length: 2000 }, (_, i) => ({
+        name: i % 3 === 0 ? `Config${i}` : `handler_${(i * 7) % 2000}`,
+        kind: SymbolKind.Function,
+        startLine: i * 10 + 1,
+        endLine: i * 10 + 8,
+      })),
+    };
+
+    for (const maxTokens of [undefined, 3000]) {
+      expect(
+        formatPackedWithBudget(packFileMap(map), 100 * 1024, maxTokens)
+      ).toEqual(formatWithBudget(map, 100 * 1024, maxTokens));
+    }
+  });
+});
+
+describe("paginateMap", () => {
+  it("splits a large map into full-detail pages within the budget", () => {
+    const map: FileMap = {
+      ...createTestMap(),
+      symbols: [
+        {
+          name: "Registry",
+          kind: SymbolKind.Class,
+          startLine: 1,
+          endLine: 4000,
+          children: Array.from({ length: 400 }, (_, i) => ({
+            name: `register_handler_${i}`,
+            kind: SymbolKind.Method,
+            startLine: i * 10 + 2,
+            endLine: i * 10 + 9,
+            signature: "(self, name: str, handler: Callable) -> None",
+          })),
+        },
+        {
+          name: "main",
+          kind: SymbolKind.Function,
+          startLine: 4001,
+          endLine: 4010,
+        },
+      ],
+    };
+    const pages = paginateMap(map);
+
+    expect(pages.length).toBeGreaterThan(2);
+    const members = pages.flatMap((page) =>
+      page.symbols.flatMap((s) => s.children ?? [])
+    );
+    expect(members).toHaveLength(400);
+    expect(pages.at(-1)?.symbols.at(-1)?.name).toBe("main");
+    for (const page of pages) {
+      expect(page.symbols[0]?.name).toBe("Registry");
+      const text = formatFileMap(page, DetailLevel.Full);
+      expect(Buffer.byteLength(text, "utf8")).toBeLessThanOrEqual(
+        THRESHOLDS.FULL_TARGET_BYTES
+      );
+    }
+  });
 });
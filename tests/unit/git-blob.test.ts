@@ -0,0 +1,58 @@
+import { execFileSync } from "node:child_process";
+import { mkdtemp, rm, utimes, writeFile } from "node:fs/promises";
+import { tmpdir } from "node:os";
+import { join } from "node:path";
+import { afterEach, beforeEach, describe, expect, it } from "vitest";
+
+import { getBlobId, resetBlobLookups } from "../../src/git-blob.js";
+
+function git(cwd: string, ...args: string[]): string {
+  return execFileSync("git", args, { cwd, encoding: "utf8" }).trim();
+}
+
+describe("getBlobId", () => {
+  let dir: string;
+
+  beforeEach(async () => {
+    resetBlobLookups();
+    dir = await mkdtemp(join(tmpdir(), "read-map-git-"));
+    git(dir, "init", "-q");
+    await writeFile(join(dir, "tracked.py"), "def main():\n    pass\n");
+    git(dir, "add", "tracked.py");
+  });
+
+  afterEach(async () => {
+    await rm(dir, { recursive: true, force: true });
+  });
+
+  it("reads the blob ID of an unmodified tracked file from the index", async () => {
+    const path = join(dir, "tracked.py");
+    expect(await getBlobId(path)).toBe(git(dir, "hash-object", "tracked.py"));
+  });
+
+  it("returns null for modified files", async () => {
+    const path = join(dir, "tracked.py");
+    await writeFile(path, "def main():\n    return 1\n");
+    expect(await getBlobId(path)).toBeNull();
+  });
+
+  it("returns null when only the mtime no longer matches the index", async () => {
+    const path = join(dir, "tracked.py");
+    const future = Date.now() / 1000 + 60;
+    await utimes(path, future, future);
+    expect(await getBlobId(path)).toBeNull();
+  });
+
+  it("returns null for untracked files and files outside a repository", async () => {
+    await writeFile(join(dir, "untracked.py"), "x = 1\n");
+    expect(await getBlobId(join(dir, "untracked.py"))).toBeNull();
+
+    const outside = await mkdtemp(join(tmpdir(), "read-map-nogit-"));
+    try {
+      await writeFile(join(outside, "plain.py"), "x = 1\n");
+      expect(await getBlobId(join(outside, "plain.py"))).toBeNull();
+    } finally {
+      await rm(outside, { recursive: true, force: true });
+    }
+  });
+});
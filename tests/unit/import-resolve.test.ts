@@ -0,0 +1,91 @@
+import { mkdir, mkdtemp, rm, writeFile } from "node:fs/promises";
+import { tmpdir } from "node:os";
+import { dirname, join } from "node:path";
+import { afterEach, beforeEach, describe, expect, it } from "vitest";
+
+import { resolveLocalImports } from "../../src/import-resolve.js";
+
+describe("resolveLocalImports", () => {
+  let root: string;
+
+  async function touch(...files: string[]): Promise<void> {
+    for (const file of files) {
+      await mkdir(dirname(join(root, file)), { recursive: true });
+      await writeFile(join(root, file), "");
+    }
+  }
+
+  beforeEach(async () => {
+    root = await mkdtemp(join(tmpdir(), "read-map-imports-"));
+  });
+
+  afterEach(async () => {
+    await rm(root, { recursive: true, force: true });
+  });
+
+  it("resolves relative and project-rooted Python modules", async () => {
+    await touch(
+      "app/main.py",
+      "app/models.py",
+      "app/utils/__init__.py",
+      "lib/db.py"
+    );
+    const resolved = await resolveLocalImports(
+      join(root, "app/main.py"),
+      [".models", ".utils", "lib.db", "os", "requests"],
+      root
+    );
+    expect(resolved).toEqual([
+      join(root, "app/models.py"),
+      join(root, "app/utils/__init__.py"),
+      join(root, "lib/db.py"),
+    ]);
+  });
+
+  it("resolves relative TypeScript specifiers, including .js to .ts", async () => {
+    await touch("src/index.ts", "src/types.ts", "src/lib/index.tsx");
+    const resolved = await resolveLocalImports(
+      join(root, "src/index.ts"),
+      ["./types.js", "./lib", "node:fs", "vitest"],
+      root
+    );
+    expect(resolved).toEqual([
+      join(root, "src/types.ts"),
+      join(root, "src/lib/index.tsx"),
+    ]);
+  });
+
+  it("resolves Go packages under the file's module", async () => {
+    await touch("cmd/main.go", "internal/store/store.go");
+    await touch("internal/store/store_test.go");
+    await writeFile(
+      join(root, "go.mod"),
+      "module example.com/app\n\ngo 1.22\n"
+    );
+    const resolved = await resolveLocalImports(
+      join(root, "cmd/main.go"),
+      ["fmt", "st example.com/app/internal/store", "github.com/x/y"],
+      root
+    );
+    expect(resolved).toEqual([join(root, "internal/store/store.go")]);
+  });
+
+  it("resolves Rust crate, self and super paths", async () => {
+    await touch(
+      "Cargo.toml",
+      "src/lib.rs",
+      "src/net/mod.rs",
+      "src/net/client.rs",
+      "src/config.rs"
+    );
+    const resolved = await resolveLocalImports(
+      join(root, "src/net/client.rs"),
+      ["crate::config::{Config, Mode}", "super::Socket", "std::io"],
+      root
+    );
+    expect(resolved).toEqual([
+      join(root, "src/config.rs"),
+      join(root, "src/net/mod.rs"),
+    ]);
+  });
+});
@@ -0,0 +1,171 @@
+import { mkdir, rm, writeFile } from "node:fs/promises";
+import { join } from "node:path";
+import { describe, expect, it } from "vitest";
+
+import type { FileMap } from "../../src/types.js";
+
+import { DetailLevel, SymbolKind } from "../../src/enums.js";
+import {
+  changedPercent,
+  diffLineHashes,
+  formatLineDiff,
+  hashFileLines,
+  hashLines,
+  mapLine,
+  shiftFileMap,
+} from "../../src/line-diff.js";
+
+const TMP_DIR = join(import.meta.dirname, "../fixtures/tmp");
+
+function numberedLines(count: number, prefix = "line"): string[] {
+  return Array.from({ length: count }, (_, i) => `${prefix} ${i + 1}`);
+}
+
+describe("hashLines", () => {
+  it("produces one hash per line", () => {
+    expect(hashLines("a\nb\nc")).toHaveLength(3);
+    expect(hashLines("a\nb\nc\n")).toHaveLength(3);
+    expect(hashLines("")).toHaveLength(0);
+  });
+
+  it("hashes equal lines equally", () => {
+    const hashes = hashLines("same\nother\nsame");
+    expect(hashes[0]).toBe(hashes[2]);
+    expect(hashes[0]).not.toBe(hashes[1]);
+  });
+
+  it("matches hashFileLines for the same content", async () => {
+    await mkdir(TMP_DIR, { recursive: true });
+    const filePath = join(TMP_DIR, "hash-lines.txt");
+    const content = `${numberedLines(5000).join("\n")}\n`;
+    await writeFile(filePath, content);
+
+    try {
+      const fromFile = await hashFileLines(filePath);
+      expect([...fromFile]).toEqual([...hashLines(content)]);
+    } finally {
+      await rm(filePath, { force: true });
+    }
+  });
+});
+
+describe("diffLineHashes", () => {
+  it("reports no changes for identical content", () => {
+    const hashes = hashLines(numberedLines(100).join("\n"));
+    const diff = diffLineHashes(hashes, hashes);
+
+    expect(diff.changedLines).toBe(0);
+    expect(changedPercent(diff)).toBe(0);
+    expect(mapLine(diff, 50)).toBe(50);
+  });
+
+  it("shifts lines after an insertion", () => {
+    const old = numberedLines(100);
+    const updated = [...old.slice(0, 10), "new a", "new b", ...old.slice(10)];
+    const diff = diffLineHashes(
+      hashLines(old.join("\n")),
+      hashLines(updated.join("\n"))
+    );
+
+    expect(diff.changedLines).toBe(2);
+    expect(mapLine(diff, 5)).toBe(5);
+    expect(mapLine(diff, 11)).toBe(13);
+    expect(mapLine(diff, 100)).toBe(102);
+  });
+
+  it("shifts lines after a deletion", () => {
+    const old = numberedLines(100);
+    const updated = [...old.slice(0, 20), ...old.slice(30)];
+    const diff = diffLineHashes(
+      hashLines(old.join("\n")),
+      hashLines(updated.join("\n"))
+    );
+
+    expect(mapLine(diff, 31)).toBe(21);
+    expect(mapLine(diff, 100)).toBe(90);
+    expect(changedPercent(diff)).toBe(10);
+  });
+
+  it("aligns repeated lines around unique anchors", () => {
+    const block = (name: string) => [`def ${name}():`, "    pass", ""];
+    const old = [...block("a"), ...block("b"), ...block("c")];
+    const updated = [...block("a"), "# comment", ...block("b"), ...block("c")];
+    const diff = diffLineHashes(
+      hashLines(old.join("\n")),
+      hashLines(updated.join("\n"))
+    );
+
+    expect(diff.changedLines).toBe(1);
+    expect(mapLine(diff, 4)).toBe(5);
+    expect(mapLine(diff, 8)).toBe(9);
+  });
+});
+
+describe("shiftFileMap", () => {
+  it("moves symbols and children to their new lines", () => {
+    const old = numberedLines(200);
+    const updated = [...numberedLines(5, "header"), ...old];
+    const diff = diffLineHashes(
+      hashLines(old.join("\n")),
+      hashLines(updated.join("\n"))
+    );
+    const map: FileMap = {
+      path: "/test/file.py",
+      totalLines: 200,
+      totalBytes: 2000,
+      language: "Python",
+      detailLevel: DetailLevel.Full,
+      imports: [],
+      symbols: [
+        {
+          name: "Outer",
+          kind: SymbolKind.Class,
+          startLine: 10,
+          endLine: 50,
+          children: [
+            {
+              name: "inner",
+              kind: SymbolKind.Method,
+              startLine: 20,
+              endLine: 30,
+            },
+          ],
+        },
+      ],
+    };
+
+    const shifted = shiftFileMap(map, diff, 2100);
+
+    expect(shifted.totalLines).toBe(205);
+    expect(shifted.totalBytes).toBe(2100);
+    expect(shifted.symbols[0]?.startLine).toBe(15);
+    expect(shifted.symbols[0]?.endLine).toBe(55);
+    expect(shifted.symbols[0]?.children?.[0]?.startLine).toBe(25);
+    expect(map.symbols[0]?.startLine).toBe(10);
+  });
+});
+
+describe("formatLineDiff", () => {
+  it("renders changed lines as hunks numbered from the first line", () => {
+    const before = numberedLines(10).join("\n");
+    const lines = numberedLines(10);
+    lines.splice(3, 1, "changed 4");
+    lines.splice(8, 0, "inserted");
+    const diff = formatLineDiff(before, lines.join("\n"), 101);
+
+    expect(diff).toBe(
+      [
+        "@@ -104,1 +104,1 @@",
+        "-line 4",
+        "+changed 4",
+        "@@ -109,0 +109,1 @@",
+        "+inserted",
+      ].join("\n")
+    );
+  });
+
+  it("is empty for equal texts", () => {
+    const text = numberedLines(5).join("\n");
+    expect(formatLineDiff(text, text)).toBe("");
+  });
+});
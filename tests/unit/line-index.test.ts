@@ -0,0 +1,99 @@
+import { createReadTool } from "@mariozechner/pi-coding-agent";
+import { mkdir, rm, stat, writeFile } from "node:fs/promises";
+import { join } from "node:path";
+import { afterAll, beforeAll, describe, expect, it } from "vitest";
+
+import { buildLineIndex, readIndexedRange } from "../../src/line-index.js";
+
+const TMP_DIR = join(import.meta.dirname, "../fixtures/tmp");
+const FILE_PATH = join(TMP_DIR, "line-index.txt");
+
+/**
+ * Lines of varying width, including one longer than the byte limit.
+ */
+function generateContent(): string {
+  const lines = Array.from(
+    { length: 6000 },
+    (_, i) => `${i + 1}: ${"x".repeat(i % 97)}`
+  );
+  lines[4500] = "y".repeat(60 * 1024);
+  return `${lines.join("\n")}\n`;
+}
+
+async function builtInText(offset?: number, limit?: number): Promise<string> {
+  const result = await createReadTool(TMP_DIR).execute("test-call-id", {
+    path: FILE_PATH,
+    offset,
+    limit,
+  });
+  const [block] = result.content;
+  return block?.type === "text" ? block.text : "";
+}
+
+describe("line index", () => {
+  beforeAll(async () => {
+    await mkdir(TMP_DIR, { recursive: true });
+    await writeFile(FILE_PATH, generateContent());
+  });
+
+  afterAll(async () => {
+    await rm(FILE_PATH, { force: true });
+  });
+
+  it("records the byte offset of every stride-th line", async () => {
+    const stats = await stat(FILE_PATH);
+    const index = await buildLineIndex(
+      FILE_PATH,
+      stats.mtimeMs,
+      undefined,
+      100
+    );
+
+    expect(index.totalLines).toBe(6001);
+    expect(index.size).toBe(stats.size);
+    expect(index.offsets[0]).toBe(0);
+    expect(index.offsets).toHaveLength(61);
+  });
+
+  it.each([
+    [1, 10],
+    [17, 5],
+    [101, 100],
+    [2000, undefined],
+    [3333, 1],
+    [4490, 20],
+    [4501, 3],
+    [5990, 50],
+    [6001, undefined],
+    [undefined, 25],
+  ])(
+    "matches the built-in read for offset=%s limit=%s",
+    async (offset, limit) => {
+      const stats = await stat(FILE_PATH);
+      const index = await buildLineIndex(
+        FILE_PATH,
+        stats.mtimeMs,
+        undefined,
+        7
+      );
+      const range = await readIndexedRange(
+        FILE_PATH,
+        FILE_PATH,
+        index,
+        offset,
+        limit
+      );
+
+      expect(range?.text).toBe(await builtInText(offset, limit));
+    }
+  );
+
+  it("returns null for an offset past the end", async () => {
+    const stats = await stat(FILE_PATH);
+    const index = await buildLineIndex(FILE_PATH, stats.mtimeMs);
+
+    expect(
+      await readIndexedRange(FILE_PATH, FILE_PATH, index, 7000, 10)
+    ).toBeNull();
+  });
+});
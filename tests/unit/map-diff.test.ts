@@ -0,0 +1,94 @@
+import { describe, expect, it } from "vitest";
+
+import type { FileSymbol } from "../../src/types.js";
+
+import { SymbolKind } from "../../src/enums.js";
+import {
+  diffPackedMaps,
+  formatMapDiff,
+  summarizeMapDiff,
+} from "../../src/map-diff.js";
+import { packSymbols } from "../../src/packed-map.js";
+
+function fn(name: string, startLine: number, endLine: number): FileSymbol {
+  return { name, kind: SymbolKind.Function, startLine, endLine };
+}
+
+describe("diffPackedMaps", () => {
+  it("lists added, removed and resized symbols and shifted regions", () => {
+    const before = packSymbols([
+      fn("load", 1, 10),
+      {
+        ...fn("Parser", 11, 40),
+        kind: SymbolKind.Class,
+        children: [
+          { ...fn("parse", 12, 20), kind: SymbolKind.Method },
+          { ...fn("reset", 21, 40), kind: SymbolKind.Method },
+        ],
+      },
+      fn("old_helper", 41, 50),
+      fn("save", 51, 60),
+      fn("close", 61, 70),
+    ]);
+    const after = packSymbols([
+      fn("load", 1, 10),
+      {
+        ...fn("Parser", 11, 45),
+        kind: SymbolKind.Class,
+        children: [
+          { ...fn("parse", 12, 25), kind: SymbolKind.Method },
+          { ...fn("reset", 26, 45), kind: SymbolKind.Method },
+        ],
+      },
+      {
+        ...fn("Cache", 46, 50),
+        kind: SymbolKind.Class,
+        children: [{ ...fn("get", 47, 50), kind: SymbolKind.Method }],
+      },
+      fn("save", 51, 60),
+      fn("close", 61, 70),
+    ]);
+
+    const diff = diffPackedMaps(before, after);
+
+    // Members of a new class are implied by it
+    expect(diff.added.map((s) => s.name)).toEqual(["Cache"]);
+    expect(diff.removed.map((s) => s.name)).toEqual(["old_helper"]);
+    expect(diff.resized.map(({ after: s }) => s.name)).toEqual([
+      "Parser",
+      "Parser.parse",
+    ]);
+    expect(diff.shifted).toEqual([{ start: 26, end: 45, shift: 5 }]);
+    expect(summarizeMapDiff(diff)).toBe(
+      "1 added, 1 removed, 2 resized, 1 region shifted"
+    );
+    expect(formatMapDiff(diff)).toBe(
+      [
+        "Added:",
+        "  class Cache [46-50]",
+        "Removed:",
+        "  function old_helper [41-50]",
+        "Resized:",
+        "  class Parser [11-45], was [11-40]",
+        "  method Parser.parse [12-25], was [12-20]",
+        "Shifted:",
+        "  lines 26-45 by +5",
+      ].join("\n")
+    );
+  });
+
+  it("matches repeated names in order; equal maps diff empty", () => {
+    const symbols = [fn("handler", 1, 5), fn("handler", 6, 9)];
+    const diff = diffPackedMaps(packSymbols(symbols), packSymbols(symbols));
+
+    expect(summarizeMapDiff(diff)).toBe("");
+    expect(formatMapDiff(diff)).toBe("");
+
+    const moved = diffPackedMaps(
+      packSymbols(symbols),
+      packSymbols([fn("handler", 3, 7), fn("handler", 8, 11)])
+    );
+    expect(moved.resized).toEqual([]);
+    expect(moved.shifted).toEqual([{ start: 3, end: 11, shift: 2 }]);
+  });
+});
@@ -0,0 +1,82 @@
+import { describe, expect, it } from "vitest";
+
+import type { FileMap } from "../../src/types.js";
+
+import { DetailLevel, SymbolKind } from "../../src/enums.js";
+import { slicePackedMap } from "../../src/map-slice.js";
+import { packFileMap } from "../../src/packed-map.js";
+
+function createTestMap(): FileMap {
+  return {
+    path: "/path/to/engine.py",
+    totalLines: 900,
+    totalBytes: 30_000,
+    language: "Python",
+    detailLevel: DetailLevel.Full,
+    imports: ["os"],
+    symbols: [
+      { name: "setup", kind: SymbolKind.Function, startLine: 1, endLine: 20 },
+      {
+        name: "Engine",
+        kind: SymbolKind.Class,
+        startLine: 30,
+        endLine: 800,
+        children: [
+          {
+            name: "start",
+            kind: SymbolKind.Method,
+            startLine: 40,
+            endLine: 90,
+          },
+          {
+            name: "step",
+            kind: SymbolKind.Method,
+            startLine: 400,
+            endLine: 450,
+            children: [
+              {
+                name: "inner",
+                kind: SymbolKind.Function,
+                startLine: 410,
+                endLine: 420,
+              },
+            ],
+          },
+        ],
+      },
+      { name: "main", kind: SymbolKind.Function, startLine: 850, endLine: 900 },
+    ],
+  };
+}
+
+describe("slicePackedMap", () => {
+  it("keeps symbols overlapping the range at every depth", () => {
+    const slice = slicePackedMap(packFileMap(createTestMap()), {
+      startLine: 300,
+      endLine: 500,
+    });
+
+    expect(slice.symbols).toEqual([
+      {
+        name: "Engine",
+        kind: SymbolKind.Class,
+        startLine: 30,
+        endLine: 800,
+        children: [createTestMap().symbols[1]?.children?.[1]],
+      },
+    ]);
+  });
+
+  it("limits nesting to the requested depth", () => {
+    const slice = slicePackedMap(packFileMap(createTestMap()), { depth: 2 });
+    const engine = slice.symbols[1];
+
+    expect(slice.symbols.map((s) => s.name)).toEqual([
+      "setup",
+      "Engine",
+      "main",
+    ]);
+    expect(engine?.children?.map((c) => c.name)).toEqual(["start", "step"]);
+    expect(engine?.children?.[1]?.children).toBeUndefined();
+  });
+});
@@ -0,0 +1,65 @@
+import { afterEach, describe, expect, it } from "vitest";
+
+import { DEFAULT_SETTINGS } from "../../src/constants.js";
+import { DetailLevel } from "../../src/enums.js";
+import {
+  estimateMapperMs,
+  getMapperCost,
+  isMapperAvailable,
+  planMappers,
+  predictDetailLevel,
+} from "../../src/mapper-costs.js";
+import { setSettings } from "../../src/settings.js";
+
+const MB = 1024 * 1024;
+
+describe("mapper cost model", () => {
+  afterEach(() => {
+    setSettings(DEFAULT_SETTINGS);
+  });
+
+  it("predicts poorer detail levels for longer files", () => {
+    expect(predictDetailLevel(500)).toBe(DetailLevel.Full);
+    expect(predictDetailLevel(20_000)).toBe(DetailLevel.Outline);
+    expect(predictDetailLevel(10_000_000)).toBe(DetailLevel.Truncated);
+  });
+
+  it("grows estimates with file size", () => {
+    expect(estimateMapperMs("python", 10 * MB, 250_000)).toBeGreaterThan(
+      estimateMapperMs("python", 10_000, 250)
+    );
+  });
+
+  it("prefers the precise mapper when its detail is needed", () => {
+    expect(planMappers(["typescript", "ctags"], 20_000, 500)).toEqual([
+      "typescript",
+      "ctags",
+    ]);
+  });
+
+  it("prefers the cheaper mapper when only an outline fits", () => {
+    expect(planMappers(["typescript", "ctags"], MB, 20_000)).toEqual([
+      "ctags",
+      "typescript",
+    ]);
+  });
+
+  it("applies cost overrides from settings", () => {
+    setSettings({
+      mapperCosts: { typescript: { fixedMs: 0, msPerMB: 1 } },
+    });
+    expect(getMapperCost("typescript").detail).toBe(DetailLevel.Full);
+    expect(planMappers(["typescript", "ctags"], MB, 20_000)).toEqual([
+      "typescript",
+      "ctags",
+    ]);
+  });
+
+  it("reports mappers without a required command as available", async () => {
+    expect(await isMapperAvailable("markdown")).toBe(true);
+    setSettings({
+      mapperCosts: { markdown: { requires: "no-such-command-for-read-map" } },
+    });
+    expect(await isMapperAvailable("markdown")).toBe(false);
+  });
+});
@@ -0,0 +1,137 @@
+import { mkdtemp, rm, writeFile } from "node:fs/promises";
+import { tmpdir } from "node:os";
+import { join } from "node:path";
+import { afterEach, beforeEach, describe, expect, it } from "vitest";
+
+import { SymbolKind } from "../../../src/enums.js";
+import { formatFileMap } from "../../../src/formatter.js";
+import { generateMap } from "../../../src/mapper.js";
+import {
+  averageLineBytes,
+  minifiedMapper,
+} from "../../../src/mappers/minified.js";
+import { startReadTrace } from "../../../src/read-stats.js";
+
+const BUNDLE = [
+  "/*! lib v1.0 | MIT */",
+  '!function(e){"use strict";var t=/[a-z]{2}\\//g,n=`x${e+"}"}y`;' +
+    "function createStore(e,t){return{get:function(){return e},set:function(n){e=n}}}" +
+    "class EventBus extends Base{constructor(e){super(e);this.h={}}emit(e,...t){(this.h[e]||[]).forEach(n=>n(...t))}static create(){return new EventBus}}" +
+    "var formatDate=(e,t)=>{return e.toISOString()},u=e=>e*2;" +
+    'e.modules={123:function(e,t,n){n.x=1},"./src/util.js":function(e,t){t.y=2}}}(window);',
+].join("\n");
+
+describe("minifiedMapper", () => {
+  let dir: string;
+
+  beforeEach(async () => {
+    dir = await mkdtemp(join(tmpdir(), "minified-mapper-"));
+  });
+
+  afterEach(async () => {
+    await rm(dir, { recursive: true, force: true });
+  });
+
+  it("maps functions, classes and methods of a bundle by byte range", async () => {
+    const filePath = join(dir, "bundle.min.js");
+    await writeFile(filePath, BUNDLE);
+    const result = await minifiedMapper(filePath);
+
+    expect(result?.language).toBe("JavaScript (minified)");
+    expect(result?.symbols.map((s) => s.name)).toEqual([
+      "createStore",
+      "EventBus",
+      "formatDate",
+      "123",
+      "./src/util.js",
+    ]);
+
+    const bus = result?.symbols.find((s) => s.name === "EventBus");
+    expect(bus?.kind).toBe(SymbolKind.Class);
+    expect(bus?.startLine).toBe(2);
+    expect(bus?.children?.map((c) => [c.name, c.kind])).toEqual([
+      ["constructor", SymbolKind.Method],
+      ["emit", SymbolKind.Method],
+      ["create", SymbolKind.Method],
+    ]);
+    expect(BUNDLE.slice(bus?.startByte, bus?.endByte)).toMatch(
+      /^class EventBus.*new EventBus\}\}$/
+    );
+
+    const store = result?.symbols.find((s) => s.name === "createStore");
+    expect(BUNDLE.slice(store?.startByte, store?.endByte)).toBe(
+      "function createStore(e,t){return{get:function(){return e},set:function(n){e=n}}}"
+    );
+  });
+
+  it("maps one-line JSON members with their types", async () => {
+    const filePath = join(dir, "dump.json");
+    const json =
+      '{"name":"api","count":-3,"data":{"users":[{"id":1},{"id":2}],"meta":{"page":1}},"tags":["a",null]}';
+    await writeFile(filePath, json);
+    const result = await minifiedMapper(filePath);
+
+    expect(result?.symbols.map((s) => s.name)).toEqual([
+      "name: string",
+      "count: number",
+      "data",
+      "tags (2 items)",
+    ]);
+    const data = result?.symbols.find((s) => s.name === "data");
+    expect(data?.children?.map((c) => c.name)).toEqual([
+      "users (2 items)",
+      "meta",
+    ]);
+    expect(json.slice(data?.startByte, data?.endByte)).toBe(
+      '{"users":[{"id":1},{"id":2}],"meta":{"page":1}}'
+    );
+    const count = result?.symbols.find((s) => s.name === "count: number");
+    expect(json.slice(count?.startByte, count?.endByte)).toBe("-3");
+  });
+
+  it("formats byte ranges and byte-read guidance", async () => {
+    const filePath = join(dir, "bundle.min.js");
+    await writeFile(filePath, BUNDLE);
+    const result = await minifiedMapper(filePath);
+    const text = formatFileMap(result!);
+
+    expect(text).toMatch(/class EventBus: \[bytes \d+-\d+\]/);
+    expect(text).toContain("byteOffset=START, byteLength=N");
+  });
+
+  it("measures the average line length from the start of the file", async () => {
+    const minified = join(dir, "app.min.js");
+    await writeFile(minified, `/* header */\n${"a=1;".repeat(20_000)}`);
+    const regular = join(dir, "app.js");
+    await writeFile(regular, "const a = 1;\n".repeat(5000));
+
+    expect(await averageLineBytes(minified)).toBeGreaterThan(30_000);
+    expect(await averageLineBytes(regular)).toBe(13);
+  });
+
+  it("routes long-line files to the tokenizer instead of the language mapper", async () => {
+    const filePath = join(dir, "bundle.min.js");
+    await writeFile(filePath, `${BUNDLE};${"x=1;".repeat(20_000)}`);
+    const trace = startReadTrace(filePath);
+    const result = await generateMap(filePath, { trace, useWorkers: false });
+
+    expect(trace.attempts.map((a) => a.mapper)).toEqual(["minified"]);
+    expect(result?.symbols[0]?.startByte).toBeDefined();
+  });
+
+  it("keeps the language mapper for long-line Markdown", async () => {
+    const filePath = join(dir, "notes.md");
+    const paragraph = "A long paragraph written on a single line. ".repeat(60);
+    const headings = ["# Notes", "## Usage", "## License"];
+    await writeFile(
+      filePath,
+      headings.map((heading) => `${heading}\n${paragraph}\n`).join("")
+    );
+    const trace = startReadTrace(filePath);
+    const result = await generateMap(filePath, { trace, useWorkers: false });
+
+    expect(await averageLineBytes(filePath)).toBeGreaterThan(1000);
+    expect(trace.attempts.map((a) => a.mapper)).toEqual(["markdown"]);
+    expect(result?.symbols.map((s) => s.name)).toContain("Notes");
+  });
+});
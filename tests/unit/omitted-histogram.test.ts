@@ -0,0 +1,70 @@
+import { describe, expect, it } from "vitest";
+
+import type { FileSymbol, OmittedBucket } from "../../src/types.js";
+
+import { SymbolKind } from "../../src/enums.js";
+import { summarizeOmittedRows } from "../../src/omitted-histogram.js";
+import { packSymbols, topLevelRows } from "../../src/packed-map.js";
+
+function symbol(
+  name: string,
+  startLine: number,
+  lines: number,
+  kind: SymbolKind = SymbolKind.Function
+): FileSymbol {
+  return { name, kind, startLine, endLine: startLine + lines - 1 };
+}
+
+function summarize(omitted: FileSymbol[], buckets: number): OmittedBucket[] {
+  const packed = packSymbols(omitted);
+  return summarizeOmittedRows(packed, topLevelRows(packed), buckets);
+}
+
+describe("summarizeOmittedRows", () => {
+  it("reports count, dominant kinds and largest symbols per region", () => {
+    const omitted = [
+      ...Array.from({ length: 30 }, (_, i) =>
+        symbol(`helper_${i}`, i * 10 + 1, 5)
+      ),
+      symbol("Parser", 301, 90, SymbolKind.Class),
+      ...Array.from({ length: 10 }, (_, i) =>
+        symbol(`TOKEN_${i}`, 410 + i * 15, 1, SymbolKind.Constant)
+      ),
+      symbol("Lexer", 600, 200, SymbolKind.Class),
+    ];
+    const buckets = summarize(omitted, 2);
+
+    expect(buckets).toEqual([
+      {
+        startLine: 1,
+        endLine: 390,
+        symbols: 31,
+        kinds: [
+          { kind: SymbolKind.Function, count: 30 },
+          { kind: SymbolKind.Class, count: 1 },
+        ],
+        largest: ["Parser", "helper_0"],
+      },
+      {
+        startLine: 410,
+        endLine: 799,
+        symbols: 11,
+        kinds: [
+          { kind: SymbolKind.Constant, count: 10 },
+          { kind: SymbolKind.Class, count: 1 },
+        ],
+        largest: ["Lexer", "TOKEN_0"],
+      },
+    ]);
+  });
+
+  it("leaves out empty regions and tiny omissions", () => {
+    const omitted = [
+      ...Array.from({ length: 5 }, (_, i) => symbol(`a_${i}`, i + 1, 1)),
+      ...Array.from({ length: 5 }, (_, i) => symbol(`b_${i}`, 1000 + i, 1)),
+    ];
+
+    expect(summarize(omitted, 4).map((b) => b.symbols)).toEqual([5, 5]);
+    expect(summarize(omitted.slice(0, 3), 4)).toEqual([]);
+  });
+});
@@ -0,0 +1,110 @@
+import { describe, expect, it } from "vitest";
+
+import type { FileMap } from "../../src/types.js";
+
+import { DetailLevel, SymbolKind } from "../../src/enums.js";
+import {
+  createSymbolReader,
+  packFileMap,
+  unpackFileMap,
+} from "../../src/packed-map.js";
+
+function createMap(): FileMap {
+  return {
+    path: "/tmp/app.ts",
+    totalLines: 120,
+    totalBytes: 4000,
+    language: "TypeScript",
+    imports: ["node:fs"],
+    detailLevel: DetailLevel.Full,
+    symbols: [
+      {
+        name: "Store",
+        kind: SymbolKind.Class,
+        startLine: 1,
+        endLine: 60,
+        isExported: true,
+        docstring: "Keeps items.",
+        children: [
+          {
+            name: "get",
+            kind: SymbolKind.Method,
+            startLine: 2,
+            endLine: 10,
+            signature: "(key: string): Item",
+            modifiers: ["public", "async"],
+          },
+          {
+            name: "clear",
+            kind: SymbolKind.Method,
+            startLine: 11,
+            endLine: 20,
+            signature: "",
+            modifiers: [],
+            isExported: false,
+          },
+        ],
+      },
+      {
+        name: "Empty",
+        kind: SymbolKind.Class,
+        startLine: 61,
+        endLine: 62,
+        children: [],
+      },
+      {
+        name: "handler_[0..99]",
+        kind: SymbolKind.Function,
+        startLine: 63,
+        endLine: 120,
+        startByte: 2000,
+        endByte: 3999,
+        runLength: 100,
+      },
+    ],
+  };
+}
+
+describe("packFileMap", () => {
+  it("round-trips a map, nesting and optional fields included", () => {
+    const map = createMap();
+    const packed = packFileMap(map);
+
+    expect(packed.count).toBe(5);
+    expect([...packed.parents]).toEqual([-1, 0, 0, -1, -1]);
+    expect(unpackFileMap(packed)).toEqual(map);
+  });
+
+  it("stores each distinct string once", () => {
+    const map = createMap();
+    map.symbols = Array.from({ length: 1000 }, (_, i) => ({
+      name: i % 2 === 0 ? "render" : "update",
+      kind: SymbolKind.Function,
+      startLine: i + 1,
+      endLine: i + 1,
+      signature: "(): void",
+    }));
+
+    const packed = packFileMap(map);
+    expect(packed.strings).toEqual(["render", "(): void", "update"]);
+    expect(unpackFileMap(packed).symbols).toEqual(map.symbols);
+  });
+});
+
+describe("createSymbolReader", () => {
+  it("reads rows into one object per slot, clearing unset fields", () => {
+    const read = createSymbolReader(packFileMap(createMap()));
+
+    const store = read(0);
+    expect(store).toMatchObject({ name: "Store", docstring: "Keeps items." });
+    const get = read(1);
+    expect(get).toBe(store);
+    expect(get).toMatchObject({
+      name: "get",
+      docstring: undefined,
+      modifiers: ["public", "async"],
+    });
+    expect(read(4, 1)).toMatchObject({ startByte: 2000, runLength: 100 });
+    expect(read(1).name).toBe("get");
+  });
+});
@@ -0,0 +1,124 @@
+import { mkdtemp, rm, stat, utimes, writeFile } from "node:fs/promises";
+import { tmpdir } from "node:os";
+import { join } from "node:path";
+import { afterEach, beforeEach, describe, expect, it, vi } from "vitest";
+
+import type { MapCacheEntry } from "../../src/types.js";
+
+import { DetailLevel } from "../../src/enums.js";
+import { packFileMap } from "../../src/packed-map.js";
+import {
+  cancelAllPrefetches,
+  claimPrefetch,
+  getPrefetchStats,
+  prefetchMaps,
+  resetPrefetchStats,
+} from "../../src/prefetch.js";
+
+function createEntry(mtime: number): MapCacheEntry {
+  return {
+    mtime,
+    map: "map",
+    packedMap: packFileMap({
+      path: "",
+      totalLines: 0,
+      totalBytes: 0,
+      language: "Python",
+      symbols: [],
+      imports: [],
+      detailLevel: DetailLevel.Full,
+    }),
+    detailLevel: DetailLevel.Full,
+    renderKey: "",
+    renders: new Map(),
+  };
+}
+
+describe("prefetchMaps", () => {
+  let dir: string;
+  let large: string;
+  let small: string;
+
+  beforeEach(async () => {
+    resetPrefetchStats();
+    dir = await mkdtemp(join(tmpdir(), "read-map-prefetch-"));
+    large = join(dir, "large.py");
+    small = join(dir, "small.py");
+    await writeFile(large, "x = 1\n".repeat(3000));
+    await writeFile(small, "x = 1\n");
+  });
+
+  afterEach(async () => {
+    cancelAllPrefetches();
+    await rm(dir, { recursive: true, force: true });
+  });
+
+  it("builds maps only for files large enough to be mapped", async () => {
+    const build = vi.fn(async (_path: string, mtime: number) =>
+      createEntry(mtime)
+    );
+    prefetchMaps([large, small], build);
+
+    await vi.waitFor(() => expect(getPrefetchStats().completed).toBe(1));
+    expect(build).toHaveBeenCalledTimes(1);
+    expect(build.mock.calls[0]?.[0]).toBe(large);
+  });
+
+  it("counts a read of the prefetched version as a hit", async () => {
+    prefetchMaps([large], async (_path, mtime) => createEntry(mtime));
+    await vi.waitFor(() => expect(getPrefetchStats().pending).toBe(1));
+
+    claimPrefetch(large, (await stat(large)).mtimeMs);
+    expect(getPrefetchStats()).toMatchObject({
+      hits: 1,
+      wasted: 0,
+      pending: 0,
+    });
+  });
+
+  it("counts a prefetched map of an outdated version as waste", async () => {
+    prefetchMaps([large], async (_path, mtime) => createEntry(mtime));
+    await vi.waitFor(() => expect(getPrefetchStats().pending).toBe(1));
+
+    const future = Date.now() / 1000 + 60;
+    await utimes(large, future, future);
+    claimPrefetch(large, (await stat(large)).mtimeMs);
+    expect(getPrefetchStats()).toMatchObject({ hits: 0, wasted: 1 });
+  });
+
+  it("aborts cancelled prefetches", async () => {
+    let signal: AbortSignal | undefined;
+    prefetchMaps([large], (_path, _mtime, taskSignal) => {
+      signal = taskSignal;
+      return new Promise((resolve) => {
+        taskSignal.addEventListener("abort", () => resolve(null));
+      });
+    });
+    await vi.waitFor(() => expect(signal).toBeDefined());
+
+    cancelAllPrefetches();
+    expect(signal?.aborted).toBe(true);
+    expect(getPrefetchStats().cancelled).toBe(1);
+  });
+
+  it("keeps a prefetch adopted by a read from being cancelled", async () => {
+    let signal: AbortSignal | undefined;
+    let finish: (entry: MapCacheEntry) => void = () => {};
+    prefetchMaps([large], (_path, _mtime, taskSignal) => {
+      signal = taskSignal;
+      return new Promise((resolve) => {
+        finish = resolve;
+      });
+    });
+    await vi.waitFor(() => expect(signal).toBeDefined());
+
+    const { mtimeMs } = await stat(large);
+    claimPrefetch(large, mtimeMs);
+    cancelAllPrefetches();
+    finish(createEntry(mtimeMs));
+
+    expect(signal?.aborted).toBe(false);
+    await vi.waitFor(() => expect(getPrefetchStats().completed).toBe(1));
+    expect(getPrefetchStats()).toMatchObject({ hits: 1, pending: 0 });
+  });
+});
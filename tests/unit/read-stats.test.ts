@@ -0,0 +1,125 @@
+import { mkdtemp, readFile, rm } from "node:fs/promises";
+import { tmpdir } from "node:os";
+import { join } from "node:path";
+import { afterEach, beforeEach, describe, expect, it, vi } from "vitest";
+
+import { STATS } from "../../src/constants.js";
+import { DetailLevel, ReadOutcome, ReadStage } from "../../src/enums.js";
+import { generateMap } from "../../src/mapper.js";
+import {
+  addSpan,
+  exportReadStats,
+  formatReadStats,
+  getRecentReads,
+  histogramQuantile,
+  resetReadStats,
+  startReadTrace,
+  traceRead,
+} from "../../src/read-stats.js";
+import { setSettings } from "../../src/settings.js";
+
+const FIXTURES = join(import.meta.dirname, "../fixtures");
+
+describe("read stats", () => {
+  let dir: string;
+
+  beforeEach(async () => {
+    resetReadStats();
+    dir = await mkdtemp(join(tmpdir(), "read-stats-"));
+  });
+
+  afterEach(async () => {
+    setSettings({});
+    await rm(dir, { recursive: true, force: true });
+  });
+
+  it("records one trace per read with its outcome and spans", async () => {
+    await traceRead("a.py", async (trace) => {
+      addSpan(trace, ReadStage.Stat, 2);
+      addSpan(trace, ReadStage.Stat, 1);
+      trace.outcome = ReadOutcome.Map;
+    });
+
+    const [trace] = getRecentReads();
+    expect(trace?.path).toBe("a.py");
+    expect(trace?.outcome).toBe(ReadOutcome.Map);
+    expect(trace?.spans[ReadStage.Stat]).toBe(3);
+    expect(trace?.totalMs).toBeGreaterThanOrEqual(0);
+  });
+
+  it("marks reads that throw as errors", async () => {
+    await expect(
+      traceRead("missing.py", () => Promise.reject(new Error("ENOENT")))
+    ).rejects.toThrow("ENOENT");
+
+    expect(getRecentReads()[0]?.outcome).toBe(ReadOutcome.Error);
+  });
+
+  it("records which mapper produced the map", async () => {
+    const trace = startReadTrace("sample.py");
+    const map = await generateMap(join(FIXTURES, "python/docstrings.py"), {
+      trace,
+    });
+
+    expect(map).not.toBeNull();
+    expect(trace.mapper).toBe("python");
+    expect(trace.fallbackDepth).toBe(0);
+    expect(trace.attempts).toHaveLength(1);
+    expect(trace.attempts[0]?.ok).toBe(true);
+  });
+
+  it("reports quantiles from histogram bucket bounds", () => {
+    const buckets = Array.from(
+      { length: STATS.HISTOGRAM_BOUNDS_MS.length + 1 },
+      () => 0
+    );
+    // 9 samples at <=1ms, 1 sample above every bound
+    buckets[0] = 9;
+    buckets[STATS.HISTOGRAM_BOUNDS_MS.length] = 1;
+    const histogram = { buckets, count: 10, totalMs: 20_009, maxMs: 20_000 };
+
+    expect(histogramQuantile(histogram, 0.5)).toBe(1);
+    expect(histogramQuantile(histogram, 0.9)).toBe(1);
+    expect(histogramQuantile(histogram, 0.95)).toBe(20_000);
+  });
+
+  it("renders stage, mapper and detail level summaries", async () => {
+    await traceRead("big.py", async (trace) => {
+      addSpan(trace, ReadStage.Mapper, 40);
+      trace.attempts.push({ mapper: "python", ms: 40, ok: true });
+      trace.detailLevel = DetailLevel.Compact;
+      trace.outcome = ReadOutcome.Map;
+    });
+
+    const report = formatReadStats();
+    expect(report).toContain("read-map: 1 reads (map 1)");
+    expect(report).toMatch(/^mapper\s+1\s+50ms/m);
+    expect(report).toMatch(/^python\s+1/m);
+    expect(report).toContain("Detail levels: compact 1");
+  });
+
+  it("exports recent reads as JSONL", async () => {
+    await traceRead("one.py", async () => {});
+    await traceRead("two.py", async () => {});
+    const file = join(dir, "stats.jsonl");
+
+    expect(await exportReadStats(file)).toBe(2);
+
+    const lines = (await readFile(file, "utf8")).trim().split("\n");
+    expect(lines.map((line) => JSON.parse(line).path)).toEqual([
+      "one.py",
+      "two.py",
+    ]);
+  });
+
+  it("appends each read to the configured stats file", async () => {
+    const file = join(dir, "live.jsonl");
+    setSettings({ statsFile: file });
+
+    await traceRead("live.py", async () => {});
+
+    await vi.waitFor(async () => {
+      expect(await readFile(file, "utf8")).toContain('"path":"live.py"');
+    });
+  });
+});
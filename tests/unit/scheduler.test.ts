@@ -0,0 +1,207 @@
+import { beforeEach, describe, expect, it } from "vitest";
+
+import { SCHEDULER } from "../../src/constants.js";
+import { MapPriority, MapperKind } from "../../src/enums.js";
+import {
+  createUrgency,
+  getSchedulerStats,
+  raiseUrgency,
+  resetSchedulerStats,
+  schedule,
+} from "../../src/scheduler.js";
+
+/**
+ * Create a task that stays running until `release` is called.
+ */
+function createGate(): { promise: Promise<void>; release: () => void } {
+  let release = () => {};
+  const promise = new Promise<void>((resolve) => {
+    release = resolve;
+  });
+  return { promise, release };
+}
+
+function statsFor(kind: MapperKind) {
+  return getSchedulerStats().find((s) => s.kind === kind);
+}
+
+describe("schedule", () => {
+  beforeEach(() => {
+    resetSchedulerStats();
+  });
+
+  it("returns the task result", async () => {
+    const result = await schedule(MapperKind.Grep, async () => 42);
+    expect(result).toBe(42);
+  });
+
+  it("limits concurrent tasks per resource class", async () => {
+    const limit = SCHEDULER.CONCURRENCY[MapperKind.Python];
+    const gate = createGate();
+    let running = 0;
+    let peak = 0;
+
+    const tasks = Array.from({ length: limit + 3 }, () =>
+      schedule(MapperKind.Python, async () => {
+        running++;
+        peak = Math.max(peak, running);
+        await gate.promise;
+        running--;
+      })
+    );
+
+    await Promise.resolve();
+    expect(statsFor(MapperKind.Python)?.queued).toBe(3);
+
+    gate.release();
+    await Promise.all(tasks);
+    expect(peak).toBe(limit);
+  });
+
+  it("runs foreground tasks ahead of queued prefetch tasks", async () => {
+    const limit = SCHEDULER.CONCURRENCY[MapperKind.Go];
+    const gate = createGate();
+    const order: string[] = [];
+
+    const blockers = Array.from({ length: limit }, () =>
+      schedule(MapperKind.Go, () => gate.promise)
+    );
+    const prefetch = schedule(
+      MapperKind.Go,
+      async () => {
+        order.push("prefetch");
+      },
+      { priority: MapPriority.Prefetch }
+    );
+    const foreground = schedule(MapperKind.Go, async () => {
+      order.push("foreground");
+    });
+
+    gate.release();
+    await Promise.all([...blockers, prefetch, foreground]);
+    expect(order).toEqual(["foreground", "prefetch"]);
+  });
+
+  it("moves a raised prefetch task ahead of queued prefetch tasks", async () => {
+    const limit = SCHEDULER.CONCURRENCY[MapperKind.Go];
+    const gate = createGate();
+    const order: string[] = [];
+    const urgency = createUrgency(MapPriority.Prefetch);
+
+    const blockers = Array.from({ length: limit }, () =>
+      schedule(MapperKind.Go, () => gate.promise)
+    );
+    const other = schedule(
+      MapperKind.Go,
+      async () => {
+        order.push("other");
+      },
+      { priority: MapPriority.Prefetch }
+    );
+    const raised = schedule(
+      MapperKind.Go,
+      async () => {
+        order.push("raised");
+      },
+      { urgency }
+    );
+    raiseUrgency(urgency, MapPriority.Foreground);
+
+    gate.release();
+    await Promise.all([...blockers, other, raised]);
+    expect(order).toEqual(["raised", "other"]);
+  });
+
+  it("re-arms a running task's deadline when raised", async () => {
+    const urgency = createUrgency(MapPriority.Prefetch, Date.now() + 60_000);
+    const result = schedule(
+      MapperKind.InProcess,
+      (signal) =>
+        new Promise<string>((resolve) => {
+          signal?.addEventListener("abort", () => resolve("aborted"));
+        }),
+      { urgency }
+    );
+    raiseUrgency(urgency, MapPriority.Foreground, Date.now() + 20);
+    expect(await result).toBe("aborted");
+  });
+
+  it("skips queued tasks whose deadline passes", async () => {
+    const limit = SCHEDULER.CONCURRENCY[MapperKind.Jq];
+    const gate = createGate();
+    let ran = false;
+
+    const blockers = Array.from({ length: limit }, () =>
+      schedule(MapperKind.Jq, () => gate.promise)
+    );
+    const late = schedule(
+      MapperKind.Jq,
+      async () => {
+        ran = true;
+        return "done";
+      },
+      { deadline: Date.now() + 20 }
+    );
+
+    expect(await late).toBeNull();
+    expect(ran).toBe(false);
+    expect(statsFor(MapperKind.Jq)?.skipped).toBe(1);
+
+    gate.release();
+    await Promise.all(blockers);
+  });
+
+  it("skips tasks whose deadline already passed", async () => {
+    const result = await schedule(MapperKind.Ctags, async () => "done", {
+      deadline: Date.now() - 1,
+    });
+    expect(result).toBeNull();
+  });
+
+  it("aborts a running task at its deadline", async () => {
+    const result = await schedule(
+      MapperKind.InProcess,
+      (signal) =>
+        new Promise<string>((resolve) => {
+          signal?.addEventListener("abort", () => resolve("aborted"));
+        }),
+      { deadline: Date.now() + 20 }
+    );
+    expect(result).toBe("aborted");
+  });
+
+  it("drops queued tasks when the caller aborts", async () => {
+    const limit = SCHEDULER.CONCURRENCY[MapperKind.Stream];
+    const gate = createGate();
+    const controller = new AbortController();
+
+    const blockers = Array.from({ length: limit }, () =>
+      schedule(MapperKind.Stream, () => gate.promise)
+    );
+    const queued = schedule(MapperKind.Stream, async () => "done", {
+      signal: controller.signal,
+    });
+    controller.abort();
+
+    expect(await queued).toBeNull();
+    gate.release();
+    await Promise.all(blockers);
+  });
+
+  it("records queue wait time", async () => {
+    const limit = SCHEDULER.CONCURRENCY[MapperKind.Ctags];
+    const gate = createGate();
+
+    const blockers = Array.from({ length: limit }, () =>
+      schedule(MapperKind.Ctags, () => gate.promise)
+    );
+    const waiting = schedule(MapperKind.Ctags, async () => "done");
+
+    setTimeout(gate.release, 30);
+    await Promise.all([...blockers, waiting]);
+
+    const stats = statsFor(MapperKind.Ctags);
+    expect(stats?.started).toBe(limit + 1);
+    expect(stats?.maxWaitMs).toBeGreaterThanOrEqual(20);
+  });
+});
@@ -0,0 +1,67 @@
+import { mkdir, mkdtemp, rm, writeFile } from "node:fs/promises";
+import { tmpdir } from "node:os";
+import { join } from "node:path";
+import { afterEach, beforeEach, describe, expect, it, vi } from "vitest";
+
+import { DEFAULT_SETTINGS } from "../../src/constants.js";
+import { DetailLevel, MapFormat } from "../../src/enums.js";
+import { loadSettings, setSettings } from "../../src/settings.js";
+
+describe("settings", () => {
+  let dir: string;
+
+  beforeEach(async () => {
+    dir = await mkdtemp(join(tmpdir(), "settings-"));
+    await mkdir(join(dir, ".pi"));
+  });
+
+  afterEach(async () => {
+    vi.restoreAllMocks();
+    setSettings(DEFAULT_SETTINGS);
+    await rm(dir, { recursive: true, force: true });
+  });
+
+  async function writeSettings(settings: unknown): Promise<void> {
+    await writeFile(
+      join(dir, ".pi", "read-map.json"),
+      JSON.stringify(settings)
+    );
+  }
+
+  it("loads project settings", async () => {
+    await writeSettings({ mapFormat: "dense", maxMapTokens: 500 });
+    const settings = loadSettings(dir);
+    expect(settings.mapFormat).toBe(MapFormat.Dense);
+    expect(settings.maxMapTokens).toBe(500);
+  });
+
+  it("falls back to the default map format with a warning", async () => {
+    const warn = vi.spyOn(console, "warn").mockImplementation(() => {});
+    await writeSettings({ mapFormat: "compact", maxMapTokens: 500 });
+
+    const settings = loadSettings(dir);
+    expect(settings.mapFormat).toBe(DEFAULT_SETTINGS.mapFormat);
+    expect(settings.maxMapTokens).toBe(500);
+    expect(warn).toHaveBeenCalledWith(expect.stringContaining("mapFormat"));
+  });
+
+  it("drops unknown detail levels from mapper costs", async () => {
+    const warn = vi.spyOn(console, "warn").mockImplementation(() => {});
+    await writeSettings({
+      mapperCosts: {
+        python: { fixedMs: 10, detail: "everything" },
+        go: { detail: DetailLevel.Outline },
+      },
+    });
+
+    const settings = loadSettings(dir);
+    expect(settings.mapperCosts).toEqual({
+      python: { fixedMs: 10 },
+      go: { detail: DetailLevel.Outline },
+    });
+    expect(warn).toHaveBeenCalledTimes(1);
+    expect(warn).toHaveBeenCalledWith(
+      expect.stringContaining("mapperCosts.python.detail")
+    );
+  });
+});
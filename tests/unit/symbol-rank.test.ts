@@ -0,0 +1,55 @@
+import { describe, expect, it } from "vitest";
+
+import type { FileSymbol } from "../../src/types.js";
+
+import { SymbolKind } from "../../src/enums.js";
+import { packSymbols, topLevelRows } from "../../src/packed-map.js";
+import { rankRows } from "../../src/symbol-rank.js";
+
+function symbol(
+  name: string,
+  lines: number,
+  extra: Partial<FileSymbol> = {}
+): FileSymbol {
+  return {
+    name,
+    kind: SymbolKind.Function,
+    startLine: 1,
+    endLine: lines,
+    ...extra,
+  };
+}
+
+function rank(symbols: FileSymbol[]): number[] {
+  const packed = packSymbols(symbols);
+  return Array.from(rankRows(packed, topLevelRows(packed)));
+}
+
+describe("rankRows", () => {
+  it("ranks large, exported, documented symbols with members first", () => {
+    const symbols = [
+      symbol("helper", 3),
+      symbol("Server", 400, {
+        kind: SymbolKind.Class,
+        isExported: true,
+        docstring: "HTTP server",
+        children: [symbol("listen", 20), symbol("close", 10)],
+      }),
+      symbol("parse", 60, { isExported: true }),
+      symbol("tiny", 1),
+    ];
+
+    expect(rank(symbols)).toEqual([1, 2, 0, 3]);
+  });
+
+  it("prefers distinctive names and keeps line order on ties", () => {
+    const symbols = [
+      symbol("get", 10),
+      symbol("get", 10),
+      symbol("load", 10),
+      symbol("save", 10),
+    ];
+
+    expect(rank(symbols)).toEqual([2, 3, 0, 1]);
+  });
+});
@@ -0,0 +1,119 @@
+import { describe, expect, it } from "vitest";
+
+import type { FileMap } from "../../src/types.js";
+
+import { DetailLevel, SymbolKind } from "../../src/enums.js";
+import {
+  formatSymbolMatch,
+  resolveSymbol,
+} from "../../src/symbol-resolve.js";
+
+function createTestMap(): FileMap {
+  return {
+    path: "/path/to/processor.py",
+    totalLines: 500,
+    totalBytes: 20_000,
+    language: "Python",
+    detailLevel: DetailLevel.Full,
+    imports: [],
+    symbols: [
+      {
+        name: "BatchProcessor",
+        kind: SymbolKind.Class,
+        startLine: 10,
+        endLine: 200,
+        children: [
+          {
+            name: "run",
+            kind: SymbolKind.Method,
+            startLine: 20,
+            endLine: 80,
+          },
+          {
+            name: "run_async",
+            kind: SymbolKind.Method,
+            startLine: 82,
+            endLine: 150,
+          },
+        ],
+      },
+      {
+        name: "StreamProcessor",
+        kind: SymbolKind.Class,
+        startLine: 210,
+        endLine: 400,
+        children: [
+          {
+            name: "run",
+            kind: SymbolKind.Method,
+            startLine: 220,
+            endLine: 260,
+          },
+        ],
+      },
+      {
+        name: "main",
+        kind: SymbolKind.Function,
+        startLine: 450,
+        endLine: 450,
+      },
+    ],
+  };
+}
+
+function names(query: string): string[] {
+  return resolveSymbol(createTestMap(), query).map((m) => m.qualifiedName);
+}
+
+describe("resolveSymbol", () => {
+  it("resolves a qualified name exactly", () => {
+    expect(names("BatchProcessor.run")).toEqual(["BatchProcessor.run"]);
+  });
+
+  it("accepts :: and # as separators", () => {
+    expect(names("StreamProcessor::run")).toEqual(["StreamProcessor.run"]);
+    expect(names("StreamProcessor#run")).toEqual(["StreamProcessor.run"]);
+  });
+
+  it("returns every symbol sharing an exact name", () => {
+    expect(names("run")).toEqual([
+      "BatchProcessor.run",
+      "StreamProcessor.run",
+    ]);
+  });
+
+  it("prefers exact matches over partial ones", () => {
+    expect(names("main")).toEqual(["main"]);
+  });
+
+  it("matches case-insensitively", () => {
+    expect(names("batchprocessor")).toEqual(["BatchProcessor"]);
+  });
+
+  it("falls back to substring matches", () => {
+    expect(names("async")).toEqual(["BatchProcessor.run_async"]);
+  });
+
+  it("falls back to fuzzy subsequence matches", () => {
+    expect(names("strmproc")).toEqual(["StreamProcessor"]);
+  });
+
+  it("returns nothing for unknown or empty queries", () => {
+    expect(names("nonexistent_symbol_xyz")).toEqual([]);
+    expect(names("  ")).toEqual([]);
+  });
+});
+
+describe("formatSymbolMatch", () => {
+  it("formats qualified name, kind and line range", () => {
+    const [match] = resolveSymbol(createTestMap(), "BatchProcessor.run");
+    expect(match && formatSymbolMatch(match)).toBe(
+      "BatchProcessor.run (method) [20-80]"
+    );
+  });
+
+  it("formats single-line symbols with one line number", () => {
+    const [match] = resolveSymbol(createTestMap(), "main");
+    expect(match && formatSymbolMatch(match)).toBe("main (function) [450]");
+  });
+});
@@ -0,0 +1,75 @@
+import { describe, expect, it } from "vitest";
+
+import type { FileSymbol } from "../../src/types.js";
+
+import { SymbolKind } from "../../src/enums.js";
+import {
+  packSymbols,
+  topLevelRows,
+  unpackFileMap,
+} from "../../src/packed-map.js";
+import { collapseRows } from "../../src/symbol-runs.js";
+
+function symbol(
+  name: string,
+  line: number,
+  kind: SymbolKind = SymbolKind.Function
+): FileSymbol {
+  return { name, kind, startLine: line, endLine: line + 2 };
+}
+
+function collapse(symbols: FileSymbol[]): FileSymbol[] {
+  const packed = packSymbols(symbols);
+  const collapsed = collapseRows(packed, topLevelRows(packed)) ?? packed;
+  return unpackFileMap(collapsed).symbols;
+}
+
+describe("collapseRows", () => {
+  it("collapses consecutive numbered symbols into a range", () => {
+    const symbols = [
+      symbol("setup", 1),
+      ...Array.from({ length: 6 }, (_, i) =>
+        symbol(`test_case_${i + 1}`, i * 5 + 10)
+      ),
+      symbol("teardown", 100),
+    ];
+
+    expect(collapse(symbols)).toEqual([
+      symbol("setup", 1),
+      {
+        name: "test_case_[1..6]",
+        kind: SymbolKind.Function,
+        startLine: 10,
+        endLine: 37,
+        runLength: 6,
+      },
+      symbol("teardown", 100),
+    ]);
+  });
+
+  it("keeps suffixes and zero padding", () => {
+    const symbols = ["Config08", "Config09", "Config10", "Config11"].map(
+      (name, i) => symbol(`${name}Test`, i * 10 + 1, SymbolKind.Class)
+    );
+
+    expect(collapse(symbols)[0]?.name).toBe("Config[08..11]Test");
+  });
+
+  it("leaves short runs, gaps and mixed kinds alone", () => {
+    const symbols = [
+      symbol("a_1", 1),
+      symbol("a_2", 5),
+      symbol("a_3", 9),
+      symbol("b_1", 20),
+      symbol("b_2", 25),
+      symbol("b_4", 30),
+      symbol("b_5", 35),
+      symbol("c_1", 40),
+      symbol("c_2", 45, SymbolKind.Class),
+      symbol("c_3", 50),
+      symbol("c_4", 55),
+    ];
+
+    expect(collapse(symbols)).toEqual(symbols);
+  });
+});
@@ -0,0 +1,28 @@
+import { describe, expect, it } from "vitest";
+
+import { estimateTokens } from "../../src/tokens.js";
+
+describe("estimateTokens", () => {
+  it("charges words, numbers and punctuation by run", () => {
+    expect(estimateTokens("")).toBe(0);
+    expect(estimateTokens("function")).toBe(1);
+    expect(estimateTokens("BatchProcessor")).toBe(2);
+    expect(estimateTokens("def run")).toBe(2);
+    expect(estimateTokens("12345")).toBe(2);
+    expect(estimateTokens("(x) -> None")).toBe(5);
+  });
+
+  it("costs CJK and symbols more than their byte count suggests", () => {
+    expect(estimateTokens("数据处理器")).toBe(5);
+    expect(estimateTokens("───────")).toBe(4);
+    expect(estimateTokens("│")).toBe(1);
+    expect(estimateTokens("😀")).toBe(2);
+  });
+
+  it("adds up over lines joined by newlines", () => {
+    const lines = ["class Server: [1-40]", "  listen: [3-9]", "", "数据 = ..."];
+    const sum = lines.reduce((total, line) => total + estimateTokens(line), 0);
+
+    expect(estimateTokens(lines.join("\n"))).toBe(sum + lines.length - 1);
+  });
+});
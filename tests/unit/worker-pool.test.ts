@@ -0,0 +1,75 @@
+import { join } from "node:path";
+import { afterAll, describe, expect, it } from "vitest";
+
+import { generateMap } from "../../src/mapper.js";
+import { markdownMapper } from "../../src/mappers/markdown.js";
+import {
+  canUseWorkers,
+  runInWorker,
+  shutdownWorkerPool,
+} from "../../src/worker-pool.js";
+
+const FIXTURES_DIR = join(import.meta.dirname, "../fixtures");
+const LARGE_MARKDOWN = join(FIXTURES_DIR, "large/readme.md");
+
+describe("worker pool", () => {
+  afterAll(async () => {
+    await shutdownWorkerPool();
+  });
+
+  it("only accepts in-process mapper languages", () => {
+    expect(canUseWorkers("python")).toBe(false);
+    expect(canUseWorkers("go")).toBe(false);
+    expect(canUseWorkers("unknown")).toBe(false);
+  });
+
+  it("resolves to null when the signal is already aborted", async () => {
+    const controller = new AbortController();
+    controller.abort();
+
+    const result = await runInWorker(
+      "markdown",
+      LARGE_MARKDOWN,
+      controller.signal
+    );
+    expect(result).toBeNull();
+  });
+
+  describe.runIf(canUseWorkers("markdown"))("with a loadable worker", () => {
+    it("returns the same map as the in-process mapper", async () => {
+      const [inWorker, inProcess] = await Promise.all([
+        runInWorker("markdown", LARGE_MARKDOWN),
+        markdownMapper(LARGE_MARKDOWN),
+      ]);
+
+      expect(inWorker).not.toBeNull();
+      expect(inWorker).toEqual(inProcess);
+    });
+
+    it("generateMap produces the same result with and without workers", async () => {
+      const [pooled, direct] = await Promise.all([
+        generateMap(LARGE_MARKDOWN),
+        generateMap(LARGE_MARKDOWN, { useWorkers: false }),
+      ]);
+
+      expect(pooled?.symbols).toEqual(direct?.symbols);
+    });
+
+    it("resolves to null when aborted while running", async () => {
+      const controller = new AbortController();
+      const pending = runInWorker(
+        "markdown",
+        LARGE_MARKDOWN,
+        controller.signal
+      );
+      controller.abort();
+
+      expect(await pending).toBeNull();
+    });
+
+    it("keeps serving tasks after a worker is recycled", async () => {
+      const result = await runInWorker("markdown", LARGE_MARKDOWN);
+      expect(result?.language).toBe("Markdown");
+    });
+  });
+});